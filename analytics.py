@@ -1,69 +1,279 @@
 """
 Módulo de Análise Inteligente
-Análise ABC, produtos parados, previsões e sugestões
+Análise ABC, produtos parados, clientes (RFM e coortes), previsões e sugestões
 """
 
 from typing import List, Dict, Tuple
 from datetime import datetime, timedelta
 from database import Database
-from utils import Formatador
+from utils import Formatador, Periodo
+from previsao import prever, intervalo_total, completar_dias, matriz_diaria, datas_futuras, indices_dias
+from reposicao import planejar_reposicao, situacao_reposicao
+from regras_alertas import DIAS_METRICAS, montar_metricas, avaliar_regras, limites_alertas
+import numpy as np
 import statistics
+import warnings
+
+# Dias de histórico usados pelas previsões (26 semanas)
+DIAS_HISTORICO_PREVISAO = 182
+
+# Receita acumulada (%) que fecha as classes A e B da análise ABC
+LIMITES_ABC = (80, 95)
+# Coeficiente de variação da demanda diária que fecha as classes X e Y (acima: Z)
+LIMITES_XYZ = (0.5, 1.0)
+# Dias analisados pela ABC/XYZ quando o período não é informado
+DIAS_PADRAO_XYZ = 90
+# Resultados por período (ABC, ABC/XYZ) mantidos em cache
+RESULTADOS_EM_CACHE = 32
+
+# Segmentos RFM, testados em ordem (o primeiro que servir): nome, nota R mínima e máxima,
+# média das notas F e M mínima e máxima (notas de 1 a 5 por quintil)
+SEGMENTOS_RFM = (
+    ('Campeões', 4, 5, 4, 5),
+    ('Leais', 3, 5, 3, 5),
+    ('Novos e promissores', 4, 5, 1, 3),
+    ('Precisam de atenção', 3, 3, 1, 3),
+    ('Em risco', 1, 2, 3, 5),
+    ('Perdidos', 1, 2, 1, 3),
+)
+# Coortes (meses de primeira compra) exibidas na matriz de retenção
+MESES_COORTES = 12
+
+# Elasticidade-preço: reajustes dos últimos DIAS_ELASTICIDADE dias, comparando as vendas dos
+# JANELA_ELASTICIDADE dias antes e depois de cada um
+DIAS_ELASTICIDADE = 365
+JANELA_ELASTICIDADE = 30
+# Elasticidade assumida sem reajustes e seu peso na estimativa (0.15 equivale a um reajuste de 10%
+# com cerca de 30 unidades vendidas em cada janela); limites da estimativa
+ELASTICIDADE_PADRAO = -1.5
+PESO_ELASTICIDADE_PADRAO = 0.15
+LIMITES_ELASTICIDADE = (-5.0, 0.0)
+# Variações de preço avaliadas pela sugestão em lote e ganho mínimo (fração do lucro de 30 dias) para mudar
+PASSOS_PRECO = (-0.10, -0.05, 0.0, 0.05, 0.10)
+GANHO_MINIMO_PRECO = 0.02
+
+# Anomalias gravadas em alertas ao registrar vendas (anomalias.py): ícone, título e ação sugerida
+ANOMALIAS = {
+    'QUANTIDADE_ATIPICA': ('🧾', 'Quantidade atípica', 'Confira se a venda foi registrada corretamente'),
+    'PRECO_ATIPICO': ('🏷️', 'Preço atípico', 'Confira o preço de venda cadastrado'),
+    'QUEDA_VENDAS': ('📉', 'Queda nas vendas', 'Verifique estoque, exposição e preço do produto'),
+}
 
 class Analytics:
     def __init__(self, db: Database):
         self.db = db
+        # Análises por período: (análise, data_inicio, data_fim) -> (versão dos dados, resultado)
+        self.cache_periodos = {}
+    
+    def em_cache(self, chave: Tuple, calcular):
+        """Resultado de `calcular()` guardado por chave enquanto a versão dos dados não mudar"""
+        versao = self.db.get_versao_dados()
+        guardado = self.cache_periodos.get(chave)
+        if guardado and guardado[0] == versao:
+            return guardado[1]
+        
+        resultado = calcular()
+        self.cache_periodos.pop(chave, None)
+        self.cache_periodos[chave] = (versao, resultado)
+        while len(self.cache_periodos) > RESULTADOS_EM_CACHE:
+            self.cache_periodos.pop(next(iter(self.cache_periodos)))
+        return resultado
     
     # ==================== ANÁLISE ABC ====================
     
-    def analise_abc(self) -> Dict:
+    def analise_abc(self, data_inicio: str = None, data_fim: str = None) -> Dict:
         """
-        Análise ABC de produtos baseada em receita
+        Análise ABC de produtos baseada em receita (todos os produtos, qualquer período)
         A: 80% da receita (top produtos)
         B: 15% da receita (produtos intermediários)
         C: 5% da receita (produtos de baixo giro)
+        O resultado fica em cache por período enquanto a versão dos dados não mudar
         """
-        produtos_vendas = self.db.get_produtos_mais_vendidos(1000)
+        def calcular():
+            abc = {'A': [], 'B': [], 'C': [], 'sem_vendas': []}
+            for produto in self.db.curva_abc(data_inicio, data_fim, *LIMITES_ABC):
+                abc['sem_vendas' if produto['classe'] == 'SEM_VENDAS' else produto['classe']].append(produto)
+            return abc
         
-        if not produtos_vendas:
-            return {'A': [], 'B': [], 'C': [], 'sem_vendas': []}
-        
-        # Calcular receita total
-        receita_total = sum(p['receita_total'] for p in produtos_vendas)
-        
-        # Ordenar por receita
-        produtos_ordenados = sorted(
-            produtos_vendas, 
-            key=lambda x: x['receita_total'], 
-            reverse=True
-        )
-        
-        # Classificar
-        abc = {'A': [], 'B': [], 'C': [], 'sem_vendas': []}
-        acumulado = 0
+        return self.em_cache(('abc', data_inicio, data_fim), calcular)
+    
+    def analise_abc_xyz(self, data_inicio: str = None, data_fim: str = None) -> Dict:
+        """
+        Matriz ABC (receita) × XYZ (variabilidade da demanda diária) do período
+        X: coeficiente de variação até 0,5 (demanda estável), Y: até 1,0, Z: acima (irregular)
+        A variabilidade considera todos os dias do período (dias sem venda valem zero)
+        Retorna as 9 células ('AX' ... 'CZ') com totais e a lista de produtos de cada uma
+        """
+        if not data_inicio or not data_fim:
+            data_inicio, data_fim = Periodo.ultimos_n_dias(DIAS_PADRAO_XYZ)
+        # Dias futuros do período não entram na média (seriam zeros)
+        data_fim = min(data_fim, Periodo.hoje())
+        return self.em_cache(('abc_xyz', data_inicio, data_fim),
+                             lambda: self.calcular_abc_xyz(data_inicio, data_fim))
+    
+    def calcular_abc_xyz(self, data_inicio: str, data_fim: str) -> Dict:
+        """Cálculo da analise_abc_xyz (sem cache): curva ABC e demanda diária em uma leitura das vendas"""
+        dias = (datetime.strptime(data_fim, "%Y-%m-%d") - datetime.strptime(data_inicio, "%Y-%m-%d")).days + 1
+        curva = self.db.curva_abc(data_inicio, data_fim, *LIMITES_ABC, demanda_diaria=True)
+        vendidos = [produto for produto in curva if produto['classe'] != 'SEM_VENDAS']
+        
+        # Média e desvio da demanda diária de todos os produtos de uma vez
+        soma = np.array([p['quantidade_vendida'] for p in vendidos], dtype=float)
+        soma_quadrados = np.array([p['soma_quadrados'] for p in vendidos], dtype=float)
+        media = soma / max(dias, 1)
+        desvio = np.sqrt(np.maximum(soma_quadrados / max(dias, 1) - media ** 2, 0))
+        cv = np.divide(desvio, media, out=np.full_like(desvio, np.inf), where=media > 0)
+        xyz = np.where(cv <= LIMITES_XYZ[0], 'X', np.where(cv <= LIMITES_XYZ[1], 'Y', 'Z'))
+        
+        celulas = {
+            a + x: {'classe_abc': a, 'classe_xyz': x, 'quantidade_produtos': 0,
+                    'receita': 0.0, 'participacao': 0.0, 'produtos': []}
+            for a in 'ABC' for x in 'XYZ'
+        }
+        for produto, classe_xyz, media_diaria, desvio_diario, variacao in zip(
+                vendidos, xyz.tolist(), media.tolist(), desvio.tolist(), cv.tolist()):
+            produto['classe_abc'] = produto['classe']
+            produto['classe_xyz'] = classe_xyz
+            produto['classe'] = produto['classe_abc'] + classe_xyz
+            produto['media_diaria'] = media_diaria
+            produto['desvio_diario'] = desvio_diario
+            produto['cv'] = variacao
+            celula = celulas[produto['classe']]
+            celula['produtos'].append(produto)
+            celula['quantidade_produtos'] += 1
+            celula['receita'] += produto['receita_total']
+        
+        receita_total = sum(celula['receita'] for celula in celulas.values())
+        for celula in celulas.values():
+            celula['participacao'] = celula['receita'] / receita_total * 100 if receita_total else 0.0
         
-        for produto in produtos_ordenados:
-            participacao = (produto['receita_total'] / receita_total) * 100
-            acumulado += participacao
-            
-            produto['participacao'] = participacao
-            produto['acumulado'] = acumulado
-            
-            if acumulado <= 80:
-                abc['A'].append(produto)
-            elif acumulado <= 95:
-                abc['B'].append(produto)
-            else:
-                abc['C'].append(produto)
+        return {
+            'data_inicio': data_inicio,
+            'data_fim': data_fim,
+            'dias': dias,
+            'celulas': celulas,
+            'sem_vendas': [produto for produto in curva if produto['classe'] == 'SEM_VENDAS']
+        }
+    
+    # ==================== CLIENTES (RFM E COORTES) ====================
+    
+    def analise_rfm(self) -> Dict:
+        """
+        Segmentação RFM dos clientes com compra: recência (dias desde a última compra),
+        frequência (compras) e valor (receita), cada um com nota de 1 a 5 pelo quintil
+        Lê os totais mantidos em clientes (sem percorrer as vendas); fica em cache no dia
+        enquanto a versão dos dados não mudar
+        """
+        hoje = Periodo.hoje()
+        return self.em_cache(('rfm', hoje), lambda: self.calcular_rfm(hoje))
+    
+    @staticmethod
+    def notas_quintil(valores: np.ndarray) -> np.ndarray:
+        """Nota de 1 a 5 pelo quintil de cada valor (valores iguais recebem a mesma nota)"""
+        if not len(valores):
+            return np.zeros(0, dtype=int)
+        posicao = np.searchsorted(np.sort(valores), valores, side='left')
+        return 1 + (5 * posicao // len(valores)).astype(int)
+    
+    def calcular_rfm(self, hoje: str) -> Dict:
+        """Cálculo da analise_rfm (sem cache)"""
+        clientes = self.db.listar_clientes_compras()
+        referencia = np.datetime64(hoje)
+        ultima = np.array([c['ultima_compra'][:10] for c in clientes], dtype='datetime64[D]')
+        recencia = np.maximum((referencia - ultima).astype(int), 0)
+        frequencia = np.array([c['compras'] for c in clientes], dtype=float)
+        valor = np.array([c['valor_total'] for c in clientes], dtype=float)
+        
+        nota_r = self.notas_quintil(-recencia)
+        nota_f = self.notas_quintil(frequencia)
+        nota_m = self.notas_quintil(valor)
+        nota_fm = (nota_f + nota_m) / 2
+        
+        segmento = np.full(len(clientes), len(SEGMENTOS_RFM) - 1)
+        for indice in range(len(SEGMENTOS_RFM) - 1, -1, -1):
+            _, r_min, r_max, fm_min, fm_max = SEGMENTOS_RFM[indice]
+            faixa = (nota_r >= r_min) & (nota_r <= r_max) & (nota_fm >= fm_min) & (nota_fm <= fm_max)
+            segmento[faixa] = indice
+        
+        receita_total = valor.sum()
+        segmentos = {}
+        for indice, (nome, *_) in enumerate(SEGMENTOS_RFM):
+            grupo = segmento == indice
+            quantidade = int(grupo.sum())
+            segmentos[nome] = {
+                'clientes': quantidade,
+                'receita': float(valor[grupo].sum()),
+                'participacao': float(valor[grupo].sum() / receita_total * 100) if receita_total else 0.0,
+                'recencia_media': float(recencia[grupo].mean()) if quantidade else 0.0,
+                'compras_media': float(frequencia[grupo].mean()) if quantidade else 0.0,
+                'valor_medio': float(valor[grupo].mean()) if quantidade else 0.0
+            }
         
-        # Produtos sem vendas
-        todos_produtos = self.db.listar_produtos()
-        produtos_vendidos_ids = [p['nome'] for p in produtos_vendas]
+        for cliente, r, f, m, dias, indice in zip(clientes, nota_r.tolist(), nota_f.tolist(), nota_m.tolist(),
+                                                  recencia.tolist(), segmento.tolist()):
+            cliente['recencia'] = dias
+            cliente['nota_r'], cliente['nota_f'], cliente['nota_m'] = r, f, m
+            cliente['rfm'] = f"{r}{f}{m}"
+            cliente['segmento'] = SEGMENTOS_RFM[indice][0]
+        clientes.sort(key=lambda c: c['valor_total'], reverse=True)
         
-        for produto in todos_produtos:
-            if produto['nome'] not in produtos_vendidos_ids:
-                abc['sem_vendas'].append(produto)
+        return {
+            'data_referencia': hoje,
+            'total_clientes': len(clientes),
+            'receita_total': float(receita_total),
+            'segmentos': segmentos,
+            'clientes': clientes
+        }
+    
+    def coortes_clientes(self, meses: int = MESES_COORTES) -> Dict:
+        """
+        Retenção das coortes dos últimos `meses` meses (clientes agrupados pelo mês da primeira compra)
+        Para cada coorte: clientes que compraram e receita em cada mês desde a entrada
+        (mês 0 = entrada); meses ainda não ocorridos ficam como None
+        """
+        hoje = Periodo.hoje()
+        return self.em_cache(('coortes', hoje, meses), lambda: self.calcular_coortes(hoje, meses))
+    
+    def calcular_coortes(self, hoje: str, meses: int) -> Dict:
+        """Cálculo da coortes_clientes (sem cache)"""
+        def indice_mes(mes: str) -> int:
+            return int(mes[:4]) * 12 + int(mes[5:7]) - 1
+        
+        atual = indice_mes(hoje)
+        primeira = atual - meses + 1
+        nomes = [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(primeira, atual + 1)]
+        
+        linhas = self.db.get_coortes_clientes(nomes[0])
+        coorte = np.array([indice_mes(l['coorte']) - primeira for l in linhas], dtype=int)
+        distancia = np.array([indice_mes(l['mes']) for l in linhas], dtype=int) - primeira - coorte
+        ativos = np.array([l['clientes'] for l in linhas], dtype=float)
+        receita_mes = np.array([l['receita'] for l in linhas], dtype=float)
+        # Vendas com data futura não entram na matriz
+        validas = (coorte >= 0) & (coorte < meses) & (distancia >= 0) & (distancia < meses)
+        clientes = np.zeros((meses, meses))
+        receita = np.zeros((meses, meses))
+        clientes[coorte[validas], distancia[validas]] = ativos[validas]
+        receita[coorte[validas], distancia[validas]] = receita_mes[validas]
+        
+        tamanho = clientes[:, 0]
+        retencao = np.divide(clientes * 100, tamanho[:, None], out=np.zeros_like(clientes),
+                             where=tamanho[:, None] > 0)
+        # Coorte i só tem meses - i meses observados
+        ocorridos = np.arange(meses)[None, :] < (meses - np.arange(meses))[:, None]
+        
+        def matriz(valores: np.ndarray) -> List[List]:
+            return [[v if ok else None for v, ok in zip(linha, mascara)]
+                    for linha, mascara in zip(valores.tolist(), ocorridos.tolist())]
         
-        return abc
+        return {
+            'coortes': nomes,
+            'tamanho': tamanho.astype(int).tolist(),
+            'clientes': matriz(clientes.astype(int)),
+            'retencao': matriz(np.round(retencao, 1)),
+            'receita': matriz(receita),
+            'receita_por_cliente': np.divide(receita.sum(axis=1), tamanho, out=np.zeros(meses),
+                                             where=tamanho > 0).tolist()
+        }
     
     # ==================== PRODUTOS PARADOS ====================
     
@@ -106,52 +316,28 @@ class Analytics:
     
     # ==================== PREVISÃO DE REPOSIÇÃO ====================
     
-    def previsao_reposicao(self, dias_historico: int = 90) -> List[Dict]:
+    def previsao_reposicao(self, dias_historico: int = None, *, recalcular: bool = False) -> List[Dict]:
         """
-        Prevê quando produtos precisarão ser repostos
+        Plano de reposição lido da tabela plano_reposicao (gerada por reposicao.py),
+        do mais urgente para o menos urgente
+        O plano é refeito quando `recalcular`, quando não existe ou quando foi gerado antes de hoje
+        dias_historico: obsoleto e ignorado (o histórico usado é o de reposicao.py); ainda aceito
+        na posição antiga, como em previsao_reposicao(30), com aviso de obsolescência
         """
-        data_inicio = (datetime.now() - timedelta(days=dias_historico)).strftime("%Y-%m-%d")
-        vendas = self.db.listar_vendas(data_inicio)
-        
-        # Calcular média de vendas por dia
-        vendas_por_produto = {}
-        for venda in vendas:
-            pid = venda['produto_id']
-            if pid not in vendas_por_produto:
-                vendas_por_produto[pid] = []
-            vendas_por_produto[pid].append(venda['quantidade'])
-        
-        previsoes = []
-        produtos = self.db.listar_produtos()
-        
-        for produto in produtos:
-            pid = produto['id']
-            
-            if pid in vendas_por_produto and vendas_por_produto[pid]:
-                # Média diária
-                media_diaria = sum(vendas_por_produto[pid]) / dias_historico
-                
-                if media_diaria > 0:
-                    # Dias até acabar o estoque
-                    dias_restantes = produto['estoque'] / media_diaria
-                    
-                    # Data prevista
-                    data_reposicao = datetime.now() + timedelta(days=dias_restantes)
-                    
-                    # Quantidade sugerida (para 30 dias)
-                    qtd_sugerida = int(media_diaria * 30)
-                    
-                    previsoes.append({
-                        'produto_id': pid,
-                        'produto_nome': produto['nome'],
-                        'estoque_atual': produto['estoque'],
-                        'media_diaria': round(media_diaria, 2),
-                        'dias_restantes': int(dias_restantes),
-                        'data_reposicao': data_reposicao.strftime("%Y-%m-%d"),
-                        'qtd_sugerida': qtd_sugerida,
-                        'urgencia': 'ALTA' if dias_restantes < 7 else 'MÉDIA' if dias_restantes < 15 else 'BAIXA'
-                    })
-        
+        if dias_historico is not None:
+            warnings.warn(
+                "previsao_reposicao: dias_historico está obsoleto e é ignorado; "
+                "o plano usa o histórico definido em reposicao.py",
+                DeprecationWarning, stacklevel=2
+            )
+        
+        gerado_em = self.db.data_plano_reposicao()
+        if recalcular or not gerado_em or gerado_em[:10] < datetime.now().strftime("%Y-%m-%d"):
+            planejar_reposicao(self.db)
+        
+        hoje = datetime.now()
+        previsoes = [situacao_reposicao(item, hoje) for item in self.db.listar_plano_reposicao()
+                     if item['media_diaria_prevista'] > 0]
         return sorted(previsoes, key=lambda x: x['dias_restantes'])
     
     # ==================== SUGESTÃO DE PREÇOS ====================
@@ -159,6 +345,7 @@ class Analytics:
     def sugestao_precos(self, produto_id: int) -> Dict:
         """
         Sugere preços baseados em histórico e concorrência
+        Para o catálogo inteiro use sugestao_precos_lote (uma passada, sem consultas por produto)
         """
         produto = self.db.buscar_produto(produto_id)
         if not produto:
@@ -221,17 +408,184 @@ class Analytics:
             'recomendacao': recomendacao
         }
     
+    def sugestao_precos_lote(self, ids: List[int] = None) -> List[Dict]:
+        """
+        Sugestões de preço de todo o catálogo (ou só dos `ids`), em ordem de prioridade:
+        mudanças com maior ganho estimado no lucro de 30 dias, depois produtos parados (maior
+        valor em estoque primeiro) e por fim os que devem manter o preço
+        A tabela é calculada uma vez por dia e versão dos dados (calcular_precos_lote)
+        """
+        tabela = self.em_cache(('precos_lote', Periodo.hoje()), self.calcular_precos_lote)
+        if ids is None:
+            return tabela
+        selecionados = set(ids)
+        return [linha for linha in tabela if linha['produto_id'] in selecionados]
+    
+    def calcular_precos_lote(self) -> List[Dict]:
+        """
+        Cálculo da sugestao_precos_lote (sem cache): velocidade de 30 dias e estatísticas do
+        histórico de preços em duas consultas agrupadas; para cada produto, lucro de 30 dias
+        previsto em cada passo de PASSOS_PRECO (quantidade × (1 + passo) ^ elasticidade),
+        respeitando a margem mínima de configuracoes
+        """
+        metricas = self.db.metricas_produtos(DIAS_METRICAS)
+        if not metricas:
+            return []
+        historico = {linha['produto_id']: linha for linha in self.db.estatisticas_precos()}
+        elasticidades = self.elasticidades_precos()
+        margem_minima = limites_alertas(self.db)['alerta_margem_minima']
+        
+        preco = np.array([m['preco_venda'] for m in metricas], dtype=float)
+        custo = np.array([m['preco_custo'] for m in metricas], dtype=float)
+        vendido = np.array([m['vendido'] for m in metricas], dtype=float)
+        estoque = np.array([m['estoque'] for m in metricas], dtype=float)
+        estimada = [elasticidades.get(m['id'], (ELASTICIDADE_PADRAO, 0)) for m in metricas]
+        elasticidade = np.array([e for e, _ in estimada])
+        reajustes = np.array([n for _, n in estimada])
+        
+        # Lucro de 30 dias previsto em cada passo (produtos × passos)
+        passos = np.array(PASSOS_PRECO)
+        atual = int(np.flatnonzero(passos == 0)[0])
+        precos = np.round(preco[:, None] * (1 + passos), 2)
+        lucros = (precos - custo[:, None]) * vendido[:, None] * (1 + passos) ** elasticidade[:, None]
+        validos = (precos >= custo[:, None] * (1 + margem_minima / 100)) | (passos == 0)
+        lucros = np.where(validos, lucros, -np.inf)
+        melhor = lucros.argmax(axis=1)
+        ganho = lucros[np.arange(len(metricas)), melhor] - lucros[:, atual]
+        
+        # Muda com elasticidade estimada de reajustes e ganho relevante; parados: maior redução permitida
+        muda = (reajustes > 0) & (ganho > GANHO_MINIMO_PRECO * np.abs(lucros[:, atual]))
+        reducoes = validos & (passos < 0)
+        parado = (vendido == 0) & (estoque > 0) & reducoes.any(axis=1)
+        escolha = np.where(parado, reducoes.argmax(axis=1), np.where(muda, melhor, atual))
+        ganho = np.where(muda & ~parado, ganho, 0.0)
+        
+        tabela = []
+        for i, produto in enumerate(metricas):
+            sugerido = float(precos[i, escolha[i]])
+            estatisticas = historico.get(produto['id'], {})
+            if parado[i]:
+                recomendacao, motivo, grupo = "Reduzir preço", "Sem vendas em 30 dias com estoque parado", 1
+            elif escolha[i] != atual:
+                recomendacao = "Aumentar preço" if sugerido > preco[i] else "Reduzir preço"
+                sensivel = "sensível" if elasticidade[i] < -1 else "pouco sensível"
+                motivo, grupo = f"Demanda {sensivel} ao preço (elasticidade {elasticidade[i]:.2f})", 0
+            elif reajustes[i] == 0:
+                recomendacao, motivo, grupo = "Manter preço", "Sem reajustes recentes para estimar a elasticidade", 2
+            else:
+                recomendacao, motivo, grupo = "Manter preço", "Preço próximo do melhor estimado", 2
+            
+            tabela.append({
+                'produto_id': produto['id'],
+                'produto_nome': produto['nome'],
+                'preco_atual': float(preco[i]),
+                'preco_custo': float(custo[i]),
+                'margem_atual': float(Formatador.calcular_margem(preco[i], custo[i])),
+                'preco_medio_historico': estatisticas.get('preco_medio'),
+                'preco_minimo_historico': estatisticas.get('preco_minimo'),
+                'preco_maximo_historico': estatisticas.get('preco_maximo'),
+                'alteracoes': estatisticas.get('alteracoes', 0),
+                'ultima_alteracao': estatisticas.get('ultima_alteracao'),
+                'vendas_30d': float(vendido[i]),
+                'velocidade_diaria': float(vendido[i]) / DIAS_METRICAS,
+                'estoque': float(estoque[i]),
+                'elasticidade': float(elasticidade[i]),
+                'reajustes_elasticidade': int(reajustes[i]),
+                'preco_sugerido': sugerido,
+                'variacao_percentual': float(sugerido / preco[i] - 1) * 100 if preco[i] else 0.0,
+                'margem_sugerida': float(Formatador.calcular_margem(sugerido, custo[i])),
+                'lucro_30d_atual': float(lucros[i, atual]),
+                'lucro_30d_estimado': float(lucros[i, escolha[i]]),
+                'ganho_estimado': float(ganho[i]),
+                'recomendacao': recomendacao,
+                'motivo': motivo,
+                'grupo': grupo
+            })
+        
+        tabela.sort(key=lambda linha: (linha['grupo'], -linha['ganho_estimado'],
+                                       -linha['preco_custo'] * linha['estoque']))
+        for linha in tabela:
+            del linha['grupo']
+        return tabela
+    
+    def elasticidades_precos(self) -> Dict[int, Tuple[float, int]]:
+        """
+        Elasticidade-preço de cada produto com reajuste de preço nos últimos DIAS_ELASTICIDADE dias
+        Para cada reajuste: log da razão entre as quantidades vendidas nos JANELA_ELASTICIDADE dias
+        depois e antes (descontada a mesma razão de todo o catálogo, que absorve sazonalidade)
+        contra o log da razão dos preços; mínimos quadrados ponderados pela origem, puxados para
+        ELASTICIDADE_PADRAO com peso PESO_ELASTICIDADE_PADRAO e limitados a LIMITES_ELASTICIDADE
+        Retorna produto_id -> (elasticidade, reajustes usados)
+        """
+        inicio, fim = self.janela_historico(DIAS_ELASTICIDADE + JANELA_ELASTICIDADE)
+        reajustes = self.db.listar_reajustes(inicio, fim)
+        if not reajustes:
+            return {}
+        
+        vendas = self.db.get_vendas_por_dia(inicio, fim, por_produto=True)
+        com_reajuste = {r['produto_id'] for r in reajustes}
+        produtos, quantidades = matriz_diaria((v for v in vendas if v['produto_id'] in com_reajuste),
+                                              'produto_id', 'quantidade', inicio, fim)
+        por_dia = {}
+        for venda in vendas:
+            por_dia[venda['dia']] = por_dia.get(venda['dia'], 0) + venda['quantidade']
+        total = completar_dias(por_dia, inicio, fim)
+        
+        # Somas acumuladas: vendas dos dias [a, b) = acumulado[b] - acumulado[a]; a última linha
+        # (zeros) fica para produtos sem venda no período
+        dias = len(total)
+        acumulado = np.zeros((len(produtos) + 1, dias + 1))
+        acumulado[:-1, 1:] = quantidades.cumsum(axis=1)
+        acumulado_total = np.concatenate(([0.0], total.cumsum()))
+        
+        # Janelas antes e depois do dia do reajuste (o próprio dia fica de fora)
+        indices = indices_dias(inicio, fim)
+        linhas = {produto_id: i for i, produto_id in enumerate(produtos)}
+        dia = np.array([indices.get(r['data_alteracao'][:10], -1) for r in reajustes])
+        usados = (dia >= JANELA_ELASTICIDADE) & (dia + JANELA_ELASTICIDADE < dias)
+        if not usados.any():
+            return {}
+        reajustes = [r for r, usado in zip(reajustes, usados.tolist()) if usado]
+        dia = dia[usados]
+        linha = np.array([linhas.get(r['produto_id'], len(produtos)) for r in reajustes])
+        antes, depois = dia - JANELA_ELASTICIDADE, dia + 1 + JANELA_ELASTICIDADE
+        
+        quantidade_antes = acumulado[linha, dia] - acumulado[linha, antes]
+        quantidade_depois = acumulado[linha, depois] - acumulado[linha, dia + 1]
+        catalogo = np.log((acumulado_total[depois] - acumulado_total[dia + 1] + 0.5)
+                          / (acumulado_total[dia] - acumulado_total[antes] + 0.5))
+        x = np.log(np.array([r['preco_novo'] / r['preco_anterior'] for r in reajustes]))
+        y = np.log((quantidade_depois + 0.5) / (quantidade_antes + 0.5)) - catalogo
+        
+        # Peso de cada reajuste: inverso da variância de y, tratando as vendas como Poisson
+        peso = 1 / (1 / (quantidade_antes + 0.5) + 1 / (quantidade_depois + 0.5))
+        
+        ids, grupo = np.unique([r['produto_id'] for r in reajustes], return_inverse=True)
+        soma_xy = np.bincount(grupo, peso * x * y)
+        soma_xx = np.bincount(grupo, peso * x * x)
+        contagem = np.bincount(grupo)
+        elasticidade = np.clip((soma_xy + PESO_ELASTICIDADE_PADRAO * ELASTICIDADE_PADRAO)
+                               / (soma_xx + PESO_ELASTICIDADE_PADRAO), *LIMITES_ELASTICIDADE)
+        return {int(p): (float(e), int(n)) for p, e, n in zip(ids, elasticidade, contagem)}
+    
     # ==================== PREVISÃO DE VENDAS ====================
     
-    def previsao_vendas(self, dias_futuro: int = 30) -> Dict:
+    def janela_historico(self, dias_historico: int) -> Tuple[str, str]:
+        """Período de histórico das previsões: termina ontem (o dia atual ainda está incompleto)"""
+        fim = datetime.now() - timedelta(days=1)
+        inicio = fim - timedelta(days=dias_historico - 1)
+        return inicio.strftime("%Y-%m-%d"), fim.strftime("%Y-%m-%d")
+    
+    def previsao_vendas(self, dias_futuro: int = 30, dias_historico: int = DIAS_HISTORICO_PREVISAO) -> Dict:
         """
-        Prevê vendas futuras baseado em média móvel simples
+        Prevê receita e lucro dos próximos dias por suavização exponencial (previsao.py):
+        dias sem venda contam como zero e o modelo (simples, Holt ou Holt-Winters semanal)
+        é escolhido pelo erro nas últimas semanas do histórico
         """
-        # Buscar vendas dos últimos 90 dias
-        data_inicio = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-        vendas = self.db.listar_vendas(data_inicio)
+        inicio, fim = self.janela_historico(dias_historico)
+        dias = self.db.get_vendas_por_dia(inicio, fim)
         
-        if not vendas:
+        if not dias:
             return {
                 'previsao_receita': 0,
                 'previsao_lucro': 0,
@@ -239,132 +593,121 @@ class Analytics:
                 'tendencia': 'Sem dados'
             }
         
-        # Agrupar por dia
-        vendas_por_dia = {}
-        for venda in vendas:
-            data = venda['data_venda'][:10]
-            if data not in vendas_por_dia:
-                vendas_por_dia[data] = {'receita': 0, 'lucro': 0}
-            
-            vendas_por_dia[data]['receita'] += venda['valor_total']
-            
-            # Calcular lucro
-            produto = self.db.buscar_produto(venda['produto_id'])
-            if produto:
-                lucro = (venda['preco_unitario'] - produto['preco_custo']) * venda['quantidade']
-                vendas_por_dia[data]['lucro'] += lucro
-        
-        # Calcular médias
-        receitas = [v['receita'] for v in vendas_por_dia.values()]
-        lucros = [v['lucro'] for v in vendas_por_dia.values()]
-        
-        media_receita_dia = statistics.mean(receitas)
-        media_lucro_dia = statistics.mean(lucros)
-        
-        # Previsão para período futuro
-        previsao_receita = media_receita_dia * dias_futuro
-        previsao_lucro = media_lucro_dia * dias_futuro
-        
-        # Calcular tendência
-        primeira_metade = receitas[:len(receitas)//2]
-        segunda_metade = receitas[len(receitas)//2:]
+        receita = completar_dias({d['dia']: d['receita'] for d in dias}, inicio, fim)
+        lucro = completar_dias({d['dia']: d['lucro_bruto'] for d in dias}, inicio, fim)
+        resultado = prever(np.vstack([receita, lucro]), dias_futuro)
+        minimo, maximo = intervalo_total(resultado)
+        previsao_receita, previsao_lucro = resultado['previsao'].sum(axis=1)
         
-        media_primeira = statistics.mean(primeira_metade)
-        media_segunda = statistics.mean(segunda_metade)
-        
-        if media_segunda > media_primeira * 1.1:
+        # Tendência: média diária prevista contra a dos últimos dias observados
+        media_recente = receita[-dias_futuro:].mean()
+        media_prevista = previsao_receita / dias_futuro
+        if media_prevista > media_recente * 1.1:
             tendencia = "CRESCIMENTO"
-        elif media_segunda < media_primeira * 0.9:
+        elif media_prevista < media_recente * 0.9:
             tendencia = "QUEDA"
         else:
             tendencia = "ESTÁVEL"
         
-        # Confiança (baseado na variabilidade)
-        desvio = statistics.stdev(receitas) if len(receitas) > 1 else 0
-        cv = (desvio / media_receita_dia * 100) if media_receita_dia > 0 else 100
-        confianca = max(0, 100 - cv)
+        # Confiança: erro médio na validação em relação à receita média diária
+        media_receita_dia = receita.mean()
+        erro = resultado['erro_validacao'][0]
+        if media_receita_dia > 0 and not np.isnan(erro):
+            confianca = max(0.0, 100 - erro / media_receita_dia * 100)
+        else:
+            confianca = 0.0
         
         return {
-            'previsao_receita': previsao_receita,
-            'previsao_lucro': previsao_lucro,
-            'media_diaria': media_receita_dia,
-            'confianca': confianca,
+            'previsao_receita': float(previsao_receita),
+            'previsao_lucro': float(previsao_lucro),
+            'receita_minima': float(minimo[0]),
+            'receita_maxima': float(maximo[0]),
+            'lucro_minimo': float(minimo[1]),
+            'lucro_maximo': float(maximo[1]),
+            'media_diaria': float(media_receita_dia),
+            'confianca': float(confianca),
             'tendencia': tendencia,
-            'dias_analisados': len(vendas_por_dia),
-            'dias_previsao': dias_futuro
+            'modelo': str(resultado['modelo'][0]),
+            'dias_analisados': len(receita),
+            'dias_previsao': dias_futuro,
+            'previsao_diaria': [
+                {'dia': dia, 'receita': float(valor), 'inferior': float(inferior), 'superior': float(superior)}
+                for dia, valor, inferior, superior in zip(
+                    datas_futuras(fim, dias_futuro), resultado['previsao'][0],
+                    resultado['inferior'][0], resultado['superior'][0]
+                )
+            ]
+        }
+    
+    def previsao_produtos(self, dias_futuro: int = 30,
+                          dias_historico: int = DIAS_HISTORICO_PREVISAO) -> Dict[int, Dict]:
+        """
+        Previsão da quantidade vendida de todos os produtos de uma vez (uma consulta e um
+        ajuste vetorizado), por id. Produtos sem venda no histórico ficam de fora
+        """
+        inicio, fim = self.janela_historico(dias_historico)
+        linhas = self.db.get_vendas_por_dia(inicio, fim, por_produto=True)
+        produtos, quantidades = matriz_diaria(linhas, 'produto_id', 'quantidade', inicio, fim)
+        
+        if not produtos:
+            return {}
+        
+        resultado = prever(quantidades, dias_futuro)
+        minimo, maximo = intervalo_total(resultado)
+        total = resultado['previsao'].sum(axis=1)
+        
+        return {
+            produto_id: {
+                'produto_id': produto_id,
+                'previsao_quantidade': float(total[i]),
+                'minimo': float(minimo[i]),
+                'maximo': float(maximo[i]),
+                'media_diaria': float(quantidades[i].mean()),
+                'media_diaria_prevista': float(total[i] / dias_futuro),
+                'modelo': str(resultado['modelo'][i]),
+                'erro_validacao': float(resultado['erro_validacao'][i])
+            }
+            for i, produto_id in enumerate(produtos)
         }
     
     # ==================== ALERTAS INTELIGENTES ====================
     
+    def metricas_produtos(self) -> Dict[str, np.ndarray]:
+        """
+        Métricas por produto das regras de alerta (regras_alertas.py): vendido em 30 dias, estoque,
+        margem, dias de cobertura... calculadas uma vez por versão dos dados e plano de reposição
+        """
+        chave = ('metricas_produtos', Periodo.hoje(), self.db.data_plano_reposicao())
+        return self.em_cache(chave, lambda: montar_metricas(self.db.metricas_produtos(DIAS_METRICAS)))
+    
+    def alertas_regras(self) -> List[Dict]:
+        """Alertas das regras declarativas, com os limites atuais de configuracoes"""
+        return avaliar_regras(self.metricas_produtos(), limites_alertas(self.db))
+    
     def gerar_alertas_inteligentes(self) -> List[Dict]:
         """
         Gera alertas inteligentes baseados em análises
+        As anomalias detectadas ao registrar vendas vêm prontas da tabela alertas (com 'id');
+        as demais, das regras de regras_alertas.py avaliadas de uma vez sobre as métricas por produto
         """
         alertas = []
         
-        # 1. Produtos vendendo muito (aumentar estoque)
-        vendas_30dias = self.db.listar_vendas(
-            (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        )
-        
-        vendas_por_produto = {}
-        for venda in vendas_30dias:
-            pid = venda['produto_id']
-            if pid not in vendas_por_produto:
-                vendas_por_produto[pid] = 0
-            vendas_por_produto[pid] += venda['quantidade']
-        
-        produtos = self.db.listar_produtos()
-        for produto in produtos:
-            qtd_vendida = vendas_por_produto.get(produto['id'], 0)
-            
-            # Alta demanda
-            if qtd_vendida > produto['estoque'] * 2:
-                alertas.append({
-                    'tipo': 'ALTA_DEMANDA',
-                    'prioridade': 'ALTA',
-                    'icone': '🔥',
-                    'titulo': f'Alta demanda: {produto["nome"]}',
-                    'mensagem': f'Vendeu {qtd_vendida} unidades em 30 dias. Estoque atual: {produto["estoque"]}',
-                    'acao': 'Considere aumentar estoque'
-                })
-            
-            # Produto parado
-            elif qtd_vendida == 0 and produto['estoque'] > 10:
-                alertas.append({
-                    'tipo': 'PRODUTO_PARADO',
-                    'prioridade': 'MÉDIA',
-                    'icone': '⚠️',
-                    'titulo': f'Produto parado: {produto["nome"]}',
-                    'mensagem': f'Sem vendas em 30 dias. Estoque: {produto["estoque"]}',
-                    'acao': 'Considere promoção ou redução de preço'
-                })
-        
-        # 2. Produtos perto de acabar
-        previsoes = self.previsao_reposicao(30)
-        for prev in previsoes[:5]:  # Top 5 mais urgentes
-            if prev['urgencia'] == 'ALTA':
-                alertas.append({
-                    'tipo': 'ESTOQUE_ACABANDO',
-                    'prioridade': 'ALTA',
-                    'icone': '📦',
-                    'titulo': f'Repor: {prev["produto_nome"]}',
-                    'mensagem': f'Estoque acaba em {prev["dias_restantes"]} dias',
-                    'acao': f'Comprar {prev["qtd_sugerida"]} unidades'
-                })
-        
-        # 3. Margem baixa
-        for produto in produtos:
-            margem = Formatador.calcular_margem(produto['preco_venda'], produto['preco_custo'])
-            if margem < 15:
-                alertas.append({
-                    'tipo': 'MARGEM_BAIXA',
-                    'prioridade': 'MÉDIA',
-                    'icone': '💰',
-                    'titulo': f'Margem baixa: {produto["nome"]}',
-                    'mensagem': f'Margem atual: {margem:.1f}%',
-                    'acao': 'Revisar preço de venda'
-                })
+        # 0. Anomalias nas vendas (não lidas)
+        for anomalia in self.db.listar_alertas():
+            icone, titulo, acao = ANOMALIAS.get(anomalia['tipo'], ('⚠️', anomalia['tipo'], ''))
+            ocorrencias = f" ({anomalia['ocorrencias']} ocorrências)" if anomalia['ocorrencias'] > 1 else ""
+            alertas.append({
+                'id': anomalia['id'],
+                'tipo': anomalia['tipo'],
+                'prioridade': anomalia['prioridade'],
+                'icone': icone,
+                'titulo': f'{titulo}: {anomalia["produto_nome"]}',
+                'mensagem': f"{anomalia['mensagem']}{ocorrencias} • {Formatador.formatar_data_hora(anomalia['data_alerta'])}",
+                'acao': acao
+            })
+        
+        # 1. Regras sobre as métricas por produto (demanda, reposição, estoque, parados e margem)
+        alertas += self.alertas_regras()
         
         return sorted(alertas, key=lambda x: {'ALTA': 0, 'MÉDIA': 1, 'BAIXA': 2}[x['prioridade']])
     
@@ -0,0 +1,155 @@
+"""
+Detecção de anomalias nas vendas, atualizada a cada venda registrada
+Cada produto guarda médias e variâncias móveis exponenciais (EWMA) da quantidade e do preço
+por venda e das unidades vendidas por dia; uma venda nova é comparada com esse estado e o
+atualiza em O(1). Dias encerrados (somados aos dias sem venda seguintes) muito abaixo do
+esperado pela média e variância diárias indicam queda súbita
+
+O estado é um dict com as colunas de estatisticas_vendas (database.py)
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import math
+
+# Peso da observação nova nas médias por venda e por dia
+ALFA_VENDA = 0.05
+ALFA_DIA = 0.1
+# Desvios-padrão acima (quantidade, preço) ou abaixo (dia encerrado) da média que geram alerta
+Z_ALERTA = 4.0
+# Variação mínima do preço em relação à média (preços fixos têm variância zero)
+VARIACAO_PRECO_MINIMA = 0.10
+# Quantidade mínima, em múltiplos da média por venda, para alertar quantidade atípica
+FATOR_QUANTIDADE_MINIMO = 4
+# Observações mínimas antes de alertar
+MIN_VENDAS = 30
+MIN_DIAS = 14
+# Dias sem venda considerados de uma vez ao fechar (além disso a média já está perto de zero)
+MAX_DIAS_FECHADOS = 365
+
+
+def atualizar_ewma(media: float, variancia: float, valor: float, alfa: float) -> Tuple[float, float]:
+    """Média e variância exponenciais após uma observação (forma incremental)"""
+    diferenca = valor - media
+    incremento = alfa * diferenca
+    return media + incremento, (1 - alfa) * (variancia + diferenca * incremento)
+
+
+def desvio_acima(valor: float, media: float, variancia: float) -> float:
+    """Quantos desvios-padrão `valor` está acima da média (inf se a variância for zero e houver diferença)"""
+    diferenca = valor - media
+    if variancia > 0:
+        return diferenca / math.sqrt(variancia)
+    return 0.0 if abs(diferenca) < 1e-9 else math.copysign(math.inf, diferenca)
+
+
+def dias_entre(inicio: str, fim: str) -> int:
+    """Dias de `inicio` a `fim` (AAAA-MM-DD)"""
+    return (datetime.strptime(fim[:10], "%Y-%m-%d") - datetime.strptime(inicio[:10], "%Y-%m-%d")).days
+
+
+def queda_improvavel(quantidade: float, dias: int, media_diaria: float, variancia_diaria: float) -> bool:
+    """
+    Se vender `quantidade` unidades em `dias` dias está mais de Z_ALERTA desvios abaixo do esperado
+    (média e variância diárias somadas nos dias, como se fossem independentes)
+    """
+    if dias <= 0 or media_diaria <= 0:
+        return False
+    return desvio_acima(quantidade, media_diaria * dias, variancia_diaria * dias) < -Z_ALERTA
+
+
+def estado_inicial(produto_id: int, dia: str) -> Dict:
+    """Estado de um produto ainda sem estatísticas"""
+    return {
+        'produto_id': produto_id, 'vendas': 0, 'media_quantidade': 0.0, 'variancia_quantidade': 0.0,
+        'media_preco': 0.0, 'variancia_preco': 0.0, 'dia': dia, 'quantidade_dia': 0.0,
+        'dias': 0, 'media_diaria': 0.0, 'variancia_diaria': 0.0
+    }
+
+
+def fechar_dias(estado: Dict, dia: str) -> List[Dict]:
+    """
+    Encerra o dia guardado no estado (e os dias sem venda até `dia`, exclusive) nas médias diárias
+    Retorna o alerta de queda se as vendas desses dias ficaram muito abaixo do esperado
+    """
+    alertas = []
+    dias_vazios = min(max(dias_entre(estado['dia'], dia) - 1, 0), MAX_DIAS_FECHADOS)
+    media, variancia = estado['media_diaria'], estado['variancia_diaria']
+
+    if estado['dias'] >= MIN_DIAS and queda_improvavel(estado['quantidade_dia'], 1 + dias_vazios, media, variancia):
+        alertas.append(alerta_queda(estado['dia'], estado['quantidade_dia'], media, dias_vazios))
+
+    media, variancia = atualizar_ewma(media, variancia, estado['quantidade_dia'], ALFA_DIA)
+    for _ in range(dias_vazios):
+        media, variancia = atualizar_ewma(media, variancia, 0.0, ALFA_DIA)
+
+    estado.update(media_diaria=media, variancia_diaria=variancia,
+                  dias=estado['dias'] + 1 + dias_vazios, dia=dia, quantidade_dia=0.0)
+    return alertas
+
+
+def avaliar_venda(estado: Optional[Dict], produto_id: int, quantidade: float,
+                  preco: float, data_venda: str) -> Tuple[Dict, List[Dict]]:
+    """
+    Compara a venda com as médias do produto e atualiza o estado
+    Retorna o novo estado e os alertas (dicts com tipo, prioridade, valor, esperado e mensagem)
+    """
+    dia = str(data_venda)[:10]
+    estado = dict(estado) if estado else estado_inicial(produto_id, dia)
+    alertas = []
+
+    if dia > estado['dia']:
+        alertas += fechar_dias(estado, dia)
+
+    if estado['vendas'] >= MIN_VENDAS:
+        z = desvio_acima(quantidade, estado['media_quantidade'], estado['variancia_quantidade'])
+        if z > Z_ALERTA and quantidade >= FATOR_QUANTIDADE_MINIMO * estado['media_quantidade']:
+            alertas.append({
+                'tipo': 'QUANTIDADE_ATIPICA',
+                'prioridade': 'MÉDIA',
+                'valor': quantidade,
+                'esperado': estado['media_quantidade'],
+                'mensagem': (f"Venda de {quantidade:g} unidades; o normal é "
+                             f"{estado['media_quantidade']:.1f} ± {math.sqrt(estado['variancia_quantidade']):.1f} por venda")
+            })
+
+        variacao = abs(preco - estado['media_preco']) / estado['media_preco'] if estado['media_preco'] else 0.0
+        z = desvio_acima(preco, estado['media_preco'], estado['variancia_preco'])
+        if variacao >= VARIACAO_PRECO_MINIMA and abs(z) > Z_ALERTA:
+            alertas.append({
+                'tipo': 'PRECO_ATIPICO',
+                'prioridade': 'MÉDIA',
+                'valor': preco,
+                'esperado': estado['media_preco'],
+                'mensagem': (f"Vendido a R$ {preco:.2f}, {variacao * 100:.0f}% "
+                             f"{'acima' if preco > estado['media_preco'] else 'abaixo'} "
+                             f"da média recente (R$ {estado['media_preco']:.2f})")
+            })
+
+    # Primeira venda: a média começa no valor observado
+    if estado['vendas'] == 0:
+        estado.update(media_quantidade=float(quantidade), media_preco=float(preco))
+    else:
+        estado['media_quantidade'], estado['variancia_quantidade'] = atualizar_ewma(
+            estado['media_quantidade'], estado['variancia_quantidade'], quantidade, ALFA_VENDA)
+        estado['media_preco'], estado['variancia_preco'] = atualizar_ewma(
+            estado['media_preco'], estado['variancia_preco'], preco, ALFA_VENDA)
+    estado['vendas'] += 1
+    estado['quantidade_dia'] += quantidade
+    return estado, alertas
+
+
+def alerta_queda(dia: str, quantidade: float, media: float, dias_sem_venda: int = 0) -> Dict:
+    """Alerta de queda súbita: `quantidade` vendida em `dia`, seguida de `dias_sem_venda` dias sem venda"""
+    data = datetime.strptime(dia[:10], "%Y-%m-%d").strftime("%d/%m/%Y")
+    mensagem = f"Vendeu {quantidade:g} unidades em {data}"
+    if dias_sem_venda:
+        mensagem += f" e ficou {dias_sem_venda} dias sem vender"
+    mensagem += f"; a média é {media:.1f} por dia"
+    return {
+        'tipo': 'QUEDA_VENDAS',
+        'prioridade': 'ALTA',
+        'valor': quantidade,
+        'esperado': media,
+        'mensagem': mensagem
+    }
@@ -4,10 +4,14 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
+import os
 import plotly.graph_objects as go
 import plotly.express as px
-from database import Database
+from database import Database, BackupInvalido
+import instrumentacao
 from utils import Formatador, Periodo
+from series_temporais import reduzir_linha, reduzir_serie
+from regras_alertas import REGRAS, LIMITES_ALERTAS, limites_alertas
 
 # Configuração da página
 st.set_page_config(
@@ -22,6 +26,10 @@ st.set_page_config(
     }
 )
 
+# Largura aproximada (px) dos gráficos Plotly, usada para reduzir as séries temporais
+LARGURA_GRAFICO_COLUNA = 600
+LARGURA_GRAFICO_INTEIRO = 1200
+
 # Funções com cache para otimização
 @st.cache_data(ttl=60)  # Cache de 60 segundos
 def get_produtos_cached():
@@ -47,6 +55,101 @@ def get_categorias_cached():
     db = Database()
     return db.listar_categorias()
 
+def get_analytics():
+    """Analytics da sessão (guarda o cache da análise ABC); recriado se o banco for reaberto"""
+    analytics = st.session_state.get('analytics')
+    if analytics is None or analytics.db is not st.session_state.db:
+        from analytics import Analytics
+        analytics = st.session_state.analytics = Analytics(st.session_state.db)
+    return analytics
+
+# ==================== EXPORTAÇÕES EM SEGUNDO PLANO ====================
+
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_PDF = "application/pdf"
+
+@st.cache_resource
+def get_fila_exportacao():
+    """Fila de exportações compartilhada por todas as sessões"""
+    from tarefas import FilaExportacao
+    return FilaExportacao()
+
+def enviar_exportacao_vendas(formato, data_inicio, data_fim):
+    """Agenda a exportação das vendas do período (Excel ou PDF) e retorna a chave da tarefa"""
+    db = st.session_state.db
+    total = db.get_resumo_vendas(data_inicio, data_fim)['total_vendas']
+    
+    if formato == 'excel':
+        def gerar(caminho, progresso):
+            from exportadores import ExportadorExcel
+            from tarefas import com_progresso
+            vendas = com_progresso(db.iterar_vendas(data_inicio, data_fim), total, progresso)
+            ExportadorExcel.gerar_relatorio_vendas(vendas, caminho)
+        nome, mime = f"vendas_{data_inicio}_{data_fim}.xlsx", MIME_EXCEL
+    else:
+        def gerar(caminho, progresso):
+            import relatorio_pdf
+            relatorio_pdf.gerar_relatorio_vendas(db, caminho, data_inicio, data_fim, progresso=progresso)
+        nome, mime = f"vendas_{data_inicio}_{data_fim}.pdf", MIME_PDF
+    
+    tarefa = get_fila_exportacao().enviar(
+        f"vendas_{formato}", (data_inicio, data_fim), db.get_versao_dados(), nome, mime, gerar
+    )
+    return tarefa.chave
+
+def enviar_recibo_venda(venda_id):
+    """Agenda o PDF de recibo de uma venda e retorna a chave da tarefa"""
+    db = st.session_state.db
+    
+    def gerar(caminho, progresso):
+        from exportadores import ExportadorPDF
+        venda = db.buscar_venda(venda_id)
+        if not venda:
+            raise ValueError("Venda não encontrada")
+        ExportadorPDF.gerar_recibo_venda(venda, caminho)
+    
+    tarefa = get_fila_exportacao().enviar(
+        "recibo_venda", (venda_id,), db.get_versao_dados(), f"recibo_venda_{venda_id}.pdf", MIME_PDF, gerar
+    )
+    return tarefa.chave
+
+def mostrar_exportacao(chave_sessao):
+    """Mostra o progresso da exportação guardada na sessão e, quando pronta, o botão de download"""
+    chave = st.session_state.get(chave_sessao)
+    if not chave:
+        return
+    
+    fila = get_fila_exportacao()
+    tarefa = fila.obter(chave)
+    if tarefa is None:
+        return
+    ativa_ao_iniciar = tarefa.ativa
+    
+    def painel():
+        tarefa = fila.obter(chave)
+        if tarefa is None:
+            return
+        if tarefa.ativa:
+            st.progress(tarefa.progresso, text=f"⏳ Gerando {tarefa.nome_arquivo}... {tarefa.progresso:.0%}")
+        elif ativa_ao_iniciar:
+            # Terminou: recarrega a página para parar a atualização automática
+            st.rerun()
+        elif tarefa.pronta:
+            with open(tarefa.caminho, 'rb') as arquivo:
+                st.download_button(
+                    f"⬇️ Baixar {tarefa.nome_arquivo}",
+                    data=arquivo,
+                    file_name=tarefa.nome_arquivo,
+                    mime=tarefa.mime,
+                    key=f"baixar_{chave_sessao}",
+                    use_container_width=True
+                )
+        elif tarefa.erro:
+            st.error(f"❌ Erro ao exportar: {tarefa.erro}")
+    
+    # Enquanto a tarefa roda, o painel se atualiza sozinho a cada segundo
+    st.fragment(painel, run_every=1 if ativa_ao_iniciar else None)()
+
 # CSS Customizado
 st.markdown("""
 <style>
@@ -196,33 +299,8 @@ def show_dashboard():
         data_inicio_str = Periodo.inicio_ano()
         data_fim_str = Periodo.fim_ano()
     
-    # KPIs
-    resumo = st.session_state.db.get_resumo_vendas(data_inicio_str, data_fim_str)
-    financeiro = st.session_state.db.get_lucro_periodo(data_inicio_str, data_fim_str)
-    
-    # Calcular valor investido em estoque (preço de custo) - incluir todos os produtos
-    produtos = st.session_state.db.listar_produtos(apenas_ativos=False)
-    valor_estoque = sum(p['preco_custo'] * p['estoque'] for p in produtos)
-    
-    # Calcular margem média
-    margem_media = 0
-    if produtos:
-        margens = [(p['preco_venda'] - p['preco_custo']) / p['preco_venda'] * 100 
-                   for p in produtos if p['preco_venda'] > 0]
-        margem_media = sum(margens) / len(margens) if margens else 0
-    
-    # Consolidar KPIs
-    kpis = {
-        'receita_total': resumo['receita_total'],
-        'lucro_liquido': financeiro['lucro_liquido'],
-        'total_vendas': resumo['total_vendas'],
-        'ticket_medio': resumo['ticket_medio'],
-        'lucro_bruto': financeiro['lucro_bruto'],
-        'despesas': financeiro['despesas'],
-        'valor_estoque': valor_estoque,
-        'total_despesas': financeiro['despesas'],
-        'margem_media': margem_media
-    }
+    # KPIs (todos os cards em uma única consulta)
+    kpis = st.session_state.db.kpis_periodo(data_inicio_str, data_fim_str)
     
     # Cards de KPIs
     col1, col2, col3, col4 = st.columns(4)
@@ -261,27 +339,27 @@ def show_dashboard():
         st.metric(
             label="� Capital em Estoque",
             value=Formatador.formatar_moeda(kpis['valor_estoque']),
-            help="Valor total investido em produtos (preço de custo × quantidade)"
+            help="Valor investido nos produtos ativos (preço de custo × quantidade)"
         )
     
     with col2:
         st.metric(
             label="💸 Despesas",
-            value=Formatador.formatar_moeda(kpis['total_despesas'])
+            value=Formatador.formatar_moeda(kpis['despesas'])
         )
     
     with col3:
         st.metric(
             label="📊 Margem Média",
-            value=Formatador.formatar_porcentagem(kpis['margem_media'])
+            value=Formatador.formatar_porcentagem(kpis['margem']),
+            help="Lucro bruto sobre a receita do período"
         )
     
     with col4:
-        alertas = st.session_state.db.produtos_estoque_baixo()
         st.metric(
             label="⚠️ Alertas de Estoque",
-            value=str(len(alertas)),
-            delta="Crítico" if len(alertas) > 0 else "OK",
+            value=str(kpis['estoque_baixo']),
+            delta="Crítico" if kpis['estoque_baixo'] > 0 else "OK",
             delta_color="inverse"
         )
     
@@ -303,16 +381,16 @@ def show_dashboard():
                     vendas_por_data[data] = 0
                 vendas_por_data[data] += venda['valor_total']
             
-            # Criar gráfico
-            df_vendas = pd.DataFrame(list(vendas_por_data.items()), columns=['Data', 'Receita'])
-            df_vendas['Data'] = pd.to_datetime(df_vendas['Data'])
+            # Reduzir a série (LTTB) para a largura do gráfico
+            serie = reduzir_linha(vendas_por_data, LARGURA_GRAFICO_COLUNA)
+            df_vendas = pd.DataFrame({'Data': pd.to_datetime(serie['datas']), 'Receita': serie['valores']})
             
             fig = px.line(
                 df_vendas,
                 x='Data',
                 y='Receita',
                 title='',
-                markers=True
+                markers=len(df_vendas) <= 60
             )
             fig.update_traces(line_color='#667eea', line_width=3)
             fig.update_layout(
@@ -735,17 +813,23 @@ def show_vendas():
                                 st.warning("⚠️ Clique novamente para confirmar")
                         
                         if st.button("📄 PDF", key=f"pdf_venda_{venda['id']}", use_container_width=True):
-                            st.info("🚧 Exportação em desenvolvimento")
+                            st.session_state[f"recibo_{venda['id']}"] = enviar_recibo_venda(venda['id'])
+                        mostrar_exportacao(f"recibo_{venda['id']}")
             
-            # Exportação em massa
+            # Exportação em massa (todas as vendas do período, geradas em segundo plano)
             st.markdown("---")
+            periodo_exportacao = (data_inicio.strftime("%Y-%m-%d"), data_fim.strftime("%Y-%m-%d"))
+            if busca_cliente:
+                st.caption("ℹ️ As exportações incluem todas as vendas do período; o filtro de cliente não é aplicado")
             col1, col2, col3 = st.columns(3)
             with col1:
-                if st.button("📊 Exportar para Excel", use_container_width=True):
-                    st.info("🚧 Em desenvolvimento")
+                if st.button("📊 Exportar período para Excel", use_container_width=True):
+                    st.session_state.exportacao_vendas_excel = enviar_exportacao_vendas('excel', *periodo_exportacao)
+                mostrar_exportacao('exportacao_vendas_excel')
             with col2:
-                if st.button("📄 Exportar para PDF", use_container_width=True):
-                    st.info("🚧 Em desenvolvimento")
+                if st.button("📄 Exportar período para PDF", use_container_width=True):
+                    st.session_state.exportacao_vendas_pdf = enviar_exportacao_vendas('pdf', *periodo_exportacao)
+                mostrar_exportacao('exportacao_vendas_pdf')
         else:
             st.info("📭 Nenhuma venda encontrada no período")
     
@@ -840,14 +924,13 @@ def show_vendas():
                 vendas_por_dia[dia]['quantidade'] += venda['quantidade']
                 vendas_por_dia[dia]['valor'] += venda['valor_total']
             
-            df_dias = pd.DataFrame([
-                {'Data': dia, 'Quantidade': info['quantidade'], 'Receita': info['valor']}
-                for dia, info in vendas_por_dia.items()
-            ])
-            df_dias['Data'] = pd.to_datetime(df_dias['Data'])
-            df_dias = df_dias.sort_values('Data')
+            serie = reduzir_linha(
+                {dia: info['valor'] for dia, info in vendas_por_dia.items()},
+                LARGURA_GRAFICO_INTEIRO
+            )
+            df_dias = pd.DataFrame({'Data': pd.to_datetime(serie['datas']), 'Receita': serie['valores']})
             
-            fig = px.line(df_dias, x='Data', y='Receita', markers=True, title='Receita Diária')
+            fig = px.line(df_dias, x='Data', y='Receita', markers=len(df_dias) <= 60, title='Receita Diária')
             fig.update_traces(line_color='#667eea', line_width=3)
             st.plotly_chart(fig, use_container_width=True)
             
@@ -971,19 +1054,13 @@ def show_financeiro():
                         dados_por_dia[dia] = {'receita': 0, 'despesas': 0}
                     dados_por_dia[dia]['despesas'] += despesa['valor']
                 
-                df_evolucao = pd.DataFrame([
-                    {
-                        'Data': dia,
-                        'Receita': info['receita'],
-                        'Despesas': info['despesas'],
-                        'Lucro': info['receita'] - info['despesas']
-                    }
-                    for dia, info in dados_por_dia.items()
-                ])
-                df_evolucao['Data'] = pd.to_datetime(df_evolucao['Data'])
-                df_evolucao = df_evolucao.sort_values('Data')
+                serie = reduzir_linha(
+                    {dia: info['receita'] - info['despesas'] for dia, info in dados_por_dia.items()},
+                    LARGURA_GRAFICO_COLUNA
+                )
+                df_evolucao = pd.DataFrame({'Data': pd.to_datetime(serie['datas']), 'Lucro': serie['valores']})
                 
-                fig = px.line(df_evolucao, x='Data', y='Lucro', markers=True, title='')
+                fig = px.line(df_evolucao, x='Data', y='Lucro', markers=len(df_evolucao) <= 60, title='')
                 fig.update_traces(line_color='#667eea', line_width=3)
                 st.plotly_chart(fig, use_container_width=True)
             else:
@@ -1117,9 +1194,21 @@ def show_financeiro():
             df_fluxo = df_fluxo.sort_values('Data')
             df_fluxo['Saldo Acumulado'] = df_fluxo['Saldo'].cumsum()
             
-            # Gráfico de barras - Entradas vs Saídas
+            # Gráfico de barras - Entradas vs Saídas (agregadas por dia/semana/mês)
+            inicio_str = data_inicio.strftime("%Y-%m-%d")
+            fim_str = data_fim.strftime("%Y-%m-%d")
+            entradas = reduzir_serie({d: i['entradas'] for d, i in fluxo.items()},
+                                     LARGURA_GRAFICO_INTEIRO, inicio_str, fim_str)
+            saidas = reduzir_serie({d: i['saidas'] for d, i in fluxo.items()},
+                                   LARGURA_GRAFICO_INTEIRO, inicio_str, fim_str)
+            df_barras = pd.DataFrame({
+                'Data': pd.to_datetime(entradas['chaves']),
+                'Entradas': entradas['valores'],
+                'Saídas': saidas['valores']
+            })
+            
             fig = px.bar(
-                df_fluxo,
+                df_barras,
                 x='Data',
                 y=['Entradas', 'Saídas'],
                 title='Fluxo de Caixa - Entradas vs Saídas',
@@ -1128,13 +1217,19 @@ def show_financeiro():
             )
             st.plotly_chart(fig, use_container_width=True)
             
-            # Gráfico de linha - Saldo Acumulado
+            # Gráfico de linha - Saldo Acumulado (reduzido com LTTB)
+            saldo = reduzir_linha(
+                dict(zip(df_fluxo['Data'].dt.strftime("%Y-%m-%d"), df_fluxo['Saldo Acumulado'])),
+                LARGURA_GRAFICO_INTEIRO
+            )
+            df_saldo = pd.DataFrame({'Data': pd.to_datetime(saldo['datas']), 'Saldo Acumulado': saldo['valores']})
+            
             fig2 = px.line(
-                df_fluxo,
+                df_saldo,
                 x='Data',
                 y='Saldo Acumulado',
                 title='Saldo Acumulado',
-                markers=True
+                markers=len(df_saldo) <= 60
             )
             fig2.update_traces(line_color='#667eea', line_width=3)
             st.plotly_chart(fig2, use_container_width=True)
@@ -1164,24 +1259,31 @@ def show_relatorios():
     st.title("📊 Relatórios Avançados")
     
     # Tabs
-    tab1, tab2, tab3 = st.tabs(["📈 Análise ABC", "🎯 Metas", "⚠️ Alertas Inteligentes"])
+    tab1, tab_clientes, tab2, tab3 = st.tabs(["📈 Análise ABC", "👥 Clientes", "🎯 Metas", "⚠️ Alertas Inteligentes"])
     
     with tab1:
         st.subheader("📈 Análise ABC de Produtos")
-        st.info("🚧 Relatório em desenvolvimento - Classificação ABC por faturamento")
         
-        produtos = st.session_state.db.get_produtos_mais_vendidos(50)
+        periodo = st.selectbox(
+            "Período",
+            ["Todo o período", "Este Mês", "Este Ano", "Últimos 90 dias"],
+            key="periodo_abc"
+        )
+        if periodo == "Este Mês":
+            data_inicio, data_fim = Periodo.inicio_mes(), Periodo.fim_mes()
+        elif periodo == "Este Ano":
+            data_inicio, data_fim = Periodo.inicio_ano(), Periodo.fim_ano()
+        elif periodo == "Últimos 90 dias":
+            data_inicio, data_fim = Periodo.ultimos_n_dias(90)
+        else:
+            data_inicio, data_fim = None, None
         
-        if produtos:
-            df = pd.DataFrame(produtos)
-            df = df.sort_values('receita_total', ascending=False)
-            df['percentual'] = (df['receita_total'] / df['receita_total'].sum() * 100).round(2)
-            df['acumulado'] = df['percentual'].cumsum()
-            
-            # Classificar
-            df['classe'] = df['acumulado'].apply(
-                lambda x: 'A' if x <= 80 else ('B' if x <= 95 else 'C')
-            )
+        # Todos os produtos classificados em uma consulta (em cache por período e versão dos dados)
+        abc = get_analytics().analise_abc(data_inicio, data_fim)
+        vendidos = abc['A'] + abc['B'] + abc['C']
+        
+        if vendidos:
+            df = pd.DataFrame(vendidos)
             
             # Mostrar gráfico
             fig = px.bar(
@@ -1199,13 +1301,94 @@ def show_relatorios():
             resumo = df.groupby('classe').agg({
                 'nome': 'count',
                 'receita_total': 'sum',
-                'percentual': 'sum'
+                'participacao': 'sum'
             }).round(2)
             resumo.columns = ['Quantidade', 'Receita Total', 'Participação %']
             st.dataframe(resumo, use_container_width=True)
+            
+            if abc['sem_vendas']:
+                st.caption(f"📭 {len(abc['sem_vendas'])} produtos ativos sem vendas no período")
+            
+            # Matriz ABC × XYZ (variabilidade da demanda diária) para planejar compras
+            st.subheader("🧮 Matriz ABC × XYZ")
+            matriz = get_analytics().analise_abc_xyz(data_inicio, data_fim)
+            st.caption(
+                f"{Formatador.formatar_data(matriz['data_inicio'], '%Y-%m-%d')} a "
+                f"{Formatador.formatar_data(matriz['data_fim'], '%Y-%m-%d')} • "
+                "X: demanda estável • Y: variável • Z: irregular"
+            )
+            celulas = matriz['celulas']
+            st.dataframe(pd.DataFrame(
+                [[f"{celulas[a + x]['quantidade_produtos']} ({celulas[a + x]['participacao']:.1f}%)"
+                  for x in 'XYZ'] for a in 'ABC'],
+                index=['A', 'B', 'C'], columns=['X', 'Y', 'Z']
+            ), use_container_width=True)
+            
+            celula = st.selectbox("Produtos da célula", list(celulas), key="celula_abc_xyz")
+            produtos_celula = celulas[celula]['produtos']
+            if produtos_celula:
+                df_celula = pd.DataFrame(produtos_celula[:200])[
+                    ['nome', 'receita_total', 'quantidade_vendida', 'media_diaria', 'cv', 'dias_com_venda']
+                ].round(2)
+                df_celula.columns = ['Produto', 'Receita', 'Quantidade', 'Média/dia', 'CV', 'Dias c/ venda']
+                st.dataframe(df_celula, use_container_width=True, hide_index=True)
+            else:
+                st.info("Nenhum produto nesta célula")
         else:
             st.info("📭 Sem dados para análise ABC")
     
+    with tab_clientes:
+        st.subheader("👥 Segmentação RFM de Clientes")
+        
+        # Totais mantidos por cliente e coortes em cache enquanto a versão dos dados não mudar
+        rfm = get_analytics().analise_rfm()
+        
+        if rfm['total_clientes']:
+            segmentos = pd.DataFrame([
+                {'Segmento': nome, 'Clientes': s['clientes'], 'Receita': s['receita'],
+                 'Participação %': s['participacao'], 'Recência média (dias)': s['recencia_media'],
+                 'Compras média': s['compras_media'], 'Valor médio': s['valor_medio']}
+                for nome, s in rfm['segmentos'].items()
+            ]).round(2)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = px.pie(segmentos, values='Receita', names='Segmento', title='Receita por Segmento', hole=0.4)
+                st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                fig = px.bar(segmentos, x='Segmento', y='Clientes', title='Clientes por Segmento')
+                st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(segmentos, use_container_width=True, hide_index=True)
+            
+            segmento = st.selectbox("Clientes do segmento", list(rfm['segmentos']), key="segmento_rfm")
+            clientes_segmento = [c for c in rfm['clientes'] if c['segmento'] == segmento][:200]
+            if clientes_segmento:
+                df_clientes = pd.DataFrame(clientes_segmento)[
+                    ['nome', 'rfm', 'recencia', 'compras', 'valor_total', 'coorte']
+                ].round(2)
+                df_clientes.columns = ['Cliente', 'RFM', 'Recência (dias)', 'Compras', 'Valor', 'Coorte']
+                st.dataframe(df_clientes, use_container_width=True, hide_index=True)
+            else:
+                st.info("Nenhum cliente neste segmento")
+            
+            # Retenção por coorte: % dos clientes de cada mês de entrada que compraram nos meses seguintes
+            st.subheader("📅 Retenção por Coorte")
+            coortes = get_analytics().coortes_clientes()
+            retencao = pd.DataFrame(
+                coortes['retencao'], index=coortes['coortes'],
+                columns=[f"M{i}" for i in range(len(coortes['coortes']))]
+            )
+            retencao.insert(0, 'Clientes', coortes['tamanho'])
+            fig = px.imshow(
+                retencao.drop(columns='Clientes').astype(float),
+                text_auto='.0f', color_continuous_scale='Greens', aspect='auto',
+                labels={'x': 'Meses desde a primeira compra', 'y': 'Coorte', 'color': 'Retenção %'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(retencao, use_container_width=True)
+        else:
+            st.info("📭 Nenhuma venda com cliente informado")
+    
     with tab2:
         st.subheader("🎯 Metas de Vendas")
         
@@ -1266,32 +1449,49 @@ def show_relatorios():
     with tab3:
         st.subheader("⚠️ Alertas Inteligentes")
         
-        # Produtos com estoque baixo
-        alertas_estoque = st.session_state.db.produtos_estoque_baixo()
-        if alertas_estoque:
-            st.warning(f"📦 **{len(alertas_estoque)} produtos** com estoque abaixo do mínimo!")
-            with st.expander("Ver Produtos"):
-                for p in alertas_estoque:
-                    st.write(f"- **{p['nome']}**: {p['estoque']} unidades (mín: {p['estoque_minimo']})")
-        
-        # Produtos sem venda recente (últimos 30 dias)
-        st.markdown("---")
-        vendas_recentes = st.session_state.db.listar_vendas(
-            (pd.Timestamp.now() - pd.Timedelta(days=30)).strftime("%Y-%m-%d"),
-            pd.Timestamp.now().strftime("%Y-%m-%d")
-        )
-        produtos_vendidos = set(v['produto_id'] for v in vendas_recentes)
-        todos_produtos = st.session_state.db.listar_produtos()
-        produtos_parados = [p for p in todos_produtos if p['id'] not in produtos_vendidos and p.get('ativo', True)]
+        # Anomalias detectadas ao registrar as vendas (leitura indexada dos alertas não lidos)
+        anomalias = st.session_state.db.listar_alertas()
+        if anomalias:
+            st.error(f"🚨 **{len(anomalias)} anomalias** nas vendas")
+            df_anomalias = pd.DataFrame(anomalias)[['data_alerta', 'produto_nome', 'tipo', 'mensagem', 'ocorrencias']]
+            df_anomalias['data_alerta'] = Formatador.formatar_data_hora_lote(df_anomalias['data_alerta'])
+            df_anomalias.columns = ['Data', 'Produto', 'Tipo', 'Detalhe', 'Ocorrências']
+            st.dataframe(df_anomalias, use_container_width=True, hide_index=True)
+            if st.button("✓ Marcar anomalias como lidas", key="marcar_anomalias_lidas"):
+                st.session_state.db.marcar_alertas_lidos([a['id'] for a in anomalias])
+                st.rerun()
+            st.markdown("---")
         
-        if produtos_parados:
-            st.warning(f"🔴 **{len(produtos_parados)} produtos** sem vendas nos últimos 30 dias!")
-            with st.expander("Ver Produtos Parados"):
-                for p in produtos_parados:
-                    valor_parado = p['preco_custo'] * p['estoque']
-                    st.write(f"- **{p['nome']}**: {p['estoque']} un. | Valor parado: {Formatador.formatar_moeda(valor_parado)}")
+        # Regras sobre as métricas por produto (as mesmas dos alertas do desktop, limites em configuracoes)
+        alertas_regras = get_analytics().alertas_regras()
+        if alertas_regras:
+            por_tipo = {}
+            for alerta in alertas_regras:
+                por_tipo.setdefault(alerta['tipo'], []).append(alerta)
+            for regra in REGRAS:
+                itens = por_tipo.get(regra['tipo'])
+                if not itens:
+                    continue
+                aviso = st.error if regra['prioridade'] == 'ALTA' else st.warning
+                aviso(f"{regra['icone']} **{len(itens)} produtos**: {regra['titulo'].lower()}")
+                with st.expander(f"Ver Produtos ({regra['titulo']})"):
+                    df_regra = pd.DataFrame(itens)[['produto_nome', 'mensagem', 'acao']]
+                    df_regra.columns = ['Produto', 'Situação', 'Ação sugerida']
+                    st.dataframe(df_regra, use_container_width=True, hide_index=True)
         else:
-            st.success("✅ Todos os produtos estão vendendo!")
+            st.success("✅ Estoque, demanda e margens dentro dos limites!")
+        
+        with st.expander("⚙️ Limites dos alertas"):
+            with st.form("form_limites_alertas"):
+                limites = limites_alertas(st.session_state.db)
+                novos_limites = {
+                    chave: st.number_input(f"{descricao} ({unidade})", min_value=0.0, value=limites[chave])
+                    for chave, (descricao, unidade, _) in LIMITES_ALERTAS.items()
+                }
+                if st.form_submit_button("💾 Salvar limites", use_container_width=True):
+                    for chave, valor in novos_limites.items():
+                        st.session_state.db.set_config(chave, f"{valor:g}")
+                    st.rerun()
         
         # Despesas altas
         st.markdown("---")
@@ -1380,47 +1580,67 @@ def show_configuracoes():
             st.write("### 📥 Fazer Backup")
             st.info("Baixe uma cópia do seu banco de dados para seu computador")
             
-            if st.button("� Baixar Backup Agora", use_container_width=True, type="primary"):
+            if st.button("💾 Gerar Backup Agora", use_container_width=True, type="primary"):
                 try:
-                    from datetime import datetime
-                    
-                    # Nome do arquivo de backup
-                    backup_name = f"backup_dgtech_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                    
-                    # Ler o banco de dados atual
-                    with open("gestao_vendas.db", "rb") as file:
-                        st.download_button(
-                            label="💾 Clique aqui para baixar",
-                            data=file,
-                            file_name=backup_name,
-                            mime="application/octet-stream",
-                            use_container_width=True,
-                            type="primary"
-                        )
-                    st.success("✅ Backup pronto para download!")
+                    barra = st.progress(0.0, text="Copiando banco de dados...")
+                    st.session_state.db.criar_backup(
+                        progresso=lambda fracao: barra.progress(fracao, text=f"Copiando banco de dados... {fracao:.0%}")
+                    )
+                    barra.empty()
+                    st.success("✅ Backup criado!")
                 except Exception as e:
                     st.error(f"❌ Erro ao criar backup: {str(e)}")
+            
+            # Backups guardados (os mais antigos são apagados automaticamente)
+            backups = st.session_state.db.listar_backups()
+            if backups:
+                opcoes = {
+                    f"{b['data'][8:10]}/{b['data'][5:7]}/{b['data'][:4]} {b['data'][11:19]} - {b['tamanho'] / 1024:.0f} KB": b
+                    for b in backups
+                }
+                escolhido = opcoes[st.selectbox("Backups disponíveis", list(opcoes))]
+                
+                # Arquivo enviado a partir do disco, sem ler o banco em uso
+                with open(escolhido['caminho'], "rb") as arquivo:
+                    st.download_button(
+                        label="📥 Baixar backup selecionado",
+                        data=arquivo,
+                        file_name=f"backup_{escolhido['arquivo']}",
+                        mime="application/gzip",
+                        use_container_width=True
+                    )
         
         with col2:
             st.write("### 📤 Restaurar Backup")
             st.info("Envie um arquivo de backup para restaurar seus dados")
             
             uploaded_file = st.file_uploader(
-                "Selecione o arquivo de backup (.db)", 
-                type=['db'],
+                "Selecione o arquivo de backup (.db ou .db.gz)", 
+                type=['db', 'gz'],
                 help="Envie um arquivo de backup anterior"
             )
             
             if uploaded_file is not None:
-                if st.button("� Restaurar Dados", use_container_width=True, type="secondary"):
+                if st.button("♻️ Restaurar Dados", use_container_width=True, type="secondary"):
                     try:
-                        # Salvar o arquivo enviado
-                        with open("gestao_vendas.db", "wb") as f:
-                            f.write(uploaded_file.getbuffer())
+                        with st.spinner("Validando e restaurando backup..."):
+                            # O arquivo é copiado para disco em partes, validado e só então substitui o banco
+                            resultado = st.session_state.db.restaurar_backup(uploaded_file)
+                        
+                        # Descartar dados em cache e reabrir o banco restaurado
+                        st.cache_data.clear()
+                        st.session_state.db = Database()
                         
                         st.success("✅ Backup restaurado com sucesso!")
-                        st.info("🔄 Recarregando aplicação...")
-                        st.rerun()
+                        if resultado['migrado']:
+                            st.info("🔧 O backup era de uma versão anterior e foi atualizado")
+                        if resultado['particoes_ausentes']:
+                            anos = ', '.join(str(ano) for ano in resultado['particoes_ausentes'])
+                            st.warning(f"⚠️ Anos arquivados sem arquivo na pasta 'arquivo': {anos}")
+                        if resultado['backup_anterior']:
+                            st.caption(f"Os dados anteriores foram guardados em {os.path.basename(resultado['backup_anterior'])}")
+                    except BackupInvalido as e:
+                        st.error(f"❌ Backup inválido: {str(e)}")
                     except Exception as e:
                         st.error(f"❌ Erro ao restaurar backup: {str(e)}")
         
@@ -1453,8 +1673,58 @@ def show_configuracoes():
         except Exception as e:
             st.error(f"❌ Erro ao obter informações: {str(e)}")
 
+def mostrar_diagnostico():
+    """Painel oculto (?diagnostico=1): consultas que mais pesam e consultas lentas"""
+    st.markdown("---")
+    st.subheader("🩺 Diagnóstico de consultas")
+    
+    config = instrumentacao.configuracao()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        ativa = st.toggle("Instrumentação ativa", value=config['ativa'])
+    with col2:
+        explicar = st.checkbox("Capturar EXPLAIN QUERY PLAN", value=config['explicar'])
+    with col3:
+        limite = st.number_input("Lenta acima de (ms)", min_value=1.0,
+                                 value=float(config['limite_lenta_ms']), step=10.0)
+    with col4:
+        if st.button("🗑️ Limpar medições"):
+            instrumentacao.limpar()
+    
+    if ativa:
+        instrumentacao.ativar(limite_lenta_ms=limite, explicar=explicar)
+    else:
+        instrumentacao.desativar()
+    
+    principais = instrumentacao.principais(25)
+    if not principais:
+        st.info("Nenhuma consulta medida ainda. Ative a instrumentação e navegue pelas páginas.")
+        return
+    
+    rotulos = instrumentacao.rotulos_faixas()
+    df = pd.DataFrame([{
+        'Total (ms)': round(item['total_ms'], 1),
+        'Média (ms)': round(item['media_ms'], 1),
+        'Máx (ms)': round(item['max_ms'], 1),
+        'Execuções': item['execucoes'],
+        'Linhas': item['linhas'],
+        'Origem': ', '.join(item['origens']),
+        'Método': ', '.join(item['metodos']),
+        'Parâmetros': item['parametros'],
+        'Histograma': ', '.join(f"{r}: {q}" for r, q in zip(rotulos, item['faixas']) if q),
+        'Consulta': item['consulta'],
+        'Plano': ' | '.join(item['plano'] or [])
+    } for item in principais])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    lentas = instrumentacao.consultas_lentas(20)
+    if lentas:
+        st.markdown("**Consultas lentas (mais recentes primeiro)**")
+        st.dataframe(pd.DataFrame(lentas), use_container_width=True, hide_index=True)
+
 # Roteamento de páginas
 page = st.session_state.page
+instrumentacao.definir_origem(page)
 
 if "Dashboard" in page:
     show_dashboard()
@@ -1468,3 +1738,6 @@ elif "Relatórios" in page:
     show_relatorios()
 elif "Configurações" in page:
     show_configuracoes()
+
+if st.query_params.get("diagnostico") == "1":
+    mostrar_diagnostico()
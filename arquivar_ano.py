@@ -0,0 +1,46 @@
+"""
+Script para arquivar um ano encerrado de vendas e despesas
+Os registros vão para arquivo/<banco>_AAAA.db e continuam visíveis nos relatórios por período
+
+Uso:
+    python arquivar_ano.py 2023 [--banco gestao_vendas.db]
+    python arquivar_ano.py --listar
+"""
+
+import argparse
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquiva vendas e despesas de um ano encerrado")
+    parser.add_argument('ano', type=int, nargs='?', help="Ano a arquivar (ex.: 2023)")
+    parser.add_argument('--banco', default="gestao_vendas.db", help="Arquivo do banco de dados")
+    parser.add_argument('--listar', action='store_true', help="Lista os anos já arquivados")
+    args = parser.parse_args()
+
+    db = Database(args.banco)
+
+    if args.ano is not None:
+        try:
+            resultado = db.arquivar_ano(args.ano)
+        except ValueError as e:
+            parser.error(str(e))
+
+        print(f"✅ Ano {resultado['ano']} arquivado em {resultado['arquivo']}")
+        print(f"   Vendas movidas: {resultado['vendas_movidas']}")
+        print(f"   Despesas movidas: {resultado['despesas_movidas']}")
+    elif not args.listar:
+        parser.error("informe o ano a arquivar ou --listar")
+
+    if args.listar:
+        particoes = db.listar_particoes()
+        if not particoes:
+            print("Nenhum ano arquivado")
+        for particao in particoes:
+            print(f"{particao['ano']}  {particao['arquivo']:<40} "
+                  f"{particao['total_vendas']:>10} vendas  {particao['total_despesas']:>8} despesas")
+
+
+if __name__ == "__main__":
+    main()
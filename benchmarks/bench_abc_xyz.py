@@ -0,0 +1,84 @@
+"""
+Benchmark da matriz ABC/XYZ (Analytics.analise_abc_xyz)
+Gera um catálogo grande e compara o cálculo vetorizado (estatísticas diárias agregadas no banco)
+com o cálculo direto em Python sobre as vendas (série diária completa de cada produto)
+
+Uso:
+    python benchmarks/bench_abc_xyz.py [--vendas 500000] [--produtos 50000]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from analytics import Analytics, LIMITES_XYZ
+from gerador_dados import gerar_dados
+
+
+def xyz_python(db: Database, data_inicio: str, data_fim: str) -> dict:
+    """Cálculo direto: lista as vendas e monta a série diária (com zeros) de cada produto"""
+    dias = (datetime.strptime(data_fim, "%Y-%m-%d") - datetime.strptime(data_inicio, "%Y-%m-%d")).days + 1
+    series = {}
+    for venda in db.listar_vendas(data_inicio, data_fim):
+        serie = series.setdefault(venda['produto_id'], {})
+        dia = venda['data_venda'][:10]
+        serie[dia] = serie.get(dia, 0) + venda['quantidade']
+
+    classes = {}
+    for produto_id, serie in series.items():
+        valores = list(serie.values()) + [0] * (dias - len(serie))
+        media = statistics.fmean(valores)
+        cv = statistics.pstdev(valores) / media if media else float('inf')
+        classes[produto_id] = 'X' if cv <= LIMITES_XYZ[0] else 'Y' if cv <= LIMITES_XYZ[1] else 'Z'
+    return classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da matriz ABC/XYZ")
+    parser.add_argument('--vendas', type=int, default=500000)
+    parser.add_argument('--produtos', type=int, default=50000)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        gerar_dados(db, args.vendas, num_produtos=args.produtos, anos=1)
+        hoje = datetime.now()
+        print(f"{args.vendas} vendas, {args.produtos} produtos")
+
+        for dias in (90, 365):
+            periodo = ((hoje - timedelta(days=dias - 1)).strftime("%Y-%m-%d"), hoje.strftime("%Y-%m-%d"))
+            analytics = Analytics(db)
+            inicio = time.perf_counter()
+            matriz = analytics.analise_abc_xyz(*periodo)
+            vetorizado = (time.perf_counter() - inicio) * 1000
+            inicio = time.perf_counter()
+            analytics.analise_abc_xyz(*periodo)
+            em_cache = (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            esperado = xyz_python(db, *periodo)
+            direto = (time.perf_counter() - inicio) * 1000
+
+            obtido = {p['produto_id']: p['classe_xyz']
+                      for celula in matriz['celulas'].values() for p in celula['produtos']}
+            iguais = sum(obtido.get(p) == classe for p, classe in esperado.items())
+
+            print(f"  {dias} dias: vetorizado {vetorizado:.0f} ms (em cache {em_cache:.2f} ms), "
+                  f"Python direto {direto:.0f} ms; XYZ igual em {iguais}/{len(esperado)} produtos")
+            print("    " + "  ".join(f"{nome}:{celula['quantidade_produtos']}"
+                                    for nome, celula in matriz['celulas'].items()))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
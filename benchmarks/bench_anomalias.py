@@ -0,0 +1,97 @@
+"""
+Benchmark da detecção de anomalias (anomalias.py)
+Reprocessa as vendas dos últimos meses de um banco gerado, na ordem em que ocorreram, com
+vendas de quantidade muito acima do normal injetadas ao acaso: mede o custo por venda,
+quantas anomalias injetadas foram detectadas e quantos alertas surgiram nas vendas normais.
+Mede também registrar_venda com o monitoramento e a leitura dos alertas abertos
+
+Uso:
+    python benchmarks/bench_anomalias.py [--vendas 100000] [--dias 120] [--injetadas 50]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from anomalias import avaliar_venda, MIN_VENDAS
+from gerador_dados import gerar_dados
+
+# Dias iniciais do reprocessamento em que as estatísticas ainda estão se formando (alertas ignorados)
+DIAS_AQUECIMENTO = 45
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da detecção de anomalias")
+    parser.add_argument('--vendas', type=int, default=100000)
+    parser.add_argument('--dias', type=int, default=120)
+    parser.add_argument('--injetadas', type=int, default=50)
+    parser.add_argument('--fator', type=float, default=8, help="Quantidade injetada em múltiplos da média")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        gerar_dados(db, args.vendas)
+        inicio = (datetime.now() - timedelta(days=args.dias)).strftime("%Y-%m-%d")
+        aquecimento = (datetime.now() - timedelta(days=args.dias - DIAS_AQUECIMENTO)).strftime("%Y-%m-%d")
+        vendas = sorted(db.iterar_vendas(inicio), key=lambda v: v['data_venda'])
+
+        rnd = random.Random(42)
+        candidatas = [i for i, venda in enumerate(vendas) if venda['data_venda'] >= aquecimento]
+        injetadas = set(rnd.sample(candidatas, min(args.injetadas, len(candidatas))))
+
+        estados = {}
+        alertas_normais = Counter()
+        detectadas = elegiveis = 0
+        inicio_execucao = time.perf_counter()
+        for i, venda in enumerate(vendas):
+            produto_id = venda['produto_id']
+            estado = estados.get(produto_id)
+            quantidade = venda['quantidade']
+            if i in injetadas:
+                quantidade = max(round(args.fator * (estado['media_quantidade'] if estado else 1)), 2)
+                elegiveis += bool(estado and estado['vendas'] >= MIN_VENDAS)
+            estados[produto_id], alertas = avaliar_venda(estado, produto_id, quantidade,
+                                                         venda['preco_unitario'], venda['data_venda'])
+            if venda['data_venda'] < aquecimento:
+                continue
+            tipos = [alerta['tipo'] for alerta in alertas]
+            if i in injetadas:
+                detectadas += 'QUANTIDADE_ATIPICA' in tipos
+                tipos = [tipo for tipo in tipos if tipo != 'QUANTIDADE_ATIPICA']
+            alertas_normais.update(tipos)
+        por_venda = (time.perf_counter() - inicio_execucao) / max(len(vendas), 1) * 1e6
+
+        print(f"{len(vendas)} vendas reprocessadas ({args.dias} dias), {len(estados)} produtos")
+        print(f"  avaliar_venda: {por_venda:.1f} µs por venda")
+        print(f"  injetadas detectadas: {detectadas}/{len(injetadas)} "
+              f"({elegiveis} de produtos com ao menos {MIN_VENDAS} vendas)")
+        print(f"  alertas nas demais vendas: {dict(alertas_normais) or 'nenhum'}")
+
+        produto_id = max(estados, key=lambda p: estados[p]['vendas'])
+        db.atualizar_estoque(produto_id, 1000)
+        tempos = []
+        for _ in range(200):
+            inicio_execucao = time.perf_counter()
+            db.registrar_venda(produto_id, 1, "Cliente bench")
+            tempos.append((time.perf_counter() - inicio_execucao) * 1000)
+        inicio_execucao = time.perf_counter()
+        abertos = db.listar_alertas()
+        leitura = (time.perf_counter() - inicio_execucao) * 1000
+        print(f"  registrar_venda (com monitoramento): mediana {sorted(tempos)[len(tempos) // 2]:.2f} ms")
+        print(f"  listar_alertas: {len(abertos)} alertas abertos em {leitura:.2f} ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark do arquivamento por ano
+Mede as consultas do ano corrente (listar_vendas, get_resumo_vendas, get_lucro_periodo)
+antes e depois de mover os anos encerrados para arquivos próprios, e uma consulta
+que atravessa anos (com ATTACH das partições)
+
+Uso:
+    python benchmarks/bench_arquivo.py [--vendas 500000] [--anos 5]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from bench_excel import popular_banco
+from cronometro import cronometrar
+
+
+def medir(db: Database, ano_atual: int, ano_antigo: int) -> dict:
+    corrente = (f"{ano_atual}-01-01", f"{ano_atual}-12-31")
+    atravessa = (f"{ano_antigo}-07-01", f"{ano_atual}-06-30")
+    return {
+        'listar_vendas (ano corrente)': cronometrar(lambda: db.listar_vendas(*corrente)),
+        'get_resumo_vendas (ano corrente)': cronometrar(lambda: db.get_resumo_vendas(*corrente)),
+        'get_lucro_periodo (ano corrente)': cronometrar(lambda: db.get_lucro_periodo(*corrente)),
+        'get_resumo_vendas (vários anos)': cronometrar(lambda: db.get_resumo_vendas(*atravessa)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do arquivamento de vendas por ano")
+    parser.add_argument('--vendas', type=int, default=500000)
+    parser.add_argument('--anos', type=int, default=5, help="Anos de histórico, incluindo o corrente")
+    args = parser.parse_args()
+
+    ano_atual = datetime.now().year
+    ano_antigo = ano_atual - args.anos + 1
+    inicio = datetime(ano_antigo, 1, 1)
+    dias = (datetime.now() - inicio).days + 1
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        popular_banco(db, args.vendas, inicio=inicio, dias=dias)
+        resumo_antes = db.get_resumo_vendas(f"{ano_antigo}-01-01", f"{ano_atual}-12-31")
+
+        antes = medir(db, ano_atual, ano_antigo)
+
+        inicio_arquivo = time.perf_counter()
+        for ano in range(ano_antigo, ano_atual):
+            db.arquivar_ano(ano)
+        tempo_arquivo = time.perf_counter() - inicio_arquivo
+
+        conn = db.get_connection()
+        conn.execute('VACUUM')
+        conn.close()
+
+        depois = medir(db, ano_atual, ano_antigo)
+        resumo_depois = db.get_resumo_vendas(f"{ano_antigo}-01-01", f"{ano_atual}-12-31")
+
+        print(f"{args.vendas} vendas entre {ano_antigo} e {ano_atual}; "
+              f"{ano_atual - ano_antigo} anos arquivados em {tempo_arquivo:.1f} s")
+        print(f"{'consulta':<36}{'antes (ms)':>12}{'depois (ms)':>14}")
+        for nome in antes:
+            print(f"{nome:<36}{antes[nome]:>12.1f}{depois[nome]:>14.1f}")
+
+        iguais = (resumo_antes['total_vendas'] == resumo_depois['total_vendas']
+                  and abs(resumo_antes['receita_total'] - resumo_depois['receita_total']) < 0.01)
+        print(f"Totais do período completo iguais antes e depois: {'sim' if iguais else 'NÃO'}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark da análise de clientes (Analytics.analise_rfm e coortes_clientes)
+Compara a passada completa (RFM + coortes) sobre o resumo mantido em clientes/clientes_mensal
+com o mesmo cálculo agrupando direto as vendas, e confere se os resultados batem
+
+Uso:
+    python benchmarks/bench_clientes.py [--vendas 100000 1000000]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from analytics import Analytics
+from gerador_dados import gerar_dados
+
+
+def totais_direto(db: Database) -> dict:
+    """Totais de cada cliente e pares (coorte, mês) agrupando as vendas (sem o resumo)"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT cliente_id, COUNT(*), ROUND(SUM(valor_total), 2), MAX(data_venda), MIN(substr(data_venda, 1, 7))
+        FROM vendas WHERE cliente_id IS NOT NULL GROUP BY cliente_id
+    ''')
+    clientes = {row[0]: row[1:] for row in cursor.fetchall()}
+    cursor.execute('''
+        WITH coortes AS (
+            SELECT cliente_id, MIN(substr(data_venda, 1, 7)) AS coorte
+            FROM vendas WHERE cliente_id IS NOT NULL GROUP BY cliente_id
+        )
+        SELECT c.coorte, substr(v.data_venda, 1, 7), COUNT(DISTINCT v.cliente_id)
+        FROM vendas v JOIN coortes c ON c.cliente_id = v.cliente_id
+        GROUP BY 1, 2
+    ''')
+    coortes = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+    conn.close()
+    return {'clientes': clientes, 'coortes': coortes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise de clientes")
+    parser.add_argument('--vendas', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    for num_vendas in args.vendas:
+        pasta = tempfile.mkdtemp()
+        try:
+            db = Database(os.path.join(pasta, 'bench.db'))
+            gerar_dados(db, num_vendas)
+            analytics = Analytics(db)
+
+            inicio = time.perf_counter()
+            rfm = analytics.analise_rfm()
+            coortes = analytics.coortes_clientes()
+            resumo = (time.perf_counter() - inicio) * 1000
+            inicio = time.perf_counter()
+            analytics.analise_rfm()
+            analytics.coortes_clientes()
+            em_cache = (time.perf_counter() - inicio) * 1000
+
+            inicio = time.perf_counter()
+            direto = totais_direto(db)
+            tempo_direto = (time.perf_counter() - inicio) * 1000
+
+            iguais = sum(
+                direto['clientes'].get(c['cliente_id']) ==
+                (c['compras'], round(c['valor_total'], 2), c['ultima_compra'], c['coorte'])
+                for c in rfm['clientes']
+            )
+            celulas = [(nome, i) for nome, linha in zip(coortes['coortes'], coortes['clientes'])
+                       for i, valor in enumerate(linha) if valor is not None]
+            celulas_iguais = 0
+            for nome, i in celulas:
+                ano, mes = divmod(int(nome[:4]) * 12 + int(nome[5:7]) - 1 + i, 12)
+                esperado = direto['coortes'].get((nome, f"{ano:04d}-{mes + 1:02d}"), 0)
+                celulas_iguais += coortes['clientes'][coortes['coortes'].index(nome)][i] == esperado
+
+            print(f"{num_vendas} vendas, {rfm['total_clientes']} clientes com compra")
+            print(f"  RFM + coortes pelo resumo: {resumo:8.1f} ms (em cache {em_cache:.2f} ms)")
+            print(f"  agrupando as vendas:       {tempo_direto:8.1f} ms")
+            print(f"  totais iguais em {iguais}/{len(rfm['clientes'])} clientes; "
+                  f"coortes iguais em {celulas_iguais}/{len(celulas)} células")
+            print("  " + "  ".join(f"{nome}: {segmento['clientes']}"
+                                   for nome, segmento in rfm['segmentos'].items()))
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
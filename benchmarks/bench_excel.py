@@ -0,0 +1,92 @@
+"""
+Benchmark da exportação de vendas para Excel em modo streaming
+Mede tempo e pico de memória Python (tracemalloc) para diferentes volumes
+O pico deve ficar constante: as linhas vêm do banco em lotes e vão direto para o arquivo
+
+Uso:
+    python benchmarks/bench_excel.py [--vendas 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from exportadores import ExportadorExcel
+
+
+def popular_banco(db: Database, num_vendas: int, num_produtos: int = 200, semente: int = 42,
+                  inicio: datetime = datetime(2023, 1, 1), dias: int = 2 * 365):
+    """
+    Insere produtos e vendas sintéticas diretamente (sem passar por registrar_venda)
+    As datas são sorteadas entre `inicio` e `inicio + dias`
+    """
+    rnd = random.Random(semente)
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO produtos (nome, preco_custo, preco_venda, estoque) VALUES (?, ?, ?, ?)',
+        [(f"Produto {i:04d}", 10.0 + i % 50, 20.0 + i % 80, 1000) for i in range(num_produtos)]
+    )
+
+    def vendas():
+        for _ in range(num_vendas):
+            produto_id = rnd.randint(1, num_produtos)
+            quantidade = rnd.randint(1, 5)
+            preco = 20.0 + produto_id % 80
+            data = inicio + timedelta(seconds=rnd.randrange(dias * 86400))
+            yield (produto_id, quantidade, preco, preco * quantidade,
+                   f"Cliente {rnd.randrange(5000)}", data.strftime("%Y-%m-%d %H:%M:%S"))
+
+    cursor.executemany(
+        'INSERT INTO vendas (produto_id, quantidade, preco_unitario, valor_total, cliente, data_venda) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        vendas()
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de exportação Excel em streaming")
+    parser.add_argument('--vendas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="Não medir o pico de memória (evita a segunda exportação)")
+    args = parser.parse_args()
+
+    print(f"{'vendas':>10}{'tempo (s)':>12}{'pico memória (MB)':>20}")
+    for num_vendas in args.vendas:
+        pasta = tempfile.mkdtemp()
+        try:
+            db = Database(os.path.join(pasta, 'bench.db'))
+            popular_banco(db, num_vendas)
+
+            arquivo = os.path.join(pasta, 'vendas.xlsx')
+            inicio = time.perf_counter()
+            linhas = ExportadorExcel.gerar_relatorio_vendas(db.iterar_vendas(), arquivo)
+            tempo = time.perf_counter() - inicio
+
+            # Segunda passada só para medir memória (tracemalloc deixa a exportação mais lenta)
+            pico = 0
+            if not args.sem_memoria:
+                tracemalloc.start()
+                ExportadorExcel.gerar_relatorio_vendas(db.iterar_vendas(), arquivo)
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            assert linhas == num_vendas
+            print(f"{num_vendas:>10}{tempo:>12.2f}{pico / 1024 / 1024:>20.1f}")
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark de formatação em lote (moeda e data)
+Compara a formatação linha a linha com Formatador.formatar_*_lote
+
+Uso:
+    python benchmarks/bench_formatacao.py [--linhas 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import Formatador
+
+
+def gerar_linhas(n: int, semente: int = 42):
+    """Gera valores e datas no formato do banco (datas repetidas, como em vendas reais)"""
+    rnd = random.Random(semente)
+    inicio = datetime(2024, 1, 1)
+    valores = [round(rnd.uniform(1, 50000), 2) for _ in range(n)]
+    datas = [
+        (inicio + timedelta(days=rnd.randrange(365), seconds=rnd.randrange(36) * 1000)).strftime("%Y-%m-%d %H:%M:%S")
+        for _ in range(n)
+    ]
+    return valores, datas
+
+
+def cronometrar(funcao) -> float:
+    """Tempo de uma chamada em milissegundos"""
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatação em lote")
+    parser.add_argument('--linhas', type=int, default=100000)
+    args = parser.parse_args()
+
+    valores, datas = gerar_linhas(args.linhas)
+
+    casos = [
+        ("moeda (linha a linha)", lambda: [Formatador.formatar_moeda(v) for v in valores]),
+        ("moeda (lote)", lambda: Formatador.formatar_moeda_lote(valores)),
+        ("data (linha a linha)", lambda: [Formatador.formatar_data(d) for d in datas]),
+        ("data (lote)", lambda: Formatador.formatar_data_lote(datas)),
+    ]
+
+    try:
+        import pandas as pd
+        serie_valores = pd.Series(valores)
+        serie_datas = pd.Series(datas)
+        casos += [
+            ("moeda (lote, Series)", lambda: Formatador.formatar_moeda_lote(serie_valores)),
+            ("data (lote, Series)", lambda: Formatador.formatar_data_lote(serie_datas)),
+        ]
+    except ImportError:
+        pass
+
+    print(f"{args.linhas} linhas")
+    for nome, funcao in casos:
+        print(f"  {nome:<26}{cronometrar(funcao):>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
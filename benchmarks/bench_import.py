@@ -0,0 +1,79 @@
+"""
+Benchmark de regressão do tempo de importação
+Verifica que importar Formatador/Periodo não carrega reportlab, pandas nem openpyxl
+
+Uso:
+    python benchmarks/bench_import.py [--execucoes 10] [--limite-ms 20]
+
+Cada medição roda em um processo novo. Sai com código 1 se algum módulo pesado
+for carregado ou se a mediana passar do limite.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_PESADOS = ('reportlab', 'pandas', 'openpyxl', 'matplotlib')
+
+# Importações medidas: nome -> código executado no processo filho
+CASOS = {
+    'utils (Formatador, Periodo)': 'from utils import Formatador, Periodo',
+    'analytics': 'from analytics import Analytics',
+}
+
+CODIGO_FILHO = r"""
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+t0 = time.perf_counter()
+{codigo}
+tempo = time.perf_counter() - t0
+print(json.dumps({{
+    'tempo': tempo,
+    'pesados': [m for m in {pesados!r} if m in sys.modules]
+}}))
+"""
+
+
+def medir(codigo: str) -> dict:
+    """Executa uma importação em um processo novo e retorna tempo e módulos pesados carregados"""
+    saida = subprocess.run(
+        [sys.executable, '-c', CODIGO_FILHO.format(raiz=RAIZ, codigo=codigo, pesados=MODULOS_PESADOS)],
+        capture_output=True, text=True, cwd=RAIZ, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de importação")
+    parser.add_argument('--execucoes', type=int, default=10)
+    parser.add_argument('--limite-ms', type=float, default=20.0,
+                        help="Mediana máxima aceita para importar utils")
+    args = parser.parse_args()
+
+    falhou = False
+    print(f"{'importação':<30}{'mediana (ms)':>14}{'mín (ms)':>12}  módulos pesados")
+    for nome, codigo in CASOS.items():
+        resultados = [medir(codigo) for _ in range(args.execucoes)]
+        tempos = [r['tempo'] * 1000 for r in resultados]
+        pesados = resultados[0]['pesados']
+        mediana = statistics.median(tempos)
+        print(f"{nome:<30}{mediana:>14.2f}{min(tempos):>12.2f}  {', '.join(pesados) or '-'}")
+
+        if nome.startswith('utils'):
+            if pesados:
+                print(f"  FALHA: utils carregou {', '.join(pesados)}")
+                falhou = True
+            if mediana > args.limite_ms:
+                print(f"  FALHA: mediana acima de {args.limite_ms:.0f} ms")
+                falhou = True
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
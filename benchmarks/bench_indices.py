@@ -0,0 +1,111 @@
+"""
+Benchmark dos índices de cobertura
+Compara os principais KPIs com os índices antigos (uma coluna cada) e com o conjunto
+atual de criar_indices, mostrando o plano de cada consulta (COVERING INDEX = sem ler a tabela)
+
+Uso:
+    python benchmarks/bench_indices.py [--vendas 200000]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, INDICES, INDICES_OBSOLETOS
+from consultor_indices import ConsultorIndices
+from bench_excel import popular_banco
+from cronometro import cronometrar
+
+INDICES_ANTIGOS = [
+    "CREATE INDEX idx_produtos_categoria ON produtos(categoria_id)",
+    "CREATE INDEX idx_produtos_ativo ON produtos(ativo)",
+    "CREATE INDEX idx_vendas_produto ON vendas(produto_id)",
+    "CREATE INDEX idx_vendas_data ON vendas(data_venda)",
+    "CREATE INDEX idx_despesas_data ON despesas(data_despesa)",
+    "CREATE INDEX idx_historico_produto ON historico_precos(produto_id)"
+]
+
+
+def usar_indices(db: Database, antigos: bool):
+    conn = db.get_connection()
+    for nome in list(INDICES) + INDICES_OBSOLETOS:
+        conn.execute(f'DROP INDEX IF EXISTS {nome}')
+    if antigos:
+        for sql in INDICES_ANTIGOS:
+            conn.execute(sql)
+    else:
+        for nome, definicao in INDICES.items():
+            conn.execute(f'CREATE INDEX {nome} ON {definicao}')
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def kpis(db: Database):
+    hoje = datetime.now()
+    inicio = (hoje - timedelta(days=90)).strftime("%Y-%m-%d")
+    fim = hoje.strftime("%Y-%m-%d")
+    return {
+        'get_resumo_vendas (90 dias)': lambda: db.get_resumo_vendas(inicio, fim),
+        'get_lucro_periodo (90 dias)': lambda: db.get_lucro_periodo(inicio, fim),
+        'get_vendas_por_mes (90 dias)': lambda: db.get_vendas_por_mes(inicio, fim),
+        'get_vendas_por_produto (90 dias)': lambda: db.get_vendas_por_produto(inicio, fim, limite=10),
+        'get_produtos_mais_vendidos': lambda: db.get_produtos_mais_vendidos(),
+        'produtos_estoque_baixo': lambda: db.produtos_estoque_baixo(),
+    }
+
+
+def medir(db: Database) -> dict:
+    tempos = {}
+    planos = {}
+    for nome, funcao in kpis(db).items():
+        with ConsultorIndices(db) as consultor:
+            funcao()
+        conn = db.get_connection()
+        planos[nome] = [
+            etapa
+            for consulta in consultor.consultas.values()
+            for etapa in ConsultorIndices.plano(conn.cursor(), consulta['sql'])
+        ]
+        conn.close()
+        tempos[nome] = cronometrar(funcao)
+    return {'tempos': tempos, 'planos': planos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos índices de cobertura")
+    parser.add_argument('--vendas', type=int, default=200000)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        inicio = datetime.now() - timedelta(days=730)
+        popular_banco(db, args.vendas, num_produtos=500, inicio=inicio, dias=730)
+
+        usar_indices(db, antigos=True)
+        antes = medir(db)
+        usar_indices(db, antigos=False)
+        depois = medir(db)
+
+        print(f"{args.vendas} vendas em 2 anos, 500 produtos")
+        print(f"{'consulta':<36}{'antigos (ms)':>14}{'atuais (ms)':>13}")
+        for nome in antes['tempos']:
+            print(f"{nome:<36}{antes['tempos'][nome]:>14.1f}{depois['tempos'][nome]:>13.1f}")
+
+        print("\nPlanos com os índices atuais:")
+        for nome, plano in depois['planos'].items():
+            print(f"  {nome}")
+            for etapa in plano:
+                print(f"      {etapa}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
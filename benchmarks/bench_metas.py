@@ -0,0 +1,83 @@
+"""
+Benchmark do progresso das metas
+Compara o cálculo de uma meta por vez (resumo/lucro do período de cada uma) com progresso_metas (todas juntas)
+para metas com períodos sobrepostos
+
+Uso:
+    python benchmarks/bench_metas.py [--vendas 100000] [--metas 100]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from gerador_dados import gerar_dados
+from cronometro import cronometrar
+
+
+def criar_metas(db: Database, quantidade: int, semente: int = 7):
+    """Metas de 1 semana a 1 ano, começando em qualquer ponto dos últimos 2 anos"""
+    rnd = random.Random(semente)
+    hoje = datetime.now()
+    for i in range(quantidade):
+        inicio = hoje - timedelta(days=rnd.randrange(730))
+        fim = inicio + timedelta(days=rnd.choice((6, 29, 89, 364)))
+        db.adicionar_meta(('RECEITA', 'LUCRO', 'VENDAS')[i % 3], rnd.uniform(1000, 500000), 'PERSONALIZADO',
+                          inicio.strftime("%Y-%m-%d"), fim.strftime("%Y-%m-%d"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do progresso das metas")
+    parser.add_argument('--vendas', type=int, default=100000)
+    parser.add_argument('--metas', type=int, default=100)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        gerar_dados(db, args.vendas)
+        conn = db.get_connection()
+        conn.execute('DELETE FROM metas')
+        conn.commit()
+        conn.close()
+        criar_metas(db, args.metas)
+
+        def uma_por_vez():
+            """Cálculo anterior: uma consulta de resumo/lucro por meta"""
+            valores = {}
+            for meta in db.listar_metas():
+                periodo = (meta['data_inicio'], meta['data_fim'])
+                if meta['tipo'] == 'RECEITA':
+                    valores[meta['id']] = db.get_resumo_vendas(*periodo)['receita_total']
+                elif meta['tipo'] == 'LUCRO':
+                    valores[meta['id']] = db.get_lucro_periodo(*periodo)['lucro_liquido']
+                else:
+                    valores[meta['id']] = db.get_resumo_vendas(*periodo)['total_vendas']
+            return valores
+
+        antes = uma_por_vez()
+        depois = db.progresso_metas()
+        iguais = antes.keys() == depois.keys() and all(
+            abs(antes[i] - depois[i]['valor_atual']) < 0.01 for i in antes
+        )
+
+        tempo_laco = cronometrar(uma_por_vez, 3)
+        tempo_lote = cronometrar(db.progresso_metas)
+
+        print(f"{args.vendas} vendas, {args.metas} metas sobrepostas")
+        print(f"{'uma consulta por meta':<28}{tempo_laco:>12.1f} ms")
+        print(f"{'progresso_metas':<28}{tempo_lote:>12.1f} ms")
+        print(f"Mesmos valores: {'sim' if iguais else 'NÃO'}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
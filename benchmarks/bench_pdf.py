@@ -0,0 +1,80 @@
+"""
+Benchmark do motor de relatórios PDF
+Compara o relatório de vendas antigo (uma única Table do platypus) com o motor por páginas,
+e mede a geração concorrente de vários relatórios no pool de processos
+
+Uso:
+    python benchmarks/bench_pdf.py [--vendas 20000] [--relatorios 4]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from exportadores import ExportadorPDF
+import relatorio_pdf
+from bench_excel import popular_banco
+
+
+def medir(funcao):
+    """Retorna (segundos, pico de memória em MB) de uma chamada"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de relatórios PDF")
+    parser.add_argument('--vendas', type=int, default=20000)
+    parser.add_argument('--relatorios', type=int, default=4)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db_name = os.path.join(pasta, 'bench.db')
+        db = Database(db_name)
+        popular_banco(db, args.vendas)
+
+        print(f"{args.vendas} vendas{'':<14}{'tempo (s)':>12}{'pico (MB)':>12}")
+
+        tempo, pico = medir(lambda: ExportadorPDF.gerar_relatorio_vendas(
+            db.listar_vendas(), os.path.join(pasta, 'antigo.pdf')))
+        print(f"  {'Table única (antigo)':<26}{tempo:>12.2f}{pico:>12.1f}")
+
+        tempo, pico = medir(lambda: relatorio_pdf.gerar_relatorio_vendas(
+            db, os.path.join(pasta, 'novo.pdf')))
+        print(f"  {'motor por páginas':<26}{tempo:>12.2f}{pico:>12.1f}")
+
+        tarefas = [
+            {'tipo': 'vendas' if i % 2 == 0 else 'financeiro', 'db_name': db_name,
+             'arquivo': os.path.join(pasta, f'relatorio_{i}.pdf')}
+            for i in range(args.relatorios)
+        ]
+
+        inicio = time.perf_counter()
+        for tarefa in tarefas:
+            relatorio_pdf.gerar_relatorios_paralelo([tarefa])
+        sequencial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        relatorio_pdf.gerar_relatorios_paralelo(tarefas)
+        paralelo = time.perf_counter() - inicio
+
+        print(f"\n{args.relatorios} relatórios: sequencial {sequencial:.2f}s | pool de processos {paralelo:.2f}s")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark da sugestão de preços em lote (Analytics.sugestao_precos_lote)
+Compara a tabela do catálogo inteiro (consultas agrupadas + elasticidade vetorizada) com
+sugestao_precos chamada produto a produto (medida numa amostra e projetada para o catálogo)
+
+Uso:
+    python benchmarks/bench_precos.py [--vendas 100000 1000000] [--amostra 20]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from analytics import Analytics
+from gerador_dados import gerar_dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da sugestão de preços em lote")
+    parser.add_argument('--vendas', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--amostra', type=int, default=20, help="Produtos medidos com sugestao_precos")
+    args = parser.parse_args()
+
+    for num_vendas in args.vendas:
+        pasta = tempfile.mkdtemp()
+        try:
+            db = Database(os.path.join(pasta, 'bench.db'))
+            gerar_dados(db, num_vendas)
+            analytics = Analytics(db)
+
+            inicio = time.perf_counter()
+            tabela = analytics.sugestao_precos_lote()
+            lote = (time.perf_counter() - inicio) * 1000
+            inicio = time.perf_counter()
+            analytics.sugestao_precos_lote()
+            em_cache = (time.perf_counter() - inicio) * 1000
+
+            amostra = [linha['produto_id'] for linha in tabela[:args.amostra]]
+            inicio = time.perf_counter()
+            for produto_id in amostra:
+                analytics.sugestao_precos(produto_id)
+            por_produto = (time.perf_counter() - inicio) * 1000 / max(len(amostra), 1)
+
+            estimadas = [linha['elasticidade'] for linha in tabela if linha['reajustes_elasticidade']]
+            print(f"{num_vendas} vendas, {len(tabela)} produtos")
+            print(f"  sugestao_precos_lote: {lote:8.1f} ms (em cache {em_cache:.2f} ms)")
+            print(f"  sugestao_precos:      {por_produto:8.1f} ms por produto "
+                  f"(catálogo inteiro ~{por_produto * len(tabela) / 1000:.1f} s)")
+            if estimadas:
+                print(f"  elasticidade estimada em {len(estimadas)} produtos: "
+                      f"mediana {statistics.median(estimadas):.2f}")
+            print("  " + "  ".join(f"{recomendacao}: {quantidade}" for recomendacao, quantidade
+                                   in Counter(linha['recomendacao'] for linha in tabela).items()))
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark do motor de previsão (previsao.py)
+Mede o tempo de previsao_vendas e previsao_produtos e compara, em um teste retroativo
+(prevê os últimos 30 dias com o histórico anterior a eles), o erro do motor com o da
+média dos dias com venda multiplicada pelo horizonte (cálculo anterior)
+
+Uso:
+    python benchmarks/bench_previsao.py [--vendas 100000 1000000] [--horizonte 30]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from analytics import Analytics, DIAS_HISTORICO_PREVISAO
+from previsao import prever, matriz_diaria
+from gerador_dados import gerar_dados
+from cronometro import cronometrar
+
+
+def teste_retroativo(db: Database, horizonte: int) -> dict:
+    """Erro absoluto da soma prevista dos últimos `horizonte` dias (total e por produto)"""
+    ontem = datetime.now() - timedelta(days=1)
+    corte = ontem - timedelta(days=horizonte)
+    inicio = corte - timedelta(days=DIAS_HISTORICO_PREVISAO - 1)
+    datas = [d.strftime("%Y-%m-%d") for d in (inicio, corte, corte + timedelta(days=1), ontem)]
+
+    historico = db.get_vendas_por_dia(datas[0], datas[1], por_produto=True)
+    futuro = db.get_vendas_por_dia(datas[2], datas[3], por_produto=True)
+    produtos, y = matriz_diaria(historico, 'produto_id', 'quantidade', datas[0], datas[1])
+    reais = {p: 0 for p in produtos}
+    for linha in futuro:
+        if linha['produto_id'] in reais:
+            reais[linha['produto_id']] += linha['quantidade']
+    real = np.array([reais[p] for p in produtos])
+
+    # Cálculo anterior: média dos dias com venda (últimos 90) vezes o horizonte
+    recentes = y[:, -90:]
+    com_venda = (recentes > 0).sum(axis=1)
+    anterior = np.where(com_venda > 0, recentes.sum(axis=1) / np.maximum(com_venda, 1), 0) * horizonte
+
+    motor = prever(y, horizonte)['previsao'].sum(axis=1)
+    return {
+        'produtos': len(produtos),
+        'erro_anterior_produto': np.abs(anterior - real).mean(),
+        'erro_motor_produto': np.abs(motor - real).mean(),
+        'erro_anterior_total': abs(anterior.sum() - real.sum()) / real.sum() * 100,
+        'erro_motor_total': abs(motor.sum() - real.sum()) / real.sum() * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do motor de previsão")
+    parser.add_argument('--vendas', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--horizonte', type=int, default=30)
+    args = parser.parse_args()
+
+    for num_vendas in args.vendas:
+        pasta = tempfile.mkdtemp()
+        try:
+            db = Database(os.path.join(pasta, 'bench.db'))
+            gerar_dados(db, num_vendas, num_produtos=max(200, num_vendas // 500))
+            analytics = Analytics(db)
+
+            tempo_vendas = cronometrar(lambda: analytics.previsao_vendas(args.horizonte), 3)
+            tempo_produtos = cronometrar(lambda: analytics.previsao_produtos(args.horizonte), 3)
+            teste = teste_retroativo(db, args.horizonte)
+
+            print(f"{num_vendas} vendas, {teste['produtos']} produtos com venda")
+            print(f"  previsao_vendas:   {tempo_vendas:8.1f} ms")
+            print(f"  previsao_produtos: {tempo_produtos:8.1f} ms")
+            print(f"  erro médio por produto ({args.horizonte} dias, unidades): "
+                  f"anterior {teste['erro_anterior_produto']:.1f}  motor {teste['erro_motor_produto']:.1f}")
+            print(f"  erro do total de unidades: anterior {teste['erro_anterior_total']:.1f}%  "
+                  f"motor {teste['erro_motor_total']:.1f}%")
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
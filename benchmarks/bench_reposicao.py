@@ -0,0 +1,86 @@
+"""
+Benchmark do planejamento de reposição (reposicao.py)
+Mede o ajuste dos lotes de produtos no processo atual e no pool de processos para
+quantidades crescentes de produtos (séries sintéticas), e a leitura do plano gravado
+
+Uso:
+    python benchmarks/bench_reposicao.py [--produtos 5000 20000 50000] [--processos 4]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from analytics import Analytics
+from reposicao import (calcular_lote, planejar_reposicao, PRODUTOS_POR_LOTE, PRAZO_ENTREGA_DIAS,
+                       DIAS_COBERTURA, DIAS_HISTORICO, Z_NIVEL_SERVICO)
+from gerador_dados import gerar_dados
+
+
+def series_sinteticas(produtos: int, dias: int = DIAS_HISTORICO, semente: int = 42) -> np.ndarray:
+    """Demanda de Poisson com nível, tendência e semana próprios de cada produto"""
+    rnd = np.random.default_rng(semente)
+    t = np.arange(dias)
+    nivel = rnd.gamma(0.6, 3.0, (produtos, 1))
+    tendencia = rnd.normal(0, 0.002, (produtos, 1)) * t
+    semana = 1 + rnd.uniform(0, 0.4, (produtos, 1)) * np.sin(2 * np.pi * t / 7)
+    return rnd.poisson(np.maximum(nivel * semana * (1 + tendencia), 0)).astype(float)
+
+
+def ajustar(quantidades: np.ndarray, processos: int) -> float:
+    """Tempo (ms) do ajuste de todos os lotes com `processos` processos"""
+    lotes = [(list(range(i, min(i + PRODUTOS_POR_LOTE, len(quantidades)))), quantidades[i:i + PRODUTOS_POR_LOTE])
+             for i in range(0, len(quantidades), PRODUTOS_POR_LOTE)]
+    argumentos = (PRAZO_ENTREGA_DIAS, DIAS_COBERTURA, Z_NIVEL_SERVICO)
+    inicio = time.perf_counter()
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(calcular_lote, ids, matriz, *argumentos) for ids, matriz in lotes]
+            total = sum(len(futuro.result()) for futuro in futuros)
+    else:
+        total = sum(len(calcular_lote(ids, matriz, *argumentos)) for ids, matriz in lotes)
+    assert total == len(quantidades)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do planejamento de reposição")
+    parser.add_argument('--produtos', type=int, nargs='+', default=[5000, 20000, 50000])
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--vendas', type=int, default=100000, help="Vendas do banco usado na leitura do plano")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs; lotes de {PRODUTOS_POR_LOTE} produtos")
+    print(f"{'produtos':>10}{'1 processo':>14}{f'{args.processos} processos':>16}")
+    for produtos in args.produtos:
+        quantidades = series_sinteticas(produtos)
+        serial = ajustar(quantidades, 1)
+        paralelo = ajustar(quantidades, args.processos)
+        print(f"{produtos:>10}{serial:>11.0f} ms{paralelo:>13.0f} ms")
+
+    pasta = tempfile.mkdtemp()
+    try:
+        db = Database(os.path.join(pasta, 'bench.db'))
+        gerar_dados(db, args.vendas)
+        analytics = Analytics(db)
+        resumo = planejar_reposicao(db, processos=args.processos)
+        inicio = time.perf_counter()
+        plano = analytics.previsao_reposicao()
+        leitura = (time.perf_counter() - inicio) * 1000
+        print(f"\n{args.vendas} vendas: plano de {resumo['produtos']} produtos gerado em "
+              f"{resumo['duracao_ms']:.0f} ms; leitura pela tela ({len(plano)} itens) em {leitura:.1f} ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
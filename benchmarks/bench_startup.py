@@ -0,0 +1,82 @@
+"""
+Benchmark de inicialização do aplicativo desktop
+Mede o tempo até a primeira pintura da janela e até o dashboard ficar interativo
+
+Uso:
+    python benchmarks/bench_startup.py [--execucoes 5] [--banco caminho.db]
+
+Cada execução roda em um processo novo (importações a frio). Requer um display
+(em servidores, usar xvfb-run).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado no processo filho: mede desde antes do import de main até o dashboard pronto
+CODIGO_FILHO = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {raiz!r})
+import main
+t_import = time.perf_counter()
+pesados = [m for m in ('matplotlib', 'pandas', 'reportlab', 'openpyxl') if m in sys.modules]
+app = main.App({banco!r})
+while 'dashboard_interativo' not in app.marcas_tempo:
+    app.update()
+marcas = app.marcas_tempo
+resultado = {{
+    'import_main': t_import - t0,
+    'primeira_pintura': marcas['primeira_pintura'] - t0,
+    'dashboard_interativo': marcas['dashboard_interativo'] - t0,
+    'pesados_no_import': pesados,
+}}
+app.destroy()
+print(json.dumps(resultado))
+"""
+
+
+def executar_uma_vez(banco: str) -> dict:
+    """Inicia o aplicativo em um processo novo e retorna as medições"""
+    codigo = CODIGO_FILHO.format(raiz=RAIZ, banco=banco)
+    saida = subprocess.run(
+        [sys.executable, '-c', codigo],
+        capture_output=True, text=True, cwd=RAIZ, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do desktop")
+    parser.add_argument('--execucoes', type=int, default=5)
+    parser.add_argument('--banco', default=os.path.join(RAIZ, 'gestao_vendas.db'),
+                        help="Banco usado como base (é copiado; o original não é alterado)")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, 'bench.db')
+    if os.path.exists(args.banco):
+        shutil.copy(args.banco, banco)
+
+    try:
+        resultados = [executar_uma_vez(banco) for _ in range(args.execucoes)]
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    print(f"{'métrica':<24}{'mediana (ms)':>14}{'mín (ms)':>12}{'máx (ms)':>12}")
+    for metrica in ('import_main', 'primeira_pintura', 'dashboard_interativo'):
+        valores = [r[metrica] * 1000 for r in resultados]
+        print(f"{metrica:<24}{statistics.median(valores):>14.1f}"
+              f"{min(valores):>12.1f}{max(valores):>12.1f}")
+    print(f"Módulos pesados carregados por 'import main': {resultados[0]['pesados_no_import'] or 'nenhum'}")
+
+
+if __name__ == "__main__":
+    main()
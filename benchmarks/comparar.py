@@ -0,0 +1,79 @@
+"""
+Compara dois resultados da suíte de benchmarks (benchmarks/suite.py)
+Mostra a variação de cada caso e termina com código 1 se houver regressão acima do limite
+
+Uso:
+    python benchmarks/comparar.py base.json novo.json [--limite 10] [--minimo-ms 1]
+                                  [--metrica mediana_ms]
+"""
+
+import argparse
+import json
+import sys
+
+
+def carregar(caminho: str) -> dict:
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def comparar(base: dict, novo: dict, metrica: str, limite: float, minimo_ms: float):
+    """Linhas (volume, caso, antes, depois, variação %, situação) dos casos presentes nos dois"""
+    linhas = []
+    for volume, dados_novo in novo['volumes'].items():
+        dados_base = base['volumes'].get(volume)
+        if not dados_base:
+            continue
+        for caso, medicao in dados_novo['casos'].items():
+            anterior = dados_base['casos'].get(caso)
+            if not anterior:
+                linhas.append((volume, caso, None, medicao[metrica], None, 'novo'))
+                continue
+            antes, depois = anterior[metrica], medicao[metrica]
+            variacao = (depois - antes) / antes * 100 if antes else 0.0
+            situacao = ''
+            # Diferenças absolutas pequenas são ruído de medição
+            if abs(depois - antes) >= minimo_ms:
+                if variacao > limite:
+                    situacao = 'REGRESSÃO'
+                elif variacao < -limite:
+                    situacao = 'melhora'
+            linhas.append((volume, caso, antes, depois, variacao, situacao))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados da suíte de benchmarks")
+    parser.add_argument('base')
+    parser.add_argument('novo')
+    parser.add_argument('--limite', type=float, default=10.0, help="Variação (%%) considerada relevante")
+    parser.add_argument('--minimo-ms', type=float, default=1.0, help="Diferença mínima (ms) considerada")
+    parser.add_argument('--metrica', default='mediana_ms', choices=['min_ms', 'mediana_ms', 'media_ms', 'max_ms'])
+    args = parser.parse_args()
+
+    base, novo = carregar(args.base), carregar(args.novo)
+    print(f"{base['commit']} ({base['data']})  →  {novo['commit']} ({novo['data']})  [{args.metrica}]")
+    for chave in ('python', 'sqlite', 'plataforma'):
+        if base.get(chave) != novo.get(chave):
+            print(f"Atenção: {chave} diferente ({base.get(chave)} / {novo.get(chave)})")
+
+    linhas = comparar(base, novo, args.metrica, args.limite, args.minimo_ms)
+    volume_atual = None
+    for volume, caso, antes, depois, variacao, situacao in linhas:
+        if volume != volume_atual:
+            volume_atual = volume
+            print(f"\n{volume} vendas")
+            print(f"  {'caso':<45}{'antes (ms)':>12}{'depois (ms)':>13}{'variação':>10}")
+        if antes is None:
+            print(f"  {caso:<45}{'-':>12}{depois:>13.2f}{'':>10}  {situacao}")
+        else:
+            print(f"  {caso:<45}{antes:>12.2f}{depois:>13.2f}{variacao:>+9.1f}%  {situacao}")
+
+    regressoes = [linha for linha in linhas if linha[5] == 'REGRESSÃO']
+    print(f"\n{len(regressoes)} regressões, "
+          f"{sum(1 for linha in linhas if linha[5] == 'melhora')} melhoras acima de {args.limite:.0f}%")
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Cronômetro compartilhado pelos benchmarks
+"""
+
+import time
+
+
+def cronometrar(funcao, repeticoes: int = 5) -> float:
+    """Melhor tempo (ms) entre as repetições"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
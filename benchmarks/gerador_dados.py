@@ -0,0 +1,281 @@
+"""
+Gerador de dados sintéticos (reprodutível pela semente)
+Preenche um banco com categorias, produtos, anos de vendas com sazonalidade (meses e dias
+da semana), despesas fixas e variáveis, histórico de preços e metas
+
+Uso:
+    python benchmarks/gerador_dados.py destino.db [--vendas 100000] [--produtos 500] [--anos 3]
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, TABELAS_VERSIONADAS
+
+CATEGORIAS = [
+    "Eletrônicos", "Informática", "Celulares", "Acessórios", "Games", "Áudio",
+    "Casa", "Cozinha", "Ferramentas", "Papelaria", "Esporte", "Brinquedos"
+]
+
+# Peso de cada mês (jan..dez): queda no início do ano, pico em novembro/dezembro
+SAZONALIDADE_MENSAL = (0.85, 0.80, 0.90, 0.95, 1.05, 0.95, 1.00, 1.00, 0.95, 1.00, 1.25, 1.55)
+# Peso de cada dia da semana (seg..dom)
+PESO_DIA_SEMANA = (0.90, 0.95, 1.00, 1.00, 1.15, 1.35, 0.65)
+# Crescimento do movimento ao longo de um ano
+CRESCIMENTO_ANUAL = 0.12
+
+# Despesas fixas de todo mês: (descrição, categoria, valor base)
+DESPESAS_FIXAS = [
+    ("Aluguel da loja", "Aluguel", 4500.0),
+    ("Folha de pagamento", "Salários", 18000.0),
+    ("Energia elétrica", "Outros", 900.0),
+    ("Internet e telefone", "Outros", 350.0),
+]
+# Despesas variáveis: (descrição, categoria, valor mínimo, valor máximo)
+DESPESAS_VARIAVEIS = [
+    ("Frete de mercadorias", "Frete", 80.0, 900.0),
+    ("Taxas de cartão", "Taxas", 50.0, 600.0),
+    ("Campanha de anúncios", "Marketing", 200.0, 2500.0),
+    ("Material de escritório", "Outros", 30.0, 300.0),
+]
+# Uma despesa variável a cada tantas vendas
+VENDAS_POR_DESPESA = 150
+
+
+def remover_gatilhos(conn):
+    """Remove os gatilhos de versão (recriados por create_tables) para acelerar a carga em lote"""
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS trg_versao_{tabela}_{evento}')
+
+
+def pesos_acumulados(pesos) -> list:
+    acumulado = []
+    total = 0.0
+    for peso in pesos:
+        total += peso
+        acumulado.append(total)
+    return acumulado
+
+
+def gerar_dados(db: Database, num_vendas: int, num_produtos: int = 500, anos: int = 3,
+                semente: int = 42, fim: datetime = None, num_clientes: int = None) -> Dict:
+    """
+    Preenche o banco (novo) com dados sintéticos terminando em `fim` (padrão: hoje)
+    Retorna as quantidades geradas e o tempo gasto
+    """
+    inicio_geracao = time.perf_counter()
+    rnd = random.Random(semente)
+    fim = (fim or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio = fim - timedelta(days=anos * 365 - 1)
+    dias = (fim - inicio).days + 1
+    num_clientes = num_clientes or max(200, num_vendas // 20)
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    remover_gatilhos(conn)
+
+    # Categorias e produtos (preço de custo/venda iniciais, estoque e popularidade)
+    cursor.executemany(
+        'INSERT OR IGNORE INTO categorias (nome, descricao) VALUES (?, ?)',
+        [(nome, f"Categoria {nome}") for nome in CATEGORIAS]
+    )
+    cursor.execute('SELECT id FROM categorias ORDER BY id')
+    categorias = [row[0] for row in cursor.fetchall()]
+
+    produtos = []
+    for i in range(num_produtos):
+        custo = round(rnd.lognormvariate(3.5, 0.9), 2)
+        margem = rnd.uniform(0.25, 0.9)
+        produtos.append({
+            'nome': f"Produto {i + 1:05d}",
+            'categoria_id': categorias[i % len(categorias)],
+            'custo': custo,
+            'venda': round(custo * (1 + margem), 2),
+            'estoque': rnd.randint(0, 300),
+            'estoque_minimo': rnd.choice((5, 10, 10, 20))
+        })
+
+    # Histórico de preços: reajustes ao longo do período (a venda usa o preço vigente na data)
+    historico = []
+    reajustes = []
+    for indice, produto in enumerate(produtos):
+        datas = sorted(rnd.randrange(dias) for _ in range(rnd.randint(0, anos * 2)))
+        custo, venda = produto['custo'], produto['venda']
+        pontos = [(0, venda)]
+        for dia in datas:
+            fator = 1 + rnd.uniform(-0.05, 0.12)
+            novo_custo = round(custo * fator, 2)
+            nova_venda = round(venda * (fator + rnd.uniform(-0.03, 0.03)), 2)
+            data = inicio + timedelta(days=dia, hours=rnd.randint(8, 18))
+            historico.append((indice + 1, custo, novo_custo, venda, nova_venda,
+                              data.strftime("%Y-%m-%d %H:%M:%S"), "Reajuste"))
+            custo, venda = novo_custo, nova_venda
+            pontos.append((dia, venda))
+        produto['custo'], produto['venda'] = custo, venda
+        reajustes.append(([p[0] for p in pontos], [p[1] for p in pontos]))
+
+    cursor.executemany(
+        'INSERT INTO produtos (nome, descricao, categoria_id, preco_custo, preco_venda, estoque, estoque_minimo) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(p['nome'], "", p['categoria_id'], p['custo'], p['venda'], p['estoque'], p['estoque_minimo'])
+         for p in produtos]
+    )
+    cursor.executemany(
+        'INSERT INTO historico_precos (produto_id, preco_custo_anterior, preco_custo_novo, '
+        'preco_venda_anterior, preco_venda_novo, data_alteracao, motivo) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        historico
+    )
+
+    # Vendas por dia: sazonalidade do mês, dia da semana e crescimento no período
+    pesos_dias = []
+    for dia in range(dias):
+        data = inicio + timedelta(days=dia)
+        pesos_dias.append(SAZONALIDADE_MENSAL[data.month - 1] * PESO_DIA_SEMANA[data.weekday()]
+                          * (1 + CRESCIMENTO_ANUAL * dia / 365))
+    vendas_por_dia = Counter(rnd.choices(range(dias), cum_weights=pesos_acumulados(pesos_dias), k=num_vendas))
+
+    # Popularidade dos produtos e dos clientes (poucos concentram a maior parte)
+    acumulado_produtos = pesos_acumulados(1 / (i + 1) ** 0.8 for i in range(num_produtos))
+    ordem_produtos = list(range(num_produtos))
+    rnd.shuffle(ordem_produtos)
+    acumulado_clientes = pesos_acumulados(1 / (i + 1) ** 0.6 for i in range(num_clientes))
+
+    # Clientes entram ao longo do período e param de comprar depois de um tempo (coortes);
+    # os 5% mais frequentes compram desde o início e não saem
+    fixos = max(1, num_clientes // 20)
+    entrada = [0 if c < fixos else rnd.randrange(dias) for c in range(num_clientes)]
+    saida = [dias if c < fixos else entrada[c] + int(rnd.expovariate(1 / 500)) for c in range(num_clientes)]
+    cursor.executemany(
+        'INSERT INTO clientes (id, nome, nome_normalizado) VALUES (?, ?, ?)',
+        [(c + 1, f"Cliente {c + 1:05d}", f"cliente {c + 1:05d}") for c in range(num_clientes)]
+    )
+
+    def cliente_ativo(dia):
+        for _ in range(10):
+            cliente = rnd.choices(range(num_clientes), cum_weights=acumulado_clientes)[0]
+            if entrada[cliente] <= dia <= saida[cliente]:
+                return cliente
+        return rnd.randrange(fixos)
+
+    def vendas():
+        for dia in range(dias):
+            quantidade_dia = vendas_por_dia.get(dia, 0)
+            if not quantidade_dia:
+                continue
+            data = inicio + timedelta(days=dia)
+            segundos = sorted(rnd.randrange(8 * 3600, 21 * 3600) for _ in range(quantidade_dia))
+            sorteados = rnd.choices(ordem_produtos, cum_weights=acumulado_produtos, k=quantidade_dia)
+            clientes = [cliente_ativo(dia) for _ in range(quantidade_dia)]
+            for segundo, indice, cliente in zip(segundos, sorteados, clientes):
+                dias_reajuste, precos = reajustes[indice]
+                preco = precos[bisect.bisect_right(dias_reajuste, dia) - 1]
+                quantidade = rnd.choices((1, 2, 3, 4, 5), (55, 22, 12, 7, 4))[0]
+                yield (indice + 1, quantidade, preco, round(preco * quantidade, 2),
+                       f"Cliente {cliente + 1:05d}",
+                       (data + timedelta(seconds=segundo)).strftime("%Y-%m-%d %H:%M:%S"), cliente + 1)
+
+    cursor.executemany(
+        'INSERT INTO vendas (produto_id, quantidade, preco_unitario, valor_total, cliente, data_venda, cliente_id) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        vendas()
+    )
+    db.reconstruir_resumo_clientes(cursor)
+
+    # Despesas: fixas no dia 5 de cada mês e variáveis proporcionais ao movimento
+    despesas = []
+    mes = inicio.replace(day=1)
+    while mes <= fim:
+        ano_mes = mes.year + mes.month / 12
+        for descricao, categoria, valor in DESPESAS_FIXAS:
+            dia_pagamento = mes.replace(day=5)
+            if inicio <= dia_pagamento <= fim:
+                reajuste = (1 + 0.05) ** (ano_mes - inicio.year)
+                despesas.append((descricao, round(valor * reajuste * rnd.uniform(0.97, 1.03), 2),
+                                 categoria, dia_pagamento.strftime("%Y-%m-%d")))
+        mes = (mes + timedelta(days=32)).replace(day=1)
+    for dia, quantidade_dia in sorted(vendas_por_dia.items()):
+        for _ in range(int(quantidade_dia / VENDAS_POR_DESPESA + rnd.random())):
+            descricao, categoria, minimo, maximo = rnd.choice(DESPESAS_VARIAVEIS)
+            despesas.append((descricao, round(rnd.uniform(minimo, maximo), 2), categoria,
+                             (inicio + timedelta(days=dia)).strftime("%Y-%m-%d")))
+    despesas.sort(key=lambda d: d[3])
+    cursor.executemany(
+        'INSERT INTO despesas (descricao, valor, categoria, data_despesa) VALUES (?, ?, ?, ?)',
+        despesas
+    )
+
+    # Metas do mês e do ano correntes
+    inicio_mes = fim.replace(day=1)
+    fim_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    receita_media_dia = num_vendas * 2.2 * sum(p['venda'] for p in produtos) / num_produtos / dias
+    cursor.executemany(
+        'INSERT INTO metas (tipo, valor_meta, periodo, data_inicio, data_fim) VALUES (?, ?, ?, ?, ?)',
+        [
+            ('RECEITA', round(receita_media_dia * 30, 2), 'MENSAL',
+             inicio_mes.strftime("%Y-%m-%d"), fim_mes.strftime("%Y-%m-%d")),
+            ('VENDAS', round(num_vendas / dias * 30), 'MENSAL',
+             inicio_mes.strftime("%Y-%m-%d"), fim_mes.strftime("%Y-%m-%d")),
+            ('LUCRO', round(receita_media_dia * 365 * 0.2, 2), 'ANUAL',
+             f"{fim.year}-01-01", f"{fim.year}-12-31"),
+        ]
+    )
+
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+    # Recria os gatilhos de versão e marca os dados como alterados
+    db.create_tables()
+    db.recalcular_estatisticas_vendas()
+    conn = db.get_connection()
+    conn.execute('UPDATE versao_dados SET versao = versao + 1 WHERE id = 1')
+    conn.commit()
+    conn.close()
+
+    return {
+        'vendas': num_vendas,
+        'produtos': num_produtos,
+        'categorias': len(categorias),
+        'clientes': num_clientes,
+        'despesas': len(despesas),
+        'historico_precos': len(historico),
+        'inicio': inicio.strftime("%Y-%m-%d"),
+        'fim': fim.strftime("%Y-%m-%d"),
+        'semente': semente,
+        'tempo_s': round(time.perf_counter() - inicio_geracao, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco com dados sintéticos")
+    parser.add_argument('destino', help="Arquivo do banco (não pode existir)")
+    parser.add_argument('--vendas', type=int, default=100000)
+    parser.add_argument('--produtos', type=int, default=500)
+    parser.add_argument('--anos', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--fim', help="Último dia dos dados (AAAA-MM-DD, padrão: hoje)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.destino):
+        parser.error(f"{args.destino} já existe")
+
+    fim = datetime.strptime(args.fim, "%Y-%m-%d") if args.fim else None
+    resumo = gerar_dados(Database(args.destino), args.vendas, args.produtos, args.anos,
+                         args.semente, fim)
+    print(f"{resumo['vendas']} vendas, {resumo['produtos']} produtos, {resumo['despesas']} despesas, "
+          f"{resumo['historico_precos']} reajustes de preço entre {resumo['inicio']} e {resumo['fim']} "
+          f"em {resumo['tempo_s']} s")
+
+
+if __name__ == "__main__":
+    main()
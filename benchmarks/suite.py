@@ -0,0 +1,417 @@
+"""
+Suíte de benchmarks do Database, do Analytics e dos dados de cada página web
+Gera (ou reaproveita do cache) um banco sintético por volume de vendas, cronometra cada
+caso e grava um JSON que pode ser comparado entre commits com benchmarks/comparar.py
+
+Uso:
+    python benchmarks/suite.py [--volumes 10000 100000 1000000] [--repeticoes 5]
+                               [--saida resultados.json] [--cache pasta] [--filtro texto]
+                               [--excluir texto ...]
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import Database
+from analytics import Analytics
+from reposicao import planejar_reposicao
+from regras_alertas import limites_alertas
+from utils import Periodo
+from gerador_dados import gerar_dados
+
+VOLUMES_PADRAO = [10000, 100000, 1000000]
+# Produtos gerados para cada volume de vendas
+PRODUTOS_POR_VOLUME = {10000: 200, 100000: 500, 1000000: 2000}
+ANOS_DADOS = 3
+SEMENTE = 42
+# Um caso para de repetir quando já gastou este tempo (depois da primeira medição)
+TEMPO_MAXIMO_CASO_S = 20
+
+# Métodos públicos fora da suíte: administração, E/S de arquivos ou internos,
+# medidos pelos benchmarks próprios (bench_arquivo, bench_indices) ou sem interesse
+NAO_MEDIDOS = {
+    'Database.create_tables': "inicialização",
+    'Database.criar_indices': "inicialização (bench_indices)",
+    'Database.init_default_configs': "inicialização",
+    'Database.get_connection': "interno",
+    'Database.fabrica_conexao': "classe da conexão",
+    'Database.anexar_particoes': "interno das consultas por período",
+    'Database.fonte_particionada': "interno das consultas por período",
+    'Database.caminho_particao': "interno das consultas por período",
+    'Database.criar_tabelas_particao': "interno de arquivar_ano e anexar_particoes",
+    'Database.particoes_uma_a_uma': "interno das buscas em anos arquivados",
+    'Database.venda_de_linha': "interno de iterar_vendas e buscar_venda",
+    'Database.localizar_registro': "interno de buscar_venda, excluir_venda e remover_despesa",
+    'Analytics.janela_historico': "interno das previsões",
+    'Analytics.em_cache': "interno das análises por período",
+    'Analytics.calcular_abc_xyz': "medido por analise_abc_xyz",
+    'Analytics.calcular_rfm': "medido por analise_rfm",
+    'Analytics.calcular_coortes': "medido por coortes_clientes",
+    'Analytics.notas_quintil': "interno do RFM",
+    'Analytics.calcular_precos_lote': "medido por sugestao_precos_lote",
+    'Database.obter_cliente_id': "interno de registrar_venda",
+    'Database.atualizar_resumo_cliente': "interno de registrar_venda e excluir_venda",
+    'Database.reconstruir_resumo_clientes': "migração e geração de dados",
+    'Database.migrar_clientes': "migração",
+    'Database.monitorar_venda': "interno de registrar_venda (bench_anomalias)",
+    'Database.verificar_quedas': "interno de registrar_venda (uma vez por dia)",
+    'Database.gravar_alerta': "interno de registrar_venda",
+    'Database.recalcular_estatisticas_vendas': "migração e geração de dados",
+    'Database.arquivar_ano': "administração (bench_arquivo)",
+    'Database.salvar_plano_reposicao': "gravação do planejamento (bench_reposicao)",
+    'Database.executar_manutencao': "administração",
+    'Database.converter_vacuum_incremental': "administração (VACUUM completo, uma vez)",
+    'Database.criar_backup': "administração (E/S)",
+    'Database.restaurar_backup': "administração (E/S)",
+    'Database.embutir_particoes': "administração (E/S)",
+    'Database.extrair_particoes': "administração (E/S)",
+    'Database.rotacionar_backups': "administração (E/S)",
+    'Database.validar_banco': "administração (E/S)",
+}
+
+
+class Caso(NamedTuple):
+    nome: str
+    grupo: str
+    metodos: Tuple[str, ...]
+    funcao: Callable
+
+
+def commit_atual() -> str:
+    """Hash curto do HEAD (com '-sujo' se houver alterações não commitadas)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip()
+        return commit + ('-sujo' if sujo else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def metodos_publicos() -> List[str]:
+    return [f"{classe.__name__}.{nome}"
+            for classe in (Database, Analytics)
+            for nome, _ in inspect.getmembers(classe, callable)
+            if not nome.startswith('_')]
+
+
+def consumir(iteravel) -> int:
+    return sum(1 for _ in iteravel)
+
+
+def casos_leitura(db: Database, analytics: Analytics, fim: datetime) -> List[Caso]:
+    d = lambda dias: (fim - timedelta(days=dias)).strftime("%Y-%m-%d")
+    hoje = fim.strftime("%Y-%m-%d")
+    mes, ano = (d(30), hoje), (d(365), hoje)
+    mais_vendido = db.get_vendas_por_produto(limite=1)
+    produto_id = mais_vendido[0]['produto_id'] if mais_vendido else 1
+    venda_id = db.get_resumo_vendas()['total_vendas'] // 2 or 1
+    meta_id = db.listar_metas()[0]['id'] if db.listar_metas() else 1
+    if db.data_plano_reposicao() is None:
+        planejar_reposicao(db)
+
+    casos = [
+        ('listar_produtos', lambda: db.listar_produtos(apenas_ativos=False)),
+        ('buscar_produto', lambda: db.buscar_produto(produto_id)),
+        ('produtos_estoque_baixo', db.produtos_estoque_baixo),
+        ('metricas_produtos (30 dias)', db.metricas_produtos),
+        ('listar_categorias', db.listar_categorias),
+        ('listar_vendas (30 dias)', lambda: db.listar_vendas(*mes)),
+        ('listar_vendas (1 ano)', lambda: db.listar_vendas(*ano)),
+        ('iterar_vendas (tudo)', lambda: consumir(db.iterar_vendas())),
+        ('buscar_venda', lambda: db.buscar_venda(venda_id)),
+        ('listar_despesas (1 ano)', lambda: db.listar_despesas(*ano)),
+        ('get_resumo_vendas (30 dias)', lambda: db.get_resumo_vendas(*mes)),
+        ('get_resumo_vendas (tudo)', db.get_resumo_vendas),
+        ('get_lucro_periodo (30 dias)', lambda: db.get_lucro_periodo(*mes)),
+        ('get_lucro_periodo (1 ano)', lambda: db.get_lucro_periodo(*ano)),
+        ('kpis_periodo (30 dias)', lambda: db.kpis_periodo(*mes)),
+        ('kpis_periodo (1 ano)', lambda: db.kpis_periodo(*ano)),
+        ('get_produtos_mais_vendidos', lambda: db.get_produtos_mais_vendidos(10)),
+        ('curva_abc (tudo)', db.curva_abc),
+        ('curva_abc (1 ano)', lambda: db.curva_abc(*ano)),
+        ('curva_abc (demanda diária, 1 ano)', lambda: db.curva_abc(*ano, demanda_diaria=True)),
+        ('get_vendas_por_mes (1 ano)', lambda: db.get_vendas_por_mes(*ano)),
+        ('get_vendas_por_dia (1 ano)', lambda: db.get_vendas_por_dia(*ano)),
+        ('get_vendas_por_dia (por produto, 30 dias)', lambda: db.get_vendas_por_dia(*mes, por_produto=True)),
+        ('get_vendas_por_produto (30 dias)', lambda: db.get_vendas_por_produto(*mes, limite=10)),
+        ('get_despesas_por_categoria (1 ano)', lambda: db.get_despesas_por_categoria(*ano)),
+        ('get_valor_estoque_total', db.get_valor_estoque_total),
+        ('estatisticas_precos', db.estatisticas_precos),
+        ('listar_reajustes (1 ano)', lambda: db.listar_reajustes(*ano)),
+        ('listar_clientes_compras', db.listar_clientes_compras),
+        ('listar_alertas', db.listar_alertas),
+        ('get_coortes_clientes (12 meses)', lambda: db.get_coortes_clientes(d(365)[:7])),
+        ('get_versao_dados', db.get_versao_dados),
+        ('get_config', lambda: db.get_config('nome_empresa')),
+        ('listar_metas', db.listar_metas),
+        ('progresso_meta', lambda: db.progresso_meta(meta_id)),
+        ('progresso_metas', db.progresso_metas),
+        ('listar_plano_reposicao', db.listar_plano_reposicao),
+        ('data_plano_reposicao', db.data_plano_reposicao),
+        ('listar_particoes', db.listar_particoes),
+        ('status_manutencao', db.status_manutencao),
+        ('historico_manutencao', db.historico_manutencao),
+        ('listar_backups', db.listar_backups),
+        ('pasta_backups', db.pasta_backups),
+    ]
+    resultado = [Caso(f"Database.{nome}", 'database', (f"Database.{nome.split(' ')[0]}",), funcao)
+                 for nome, funcao in casos]
+
+    casos_analytics = [
+        ('analise_abc', lambda: (analytics.cache_periodos.clear(), analytics.analise_abc())),
+        ('analise_abc (em cache)', analytics.analise_abc),
+        ('analise_abc_xyz (90 dias)', lambda: (analytics.cache_periodos.clear(), analytics.analise_abc_xyz())),
+        ('analise_abc_xyz (1 ano)', lambda: (analytics.cache_periodos.clear(), analytics.analise_abc_xyz(*ano))),
+        ('analise_rfm', lambda: (analytics.cache_periodos.clear(), analytics.analise_rfm())),
+        ('analise_rfm (em cache)', analytics.analise_rfm),
+        ('coortes_clientes', lambda: (analytics.cache_periodos.clear(), analytics.coortes_clientes())),
+        ('produtos_baixa_rotatividade', analytics.produtos_baixa_rotatividade),
+        ('previsao_reposicao', analytics.previsao_reposicao),
+        ('previsao_reposicao (recalcular)', lambda: analytics.previsao_reposicao(recalcular=True)),
+        ('sugestao_precos', lambda: analytics.sugestao_precos(produto_id)),
+        ('sugestao_precos_lote', lambda: (analytics.cache_periodos.clear(), analytics.sugestao_precos_lote())),
+        ('sugestao_precos_lote (em cache)', analytics.sugestao_precos_lote),
+        ('elasticidades_precos', analytics.elasticidades_precos),
+        ('previsao_vendas', analytics.previsao_vendas),
+        ('previsao_produtos', analytics.previsao_produtos),
+        ('metricas_produtos', lambda: (analytics.cache_periodos.clear(), analytics.metricas_produtos())),
+        ('alertas_regras', analytics.alertas_regras),
+        ('gerar_alertas_inteligentes', analytics.gerar_alertas_inteligentes),
+        ('analise_sazonalidade', analytics.analise_sazonalidade),
+    ]
+    resultado += [Caso(f"Analytics.{nome}", 'analytics', (f"Analytics.{nome.split(' ')[0]}",), funcao)
+                  for nome, funcao in casos_analytics]
+    return resultado
+
+
+def casos_web(db: Database) -> List[Caso]:
+    """Consultas que cada página do app_web faz ao abrir (com os filtros padrão)"""
+    def ultimos(dias):
+        agora = datetime.now()
+        return (agora - timedelta(days=dias)).strftime("%Y-%m-%d"), agora.strftime("%Y-%m-%d")
+
+    def dashboard():
+        db.kpis_periodo(Periodo.hoje(), Periodo.hoje())
+        db.listar_vendas(Periodo.hoje(), Periodo.hoje())
+        db.get_produtos_mais_vendidos(5)
+
+    def produtos():
+        db.listar_categorias()
+        db.listar_produtos(apenas_ativos=False)
+        db.produtos_estoque_baixo()
+        db.listar_produtos(apenas_ativos=True)
+
+    def vendas():
+        db.listar_vendas(*ultimos(30))
+        db.listar_produtos()
+        db.listar_vendas(*ultimos(30))
+
+    def financeiro():
+        db.get_resumo_vendas(Periodo.hoje(), Periodo.hoje())
+        db.get_lucro_periodo(Periodo.hoje(), Periodo.hoje())
+        db.listar_vendas(Periodo.hoje(), Periodo.hoje())
+        db.listar_despesas(Periodo.hoje(), Periodo.hoje())
+        db.listar_categorias()
+        db.listar_despesas(*ultimos(30))
+        db.listar_vendas(*ultimos(90))
+        db.listar_despesas(*ultimos(90))
+
+    def relatorios():
+        db.curva_abc()
+        db.listar_clientes_compras()
+        db.get_coortes_clientes(Periodo.ultimos_n_dias(365)[0][:7])
+        db.listar_alertas()
+        db.get_resumo_vendas(Periodo.inicio_mes(), Periodo.fim_mes())
+        db.metricas_produtos()
+        limites_alertas(db)
+        db.listar_despesas(Periodo.inicio_mes(), Periodo.fim_mes())
+        db.listar_vendas(Periodo.inicio_mes(), Periodo.fim_mes())
+
+    return [Caso(f"web.{funcao.__name__}", 'web', (), funcao)
+            for funcao in (dashboard, produtos, vendas, financeiro, relatorios)]
+
+
+def casos_escrita(db: Database, fim: datetime) -> List[Caso]:
+    """Alterações (rodam por último; cada repetição usa um registro novo)"""
+    contador = itertools.count(1)
+    categoria_id = db.listar_categorias()[0]['id']
+    produtos_novos = []
+    total_vendas = db.get_resumo_vendas()['total_vendas']
+    vendas_excluir = iter(range(total_vendas, 0, -1))
+    despesas_remover = iter(range(len(db.listar_despesas()), 0, -1))
+    mais_vendido = db.get_vendas_por_produto(limite=1)
+    produto_id = mais_vendido[0]['produto_id'] if mais_vendido else 1
+    hoje = fim.strftime("%Y-%m-%d")
+
+    def adicionar_produto():
+        produtos_novos.append(db.adicionar_produto(f"Bench {next(contador)}", "", categoria_id,
+                                                   10.0, 20.0, 100))
+
+    def excluir_produto_permanente():
+        db.excluir_produto_permanente(produtos_novos.pop() if produtos_novos
+                                      else db.adicionar_produto("Bench", "", categoria_id, 10.0, 20.0))
+
+    def remover_produto():
+        db.remover_produto(produtos_novos[-1] if produtos_novos else produto_id)
+
+    casos = [
+        ('registrar_venda', lambda: db.registrar_venda(produto_id, 1, "Cliente bench")),
+        ('excluir_venda', lambda: db.excluir_venda(next(vendas_excluir))),
+        ('marcar_alertas_lidos', db.marcar_alertas_lidos),
+        ('adicionar_despesa', lambda: db.adicionar_despesa("Bench", 10.0, "Outros", hoje)),
+        ('remover_despesa', lambda: db.remover_despesa(next(despesas_remover))),
+        ('adicionar_categoria', lambda: db.adicionar_categoria(f"Bench {next(contador)}")),
+        ('adicionar_produto', adicionar_produto),
+        ('atualizar_produto', lambda: db.atualizar_produto(produto_id, preco_venda=30.0 + next(contador) % 7)),
+        ('atualizar_estoque', lambda: db.atualizar_estoque(produto_id, 1)),
+        ('atualizar_produto_status', lambda: db.atualizar_produto_status(produto_id, True)),
+        ('remover_produto', remover_produto),
+        ('excluir_produto_permanente', excluir_produto_permanente),
+        ('set_config', lambda: db.set_config('bench', str(next(contador)))),
+        ('adicionar_meta', lambda: db.adicionar_meta('RECEITA', 1000.0, 'MENSAL', hoje, hoje)),
+        ('desativar_meta', lambda: db.desativar_meta(db.adicionar_meta('VENDAS', 1, 'MENSAL', hoje, hoje))),
+    ]
+    return [Caso(f"Database.{nome}", 'escrita', (f"Database.{nome}",), funcao) for nome, funcao in casos]
+
+
+def cronometrar(funcao: Callable, repeticoes: int) -> Dict:
+    """Uma execução de aquecimento e até `repeticoes` medidas (limitadas pelo tempo do caso)"""
+    inicio = time.perf_counter()
+    funcao()
+    aquecimento = time.perf_counter() - inicio
+    tempos = []
+    gasto = 0.0
+    # Caso muito lento: o aquecimento vale como a única medição
+    if aquecimento >= TEMPO_MAXIMO_CASO_S:
+        tempos.append(aquecimento)
+        gasto = aquecimento
+    while len(tempos) < repeticoes and (not tempos or gasto < TEMPO_MAXIMO_CASO_S):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+        gasto += tempos[-1]
+    return {
+        'min_ms': round(min(tempos) * 1000, 3),
+        'mediana_ms': round(statistics.median(tempos) * 1000, 3),
+        'media_ms': round(statistics.mean(tempos) * 1000, 3),
+        'max_ms': round(max(tempos) * 1000, 3),
+        'execucoes': len(tempos)
+    }
+
+
+def preparar_banco(volume: int, pasta: str, cache: str = None) -> Tuple[str, Dict]:
+    """Copia o banco do cache (ou gera um novo) para `pasta`; retorna o caminho e o resumo dos dados"""
+    produtos = PRODUTOS_POR_VOLUME.get(volume, max(200, volume // 500))
+    fim = datetime.now()
+    nome = f"bench_{volume}_{produtos}_{ANOS_DADOS}_{SEMENTE}_{fim:%Y%m%d}.db"
+    destino = os.path.join(pasta, nome)
+
+    if cache and os.path.exists(os.path.join(cache, nome)):
+        shutil.copy2(os.path.join(cache, nome), destino)
+        with open(os.path.join(cache, nome + '.json'), encoding='utf-8') as arquivo:
+            return destino, json.load(arquivo)
+
+    resumo = gerar_dados(Database(destino), volume, produtos, ANOS_DADOS, SEMENTE, fim)
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+        # Cópia consistente (o banco está em WAL)
+        origem = sqlite3.connect(destino)
+        copia = sqlite3.connect(os.path.join(cache, nome))
+        origem.backup(copia)
+        copia.close()
+        origem.close()
+        with open(os.path.join(cache, nome + '.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(resumo, arquivo)
+    return destino, resumo
+
+
+def medir_volume(volume: int, repeticoes: int, cache: str = None, filtro: str = None,
+                 excluir: List[str] = ()) -> Tuple[Dict, set]:
+    pasta = tempfile.mkdtemp()
+    try:
+        caminho, dados = preparar_banco(volume, pasta, cache)
+        dados['tamanho_mb'] = round(os.path.getsize(caminho) / 1024 / 1024, 1)
+        db = Database(caminho)
+        analytics = Analytics(db)
+        fim = datetime.strptime(dados['fim'], "%Y-%m-%d")
+
+        # Escritas por último: os casos de leitura medem o banco como foi gerado
+        casos = casos_leitura(db, analytics, fim) + casos_web(db) + casos_escrita(db, fim)
+        cobertos = {metodo for caso in casos for metodo in caso.metodos}
+
+        resultados = {}
+        for caso in casos:
+            if (filtro and filtro not in caso.nome) or any(texto in caso.nome for texto in excluir):
+                continue
+            medicao = cronometrar(caso.funcao, repeticoes)
+            medicao['grupo'] = caso.grupo
+            resultados[caso.nome] = medicao
+            print(f"  {caso.nome:<45}{medicao['mediana_ms']:>12.2f} ms  (mín {medicao['min_ms']:.2f}, "
+                  f"{medicao['execucoes']}x)", flush=True)
+        return {'dados': dados, 'casos': resultados}, cobertos
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks (JSON comparável entre commits)")
+    parser.add_argument('--volumes', type=int, nargs='+', default=VOLUMES_PADRAO,
+                        help="Quantidades de vendas geradas")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--saida', help="Arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--cache', help="Pasta onde os bancos gerados são guardados para as próximas execuções")
+    parser.add_argument('--filtro', help="Mede só os casos cujo nome contém este texto")
+    parser.add_argument('--excluir', nargs='+', default=[],
+                        help="Pula os casos cujo nome contém algum destes textos")
+    args = parser.parse_args()
+
+    commit = commit_atual()
+    resultado = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'repeticoes': args.repeticoes,
+        'volumes': {}
+    }
+
+    cobertos = set()
+    for volume in args.volumes:
+        print(f"{volume} vendas", flush=True)
+        resultado['volumes'][str(volume)], cobertos_volume = medir_volume(
+            volume, args.repeticoes, args.cache, args.filtro, args.excluir
+        )
+        cobertos |= cobertos_volume
+
+    resultado['nao_medidos'] = sorted(set(metodos_publicos()) - cobertos - set(NAO_MEDIDOS))
+    if resultado['nao_medidos']:
+        print(f"Métodos públicos sem caso na suíte: {', '.join(resultado['nao_medidos'])}")
+
+    saida = args.saida or os.path.join(RAIZ, 'benchmarks', 'resultados', f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Tela de Configurações - Tema e preferências do sistema
 import customtkinter as ctk
 from tkinter import messagebox
 from database import Database
+from regras_alertas import LIMITES_ALERTAS
+import threading
 
 class Configuracoes(ctk.CTkFrame):
     def __init__(self, parent, db: Database, app_callback=None):
@@ -34,6 +36,12 @@ class Configuracoes(ctk.CTkFrame):
         # Seção de Preços
         self.criar_secao_precos(container)
         
+        # Seção de Alertas
+        self.criar_secao_alertas(container)
+        
+        # Seção de Manutenção do banco
+        self.criar_secao_manutencao(container)
+        
         # Seção de Informações
         self.criar_secao_info(container)
         
@@ -193,6 +201,190 @@ class Configuracoes(ctk.CTkFrame):
             text_color="gray"
         ).pack(side="left", padx=5)
     
+    def criar_secao_alertas(self, parent):
+        """Cria seção com os limites das regras de alerta (regras_alertas.py)"""
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", pady=(0, 20), padx=20)
+        
+        label_titulo = ctk.CTkLabel(
+            frame,
+            text="🔔 Alertas Inteligentes",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        label_titulo.pack(pady=15, anchor="w", padx=15)
+        
+        self.entries_limites = {}
+        for chave, (descricao, unidade, padrao) in LIMITES_ALERTAS.items():
+            frame_limite = ctk.CTkFrame(frame, fg_color="transparent")
+            frame_limite.pack(fill="x", padx=15, pady=(0, 10))
+            
+            ctk.CTkLabel(
+                frame_limite,
+                text=f"{descricao}:",
+                font=ctk.CTkFont(size=13)
+            ).pack(side="left", padx=(0, 15))
+            
+            entry = ctk.CTkEntry(
+                frame_limite,
+                width=100,
+                placeholder_text=str(padrao)
+            )
+            entry.pack(side="left", padx=5)
+            self.entries_limites[chave] = entry
+            
+            ctk.CTkLabel(
+                frame_limite,
+                text=unidade,
+                font=ctk.CTkFont(size=12),
+                text_color="gray"
+            ).pack(side="left", padx=5)
+    
+    def criar_secao_manutencao(self, parent):
+        """Cria seção de manutenção do banco de dados"""
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", pady=(0, 20), padx=20)
+        
+        label_titulo = ctk.CTkLabel(
+            frame,
+            text="🛠️ Manutenção do Banco",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        label_titulo.pack(pady=15, anchor="w", padx=15)
+        
+        # Intervalo da manutenção automática
+        frame_intervalo = ctk.CTkFrame(frame, fg_color="transparent")
+        frame_intervalo.pack(fill="x", padx=15, pady=(0, 15))
+        
+        ctk.CTkLabel(
+            frame_intervalo,
+            text="Executar manutenção automática a cada:",
+            font=ctk.CTkFont(size=13)
+        ).pack(side="left", padx=(0, 15))
+        
+        self.entry_intervalo_manutencao = ctk.CTkEntry(
+            frame_intervalo,
+            width=100,
+            placeholder_text="6"
+        )
+        self.entry_intervalo_manutencao.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(
+            frame_intervalo,
+            text="horas",
+            font=ctk.CTkFont(size=12),
+            text_color="gray"
+        ).pack(side="left", padx=5)
+        
+        self.btn_manutencao = ctk.CTkButton(
+            frame_intervalo,
+            text="🧹 Executar agora",
+            command=self.executar_manutencao,
+            width=160
+        )
+        self.btn_manutencao.pack(side="right", padx=5)
+        
+        # Situação do arquivo e tempos da última execução
+        self.frame_status_manutencao = ctk.CTkFrame(frame, fg_color="transparent")
+        self.frame_status_manutencao.pack(fill="x", padx=15, pady=(0, 15))
+        self.atualizar_status_manutencao()
+    
+    def atualizar_status_manutencao(self):
+        """Mostra tamanho, espaço livre, WAL e os tempos da última manutenção"""
+        for widget in self.frame_status_manutencao.winfo_children():
+            widget.destroy()
+        
+        status = self.db.status_manutencao()
+        linhas = [
+            f"Tamanho do banco: {status['tamanho_bytes'] / 1048576:.1f} MB "
+            f"({status['livre_bytes'] / 1048576:.1f} MB em páginas livres)",
+            f"Journal: {status['journal_mode'].upper()} ({status['wal_bytes'] / 1024:.0f} KB no WAL)  |  "
+            f"auto_vacuum: {status['auto_vacuum']}"
+        ]
+        
+        historico = self.db.historico_manutencao(8)
+        if historico:
+            ultima = historico[0]['data_execucao']
+            linhas.append(f"Última manutenção: {ultima}")
+            for etapa in reversed([h for h in historico if h['data_execucao'] == ultima]):
+                detalhes = f" - {etapa['detalhes']}" if etapa['detalhes'] else ""
+                linhas.append(f"    {etapa['etapa']}: {etapa['duracao_ms']:.0f} ms{detalhes}")
+        else:
+            linhas.append("Nenhuma manutenção executada ainda")
+        
+        for texto in linhas:
+            ctk.CTkLabel(
+                self.frame_status_manutencao,
+                text=texto,
+                font=ctk.CTkFont(size=12),
+                anchor="w"
+            ).pack(fill="x", padx=5, pady=1)
+        
+        # A manutenção automática só faz vacuum incremental; a conversão é feita aqui, quando o usuário pedir
+        if status['auto_vacuum'] != 'INCREMENTAL':
+            self.btn_converter_vacuum = ctk.CTkButton(
+                self.frame_status_manutencao,
+                text="🗜️ Converter para vacuum incremental",
+                command=self.converter_vacuum,
+                width=260
+            )
+            self.btn_converter_vacuum.pack(anchor="w", padx=5, pady=(8, 0))
+    
+    def converter_vacuum(self):
+        """Conversão única para auto_vacuum incremental (VACUUM completo), após confirmação"""
+        status = self.db.status_manutencao()
+        if not messagebox.askyesno(
+            "Converter banco",
+            f"O banco ({status['tamanho_bytes'] / 1048576:.1f} MB) será reescrito por completo. "
+            "Enquanto isso, vendas e alterações ficam aguardando.\n\nDeseja continuar?"
+        ):
+            return
+        
+        self.erro_conversao_vacuum = None
+        
+        def converter():
+            try:
+                self.db.converter_vacuum_incremental()
+            except Exception as e:
+                self.erro_conversao_vacuum = str(e)
+        
+        self.conversao_vacuum = threading.Thread(target=converter, daemon=True)
+        self.conversao_vacuum.start()
+        self.btn_converter_vacuum.configure(state="disabled", text="⏳ Convertendo...")
+        self.after(500, self.aguardar_conversao_vacuum)
+    
+    def aguardar_conversao_vacuum(self):
+        """Atualiza a situação do banco quando a conversão termina"""
+        if self.conversao_vacuum.is_alive():
+            self.after(500, self.aguardar_conversao_vacuum)
+            return
+        if self.erro_conversao_vacuum:
+            messagebox.showerror("Erro", f"Erro ao converter o banco: {self.erro_conversao_vacuum}")
+        self.atualizar_status_manutencao()
+    
+    def executar_manutencao(self):
+        """Pede ao agendador do App uma manutenção imediata e acompanha até terminar"""
+        historico = self.db.historico_manutencao(1)
+        self.ultimo_id_manutencao = historico[0]['id'] if historico else 0
+        
+        enviada = self.app_callback('manutencao_solicitada', None) if self.app_callback else False
+        if not enviada:
+            # Tela aberta sem o agendador: executa em uma thread própria
+            threading.Thread(
+                target=self.db.executar_manutencao, kwargs={'forcar': True}, daemon=True
+            ).start()
+        
+        self.btn_manutencao.configure(state="disabled", text="⏳ Executando...")
+        self.after(500, self.aguardar_manutencao, 0)
+    
+    def aguardar_manutencao(self, tentativas):
+        """Verifica a cada 0,5 s se a manutenção gravou um novo registro (desiste após 10 min)"""
+        historico = self.db.historico_manutencao(1)
+        if (historico and historico[0]['id'] > self.ultimo_id_manutencao) or tentativas >= 1200:
+            self.btn_manutencao.configure(state="normal", text="🧹 Executar agora")
+            self.atualizar_status_manutencao()
+            return
+        self.after(500, self.aguardar_manutencao, tentativas + 1)
+    
     def criar_secao_info(self, parent):
         """Cria seção de informações"""
         frame = ctk.CTkFrame(parent)
@@ -303,6 +495,19 @@ class Configuracoes(ctk.CTkFrame):
         if margem:
             self.entry_margem_padrao.delete(0, "end")
             self.entry_margem_padrao.insert(0, margem)
+        
+        # Limites dos alertas
+        for chave, entry in self.entries_limites.items():
+            valor = self.db.get_config(chave)
+            if valor:
+                entry.delete(0, "end")
+                entry.insert(0, valor)
+        
+        # Intervalo da manutenção
+        intervalo = self.db.get_config('manutencao_intervalo_horas')
+        if intervalo:
+            self.entry_intervalo_manutencao.delete(0, "end")
+            self.entry_intervalo_manutencao.insert(0, intervalo)
     
     def mudar_tema(self):
         """Muda o tema da aplicação"""
@@ -334,6 +539,19 @@ class Configuracoes(ctk.CTkFrame):
             if margem and margem.replace('.', '').replace(',', '').isdigit():
                 self.db.set_config('margem_padrao', margem)
             
+            # Salvar limites dos alertas
+            for chave, entry in self.entries_limites.items():
+                valor = entry.get().strip().replace(',', '.')
+                if valor and valor.replace('.', '', 1).isdigit():
+                    self.db.set_config(chave, valor)
+            
+            # Salvar intervalo da manutenção
+            intervalo = self.entry_intervalo_manutencao.get().strip()
+            if intervalo and intervalo.isdigit() and int(intervalo) > 0:
+                self.db.set_config('manutencao_intervalo_horas', intervalo)
+                if self.app_callback:
+                    self.app_callback('manutencao_intervalo', int(intervalo))
+            
             # Salvar escala (para futura implementação)
             escala = str(self.slider_escala.get())
             self.db.set_config('escala_ui', escala)
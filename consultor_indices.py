@@ -0,0 +1,428 @@
+"""
+Consultor de índices
+Registra as consultas executadas pelo Database, roda EXPLAIN QUERY PLAN em cada consulta
+distinta e propõe índices de cobertura ou parciais, testando cada proposta antes de sugerir
+
+Uso:
+    python consultor_indices.py [--banco gestao_vendas.db] [--aplicar]
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import argparse
+import re
+import sqlite3
+import threading
+import time
+
+from database import Database
+
+# Máximo de colunas em um índice proposto (acima disso desiste da cobertura)
+MAX_COLUNAS_INDICE = 6
+# Linhas lidas por índice no ANALYZE feito para avaliar as propostas
+LIMITE_ANALISE = 1000
+# Tabelas menores que isso (linhas, pelo sqlite_stat1) não recebem propostas: a leitura já é barata
+MIN_LINHAS_TABELA = 1000
+# Ganho mínimo para propor: fração do tempo da consulta e milissegundos (melhor de REPETICOES_TEMPO)
+GANHO_MINIMO = 0.2
+GANHO_MINIMO_MS = 0.5
+REPETICOES_TEMPO = 3
+
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_LISTA = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_RE_TABELAS = re.compile(r"\b(?:FROM|JOIN)\s+(?:main\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_PALAVRAS_SQL = {'where', 'join', 'left', 'inner', 'on', 'group', 'order', 'limit', 'union', 'cross'}
+
+
+def impressao_digital(sql: str) -> str:
+    """
+    Normaliza o SQL trocando literais por ? (consultas iguais com valores diferentes se agrupam);
+    listas IN (?, ?, ...) viram IN (?...) e espaços são compactados. Usada também por instrumentacao.py
+    """
+    sql = _RE_TEXTO.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_ESPACOS.sub(' ', sql).strip()
+    return _RE_LISTA.sub('IN (?...)', sql)
+
+
+def clausula(sql: str, inicio: str, fins: Tuple[str, ...]) -> str:
+    """Trecho do SQL entre a palavra-chave `inicio` e a próxima de `fins` (ou o fim)"""
+    achado = re.search(rf"\b{inicio}\b", sql, re.IGNORECASE)
+    if not achado:
+        return ''
+    resto = sql[achado.end():]
+    corte = len(resto)
+    for fim in fins:
+        proximo = re.search(rf"\b{fim}\b", resto, re.IGNORECASE)
+        if proximo:
+            corte = min(corte, proximo.start())
+    return resto[:corte]
+
+
+class ConsultorIndices:
+    """
+    Grava as consultas do Database (via rastreador das conexões) e propõe índices
+    Uso: `with ConsultorIndices(db) as consultor: ...; propostas = consultor.analisar()`
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.consultas: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.rastreador_anterior = None
+
+    # ==================== GRAVAÇÃO ====================
+
+    def registrar(self, sql: str):
+        """Rastreador das conexões: guarda um exemplo e a contagem de cada consulta distinta"""
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return
+        chave = impressao_digital(sql)
+        with self.lock:
+            consulta = self.consultas.setdefault(chave, {'sql': sql, 'execucoes': 0})
+            consulta['execucoes'] += 1
+
+    def iniciar(self):
+        self.rastreador_anterior = self.db.rastreador
+        self.db.rastreador = self.registrar
+
+    def parar(self):
+        self.db.rastreador = self.rastreador_anterior
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *args):
+        self.parar()
+
+    # ==================== ANÁLISE ====================
+
+    @staticmethod
+    def plano(cursor, sql: str) -> List[str]:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[3] for row in cursor.fetchall()]
+
+    @staticmethod
+    def problemas_plano(plano: List[str]) -> List[str]:
+        """Etapas do plano que um índice pode eliminar"""
+        problemas = []
+        for etapa in plano:
+            if etapa.startswith(('SCAN', 'SEARCH')):
+                if 'COVERING INDEX' in etapa or 'PRIMARY KEY' in etapa or 'subquery' in etapa:
+                    continue
+                if 'USING INDEX' in etapa:
+                    problemas.append(etapa + ' (lê a tabela)')
+                elif etapa.startswith('SCAN'):
+                    problemas.append(etapa)
+            elif etapa.startswith('USE TEMP B-TREE'):
+                problemas.append(etapa)
+        return problemas
+
+    @staticmethod
+    def tempo_consulta(cursor, sql: str) -> float:
+        """Melhor tempo (ms) de REPETICOES_TEMPO execuções"""
+        tempos = []
+        for _ in range(REPETICOES_TEMPO):
+            inicio = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return min(tempos)
+
+    @staticmethod
+    def linhas_tabela(cursor, tabela: str) -> int:
+        """Linhas da tabela segundo o sqlite_stat1 (contagem limitada se não houver estatística)"""
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1', (tabela,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            return int(row[0].split()[0])
+        cursor.execute(f'SELECT COUNT(*) FROM (SELECT 1 FROM {tabela} LIMIT {MIN_LINHAS_TABELA})')
+        return cursor.fetchone()[0]
+
+    def colunas_tabela(self, cursor, tabela: str) -> Dict[str, str]:
+        cursor.execute(f'PRAGMA table_info({tabela})')
+        return {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+
+    @staticmethod
+    def eh_indicador(cursor, tabela: str, coluna: str) -> bool:
+        """Coluna com no máximo dois valores distintos (flags como ativo)"""
+        cursor.execute(f'SELECT COUNT(*) FROM (SELECT DISTINCT {coluna} FROM {tabela} LIMIT 3)')
+        return cursor.fetchone()[0] <= 2
+
+    def indices_existentes(self, cursor, tabela: str) -> List[Tuple[str, List[str], bool]]:
+        """Nome, colunas e se é parcial, para cada índice comum (não único) da tabela"""
+        cursor.execute(f'PRAGMA index_list({tabela})')
+        indices = []
+        for row in cursor.fetchall():
+            if row[2]:
+                continue
+            cursor.execute(f'PRAGMA index_info({row[1]})')
+            indices.append((row[1], [info[2] for info in cursor.fetchall()], bool(row[4])))
+        return indices
+
+    def propor_para_tabela(self, cursor, sql: str, tabela: str, alias: str,
+                           unica_tabela: bool) -> Optional[Dict]:
+        """Monta o índice: igualdades, primeira faixa, GROUP BY/ORDER BY e o resto das colunas lidas"""
+        colunas = self.colunas_tabela(cursor, tabela)
+        if not colunas:
+            return None
+
+        def referencias(trecho):
+            achadas = [c for c in re.findall(rf"\b{alias}\.(\w+)", trecho) if c in colunas]
+            if unica_tabela:
+                achadas += [c for c in colunas if re.search(rf"(?<![\w.]){c}\b", trecho)]
+            return list(dict.fromkeys(achadas))
+
+        where = clausula(sql, 'WHERE', ('GROUP', 'ORDER', 'LIMIT'))
+        agrupamento = clausula(sql, 'GROUP BY', ('ORDER', 'LIMIT', 'HAVING'))
+        ordenacao = clausula(sql, 'ORDER BY', ('LIMIT',))
+
+        igualdades, faixas, parcial, avisos = [], [], None, []
+        # Colunas do ON entram só como cobertura: o planejador escolhe a ordem da junção
+        for coluna in referencias(where):
+            ref = rf"(?:\b{alias}\.|(?<![\w.])){coluna}\b"
+            if re.search(rf"\w\(\s*{ref}", where):
+                avisos.append(f"função sobre {coluna} no WHERE impede o uso de índice")
+            literal = re.search(rf"{ref}\s*=\s*('(?:[^']|'')*'|\d+)", where)
+            if literal and self.eh_indicador(cursor, tabela, coluna):
+                # Coluna de dois valores (ex.: ativo): melhor como índice parcial do que como chave
+                parcial = f"{coluna} = {literal.group(1)}"
+            elif re.search(rf"{ref}\s*(?:=|\bIN\b)", where, re.IGNORECASE):
+                igualdades.append(coluna)
+            elif re.search(rf"{ref}\s*(?:>=|<=|<|>|\bBETWEEN\b)", where, re.IGNORECASE):
+                faixas.append(coluna)
+
+        chave = igualdades + faixas[:1]
+        for coluna in referencias(agrupamento) + referencias(ordenacao):
+            if not faixas and coluna not in chave:
+                chave.append(coluna)
+        chave = [c for c in dict.fromkeys(chave) if c != 'id']
+
+        lidas = [c for c in referencias(sql) if c not in chave and c != 'id'
+                 and (not parcial or not parcial.startswith(c + ' '))]
+        indice = chave + lidas if len(chave) + len(lidas) <= MAX_COLUNAS_INDICE else chave
+        if not indice:
+            return {'tabela': tabela, 'chave': [], 'colunas': [], 'parcial': parcial,
+                    'substitui': [], 'avisos': avisos}
+
+        # Já existe um índice com a mesma chave que também tem as colunas lidas?
+        # Os que forem só um prefixo do novo ficam redundantes e são substituídos
+        substitui = []
+        for nome, existentes, eh_parcial in self.indices_existentes(cursor, tabela):
+            if (existentes[:len(chave)] == chave and set(indice) <= set(existentes)
+                    and eh_parcial == bool(parcial)):
+                return None
+            if not eh_parcial and not parcial and indice[:len(existentes)] == existentes:
+                substitui.append(nome)
+
+        return {'tabela': tabela, 'chave': chave, 'colunas': indice, 'parcial': parcial,
+                'substitui': substitui, 'avisos': avisos}
+
+    def analisar(self) -> List[Dict]:
+        """
+        Roda EXPLAIN QUERY PLAN nas consultas gravadas e testa um índice para cada problema
+        O índice é criado dentro de um SAVEPOINT e desfeito; só entra nas propostas se o plano melhorar
+        e a consulta ficar mensuravelmente mais rápida (tabelas pequenas são ignoradas)
+        """
+        with self.lock:
+            consultas = sorted(self.consultas.values(), key=lambda c: -c['execucoes'])
+
+        conn = sqlite3.connect(self.db.db_name, isolation_level=None)
+        cursor = conn.cursor()
+        propostas = []
+        vistas = set()
+
+        # Planos sem estatísticas não refletem o uso real (a manutenção roda ANALYZE);
+        # se o banco ainda não tem, gera uma amostra que é desfeita no final
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        sem_estatisticas = cursor.fetchone() is None
+        cursor.execute('SAVEPOINT estatisticas')
+        cursor.execute(f'PRAGMA analysis_limit = {LIMITE_ANALISE}')
+        if sem_estatisticas:
+            cursor.execute('ANALYZE')
+
+        for consulta in consultas:
+            sql = consulta['sql']
+            try:
+                plano_antes = self.plano(cursor, sql)
+            except sqlite3.Error:
+                continue  # Ex.: consultas com partições anexadas
+
+            problemas = self.problemas_plano(plano_antes)
+            if not problemas:
+                continue
+
+            tabelas = [(t, a if a and a.lower() not in _PALAVRAS_SQL else t)
+                       for t, a in _RE_TABELAS.findall(sql)]
+            for tabela, alias in tabelas:
+                proposta = self.propor_para_tabela(cursor, sql, tabela, alias, len(tabelas) == 1)
+                if not proposta:
+                    continue
+                if not proposta['colunas']:
+                    if proposta['avisos']:
+                        propostas.append({**proposta, 'sql': sql, 'execucoes': consulta['execucoes'],
+                                          'nome': None, 'definicao': None, 'plano_antes': plano_antes,
+                                          'plano_depois': plano_antes, 'tempo_antes_ms': None,
+                                          'tempo_depois_ms': None})
+                    continue
+
+                nome = f"idx_sug_{tabela}_" + '_'.join(proposta['colunas'])[:40]
+                definicao = f"{tabela}({', '.join(proposta['colunas'])})"
+                if proposta['parcial']:
+                    definicao += f" WHERE {proposta['parcial']}"
+                if definicao in vistas or self.linhas_tabela(cursor, tabela) < MIN_LINHAS_TABELA:
+                    continue
+
+                tempo_antes = self.tempo_consulta(cursor, sql)
+                cursor.execute('SAVEPOINT consultor')
+                try:
+                    cursor.execute(f'CREATE INDEX {nome} ON {definicao}')
+                    cursor.execute(f'ANALYZE {nome}')
+                    for redundante in proposta['substitui']:
+                        cursor.execute(f'DROP INDEX {redundante}')
+                    plano_depois = self.plano(cursor, sql)
+                    tempo_depois = self.tempo_consulta(cursor, sql)
+                finally:
+                    cursor.execute('ROLLBACK TO consultor')
+                    cursor.execute('RELEASE consultor')
+
+                # Só propõe se o índice foi usado e eliminou leituras da tabela ou ordenações
+                usado = any(nome in etapa for etapa in plano_depois)
+                problemas_depois = self.problemas_plano(plano_depois)
+                leituras = lambda etapas: sum(not e.startswith('USE TEMP') for e in etapas)
+                melhorou = (leituras(problemas_depois) < leituras(problemas)
+                            or (leituras(problemas_depois) == leituras(problemas)
+                                and len(problemas_depois) < len(problemas)))
+                # e se o ganho de tempo for mensurável (o plano sozinho não basta)
+                ganho = tempo_antes - tempo_depois
+                if (not usado or not melhorou or ganho < GANHO_MINIMO_MS
+                        or ganho < tempo_antes * GANHO_MINIMO):
+                    continue
+
+                vistas.add(definicao)
+                propostas.append({
+                    **proposta,
+                    'sql': sql,
+                    'execucoes': consulta['execucoes'],
+                    'nome': nome,
+                    'definicao': definicao,
+                    'plano_antes': plano_antes,
+                    'plano_depois': plano_depois,
+                    'tempo_antes_ms': tempo_antes,
+                    'tempo_depois_ms': tempo_depois
+                })
+
+        cursor.execute('ROLLBACK TO estatisticas')
+        cursor.execute('RELEASE estatisticas')
+        conn.close()
+        return propostas
+
+    @staticmethod
+    def consolidar(propostas: List[Dict]) -> List[Tuple[str, str]]:
+        """
+        Junta propostas com a mesma tabela, chave e filtro parcial em um único índice
+        com todas as colunas lidas; retorna (nome, definição, índices substituídos)
+        """
+        grupos: Dict[Tuple, List[str]] = {}
+        substituidos: Dict[Tuple, List[str]] = {}
+        for proposta in propostas:
+            if not proposta.get('definicao'):
+                continue
+            grupo = (proposta['tabela'], tuple(proposta['chave']), proposta['parcial'])
+            colunas = grupos.setdefault(grupo, list(proposta['chave']))
+            colunas += [c for c in proposta['colunas'] if c not in colunas]
+            redundantes = substituidos.setdefault(grupo, [])
+            redundantes += [n for n in proposta['substitui'] if n not in redundantes]
+
+        indices = []
+        for grupo, colunas in grupos.items():
+            tabela, chave, parcial = grupo
+            if len(colunas) > MAX_COLUNAS_INDICE:
+                colunas = list(chave) or colunas[:MAX_COLUNAS_INDICE]
+            nome = f"idx_sug_{tabela}_" + '_'.join(colunas)[:40]
+            definicao = f"{tabela}({', '.join(colunas)})" + (f" WHERE {parcial}" if parcial else '')
+            indices.append((nome, definicao, substituidos[grupo]))
+        return indices
+
+    def aplicar(self, propostas: List[Dict]) -> List[str]:
+        """Cria os índices propostos (consolidados) e atualiza as estatísticas"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        criados = []
+        for nome, definicao, substitui in self.consolidar(propostas):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON {definicao}')
+            for redundante in substitui:
+                cursor.execute(f'DROP INDEX IF EXISTS {redundante}')
+            criados.append(nome)
+        if criados:
+            cursor.execute('ANALYZE')
+        conn.commit()
+        conn.close()
+        return criados
+
+
+def carga_padrao(db: Database):
+    """Executa as consultas dos dashboards e relatórios para o consultor gravar"""
+    hoje = datetime.now()
+    for dias in (7, 30, 365):
+        inicio = (hoje - timedelta(days=dias)).strftime("%Y-%m-%d")
+        fim = hoje.strftime("%Y-%m-%d")
+        db.get_resumo_vendas(inicio, fim)
+        db.get_lucro_periodo(inicio, fim)
+        db.get_vendas_por_mes(inicio, fim)
+        db.get_vendas_por_produto(inicio, fim, limite=10)
+        db.get_despesas_por_categoria(inicio, fim)
+        db.listar_vendas(inicio, fim)
+    db.get_produtos_mais_vendidos()
+    db.produtos_estoque_baixo()
+    db.listar_produtos()
+    db.get_valor_estoque_total()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propõe índices a partir das consultas do sistema")
+    parser.add_argument('--banco', default="gestao_vendas.db", help="Arquivo do banco de dados")
+    parser.add_argument('--aplicar', action='store_true', help="Cria os índices propostos")
+    args = parser.parse_args()
+
+    db = Database(args.banco)
+    with ConsultorIndices(db) as consultor:
+        carga_padrao(db)
+
+    propostas = consultor.analisar()
+    print(f"{len(consultor.consultas)} consultas distintas analisadas")
+    if not propostas:
+        print("✅ Nenhum índice a propor: as consultas já usam índices adequados")
+
+    for proposta in propostas:
+        print("-" * 80)
+        print(impressao_digital(proposta['sql'])[:160])
+        print(f"   execuções: {proposta['execucoes']}")
+        for aviso in proposta['avisos']:
+            print(f"   ⚠️ {aviso}")
+        if proposta['definicao']:
+            print(f"   proposta: CREATE INDEX {proposta['nome']} ON {proposta['definicao']}")
+            if proposta['substitui']:
+                print(f"   substitui: {', '.join(proposta['substitui'])}")
+            print(f"   antes:  {' | '.join(proposta['plano_antes'])} ({proposta['tempo_antes_ms']:.1f} ms)")
+            print(f"   depois: {' | '.join(proposta['plano_depois'])} ({proposta['tempo_depois_ms']:.1f} ms)")
+
+    consolidados = consultor.consolidar(propostas)
+    if consolidados:
+        print("=" * 80)
+        print("Índices consolidados:")
+        for nome, definicao, substitui in consolidados:
+            print(f"   CREATE INDEX {nome} ON {definicao}")
+            for redundante in substitui:
+                print(f"   DROP INDEX {redundante}  -- prefixo do anterior")
+
+    if args.aplicar and consolidados:
+        criados = consultor.aplicar(propostas)
+        print(f"✅ {len(criados)} índice(s) criado(s): {', '.join(criados)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt
 from datetime import datetime
 from database import Database
 from utils import Formatador, Periodo
+from series_temporais import largura_grafico, reduzir_linha, posicoes_rotulos
 from components import AnimatedCard, LoadingSpinner, ProgressCircle, show_loading, hide_loading
 
 class Dashboard(ctk.CTkFrame):
@@ -266,47 +267,40 @@ class Dashboard(ctk.CTkFrame):
         self.atualizar_tabela_produtos()
     
     def atualizar_kpis(self, data_inicio, data_fim):
-        """Atualiza os cards de KPI"""
-        # Resumo de vendas
-        resumo = self.db.get_resumo_vendas(data_inicio, data_fim)
+        """Atualiza os cards de KPI (uma única consulta para todos)"""
+        kpis = self.db.kpis_periodo(data_inicio, data_fim)
+        
         self.card_receita.label_valor.configure(
-            text=Formatador.formatar_moeda(resumo['receita_total'])
+            text=Formatador.formatar_moeda(kpis['receita_total'])
         )
         self.card_vendas.label_valor.configure(
-            text=str(resumo['total_vendas'])
+            text=str(kpis['total_vendas'])
         )
         self.card_ticket.label_valor.configure(
-            text=Formatador.formatar_moeda(resumo['ticket_medio'])
+            text=Formatador.formatar_moeda(kpis['ticket_medio'])
         )
         
         # Lucro e despesas
-        lucro_data = self.db.get_lucro_periodo(data_inicio, data_fim)
         self.card_lucro.label_valor.configure(
-            text=Formatador.formatar_moeda(lucro_data['lucro_liquido'])
+            text=Formatador.formatar_moeda(kpis['lucro_liquido'])
         )
         self.card_despesas.label_valor.configure(
-            text=Formatador.formatar_moeda(lucro_data['despesas'])
+            text=Formatador.formatar_moeda(kpis['despesas'])
         )
         
         # Valor em estoque
-        valor_estoque = self.db.get_valor_estoque_total()
         self.card_estoque.label_valor.configure(
-            text=Formatador.formatar_moeda(valor_estoque)
+            text=Formatador.formatar_moeda(kpis['valor_estoque'])
         )
         
         # Margem média
-        if resumo['receita_total'] > 0:
-            margem = (lucro_data['lucro_bruto'] / resumo['receita_total']) * 100
-        else:
-            margem = 0
         self.card_margem.label_valor.configure(
-            text=Formatador.formatar_porcentagem(margem)
+            text=Formatador.formatar_porcentagem(kpis['margem'])
         )
         
         # Alertas de estoque
-        produtos_baixo = self.db.produtos_estoque_baixo()
         self.card_alertas.label_valor.configure(
-            text=str(len(produtos_baixo))
+            text=str(kpis['estoque_baixo'])
         )
     
     def atualizar_grafico_vendas(self, data_inicio, data_fim):
@@ -325,16 +319,19 @@ class Dashboard(ctk.CTkFrame):
                     vendas_por_data[data] = 0
                 vendas_por_data[data] += venda['valor_total']
             
-            # Ordenar por data
-            datas = sorted(vendas_por_data.keys())
-            valores = [vendas_por_data[data] for data in datas]
+            # Reduzir a série para a largura do gráfico (LTTB)
+            largura = largura_grafico(self.figura_vendas, self.canvas_vendas)
+            serie = reduzir_linha(vendas_por_data, largura)
             
-            # Formatar datas para exibição
-            datas_formatadas = [Formatador.formatar_data(data + " 00:00:00") for data in datas]
+            # Plotar (plot e fill_between no mesmo eixo numérico)
+            marcador = 'o' if len(serie['x']) <= 60 else None
+            self.ax_vendas.plot(serie['x'], serie['valores'], marker=marcador, linewidth=2, color='#1f77b4')
+            self.ax_vendas.fill_between(serie['x'], serie['valores'], alpha=0.3, color='#1f77b4')
             
-            # Plotar
-            self.ax_vendas.plot(datas_formatadas, valores, marker='o', linewidth=2, color='#1f77b4')
-            self.ax_vendas.fill_between(range(len(valores)), valores, alpha=0.3, color='#1f77b4')
+            # Rótulos apenas onde cabem
+            posicoes = posicoes_rotulos(len(serie['x']), largura)
+            self.ax_vendas.set_xticks([serie['x'][i] for i in posicoes])
+            self.ax_vendas.set_xticklabels([serie['rotulos'][i] for i in posicoes])
             self.ax_vendas.set_xlabel('Data', fontsize=10)
             self.ax_vendas.set_ylabel('Valor (R$)', fontsize=10)
             self.ax_vendas.grid(True, alpha=0.3)
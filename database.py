@@ -4,25 +4,162 @@ Gerencia produtos, vendas, despesas, categorias e histórico de preços
 """
 
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
+import gzip
+import json
+import glob
 import os
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+
+from anomalias import avaliar_venda, queda_improvavel, dias_entre, alerta_queda, MIN_DIAS
+
+# Tabelas cujas alterações incrementam a versão dos dados (usada para invalidar caches)
+TABELAS_VERSIONADAS = ['categorias', 'produtos', 'vendas', 'despesas',
+                       'historico_precos', 'configuracoes', 'metas', 'clientes', 'alertas']
+
+# Versão do esquema gravada em PRAGMA user_version; incrementar a cada migração em create_tables
+VERSAO_SCHEMA = 4
+
+# Tabelas e colunas que um arquivo precisa ter para ser aceito como backup deste sistema
+COLUNAS_OBRIGATORIAS = {
+    'categorias': ['id', 'nome'],
+    'produtos': ['id', 'nome', 'categoria_id', 'preco_custo', 'preco_venda', 'estoque', 'ativo'],
+    'vendas': ['id', 'produto_id', 'quantidade', 'preco_unitario', 'valor_total', 'data_venda'],
+    'despesas': ['id', 'descricao', 'valor', 'data_despesa']
+}
+
+def normalizar_cliente(nome: Optional[str]) -> str:
+    """Chave do cliente: sem acentos, minúsculas e espaços simples ('' para cliente não informado)"""
+    if not nome:
+        return ''
+    sem_acentos = unicodedata.normalize('NFKD', nome)
+    sem_acentos = ''.join(c for c in sem_acentos if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+class BackupInvalido(Exception):
+    """Arquivo enviado para restauração não é um banco válido deste sistema"""
+    pass
+
+class ParticaoAusente(FileNotFoundError):
+    """Arquivo de um ano arquivado (pasta arquivo/) não foi encontrado"""
+    pass
+
+# Índices mantidos por criar_indices (nome -> tabela(colunas) [WHERE parcial]), desenhados a
+# partir das consultas do sistema; os de vendas/despesas cobrem as consultas por período
+INDICES = {
+    # Resumo, lucro e agregações por mês/produto: filtro por data lendo só o índice
+    'idx_vendas_data_cobertura': 'vendas(data_venda, produto_id, quantidade, valor_total, preco_unitario)',
+    # Mais vendidos: GROUP BY produto_id somando quantidade e valor_total sem ler a tabela
+    'idx_vendas_produto_cobertura': 'vendas(produto_id, quantidade, valor_total)',
+    # Despesas do período (soma e agrupamento por categoria)
+    'idx_despesas_data_cobertura': 'despesas(data_despesa, categoria, valor)',
+    # Estoque baixo: só produtos ativos, já em ordem de estoque
+    'idx_produtos_estoque_ativos': 'produtos(estoque, estoque_minimo) WHERE ativo = 1',
+    'idx_produtos_categoria': 'produtos(categoria_id)',
+    # Lista de produtos ativos já em ordem alfabética
+    'idx_produtos_nome_ativos': 'produtos(nome) WHERE ativo = 1',
+    # Histórico de um produto, do mais recente para o mais antigo
+    'idx_historico_produto_data': 'historico_precos(produto_id, data_alteracao)',
+    # Recálculo do resumo de um cliente no mês (registrar/excluir venda) sem ler a tabela
+    'idx_vendas_cliente_cobertura': 'vendas(cliente_id, data_venda, valor_total) WHERE cliente_id IS NOT NULL',
+    # Coortes recentes: clientes pelo mês da primeira compra
+    'idx_clientes_coorte': 'clientes(coorte) WHERE coorte IS NOT NULL',
+    # Alertas não lidos, dos mais recentes para os mais antigos
+    'idx_alertas_abertos_data': 'alertas(data_alerta) WHERE lido = 0'
+}
+# Índices de versões anteriores, substituídos pelos de cima
+INDICES_OBSOLETOS = ['idx_vendas_produto', 'idx_vendas_data', 'idx_despesas_data',
+                     'idx_historico_produto', 'idx_produtos_ativo']
+
+# Campos de uma venda listada (listar_vendas, iterar_vendas, buscar_venda), na ordem do SELECT
+CAMPOS_VENDA = ['id', 'produto_id', 'quantidade', 'preco_unitario', 'valor_total',
+                'cliente', 'data_venda', 'observacoes', 'produto_nome']
+
+# Colunas de estatisticas_vendas, na ordem do estado usado por anomalias.py
+COLUNAS_ESTATISTICAS = ['produto_id', 'vendas', 'media_quantidade', 'variancia_quantidade', 'media_preco',
+                        'variancia_preco', 'dia', 'quantidade_dia', 'dias', 'media_diaria', 'variancia_diaria']
+
+# Arquivo por ano: tabelas movidas para arquivo/<banco>_AAAA.db e colunas usadas no UNION ALL
+PASTA_ARQUIVO = 'arquivo'
+COLUNAS_PARTICIONADAS = {
+    'vendas': ['id', 'produto_id', 'quantidade', 'preco_unitario', 'valor_total',
+               'cliente', 'data_venda', 'observacoes', 'cliente_id'],
+    'despesas': ['id', 'descricao', 'valor', 'categoria', 'data_despesa',
+                 'data_registro', 'observacoes']
+}
+COLUNA_DATA_PARTICAO = {'vendas': 'data_venda', 'despesas': 'data_despesa'}
+# Limite padrão do SQLite para bancos anexados (SQLITE_MAX_ATTACHED)
+MAX_PARTICOES_ANEXADAS = 10
+
+# Restauração: segurado durante a troca do conteúdo do banco; get_connection e o agendador de
+# manutenção esperam por ele. Segundos que a troca espera as gravações já em andamento
+BLOQUEIO_RESTAURACAO = threading.RLock()
+TIMEOUT_RESTAURACAO = 30
+
+# Backups: pasta (ao lado do banco), quantidade mantida e páginas copiadas por passo
+PASTA_BACKUPS = 'backups'
+BACKUPS_MANTER_PADRAO = 5
+PAGINAS_POR_PASSO_BACKUP = 256
+# Anos arquivados vão dentro do backup, em blocos desta tabela
+TABELA_PARTICOES_BACKUP = 'arquivos_particoes'
+TAMANHO_BLOCO_PARTICAO = 8 * 1024 * 1024
+
+# Manutenção: intervalo do agendador, frequência do ANALYZE, tamanho do WAL que pede
+# checkpoint TRUNCATE e páginas liberadas por passo do incremental_vacuum
+INTERVALO_MANUTENCAO_HORAS = 6
+INTERVALO_ANALYZE_HORAS = 24
+LIMITE_WAL_BYTES = 16 * 1024 * 1024
+PAGINAS_VACUUM_POR_PASSO = 512
+# Linhas lidas por índice no PRAGMA optimize do fechamento (mantém o close barato)
+LIMITE_ANALISE_OPTIMIZE = 400
+
+class ConexaoOtimizada(sqlite3.Connection):
+    """Conexão que executa PRAGMA optimize ao ser fechada"""
+    
+    def close(self):
+        try:
+            self.execute(f'PRAGMA analysis_limit = {LIMITE_ANALISE_OPTIMIZE}')
+            self.execute('PRAGMA optimize')
+        except sqlite3.Error:
+            pass
+        super().close()
 
 class Database:
+    # Classe das conexões abertas por get_connection (a instrumentação troca por uma que mede as consultas)
+    fabrica_conexao = ConexaoOtimizada
+    
     def __init__(self, db_name="gestao_vendas.db"):
         """Inicializa a conexão com o banco de dados"""
         self.db_name = db_name
+        # Função chamada com o SQL de cada comando executado (ex.: ConsultorIndices)
+        self.rastreador = None
         self.create_tables()
     
     def get_connection(self):
-        """Retorna uma conexão com o banco de dados"""
-        return sqlite3.connect(self.db_name)
+        """Retorna uma conexão com o banco de dados (espera uma restauração em andamento terminar)"""
+        with BLOQUEIO_RESTAURACAO:
+            pass
+        conn = sqlite3.connect(self.db_name, factory=self.fabrica_conexao)
+        if self.rastreador:
+            conn.set_trace_callback(self.rastreador)
+        return conn
     
     def create_tables(self):
         """Cria as tabelas necessárias no banco de dados"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Banco novo já nasce com auto_vacuum incremental (bancos antigos são convertidos na manutenção)
+        cursor.execute('SELECT COUNT(*) FROM sqlite_master')
+        if cursor.fetchone()[0] == 0:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Tabela de categorias
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS categorias (
@@ -63,10 +200,37 @@ class Database:
                 cliente TEXT,
                 data_venda TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 observacoes TEXT,
+                cliente_id INTEGER REFERENCES clientes(id),
                 FOREIGN KEY (produto_id) REFERENCES produtos(id)
             )
         ''')
         
+        # Tabela de clientes (nomes digitados nas vendas, agrupados pela forma normalizada)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clientes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                nome_normalizado TEXT NOT NULL UNIQUE,
+                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                coorte TEXT,
+                ultima_compra TIMESTAMP,
+                compras INTEGER DEFAULT 0,
+                valor_total REAL DEFAULT 0
+            )
+        ''')
+        
+        # Resumo mensal das compras de cada cliente (inclui os anos arquivados); base do RFM e das coortes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS clientes_mensal (
+                cliente_id INTEGER NOT NULL,
+                mes TEXT NOT NULL,
+                compras INTEGER NOT NULL,
+                valor REAL NOT NULL,
+                ultima_compra TIMESTAMP,
+                PRIMARY KEY (cliente_id, mes)
+            ) WITHOUT ROWID
+        ''')
+        
         # Tabela de despesas
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS despesas (
@@ -118,6 +282,113 @@ class Database:
             )
         ''')
         
+        # Tabela de partições (anos de vendas/despesas movidos para arquivos próprios)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS particoes (
+                ano INTEGER PRIMARY KEY,
+                arquivo TEXT NOT NULL,
+                total_vendas INTEGER DEFAULT 0,
+                total_despesas INTEGER DEFAULT 0,
+                data_arquivamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Tabela de execuções da manutenção (fora de TABELAS_VERSIONADAS: não invalida caches)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS manutencao_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data_execucao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                etapa TEXT NOT NULL,
+                duracao_ms REAL NOT NULL,
+                detalhes TEXT
+            )
+        ''')
+        
+        # Plano de reposição gerado por reposicao.py (derivado das vendas: não invalida caches)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS plano_reposicao (
+                produto_id INTEGER PRIMARY KEY,
+                media_diaria REAL NOT NULL,
+                media_diaria_prevista REAL NOT NULL,
+                demanda_prazo REAL NOT NULL,
+                demanda_cobertura REAL NOT NULL,
+                estoque_seguranca REAL NOT NULL,
+                ponto_pedido REAL NOT NULL,
+                modelo TEXT,
+                prazo_entrega INTEGER NOT NULL,
+                dias_cobertura INTEGER NOT NULL,
+                gerado_em TIMESTAMP NOT NULL
+            )
+        ''')
+        
+        # Estatísticas móveis de cada produto mantidas por registrar_venda (anomalias.py; derivadas das vendas)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'estatisticas_vendas'")
+        semear_estatisticas = cursor.fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS estatisticas_vendas (
+                produto_id INTEGER PRIMARY KEY,
+                vendas INTEGER NOT NULL,
+                media_quantidade REAL NOT NULL,
+                variancia_quantidade REAL NOT NULL,
+                media_preco REAL NOT NULL,
+                variancia_preco REAL NOT NULL,
+                dia TEXT NOT NULL,
+                quantidade_dia REAL NOT NULL,
+                dias INTEGER NOT NULL,
+                media_diaria REAL NOT NULL,
+                variancia_diaria REAL NOT NULL
+            )
+        ''')
+        
+        # Alertas de anomalias gravados ao registrar vendas (um aberto por produto e tipo)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alertas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                produto_id INTEGER NOT NULL,
+                prioridade TEXT NOT NULL,
+                mensagem TEXT NOT NULL,
+                valor REAL,
+                esperado REAL,
+                ocorrencias INTEGER DEFAULT 1,
+                venda_id INTEGER,
+                data_alerta TIMESTAMP NOT NULL,
+                lido INTEGER DEFAULT 0,
+                FOREIGN KEY (produto_id) REFERENCES produtos(id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_alertas_produto_tipo_aberto
+            ON alertas(produto_id, tipo) WHERE lido = 0
+        ''')
+        
+        # Tabela de versão dos dados (incrementada por gatilhos a cada alteração)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS versao_dados (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                versao INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO versao_dados (id, versao) VALUES (1, 0)')
+        
+        # Migração do esquema 3: vendas.cliente_id preenchido a partir do texto digitado
+        cursor.execute('PRAGMA table_info(vendas)')
+        if 'cliente_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('ALTER TABLE vendas ADD COLUMN cliente_id INTEGER REFERENCES clientes(id)')
+            self.migrar_clientes(cursor)
+        
+        for tabela in TABELAS_VERSIONADAS:
+            for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()}
+                    AFTER {evento} ON {tabela}
+                    BEGIN
+                        UPDATE versao_dados SET versao = versao + 1 WHERE id = 1;
+                    END
+                ''')
+        
+        cursor.execute(f'PRAGMA user_version = {VERSAO_SCHEMA}')
+        
         conn.commit()
         conn.close()
         
@@ -126,27 +397,143 @@ class Database:
         
         # Inserir configurações padrão
         self.init_default_configs()
+        
+        # Migração do esquema 4: estatísticas iniciais calculadas com as vendas recentes
+        if semear_estatisticas:
+            self.recalcular_estatisticas_vendas()
+    
+    def migrar_clientes(self, cursor):
+        """
+        Cadastra os clientes distintos das vendas e preenche vendas.cliente_id (banco principal e anos
+        arquivados). O gatilho de versão de UPDATE em vendas é removido durante o preenchimento
+        (create_tables o recria logo depois) e a versão dos dados avança uma única vez
+        """
+        cursor.connection.commit()  # ATTACH não pode ocorrer dentro de uma transação
+        cursor.execute('DROP TRIGGER IF EXISTS trg_versao_vendas_update')
+        cursor.execute('SELECT ano, arquivo FROM particoes')
+        pasta = os.path.dirname(os.path.abspath(self.db_name))
+        esquemas = ['main']
+        for ano, arquivo in cursor.fetchall():
+            caminho = os.path.join(pasta, arquivo)
+            if os.path.exists(caminho):
+                cursor.execute(f'ATTACH DATABASE ? AS arquivo_{ano}', (caminho,))
+                cursor.execute(f'PRAGMA arquivo_{ano}.table_info(vendas)')
+                if 'cliente_id' not in [row[1] for row in cursor.fetchall()]:
+                    cursor.execute(f'ALTER TABLE arquivo_{ano}.vendas ADD COLUMN cliente_id INTEGER')
+                esquemas.append(f'arquivo_{ano}')
+        
+        # Nome exibido: a grafia mais recente de cada cliente normalizado
+        nomes = {}
+        for esquema in esquemas:
+            cursor.execute(f'''
+                SELECT cliente, MAX(data_venda) FROM {esquema}.vendas
+                WHERE cliente IS NOT NULL AND TRIM(cliente) != '' GROUP BY cliente
+            ''')
+            for cliente, ultima in cursor.fetchall():
+                nomes[cliente] = max(nomes.get(cliente, ''), ultima or '')
+        
+        grafias = {}
+        for cliente, ultima in nomes.items():
+            chave = normalizar_cliente(cliente)
+            if chave and (chave not in grafias or ultima > grafias[chave][1]):
+                grafias[chave] = (' '.join(cliente.split()), ultima)
+        cursor.executemany(
+            'INSERT OR IGNORE INTO clientes (nome, nome_normalizado) VALUES (?, ?)',
+            [(nome, chave) for chave, (nome, _) in grafias.items()]
+        )
+        
+        # Texto digitado -> id, em uma tabela temporária consultada pelo UPDATE
+        cursor.execute('SELECT nome_normalizado, id FROM clientes')
+        ids = dict(cursor.fetchall())
+        cursor.execute('CREATE TEMP TABLE mapa_clientes (cliente TEXT PRIMARY KEY, cliente_id INTEGER) WITHOUT ROWID')
+        cursor.executemany('INSERT INTO mapa_clientes VALUES (?, ?)',
+                           [(cliente, ids[normalizar_cliente(cliente)]) for cliente in nomes
+                            if normalizar_cliente(cliente) in ids])
+        for esquema in esquemas:
+            cursor.execute(f'''
+                UPDATE {esquema}.vendas SET cliente_id = (
+                    SELECT m.cliente_id FROM temp.mapa_clientes m WHERE m.cliente = vendas.cliente
+                )
+                WHERE cliente IS NOT NULL AND cliente_id IS NULL
+            ''')
+        cursor.execute('DROP TABLE temp.mapa_clientes')
+        self.reconstruir_resumo_clientes(cursor, esquemas)
+        cursor.execute('UPDATE versao_dados SET versao = versao + 1 WHERE id = 1')
+        
+        # Índice do cliente também nos anos arquivados
+        for esquema in esquemas[1:]:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {esquema}.idx_vendas_cliente_cobertura '
+                           f'ON {INDICES["idx_vendas_cliente_cobertura"]}')
+            cursor.connection.commit()
+            cursor.execute(f'DETACH DATABASE {esquema}')
+    
+    @staticmethod
+    def reconstruir_resumo_clientes(cursor, esquemas: List[str] = None):
+        """
+        Refaz clientes_mensal e os totais de clientes a partir de todas as vendas
+        esquemas: main e os anos arquivados já anexados (padrão: só main)
+        """
+        cursor.execute('DELETE FROM clientes_mensal')
+        for esquema in esquemas or ['main']:
+            cursor.execute(f'''
+                INSERT INTO clientes_mensal (cliente_id, mes, compras, valor, ultima_compra)
+                SELECT cliente_id, substr(data_venda, 1, 7), COUNT(*), SUM(valor_total), MAX(data_venda)
+                FROM {esquema}.vendas WHERE cliente_id IS NOT NULL
+                GROUP BY 1, 2
+                ON CONFLICT (cliente_id, mes) DO UPDATE SET
+                    compras = compras + excluded.compras,
+                    valor = valor + excluded.valor,
+                    ultima_compra = MAX(ultima_compra, excluded.ultima_compra)
+            ''')
+        cursor.execute('''
+            UPDATE clientes SET coorte = r.coorte, ultima_compra = r.ultima_compra,
+                                compras = r.compras, valor_total = r.valor
+            FROM (
+                SELECT cliente_id, MIN(mes) AS coorte, MAX(ultima_compra) AS ultima_compra,
+                       SUM(compras) AS compras, SUM(valor) AS valor
+                FROM clientes_mensal GROUP BY cliente_id
+            ) r
+            WHERE clientes.id = r.cliente_id
+        ''')
+    
+    @staticmethod
+    def atualizar_resumo_cliente(cursor, cliente_id: Optional[int], data_venda: str, esquema: str = 'main'):
+        """
+        Recalcula o mês da venda em clientes_mensal e os totais do cliente (após registrar ou excluir)
+        esquema: onde estão as vendas do mês ('main' ou o ano arquivado já anexado)
+        """
+        if cliente_id is None:
+            return
+        mes = str(data_venda)[:7]
+        cursor.execute('DELETE FROM clientes_mensal WHERE cliente_id = ? AND mes = ?', (cliente_id, mes))
+        cursor.execute(f'''
+            INSERT INTO clientes_mensal (cliente_id, mes, compras, valor, ultima_compra)
+            SELECT cliente_id, ?, COUNT(*), SUM(valor_total), MAX(data_venda)
+            FROM {esquema}.vendas
+            WHERE cliente_id = ? AND data_venda >= ? AND data_venda < ?
+            GROUP BY cliente_id
+        ''', (mes, cliente_id, f"{mes}-01", f"{mes}-32"))
+        cursor.execute('''
+            UPDATE clientes SET (coorte, ultima_compra, compras, valor_total) = (
+                SELECT MIN(mes), MAX(ultima_compra), COALESCE(SUM(compras), 0), COALESCE(SUM(valor), 0)
+                FROM clientes_mensal WHERE cliente_id = ?
+            )
+            WHERE id = ?
+        ''', (cliente_id, cliente_id))
     
     def criar_indices(self):
         """Cria índices para otimizar consultas"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Índices para melhorar performance
-        indices = [
-            "CREATE INDEX IF NOT EXISTS idx_produtos_categoria ON produtos(categoria_id)",
-            "CREATE INDEX IF NOT EXISTS idx_produtos_ativo ON produtos(ativo)",
-            "CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas(produto_id)",
-            "CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas(data_venda)",
-            "CREATE INDEX IF NOT EXISTS idx_despesas_data ON despesas(data_despesa)",
-            "CREATE INDEX IF NOT EXISTS idx_historico_produto ON historico_precos(produto_id)"
-        ]
+        for nome in INDICES_OBSOLETOS:
+            cursor.execute(f'DROP INDEX IF EXISTS {nome}')
         
-        for idx in indices:
+        for nome, definicao in INDICES.items():
             try:
-                cursor.execute(idx)
-            except:
-                pass  # Índice já existe
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON {definicao}')
+            except sqlite3.Error as e:
+                print(f"Erro ao criar índice {nome}: {e}")
         
         conn.commit()
         conn.close()
@@ -159,7 +546,9 @@ class Database:
         configs = [
             ('tema', 'dark'),
             ('estoque_alerta', '10'),
-            ('margem_padrao', '30')
+            ('margem_padrao', '30'),
+            ('backups_manter', str(BACKUPS_MANTER_PADRAO)),
+            ('manutencao_intervalo_horas', str(INTERVALO_MANUTENCAO_HORAS))
         ]
         
         for chave, valor in configs:
@@ -171,6 +560,209 @@ class Database:
         conn.commit()
         conn.close()
     
+    def get_versao_dados(self) -> int:
+        """
+        Retorna a versão atual dos dados
+        Muda sempre que qualquer tabela de negócio é alterada, inclusive por outro processo
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT versao FROM versao_dados WHERE id = 1')
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else 0
+    
+    # ==================== PARTIÇÕES POR ANO ====================
+    
+    def caminho_particao(self, ano: int, arquivo: str) -> str:
+        """Caminho do arquivo de um ano arquivado; ParticaoAusente se ele não existir"""
+        caminho = os.path.join(os.path.dirname(os.path.abspath(self.db_name)), arquivo)
+        if not os.path.exists(caminho):
+            raise ParticaoAusente(
+                f"Arquivo do ano {ano} não encontrado: {caminho}. Copie a pasta '{PASTA_ARQUIVO}' "
+                f"junto com o banco ou restaure um backup que contenha os anos arquivados"
+            )
+        return caminho
+    
+    def anexar_particoes(self, conn, data_inicio: str = None, data_fim: str = None) -> List[str]:
+        """
+        Anexa (ATTACH) à conexão apenas os arquivos anuais que o período alcança
+        Acima de MAX_PARTICOES_ANEXADAS anos, copia as linhas do período um ano por vez para um único
+        banco temporário (arquivo_consolidado)
+        Retorna os nomes dos esquemas anexados
+        """
+        cursor = conn.cursor()
+        query = 'SELECT ano, arquivo FROM particoes WHERE 1=1'
+        params = []
+        
+        if data_inicio:
+            query += ' AND ano >= ?'
+            params.append(int(data_inicio[:4]))
+        
+        if data_fim:
+            query += ' AND ano <= ?'
+            params.append(int(data_fim[:4]))
+        
+        cursor.execute(query + ' ORDER BY ano', params)
+        particoes = [(ano, self.caminho_particao(ano, arquivo)) for ano, arquivo in cursor.fetchall()]
+        
+        if len(particoes) <= MAX_PARTICOES_ANEXADAS:
+            esquemas = []
+            for ano, caminho in particoes:
+                esquema = f"arquivo_{ano}"
+                cursor.execute(f'ATTACH DATABASE ? AS {esquema}', (caminho,))
+                esquemas.append(esquema)
+            return esquemas
+        
+        # Nome vazio: banco temporário em disco, descartado ao fechar a conexão
+        cursor.execute("ATTACH DATABASE '' AS arquivo_consolidado")
+        self.criar_tabelas_particao(cursor, 'arquivo_consolidado', indices=False)
+        for ano, caminho in particoes:
+            cursor.execute('ATTACH DATABASE ? AS arquivo_ano', (caminho,))
+            for tabela, colunas in COLUNAS_PARTICIONADAS.items():
+                coluna_data = COLUNA_DATA_PARTICAO[tabela]
+                lista = ', '.join(colunas)
+                query = f'INSERT INTO arquivo_consolidado.{tabela} ({lista}) SELECT {lista} FROM arquivo_ano.{tabela} WHERE 1=1'
+                params = []
+                if data_inicio:
+                    query += f' AND {coluna_data} >= ?'
+                    params.append(data_inicio)
+                if data_fim:
+                    query += f" AND {coluna_data} < date(?, '+1 day')"
+                    params.append(data_fim)
+                cursor.execute(query, params)
+            conn.commit()  # DETACH não pode ocorrer dentro de uma transação
+            cursor.execute('DETACH DATABASE arquivo_ano')
+        return ['arquivo_consolidado']
+    
+    def criar_tabelas_particao(self, cursor, esquema: str, indices: bool = True):
+        """
+        Cria em um banco anexado as tabelas particionadas com a estrutura das atuais
+        (sem chaves estrangeiras: produtos fica no banco principal) e, opcionalmente, os mesmos índices
+        """
+        for tabela, colunas in COLUNAS_PARTICIONADAS.items():
+            cursor.execute(f'PRAGMA main.table_info({tabela})')
+            tipos = {row[1]: row[2] for row in cursor.fetchall()}
+            definicao = ', '.join(
+                f"{c} {tipos.get(c, '')}" + (' PRIMARY KEY' if c == 'id' else '') for c in colunas
+            )
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {esquema}.{tabela} ({definicao})')
+            if indices:
+                for nome, definicao in INDICES.items():
+                    if definicao.startswith(f'{tabela}('):
+                        cursor.execute(f'CREATE INDEX IF NOT EXISTS {esquema}.{nome} ON {definicao}')
+    
+    def particoes_uma_a_uma(self, conn) -> Iterator[str]:
+        """
+        Anexa os anos arquivados um de cada vez, do mais recente ao mais antigo, e devolve o esquema
+        O ano é desanexado ao avançar; se o laço for interrompido, o último continua anexado
+        """
+        cursor = conn.cursor()
+        cursor.execute('SELECT ano, arquivo FROM particoes ORDER BY ano DESC')
+        for ano, arquivo in cursor.fetchall():
+            esquema = f"arquivo_{ano}"
+            conn.execute(f'ATTACH DATABASE ? AS {esquema}', (self.caminho_particao(ano, arquivo),))
+            yield esquema
+            conn.commit()
+            conn.execute(f'DETACH DATABASE {esquema}')
+    
+    def fonte_particionada(self, tabela: str, esquemas: List[str], colunas: List[str] = None,
+                           filtro: str = None) -> str:
+        """
+        Tabela atual ou, se houver partições anexadas, o UNION ALL dela com os arquivos
+        colunas: subconjunto lido (permite usar só o índice de cobertura)
+        filtro: condição repetida em cada parte; pode citar colunas da consulta externa
+        (o SQLite não leva condições correlacionadas para dentro do UNION ALL)
+        """
+        if not esquemas and not filtro:
+            return tabela
+        lista = ', '.join(colunas or COLUNAS_PARTICIONADAS[tabela])
+        onde = f' WHERE {filtro}' if filtro else ''
+        partes = [f'SELECT {lista} FROM {esquema}.{tabela}{onde}' for esquema in ['main', *esquemas]]
+        return '(' + ' UNION ALL '.join(partes) + ')'
+    
+    def listar_particoes(self) -> List[Dict]:
+        """Lista os anos arquivados"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT ano, arquivo, total_vendas, total_despesas, data_arquivamento FROM particoes ORDER BY ano')
+        particoes = []
+        for row in cursor.fetchall():
+            particoes.append({
+                'ano': row[0],
+                'arquivo': row[1],
+                'total_vendas': row[2],
+                'total_despesas': row[3],
+                'data_arquivamento': row[4]
+            })
+        conn.close()
+        return particoes
+    
+    def arquivar_ano(self, ano: int) -> Dict:
+        """
+        Move as vendas e despesas de um ano encerrado para arquivo/<banco>_AAAA.db
+        As consultas por período continuam enxergando esses dados via ATTACH
+        """
+        ano = int(ano)
+        if ano >= datetime.now().year:
+            raise ValueError("Só é possível arquivar anos já encerrados")
+        
+        base = os.path.splitext(os.path.basename(self.db_name))[0]
+        arquivo = os.path.join(PASTA_ARQUIVO, f"{base}_{ano}.db")
+        pasta = os.path.dirname(os.path.abspath(self.db_name))
+        os.makedirs(os.path.join(pasta, PASTA_ARQUIVO), exist_ok=True)
+        
+        inicio = f"{ano}-01-01"
+        fim = f"{ano + 1}-01-01"
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1 FROM particoes WHERE ano = ?', (ano,))
+            ja_arquivado = cursor.fetchone() is not None
+            
+            cursor.execute('ATTACH DATABASE ? AS destino', (os.path.join(pasta, arquivo),))
+            
+            # Mesma estrutura e mesmos índices de cobertura das tabelas atuais
+            self.criar_tabelas_particao(cursor, 'destino')
+            
+            movidos = {}
+            for tabela, colunas in COLUNAS_PARTICIONADAS.items():
+                coluna_data = COLUNA_DATA_PARTICAO[tabela]
+                lista = ', '.join(colunas)
+                filtro = f'{coluna_data} >= ? AND {coluna_data} < ?'
+                cursor.execute(
+                    f'INSERT INTO destino.{tabela} ({lista}) SELECT {lista} FROM main.{tabela} WHERE {filtro}',
+                    (inicio, fim)
+                )
+                cursor.execute(f'DELETE FROM main.{tabela} WHERE {filtro}', (inicio, fim))
+                movidos[tabela] = cursor.rowcount
+            
+            cursor.execute('SELECT COUNT(*) FROM destino.vendas')
+            total_vendas = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM destino.despesas')
+            total_despesas = cursor.fetchone()[0]
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO particoes (ano, arquivo, total_vendas, total_despesas, data_arquivamento)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (ano, arquivo, total_vendas, total_despesas, datetime.now()))
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        return {
+            'ano': ano,
+            'arquivo': arquivo,
+            'vendas_movidas': movidos['vendas'],
+            'despesas_movidas': movidos['despesas'],
+            'ja_arquivado': ja_arquivado
+        }
+    
     # ==================== CATEGORIAS ====================
     
     def adicionar_categoria(self, nome: str, descricao: str = "") -> int:
@@ -275,9 +867,15 @@ class Database:
         cursor = conn.cursor()
         
         try:
-            # Verificar se produto tem vendas
-            cursor.execute('SELECT COUNT(*) FROM vendas WHERE produto_id = ?', (produto_id,))
-            tem_vendas = cursor.fetchone()[0] > 0
+            # Verificar se produto tem vendas (também nos anos arquivados, um por vez)
+            cursor.execute('SELECT 1 FROM vendas WHERE produto_id = ? LIMIT 1', (produto_id,))
+            tem_vendas = cursor.fetchone() is not None
+            if not tem_vendas:
+                for esquema in self.particoes_uma_a_uma(conn):
+                    cursor.execute(f'SELECT 1 FROM {esquema}.vendas WHERE produto_id = ? LIMIT 1', (produto_id,))
+                    if cursor.fetchone():
+                        tem_vendas = True
+                        break
             
             if tem_vendas:
                 raise Exception("Produto possui vendas registradas. Não é possível excluir.")
@@ -366,6 +964,50 @@ class Database:
         conn.close()
         return produtos
     
+    def metricas_produtos(self, dias: int = 30) -> List[Dict]:
+        """
+        Estoque, preços, quantidade vendida nos últimos `dias` dias e demanda do plano de reposição
+        (None sem plano) de todos os produtos ativos, em uma consulta agrupada
+        """
+        inicio = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d")
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, inicio)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        
+        # GROUP BY +produto_id: sem o "+" o planejador agrupa percorrendo idx_vendas_produto_cobertura
+        # (todas as vendas) em vez de ler só o intervalo de datas em idx_vendas_data_cobertura
+        cursor.execute(f'''
+            SELECT p.id, p.nome, p.estoque, p.estoque_minimo, p.preco_custo, p.preco_venda,
+                   COALESCE(v.vendido, 0), r.media_diaria_prevista, r.ponto_pedido, r.demanda_cobertura
+            FROM produtos p
+            LEFT JOIN (
+                SELECT produto_id, SUM(quantidade) AS vendido
+                FROM {vendas}
+                WHERE data_venda >= ?
+                GROUP BY +produto_id
+            ) v ON v.produto_id = p.id
+            LEFT JOIN plano_reposicao r ON r.produto_id = p.id
+            WHERE p.ativo = 1
+            ORDER BY p.nome
+        ''', (inicio,))
+        metricas = []
+        for row in cursor.fetchall():
+            metricas.append({
+                'id': row[0],
+                'nome': row[1],
+                'estoque': row[2],
+                'estoque_minimo': row[3],
+                'preco_custo': row[4],
+                'preco_venda': row[5],
+                'vendido': row[6],
+                'media_diaria_prevista': row[7],
+                'ponto_pedido': row[8],
+                'demanda_cobertura': row[9]
+            })
+        conn.close()
+        return metricas
+    
     def atualizar_estoque(self, produto_id: int, quantidade: int):
         """Atualiza o estoque de um produto"""
         conn = self.get_connection()
@@ -399,13 +1041,15 @@ class Database:
             raise ValueError("Estoque insuficiente")
         
         valor_total = preco_unitario * quantidade
+        cliente_id = self.obter_cliente_id(cursor, cliente)
         
         # Registrar venda
         cursor.execute('''
             INSERT INTO vendas (produto_id, quantidade, preco_unitario, 
-                              valor_total, cliente, observacoes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (produto_id, quantidade, preco_unitario, valor_total, cliente, observacoes))
+                              valor_total, cliente, observacoes, cliente_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (produto_id, quantidade, preco_unitario, valor_total, cliente, observacoes, cliente_id))
+        venda_id = cursor.lastrowid
         
         # Atualizar estoque
         cursor.execute('''
@@ -413,73 +1057,140 @@ class Database:
             WHERE id = ?
         ''', (quantidade, datetime.now(), produto_id))
         
+        # Atualizar o resumo do cliente e as estatísticas do produto (alertas de anomalias)
+        cursor.execute('SELECT data_venda FROM vendas WHERE id = ?', (venda_id,))
+        data_venda = cursor.fetchone()[0]
+        if cliente_id is not None:
+            self.atualizar_resumo_cliente(cursor, cliente_id, data_venda)
+        self.monitorar_venda(cursor, produto_id, quantidade, preco_unitario, data_venda, venda_id)
+        
         conn.commit()
-        venda_id = cursor.lastrowid
         conn.close()
         return venda_id
     
+    @staticmethod
+    def obter_cliente_id(cursor, nome: str) -> Optional[int]:
+        """Id do cliente pelo nome normalizado, cadastrando se for novo (None se não informado)"""
+        chave = normalizar_cliente(nome)
+        if not chave:
+            return None
+        cursor.execute('SELECT id FROM clientes WHERE nome_normalizado = ?', (chave,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        cursor.execute('INSERT INTO clientes (nome, nome_normalizado) VALUES (?, ?)',
+                       (' '.join(nome.split()), chave))
+        return cursor.lastrowid
+    
     def listar_vendas(self, data_inicio: str = None, data_fim: str = None) -> List[Dict]:
         """Lista vendas com filtros opcionais"""
+        return list(self.iterar_vendas(data_inicio, data_fim))
+    
+    @staticmethod
+    def venda_de_linha(row) -> Dict:
+        """Dicionário de uma venda a partir da linha v.*, p.nome (campos em CAMPOS_VENDA)"""
+        return dict(zip(CAMPOS_VENDA, row))
+    
+    def iterar_vendas(self, data_inicio: str = None, data_fim: str = None,
+                      tamanho_lote: int = 5000) -> Iterator[Dict]:
+        """
+        Percorre as vendas do período sem carregar tudo em memória (fetchmany em lotes)
+        Retorna os mesmos campos de listar_vendas
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
         
-        query = '''
-            SELECT v.*, p.nome as produto_nome
-            FROM vendas v
+        query = f'''
+            SELECT v.id, v.produto_id, v.quantidade, v.preco_unitario, v.valor_total,
+                   v.cliente, v.data_venda, v.observacoes, p.nome as produto_nome
+            FROM {vendas} v
             JOIN produtos p ON v.produto_id = p.id
             WHERE 1=1
         '''
         params = []
         
         if data_inicio:
-            query += ' AND DATE(v.data_venda) >= ?'
+            query += ' AND v.data_venda >= ?'
             params.append(data_inicio)
         
         if data_fim:
-            query += ' AND DATE(v.data_venda) <= ?'
+            query += " AND v.data_venda < date(?, '+1 day')"
             params.append(data_fim)
         
         query += ' ORDER BY v.data_venda DESC'
         
-        cursor.execute(query, params)
-        vendas = []
-        for row in cursor.fetchall():
-            vendas.append({
-                'id': row[0],
-                'produto_id': row[1],
-                'quantidade': row[2],
-                'preco_unitario': row[3],
-                'valor_total': row[4],
-                'cliente': row[5],
-                'data_venda': row[6],
-                'observacoes': row[7],
-                'produto_nome': row[8]
-            })
-        conn.close()
-        return vendas
+        try:
+            cursor.execute(query, params)
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                for row in linhas:
+                    yield self.venda_de_linha(row)
+        finally:
+            conn.close()
+    
+    def localizar_registro(self, conn, tabela: str, registro_id: int) -> Optional[str]:
+        """
+        Esquema onde está a venda ou despesa: 'main' ou o ano arquivado que a contém
+        (deixado anexado à conexão). Retorna None se o registro não existir
+        """
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT 1 FROM main.{tabela} WHERE id = ?', (registro_id,))
+        if cursor.fetchone():
+            return 'main'
+        for esquema in self.particoes_uma_a_uma(conn):
+            cursor.execute(f'SELECT 1 FROM {esquema}.{tabela} WHERE id = ?', (registro_id,))
+            if cursor.fetchone():
+                return esquema
+        return None
+    
+    def buscar_venda(self, venda_id: int) -> Optional[Dict]:
+        """Busca uma venda específica (com o nome do produto), inclusive em ano arquivado"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            esquema = self.localizar_registro(conn, 'vendas', venda_id)
+            if esquema is None:
+                return None
+            cursor.execute(f'''
+                SELECT v.id, v.produto_id, v.quantidade, v.preco_unitario, v.valor_total,
+                       v.cliente, v.data_venda, v.observacoes, p.nome as produto_nome
+                FROM {esquema}.vendas v
+                JOIN produtos p ON v.produto_id = p.id
+                WHERE v.id = ?
+            ''', (venda_id,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        
+        return self.venda_de_linha(row) if row else None
     
     def excluir_venda(self, venda_id: int) -> bool:
         """
-        Exclui uma venda e devolve o estoque
+        Exclui uma venda (do banco atual ou do ano arquivado) e devolve o estoque
         Retorna True se bem-sucedido, False caso contrário
         """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            # Localizar a venda antes de abrir a transação (ATTACH não ocorre dentro dela)
+            esquema = self.localizar_registro(conn, 'vendas', venda_id)
+            if esquema is None:
+                conn.close()
+                return False
+            
             # Buscar dados da venda antes de excluir
-            cursor.execute('''
-                SELECT produto_id, quantidade 
-                FROM vendas 
+            cursor.execute(f'''
+                SELECT produto_id, quantidade, cliente_id, data_venda
+                FROM {esquema}.vendas 
                 WHERE id = ?
             ''', (venda_id,))
             
-            venda = cursor.fetchone()
-            if not venda:
-                conn.close()
-                return False
-            
-            produto_id, quantidade = venda
+            produto_id, quantidade, cliente_id, data_venda = cursor.fetchone()
             
             # Devolver o estoque ao produto
             cursor.execute('''
@@ -490,7 +1201,13 @@ class Database:
             ''', (quantidade, datetime.now(), produto_id))
             
             # Excluir a venda
-            cursor.execute('DELETE FROM vendas WHERE id = ?', (venda_id,))
+            cursor.execute(f'DELETE FROM {esquema}.vendas WHERE id = ?', (venda_id,))
+            if esquema != 'main':
+                # Os gatilhos de versão só existem no banco principal
+                cursor.execute('UPDATE particoes SET total_vendas = total_vendas - 1 WHERE ano = ?',
+                               (int(esquema.rsplit('_', 1)[1]),))
+                cursor.execute('UPDATE versao_dados SET versao = versao + 1 WHERE id = 1')
+            self.atualizar_resumo_cliente(cursor, cliente_id, data_venda, esquema)
             
             conn.commit()
             conn.close()
@@ -522,8 +1239,10 @@ class Database:
         """Lista despesas com filtros opcionais"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        despesas = self.fonte_particionada('despesas', esquemas)
         
-        query = 'SELECT * FROM despesas WHERE 1=1'
+        query = f'SELECT * FROM {despesas} WHERE 1=1'
         params = []
         
         if data_inicio:
@@ -552,12 +1271,24 @@ class Database:
         return despesas
     
     def remover_despesa(self, despesa_id: int):
-        """Remove uma despesa"""
+        """Remove uma despesa (do banco atual ou do ano arquivado)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM despesas WHERE id = ?', (despesa_id,))
-        conn.commit()
-        conn.close()
+        try:
+            # Localizar antes de abrir a transação (ATTACH não ocorre dentro dela)
+            esquema = self.localizar_registro(conn, 'despesas', despesa_id)
+            if esquema is None:
+                return
+            
+            cursor.execute(f'DELETE FROM {esquema}.despesas WHERE id = ?', (despesa_id,))
+            if esquema != 'main':
+                # Os gatilhos de versão só existem no banco principal
+                cursor.execute('UPDATE particoes SET total_despesas = total_despesas - 1 WHERE ano = ?',
+                               (int(esquema.rsplit('_', 1)[1]),))
+                cursor.execute('UPDATE versao_dados SET versao = versao + 1 WHERE id = 1')
+            conn.commit()
+        finally:
+            conn.close()
     
     # ==================== RELATÓRIOS E ESTATÍSTICAS ====================
     
@@ -565,16 +1296,18 @@ class Database:
         """Retorna resumo das vendas em um período"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
         
-        query = 'SELECT SUM(valor_total), COUNT(*), AVG(valor_total) FROM vendas WHERE 1=1'
+        query = f'SELECT SUM(valor_total), COUNT(*), AVG(valor_total) FROM {vendas} WHERE 1=1'
         params = []
         
         if data_inicio:
-            query += ' AND DATE(data_venda) >= ?'
+            query += ' AND data_venda >= ?'
             params.append(data_inicio)
         
         if data_fim:
-            query += ' AND DATE(data_venda) <= ?'
+            query += " AND data_venda < date(?, '+1 day')"
             params.append(data_fim)
         
         cursor.execute(query, params)
@@ -593,29 +1326,32 @@ class Database:
         """Calcula lucro líquido em um período"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        despesas = self.fonte_particionada('despesas', esquemas)
+        vendas = self.fonte_particionada('vendas', esquemas)
         
         # Calcular lucro de vendas (preço venda - preço custo)
-        query = '''
+        query = f'''
             SELECT SUM((v.preco_unitario - p.preco_custo) * v.quantidade)
-            FROM vendas v
+            FROM {vendas} v
             JOIN produtos p ON v.produto_id = p.id
             WHERE 1=1
         '''
         params = []
         
         if data_inicio:
-            query += ' AND DATE(v.data_venda) >= ?'
+            query += ' AND v.data_venda >= ?'
             params.append(data_inicio)
         
         if data_fim:
-            query += ' AND DATE(v.data_venda) <= ?'
+            query += " AND v.data_venda < date(?, '+1 day')"
             params.append(data_fim)
         
         cursor.execute(query, params)
         lucro_bruto = cursor.fetchone()[0] or 0
         
         # Calcular despesas
-        query_despesas = 'SELECT SUM(valor) FROM despesas WHERE 1=1'
+        query_despesas = f'SELECT SUM(valor) FROM {despesas} WHERE 1=1'
         params_despesas = []
         
         if data_inicio:
@@ -636,16 +1372,87 @@ class Database:
             'despesas': total_despesas,
             'lucro_liquido': lucro_bruto - total_despesas
         }
-    
+
+    def kpis_periodo(self, data_inicio: str = None, data_fim: str = None) -> Dict:
+        """
+        Todos os cards do dashboard em uma única consulta: receita, vendas, ticket médio,
+        lucro bruto, despesas, lucro líquido, margem, valor em estoque e produtos com estoque baixo
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        despesas = self.fonte_particionada('despesas', esquemas)
+
+        filtro_vendas, filtro_despesas = '', ''
+        params_vendas, params_despesas = [], []
+
+        if data_inicio:
+            filtro_vendas += ' AND v.data_venda >= ?'
+            params_vendas.append(data_inicio)
+            filtro_despesas += ' AND data_despesa >= ?'
+            params_despesas.append(data_inicio)
+
+        if data_fim:
+            filtro_vendas += " AND v.data_venda < date(?, '+1 day')"
+            params_vendas.append(data_fim)
+            filtro_despesas += ' AND data_despesa <= ?'
+            params_despesas.append(data_fim)
+
+        cursor.execute(f'''
+            WITH periodo_vendas AS (
+                SELECT COUNT(*) AS total_vendas,
+                       SUM(v.valor_total) AS receita,
+                       SUM((v.preco_unitario - p.preco_custo) * v.quantidade) AS lucro_bruto
+                FROM {vendas} v
+                LEFT JOIN produtos p ON v.produto_id = p.id
+                WHERE 1=1{filtro_vendas}
+            ),
+            periodo_despesas AS (
+                SELECT SUM(valor) AS despesas
+                FROM {despesas}
+                WHERE 1=1{filtro_despesas}
+            ),
+            estoque AS (
+                SELECT SUM(preco_custo * estoque) AS valor_estoque,
+                       SUM(estoque <= estoque_minimo) AS estoque_baixo
+                FROM produtos
+                WHERE ativo = 1
+            )
+            SELECT total_vendas, receita, lucro_bruto, despesas, valor_estoque, estoque_baixo
+            FROM periodo_vendas, periodo_despesas, estoque
+        ''', params_vendas + params_despesas)
+        row = cursor.fetchone()
+        conn.close()
+
+        total_vendas = row[0] or 0
+        receita = row[1] or 0
+        lucro_bruto = row[2] or 0
+        total_despesas = row[3] or 0
+
+        return {
+            'receita_total': receita,
+            'total_vendas': total_vendas,
+            'ticket_medio': receita / total_vendas if total_vendas else 0,
+            'lucro_bruto': lucro_bruto,
+            'despesas': total_despesas,
+            'lucro_liquido': lucro_bruto - total_despesas,
+            'margem': (lucro_bruto / receita * 100) if receita > 0 else 0,
+            'valor_estoque': row[4] or 0,
+            'estoque_baixo': row[5] or 0
+        }
+
     def get_produtos_mais_vendidos(self, limite: int = 10) -> List[Dict]:
-        """Retorna os produtos mais vendidos"""
+        """Retorna os produtos mais vendidos em todo o histórico (inclusive anos arquivados)"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn)
+        vendas = self.fonte_particionada('vendas', esquemas)
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT p.nome, SUM(v.quantidade) as total_vendido, 
                    SUM(v.valor_total) as receita_total
-            FROM vendas v
+            FROM {vendas} v
             JOIN produtos p ON v.produto_id = p.id
             GROUP BY v.produto_id
             ORDER BY total_vendido DESC
@@ -663,29 +1470,343 @@ class Database:
         conn.close()
         return produtos
     
-    def get_valor_estoque_total(self) -> float:
-        """Calcula o valor total do estoque"""
+    def get_vendas_por_mes(self, data_inicio: str = None, data_fim: str = None) -> List[Dict]:
+        """Agrega vendas, receita e lucro bruto por mês (AAAA-MM)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT SUM(preco_custo * estoque)
-            FROM produtos
-            WHERE ativo = 1
-        ''')
-        valor = cursor.fetchone()[0] or 0
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        
+        query = f'''
+            SELECT strftime('%Y-%m', v.data_venda) as mes, COUNT(*),
+                   SUM(v.quantidade), SUM(v.valor_total),
+                   SUM((v.preco_unitario - p.preco_custo) * v.quantidade)
+            FROM {vendas} v
+            JOIN produtos p ON v.produto_id = p.id
+            WHERE 1=1
+        '''
+        params = []
+        
+        if data_inicio:
+            query += ' AND v.data_venda >= ?'
+            params.append(data_inicio)
+        
+        if data_fim:
+            query += " AND v.data_venda < date(?, '+1 day')"
+            params.append(data_fim)
+        
+        query += ' GROUP BY mes ORDER BY mes'
+        
+        cursor.execute(query, params)
+        meses = []
+        for row in cursor.fetchall():
+            meses.append({
+                'mes': row[0],
+                'total_vendas': row[1],
+                'quantidade': row[2] or 0,
+                'receita': row[3] or 0,
+                'lucro_bruto': row[4] or 0
+            })
+        
         conn.close()
-        return valor
-    
-    # ==================== CONFIGURAÇÕES ====================
-    
-    def get_config(self, chave: str) -> Optional[str]:
-        """Obtém uma configuração"""
+        return meses
+
+    def get_vendas_por_dia(self, data_inicio: str = None, data_fim: str = None,
+                           por_produto: bool = False) -> List[Dict]:
+        """Agrega vendas, quantidade, receita e lucro bruto por dia (e por produto, se pedido)"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT valor FROM configuracoes WHERE chave = ?', (chave,))
-        row = cursor.fetchone()
-        conn.close()
-        return row[0] if row else None
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
+
+        grupo = 'dia, v.produto_id' if por_produto else 'dia'
+        query = f'''
+            SELECT substr(v.data_venda, 1, 10) as dia, {'v.produto_id' if por_produto else 'NULL'},
+                   COUNT(*), SUM(v.quantidade), SUM(v.valor_total),
+                   SUM((v.preco_unitario - p.preco_custo) * v.quantidade)
+            FROM {vendas} v
+            JOIN produtos p ON v.produto_id = p.id
+            WHERE 1=1
+        '''
+        params = []
+
+        if data_inicio:
+            query += ' AND v.data_venda >= ?'
+            params.append(data_inicio)
+
+        if data_fim:
+            query += " AND v.data_venda < date(?, '+1 day')"
+            params.append(data_fim)
+
+        query += f' GROUP BY {grupo} ORDER BY {grupo}'
+
+        cursor.execute(query, params)
+        dias = []
+        for row in cursor.fetchall():
+            dia = {
+                'dia': row[0],
+                'total_vendas': row[2],
+                'quantidade': row[3] or 0,
+                'receita': row[4] or 0,
+                'lucro_bruto': row[5] or 0
+            }
+            if por_produto:
+                dia['produto_id'] = row[1]
+            dias.append(dia)
+
+        conn.close()
+        return dias
+
+    def get_vendas_por_produto(self, data_inicio: str = None, data_fim: str = None,
+                               limite: int = None) -> List[Dict]:
+        """Agrega quantidade, receita e lucro bruto por produto, em ordem de receita"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        
+        query = f'''
+            SELECT p.id, p.nome, SUM(v.quantidade), SUM(v.valor_total),
+                   SUM((v.preco_unitario - p.preco_custo) * v.quantidade)
+            FROM {vendas} v
+            JOIN produtos p ON v.produto_id = p.id
+            WHERE 1=1
+        '''
+        params = []
+        
+        if data_inicio:
+            query += ' AND v.data_venda >= ?'
+            params.append(data_inicio)
+        
+        if data_fim:
+            query += " AND v.data_venda < date(?, '+1 day')"
+            params.append(data_fim)
+        
+        query += ' GROUP BY v.produto_id ORDER BY SUM(v.valor_total) DESC'
+        
+        if limite:
+            query += ' LIMIT ?'
+            params.append(limite)
+        
+        cursor.execute(query, params)
+        produtos = []
+        for row in cursor.fetchall():
+            produtos.append({
+                'produto_id': row[0],
+                'nome': row[1],
+                'quantidade': row[2] or 0,
+                'receita': row[3] or 0,
+                'lucro_bruto': row[4] or 0
+            })
+        
+        conn.close()
+        return produtos
+    
+    def curva_abc(self, data_inicio: str = None, data_fim: str = None,
+                  limite_a: float = 80, limite_b: float = 95,
+                  demanda_diaria: bool = False) -> List[Dict]:
+        """
+        Curva ABC por receita de todos os produtos em uma consulta (SUM OVER acumulado)
+        Classe A até `limite_a`% da receita acumulada, B até `limite_b`%, C o resto;
+        produtos ativos sem venda no período ficam como SEM_VENDAS. Ordem: maior receita primeiro
+        Com `demanda_diaria`, a mesma leitura agrega antes por dia e devolve também dias com venda
+        e soma dos quadrados da quantidade diária (variância da demanda com zeros nos outros dias)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        
+        filtro = ''
+        params = []
+        if data_inicio:
+            filtro += ' AND v.data_venda >= ?'
+            params.append(data_inicio)
+        if data_fim:
+            filtro += " AND v.data_venda < date(?, '+1 day')"
+            params.append(data_fim)
+        
+        if demanda_diaria:
+            vendidos = f'''
+                SELECT produto_id, SUM(quantidade) AS quantidade, SUM(receita) AS receita,
+                       COUNT(*) AS dias, SUM(quantidade * quantidade) AS quadrados
+                FROM (
+                    SELECT v.produto_id, SUM(v.quantidade) AS quantidade, SUM(v.valor_total) AS receita
+                    FROM {vendas} v
+                    WHERE 1=1 {filtro}
+                    GROUP BY v.produto_id, substr(v.data_venda, 1, 10)
+                )
+                GROUP BY produto_id
+            '''
+        else:
+            vendidos = f'''
+                SELECT v.produto_id, SUM(v.quantidade) AS quantidade, SUM(v.valor_total) AS receita,
+                       NULL AS dias, NULL AS quadrados
+                FROM {vendas} v
+                WHERE 1=1 {filtro}
+                GROUP BY v.produto_id
+            '''
+        
+        cursor.execute(f'''
+            WITH vendidos AS ({vendidos}),
+            base AS (
+                SELECT p.id, p.nome, s.produto_id IS NULL AS sem_vendas,
+                       COALESCE(s.quantidade, 0) AS quantidade, COALESCE(s.receita, 0) AS receita,
+                       COALESCE(s.dias, 0) AS dias, COALESCE(s.quadrados, 0) AS quadrados
+                FROM produtos p
+                LEFT JOIN vendidos s ON s.produto_id = p.id
+                WHERE p.ativo = 1 OR s.produto_id IS NOT NULL
+            ),
+            curva AS (
+                SELECT id, nome, sem_vendas, quantidade, receita, dias, quadrados,
+                       receita * 100.0 / NULLIF(SUM(receita) OVER (), 0) AS participacao,
+                       SUM(receita) OVER (ORDER BY receita DESC, id ROWS UNBOUNDED PRECEDING)
+                           * 100.0 / NULLIF(SUM(receita) OVER (), 0) AS acumulado
+                FROM base
+            )
+            SELECT id, nome, quantidade, receita, COALESCE(participacao, 0), COALESCE(acumulado, 0),
+                   CASE WHEN sem_vendas THEN 'SEM_VENDAS'
+                        WHEN acumulado <= ? THEN 'A'
+                        WHEN acumulado <= ? THEN 'B'
+                        ELSE 'C' END,
+                   dias, quadrados
+            FROM curva
+            ORDER BY receita DESC, id
+        ''', params + [limite_a, limite_b])
+        
+        curva = []
+        for row in cursor.fetchall():
+            produto = {
+                'produto_id': row[0],
+                'nome': row[1],
+                'quantidade_vendida': row[2],
+                'receita_total': row[3],
+                'participacao': row[4],
+                'acumulado': row[5],
+                'classe': row[6]
+            }
+            if demanda_diaria:
+                produto['dias_com_venda'] = row[7]
+                produto['soma_quadrados'] = row[8]
+            curva.append(produto)
+        
+        conn.close()
+        return curva
+    
+    def get_despesas_por_categoria(self, data_inicio: str = None, data_fim: str = None) -> List[Dict]:
+        """Agrega despesas por categoria"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, data_inicio, data_fim)
+        despesas = self.fonte_particionada('despesas', esquemas)
+        
+        query = f'SELECT categoria, COUNT(*), SUM(valor) FROM {despesas} WHERE 1=1'
+        params = []
+        
+        if data_inicio:
+            query += ' AND data_despesa >= ?'
+            params.append(data_inicio)
+        
+        if data_fim:
+            query += ' AND data_despesa <= ?'
+            params.append(data_fim)
+        
+        query += ' GROUP BY categoria ORDER BY SUM(valor) DESC'
+        
+        cursor.execute(query, params)
+        categorias = []
+        for row in cursor.fetchall():
+            categorias.append({
+                'categoria': row[0] or 'Sem categoria',
+                'quantidade': row[1],
+                'total': row[2] or 0
+            })
+        
+        conn.close()
+        return categorias
+    
+    def get_valor_estoque_total(self) -> float:
+        """Calcula o valor total do estoque"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT SUM(preco_custo * estoque)
+            FROM produtos
+            WHERE ativo = 1
+        ''')
+        valor = cursor.fetchone()[0] or 0
+        conn.close()
+        return valor
+    
+    # ==================== HISTÓRICO DE PREÇOS ====================
+    
+    def estatisticas_precos(self) -> List[Dict]:
+        """Reajustes, preço de venda médio, mínimo e máximo e último reajuste de cada produto, em uma consulta agrupada"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT produto_id, COUNT(*), AVG(preco_venda_novo), MIN(preco_venda_novo),
+                   MAX(preco_venda_novo), MAX(data_alteracao)
+            FROM historico_precos
+            GROUP BY produto_id
+        ''')
+        estatisticas = []
+        for row in cursor.fetchall():
+            estatisticas.append({
+                'produto_id': row[0],
+                'alteracoes': row[1],
+                'preco_medio': row[2],
+                'preco_minimo': row[3],
+                'preco_maximo': row[4],
+                'ultima_alteracao': row[5]
+            })
+        conn.close()
+        return estatisticas
+    
+    def listar_reajustes(self, data_inicio: str = None, data_fim: str = None) -> List[Dict]:
+        """Mudanças do preço de venda no período, em ordem de data"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        query = '''
+            SELECT produto_id, preco_venda_anterior, preco_venda_novo, data_alteracao
+            FROM historico_precos
+            WHERE preco_venda_anterior > 0 AND preco_venda_novo > 0
+              AND preco_venda_novo <> preco_venda_anterior
+        '''
+        params = []
+        
+        if data_inicio:
+            query += ' AND data_alteracao >= ?'
+            params.append(data_inicio)
+        
+        if data_fim:
+            query += " AND data_alteracao < date(?, '+1 day')"
+            params.append(data_fim)
+        
+        query += ' ORDER BY data_alteracao'
+        
+        cursor.execute(query, params)
+        reajustes = []
+        for row in cursor.fetchall():
+            reajustes.append({
+                'produto_id': row[0],
+                'preco_anterior': row[1],
+                'preco_novo': row[2],
+                'data_alteracao': row[3]
+            })
+        conn.close()
+        return reajustes
+    
+    # ==================== CONFIGURAÇÕES ====================
+    
+    def get_config(self, chave: str) -> Optional[str]:
+        """Obtém uma configuração"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT valor FROM configuracoes WHERE chave = ?', (chave,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
     
     def set_config(self, chave: str, valor: str):
         """Define uma configuração"""
@@ -750,35 +1871,900 @@ class Database:
     
     def progresso_meta(self, meta_id: int) -> Dict:
         """Calcula progresso de uma meta"""
-        metas = self.listar_metas(apenas_ativas=False)
-        meta = next((m for m in metas if m['id'] == meta_id), None)
+        return self.progresso_metas([meta_id]).get(meta_id, {})
+    
+    def progresso_metas(self, ids: List[int] = None) -> Dict[int, Dict]:
+        """
+        Progresso de várias metas de uma vez (padrão: todas as ativas), por id
+        A linha do tempo é cortada nos limites das metas e cada trecho coberto é somado uma
+        única vez; os trechos vão em uma CTE e uma só consulta soma vendas e despesas de todos
+        (uma busca no índice de data por trecho). Cada meta soma os seus trechos
+        """
+        if ids is None:
+            metas = self.listar_metas()
+        else:
+            procurados = set(ids)
+            metas = [m for m in self.listar_metas(apenas_ativas=False) if m['id'] in procurados]
         
-        if not meta:
+        if not metas:
             return {}
         
-        data_inicio = meta['data_inicio']
-        data_fim = meta['data_fim']
-        
-        if meta['tipo'] == 'RECEITA':
-            resumo = self.get_resumo_vendas(data_inicio, data_fim)
-            valor_atual = resumo['receita_total']
-        elif meta['tipo'] == 'LUCRO':
-            lucro_data = self.get_lucro_periodo(data_inicio, data_fim)
-            valor_atual = lucro_data['lucro_liquido']
-        elif meta['tipo'] == 'VENDAS':
-            resumo = self.get_resumo_vendas(data_inicio, data_fim)
-            valor_atual = resumo['total_vendas']
+        # Limites [início, dia seguinte ao fim) de cada meta e trechos entre limites consecutivos
+        periodos = {}
+        for meta in metas:
+            fim = datetime.strptime(meta['data_fim'][:10], "%Y-%m-%d") + timedelta(days=1)
+            periodos[meta['id']] = (meta['data_inicio'][:10], fim.strftime("%Y-%m-%d"))
+        limites = sorted({data for periodo in periodos.values() for data in periodo})
+        trechos = [(inicio, fim) for inicio, fim in zip(limites, limites[1:])
+                   if any(p_inicio <= inicio and fim <= p_fim for p_inicio, p_fim in periodos.values())]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, limites[0], limites[-1])
+        
+        # Trechos passados como CTE (VALUES); para cada um, uma subconsulta correlacionada faz a
+        # busca no índice de data e devolve os agregados juntos (json_array). Evita o GROUP BY
+        # da junção, que ordenaria em uma B-tree temporária todas as linhas do período
+        valores_trechos = ', '.join('(?, ?, ?)' for _ in trechos)
+        params_trechos = [valor for n, trecho in enumerate(trechos) for valor in (n, *trecho)]
+        vendas = self.fonte_particionada(
+            'vendas', esquemas, ['produto_id', 'quantidade', 'preco_unitario', 'valor_total'],
+            'data_venda >= t.inicio AND data_venda < t.fim'
+        )
+        despesas = self.fonte_particionada('despesas', esquemas, ['valor'],
+                                           'data_despesa >= t.inicio AND data_despesa < t.fim')
+        
+        # Lucro só é calculado (junção com produtos) se alguma meta for de lucro
+        if any(meta['tipo'] == 'LUCRO' for meta in metas):
+            agregados_vendas = 'COUNT(*), SUM(v.valor_total), SUM((v.preco_unitario - p.preco_custo) * v.quantidade)'
+            juncao_produtos = 'LEFT JOIN produtos p ON v.produto_id = p.id'
+        else:
+            agregados_vendas = 'COUNT(*), SUM(v.valor_total), 0'
+            juncao_produtos = ''
+        
+        totais_trechos = []
+        if trechos:
+            cursor.execute(f'''
+                WITH trechos (n, inicio, fim) AS (VALUES {valores_trechos})
+                SELECT t.n,
+                       (SELECT json_array({agregados_vendas}) FROM {vendas} v {juncao_produtos}),
+                       (SELECT SUM(d.valor) FROM {despesas} d)
+                FROM trechos t
+                ORDER BY t.n
+            ''', params_trechos)
+            for n, agregados, total_despesas in cursor.fetchall():
+                total_vendas, receita, lucro_bruto = json.loads(agregados)
+                totais_trechos.append((trechos[n], total_vendas, receita or 0, lucro_bruto or 0, total_despesas or 0))
+        conn.close()
+        
+        totais = {}
+        for meta_id, (p_inicio, p_fim) in periodos.items():
+            somas = [0, 0, 0, 0]
+            for (inicio, fim), *valores in totais_trechos:
+                if p_inicio <= inicio and fim <= p_fim:
+                    for i, valor in enumerate(valores):
+                        somas[i] += valor
+            totais[meta_id] = somas
+        
+        progresso = {}
+        for meta in metas:
+            total_vendas, receita, lucro_bruto, total_despesas = totais[meta['id']]
+            
+            if meta['tipo'] == 'RECEITA':
+                valor_atual = receita
+            elif meta['tipo'] == 'LUCRO':
+                valor_atual = lucro_bruto - total_despesas
+            elif meta['tipo'] == 'VENDAS':
+                valor_atual = total_vendas
+            else:
+                valor_atual = 0
+            
+            valor_meta = meta['valor_meta']
+            percentual = (valor_atual / valor_meta * 100) if valor_meta > 0 else 0
+            
+            progresso[meta['id']] = {
+                'meta': meta,
+                'valor_atual': valor_atual,
+                'valor_meta': valor_meta,
+                'percentual': percentual,
+                'atingido': valor_atual >= valor_meta,
+                'falta': max(0, valor_meta - valor_atual)
+            }
+        
+        return progresso
+    
+    # ==================== CLIENTES ====================
+    
+    def listar_clientes_compras(self) -> List[Dict]:
+        """Clientes com ao menos uma compra e seus totais (mantidos pelo resumo, sem ler as vendas)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, nome, coorte, ultima_compra, compras, valor_total
+            FROM clientes
+            WHERE compras > 0
+        ''')
+        clientes = []
+        for row in cursor.fetchall():
+            clientes.append({
+                'cliente_id': row[0],
+                'nome': row[1],
+                'coorte': row[2],
+                'ultima_compra': row[3],
+                'compras': row[4],
+                'valor_total': row[5] or 0
+            })
+        conn.close()
+        return clientes
+    
+    def get_coortes_clientes(self, coorte_inicio: str) -> List[Dict]:
+        """
+        Clientes ativos e receita por coorte (mês da primeira compra, AAAA-MM) e mês de compra,
+        para as coortes a partir de `coorte_inicio`
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT c.coorte, m.mes, COUNT(*), SUM(m.valor)
+            FROM clientes c
+            JOIN clientes_mensal m ON m.cliente_id = c.id
+            WHERE c.coorte >= ?
+            GROUP BY c.coorte, m.mes
+            ORDER BY c.coorte, m.mes
+        ''', (coorte_inicio,))
+        coortes = []
+        for row in cursor.fetchall():
+            coortes.append({
+                'coorte': row[0],
+                'mes': row[1],
+                'clientes': row[2],
+                'receita': row[3] or 0
+            })
+        conn.close()
+        return coortes
+    
+    # ==================== ALERTAS DE ANOMALIAS ====================
+    
+    def monitorar_venda(self, cursor, produto_id: int, quantidade: int, preco_unitario: float,
+                        data_venda: str, venda_id: int = None):
+        """
+        Atualiza as estatísticas móveis do produto com a venda (O(1)) e grava os alertas gerados
+        Uma vez por dia também procura produtos com dias sem venda improváveis (verificar_quedas)
+        """
+        colunas = ', '.join(COLUNAS_ESTATISTICAS)
+        cursor.execute(f'SELECT {colunas} FROM estatisticas_vendas WHERE produto_id = ?', (produto_id,))
+        row = cursor.fetchone()
+        estado = dict(zip(COLUNAS_ESTATISTICAS, row)) if row else None
+        estado, alertas = avaliar_venda(estado, produto_id, quantidade, preco_unitario, data_venda)
+        
+        cursor.execute(
+            f'INSERT OR REPLACE INTO estatisticas_vendas ({colunas}) '
+            f'VALUES ({", ".join("?" * len(COLUNAS_ESTATISTICAS))})',
+            [estado[coluna] for coluna in COLUNAS_ESTATISTICAS]
+        )
+        for alerta in alertas:
+            self.gravar_alerta(cursor, produto_id, alerta, venda_id)
+        
+        dia = str(data_venda)[:10]
+        cursor.execute("SELECT valor FROM configuracoes WHERE chave = 'anomalias_verificacao'")
+        row = cursor.fetchone()
+        if not row or row[0] < dia:
+            self.verificar_quedas(cursor, dia)
+            cursor.execute('''
+                INSERT OR REPLACE INTO configuracoes (chave, valor, data_atualizacao)
+                VALUES ('anomalias_verificacao', ?, ?)
+            ''', (dia, datetime.now()))
+    
+    def verificar_quedas(self, cursor, dia: str):
+        """
+        Alerta os produtos sem venda desde antes de ontem cujas vendas do último dia com venda
+        somadas aos dias seguintes (até ontem) ficaram muito abaixo do esperado
+        """
+        cursor.execute('''
+            SELECT produto_id, dia, quantidade_dia, media_diaria, variancia_diaria FROM estatisticas_vendas
+            WHERE dias >= ? AND dia < date(?, '-1 day') AND media_diaria > 0
+        ''', (MIN_DIAS, dia))
+        for produto_id, ultimo_dia, quantidade, media, variancia in cursor.fetchall():
+            dias_sem_venda = dias_entre(ultimo_dia, dia) - 1
+            if queda_improvavel(quantidade, 1 + dias_sem_venda, media, variancia):
+                self.gravar_alerta(cursor, produto_id, alerta_queda(ultimo_dia, quantidade, media, dias_sem_venda))
+    
+    @staticmethod
+    def gravar_alerta(cursor, produto_id: int, alerta: Dict, venda_id: int = None):
+        """Grava o alerta; se já houver um não lido do mesmo tipo para o produto, atualiza esse"""
+        cursor.execute('''
+            INSERT INTO alertas (tipo, produto_id, prioridade, mensagem, valor, esperado, venda_id, data_alerta)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (produto_id, tipo) WHERE lido = 0 DO UPDATE SET
+                prioridade = excluded.prioridade,
+                mensagem = excluded.mensagem,
+                valor = excluded.valor,
+                esperado = excluded.esperado,
+                venda_id = excluded.venda_id,
+                data_alerta = excluded.data_alerta,
+                ocorrencias = ocorrencias + 1
+        ''', (alerta['tipo'], produto_id, alerta['prioridade'], alerta['mensagem'], alerta['valor'],
+              alerta['esperado'], venda_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    
+    def listar_alertas(self, apenas_abertos: bool = True, limite: int = 100) -> List[Dict]:
+        """Alertas de anomalias, dos mais recentes para os mais antigos"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        query = '''
+            SELECT a.id, a.tipo, a.produto_id, p.nome, a.prioridade, a.mensagem, a.valor,
+                   a.esperado, a.ocorrencias, a.venda_id, a.data_alerta, a.lido
+            FROM alertas a
+            JOIN produtos p ON p.id = a.produto_id
+        '''
+        if apenas_abertos:
+            query += ' WHERE a.lido = 0'
+        query += ' ORDER BY a.data_alerta DESC LIMIT ?'
+        
+        cursor.execute(query, (limite,))
+        alertas = []
+        for row in cursor.fetchall():
+            alertas.append({
+                'id': row[0],
+                'tipo': row[1],
+                'produto_id': row[2],
+                'produto_nome': row[3],
+                'prioridade': row[4],
+                'mensagem': row[5],
+                'valor': row[6],
+                'esperado': row[7],
+                'ocorrencias': row[8],
+                'venda_id': row[9],
+                'data_alerta': row[10],
+                'lido': bool(row[11])
+            })
+        conn.close()
+        return alertas
+    
+    def marcar_alertas_lidos(self, ids: List[int] = None):
+        """Marca os alertas como lidos (todos os abertos se `ids` não for informado)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if ids is None:
+            cursor.execute('UPDATE alertas SET lido = 1 WHERE lido = 0')
         else:
-            valor_atual = 0
+            cursor.executemany('UPDATE alertas SET lido = 1 WHERE id = ? AND lido = 0', [(i,) for i in ids])
+        conn.commit()
+        conn.close()
+    
+    def recalcular_estatisticas_vendas(self, dias: int = 90):
+        """
+        Recalcula as estatísticas de todos os produtos com as vendas dos últimos `dias` dias
+        (média e variância simples, que o monitoramento passa a atualizar a cada venda)
+        """
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        inicio = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d")
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        esquemas = self.anexar_particoes(conn, inicio, hoje)
+        vendas = self.fonte_particionada('vendas', esquemas)
+        
+        # Somas e somas dos quadrados por produto e dia e, em seguida, por produto
+        cursor.execute(f'''
+            SELECT produto_id, SUM(vendas), SUM(soma_q), SUM(soma_q2), SUM(soma_p), SUM(soma_p2),
+                   SUM(CASE WHEN dia < :hoje THEN soma_q END),
+                   SUM(CASE WHEN dia < :hoje THEN soma_q * soma_q END),
+                   SUM(CASE WHEN dia = :hoje THEN soma_q END)
+            FROM (
+                SELECT produto_id, substr(data_venda, 1, 10) AS dia, COUNT(*) AS vendas,
+                       SUM(quantidade) AS soma_q, SUM(quantidade * quantidade) AS soma_q2,
+                       SUM(preco_unitario) AS soma_p, SUM(preco_unitario * preco_unitario) AS soma_p2
+                FROM {vendas}
+                WHERE data_venda >= :inicio AND data_venda < date(:hoje, '+1 day')
+                GROUP BY produto_id, dia
+            )
+            GROUP BY produto_id
+        ''', {'inicio': inicio, 'hoje': hoje})
+        
+        linhas = []
+        for produto_id, n, soma_q, soma_q2, soma_p, soma_p2, soma_dia, soma_dia2, hoje_q in cursor.fetchall():
+            media_q, media_p, media_dia = soma_q / n, soma_p / n, (soma_dia or 0) / dias
+            linhas.append((
+                produto_id, n, media_q, max(soma_q2 / n - media_q ** 2, 0), media_p,
+                max(soma_p2 / n - media_p ** 2, 0), hoje, hoje_q or 0, dias,
+                media_dia, max((soma_dia2 or 0) / dias - media_dia ** 2, 0)
+            ))
+        
+        cursor.execute('DELETE FROM estatisticas_vendas')
+        cursor.executemany(
+            f'INSERT INTO estatisticas_vendas ({", ".join(COLUNAS_ESTATISTICAS)}) '
+            f'VALUES ({", ".join("?" * len(COLUNAS_ESTATISTICAS))})',
+            linhas
+        )
+        conn.commit()
+        conn.close()
+    
+    # ==================== PLANO DE REPOSIÇÃO ====================
+    
+    def salvar_plano_reposicao(self, linhas: List[Tuple], prazo_entrega: int, dias_cobertura: int):
+        """
+        Substitui o plano de reposição em uma transação
+        linhas: (produto_id, media_diaria, media_diaria_prevista, demanda_prazo,
+                 demanda_cobertura, estoque_seguranca, ponto_pedido, modelo)
+        """
+        gerado_em = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM plano_reposicao')
+            cursor.executemany('''
+                INSERT INTO plano_reposicao (produto_id, media_diaria, media_diaria_prevista,
+                    demanda_prazo, demanda_cobertura, estoque_seguranca, ponto_pedido, modelo,
+                    prazo_entrega, dias_cobertura, gerado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [tuple(linha) + (prazo_entrega, dias_cobertura, gerado_em) for linha in linhas])
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def listar_plano_reposicao(self) -> List[Dict]:
+        """Plano de reposição dos produtos ativos, com nome e estoque atuais"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT r.produto_id, p.nome, p.estoque, r.media_diaria, r.media_diaria_prevista,
+                   r.demanda_prazo, r.demanda_cobertura, r.estoque_seguranca, r.ponto_pedido,
+                   r.modelo, r.prazo_entrega, r.dias_cobertura, r.gerado_em
+            FROM plano_reposicao r
+            JOIN produtos p ON p.id = r.produto_id
+            WHERE p.ativo = 1
+        ''')
+        plano = []
+        for row in cursor.fetchall():
+            plano.append({
+                'produto_id': row[0],
+                'produto_nome': row[1],
+                'estoque_atual': row[2],
+                'media_diaria': row[3],
+                'media_diaria_prevista': row[4],
+                'demanda_prazo': row[5],
+                'demanda_cobertura': row[6],
+                'estoque_seguranca': row[7],
+                'ponto_pedido': row[8],
+                'modelo': row[9],
+                'prazo_entrega': row[10],
+                'dias_cobertura': row[11],
+                'gerado_em': row[12]
+            })
+        conn.close()
+        return plano
+    
+    def data_plano_reposicao(self) -> Optional[str]:
+        """Quando o plano de reposição foi gerado (None se nunca foi)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(gerado_em) FROM plano_reposicao')
+        gerado_em = cursor.fetchone()[0]
+        conn.close()
+        return gerado_em
+    
+    # ==================== MANUTENÇÃO ====================
+    
+    def status_manutencao(self) -> Dict:
+        """Tamanho do arquivo, páginas livres, modos de journal/auto_vacuum e tamanho do WAL"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        status = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum', 'journal_mode'):
+            cursor.execute(f'PRAGMA {pragma}')
+            status[pragma] = cursor.fetchone()[0]
+        conn.close()
+        
+        caminho_wal = self.db_name + '-wal'
+        status['tamanho_bytes'] = status['page_size'] * status['page_count']
+        status['livre_bytes'] = status['page_size'] * status['freelist_count']
+        status['wal_bytes'] = os.path.getsize(caminho_wal) if os.path.exists(caminho_wal) else 0
+        status['auto_vacuum'] = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}.get(status['auto_vacuum'], '?')
+        return status
+    
+    def historico_manutencao(self, limite: int = 20) -> List[Dict]:
+        """Últimas etapas de manutenção executadas, da mais recente para a mais antiga"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, data_execucao, etapa, duracao_ms, detalhes
+            FROM manutencao_log
+            ORDER BY id DESC
+            LIMIT ?
+        ''', (limite,))
+        historico = []
+        for row in cursor.fetchall():
+            historico.append({
+                'id': row[0],
+                'data_execucao': row[1],
+                'etapa': row[2],
+                'duracao_ms': row[3],
+                'detalhes': row[4]
+            })
+        conn.close()
+        return historico
+    
+    def executar_manutencao(self, forcar: bool = False) -> List[Dict]:
+        """
+        Executa PRAGMA optimize, ANALYZE (se vencido), vacuum incremental (se o banco já estiver
+        em auto_vacuum INCREMENTAL) e checkpoint do WAL
+        Retorna as etapas executadas com o tempo de cada uma (também gravadas em manutencao_log)
+        """
+        etapas = []
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        valor_meta = meta['valor_meta']
-        percentual = (valor_atual / valor_meta * 100) if valor_meta > 0 else 0
+        def registrar(etapa, inicio, detalhes=''):
+            etapas.append({
+                'etapa': etapa,
+                'duracao_ms': (time.perf_counter() - inicio) * 1000,
+                'detalhes': detalhes
+            })
+        
+        try:
+            inicio = time.perf_counter()
+            cursor.execute(f'PRAGMA analysis_limit = {LIMITE_ANALISE_OPTIMIZE}')
+            cursor.execute('PRAGMA optimize')
+            registrar('optimize', inicio)
+            
+            # ANALYZE completo só quando o último tiver mais de INTERVALO_ANALYZE_HORAS
+            cursor.execute('''
+                SELECT MAX(data_execucao) FROM manutencao_log
+                WHERE etapa = 'analyze' AND data_execucao >= datetime('now', ?)
+            ''', (f'-{INTERVALO_ANALYZE_HORAS} hours',))
+            if forcar or cursor.fetchone()[0] is None:
+                inicio = time.perf_counter()
+                cursor.execute('PRAGMA analysis_limit = 0')
+                cursor.execute('ANALYZE')
+                conn.commit()
+                registrar('analyze', inicio)
+            
+            cursor.execute('PRAGMA auto_vacuum')
+            modo_vacuum = cursor.fetchone()[0]
+            cursor.execute('PRAGMA freelist_count')
+            livres = cursor.fetchone()[0]
+            
+            # Sem auto_vacuum INCREMENTAL não há vacuum aqui: a conversão reescreve o arquivo inteiro
+            # e só roda quando pedida (converter_vacuum_incremental, em Configurações)
+            inicio = time.perf_counter()
+            if modo_vacuum == 2 and livres:
+                # Libera em passos curtos para não segurar o bloqueio de escrita por muito tempo
+                restantes = livres
+                while restantes:
+                    cursor.execute(f'PRAGMA incremental_vacuum({PAGINAS_VACUUM_POR_PASSO})')
+                    cursor.fetchall()
+                    conn.commit()
+                    cursor.execute('PRAGMA freelist_count')
+                    novas = cursor.fetchone()[0]
+                    if novas >= restantes:
+                        break
+                    restantes = novas
+                    time.sleep(0.01)
+                registrar('vacuum', inicio, f'{livres - restantes} páginas liberadas')
+            
+            # Checkpoint passivo sempre; TRUNCATE quando o WAL passou do limite
+            caminho_wal = self.db_name + '-wal'
+            tamanho_wal = os.path.getsize(caminho_wal) if os.path.exists(caminho_wal) else 0
+            modo = 'TRUNCATE' if tamanho_wal > LIMITE_WAL_BYTES else 'PASSIVE'
+            inicio = time.perf_counter()
+            cursor.execute(f'PRAGMA wal_checkpoint({modo})')
+            ocupado, paginas_wal, copiadas = cursor.fetchone()
+            registrar('checkpoint', inicio,
+                      f'{modo}: {copiadas}/{paginas_wal} páginas' + (' (banco ocupado)' if ocupado else ''))
+            
+            cursor.executemany(
+                'INSERT INTO manutencao_log (etapa, duracao_ms, detalhes) VALUES (?, ?, ?)',
+                [(e['etapa'], e['duracao_ms'], e['detalhes']) for e in etapas]
+            )
+            cursor.execute('''
+                DELETE FROM manutencao_log
+                WHERE id NOT IN (SELECT id FROM manutencao_log ORDER BY id DESC LIMIT 200)
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return etapas
+    
+    def converter_vacuum_incremental(self) -> Dict:
+        """
+        Conversão única para auto_vacuum INCREMENTAL: exige um VACUUM completo, que reescreve
+        o arquivo e bloqueia as gravações até terminar. Depois dela, executar_manutencao passa
+        a liberar as páginas livres em passos curtos. Retorna a etapa (também gravada em manutencao_log)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('PRAGMA auto_vacuum')
+            if cursor.fetchone()[0] == 2:
+                return {'etapa': 'vacuum', 'duracao_ms': 0.0, 'detalhes': 'auto_vacuum já é incremental'}
+            
+            cursor.execute('PRAGMA freelist_count')
+            livres = cursor.fetchone()[0]
+            inicio = time.perf_counter()
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+            etapa = {
+                'etapa': 'vacuum',
+                'duracao_ms': (time.perf_counter() - inicio) * 1000,
+                'detalhes': f'convertido para auto_vacuum incremental ({livres} páginas livres)'
+            }
+            cursor.execute('INSERT INTO manutencao_log (etapa, duracao_ms, detalhes) VALUES (?, ?, ?)',
+                           (etapa['etapa'], etapa['duracao_ms'], etapa['detalhes']))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return etapa
+    
+    # ==================== BACKUP ====================
+    
+    def pasta_backups(self) -> str:
+        """Pasta onde os backups compactados são guardados"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_name)), PASTA_BACKUPS)
+    
+    def criar_backup(self, pasta: str = None, manter: int = None,
+                     paginas_por_passo: int = PAGINAS_POR_PASSO_BACKUP,
+                     progresso: Callable[[float], None] = None,
+                     ignorar_particoes_ausentes: bool = False) -> str:
+        """
+        Cria um backup consistente com a API de backup online do SQLite
+        A cópia é feita em passos de algumas páginas, sem bloquear quem está gravando,
+        e inclui o que ainda estiver no WAL. Os anos arquivados vão junto (tabela arquivos_particoes);
+        se algum arquivo faltar, levanta ParticaoAusente, a menos que ignorar_particoes_ausentes.
+        O resultado é compactado (.db.gz) e só os `manter` backups mais recentes são preservados.
+        Retorna o caminho do arquivo
+        """
+        pasta = pasta or self.pasta_backups()
+        os.makedirs(pasta, exist_ok=True)
+        
+        if manter is None:
+            manter = int(self.get_config('backups_manter') or BACKUPS_MANTER_PADRAO)
+        
+        base = os.path.splitext(os.path.basename(self.db_name))[0]
+        carimbo = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        copia_path = os.path.join(pasta, f".{base}_{carimbo}.db")
+        destino = os.path.join(pasta, f"{base}_{carimbo}.db.gz")
+        
+        def andamento(status, restantes, total):
+            if progresso and total:
+                progresso((total - restantes) / total)
+        
+        origem = self.get_connection()
+        copia = sqlite3.connect(copia_path)
+        try:
+            origem.backup(copia, pages=paginas_por_passo, progress=andamento)
+        finally:
+            copia.close()
+            origem.close()
+        
+        try:
+            self.embutir_particoes(copia_path, ignorar_particoes_ausentes)
+            
+            # Compacta em um nome temporário; o backup só aparece quando estiver completo
+            with open(copia_path, 'rb') as entrada, gzip.open(destino + '.parcial', 'wb') as saida:
+                shutil.copyfileobj(entrada, saida, 1024 * 1024)
+            os.replace(destino + '.parcial', destino)
+        finally:
+            os.remove(copia_path)
+        
+        self.rotacionar_backups(pasta, manter)
+        return destino
+    
+    def embutir_particoes(self, copia_path: str, ignorar_ausentes: bool = False):
+        """Grava na cópia do backup o conteúdo dos arquivos anuais, em blocos de TAMANHO_BLOCO_PARTICAO"""
+        conn = sqlite3.connect(copia_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT ano, arquivo FROM particoes ORDER BY ano')
+            particoes = cursor.fetchall()
+            if not particoes:
+                return
+            
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {TABELA_PARTICOES_BACKUP} (
+                    arquivo TEXT NOT NULL,
+                    parte INTEGER NOT NULL,
+                    conteudo BLOB NOT NULL,
+                    PRIMARY KEY (arquivo, parte)
+                )
+            ''')
+            for ano, arquivo in particoes:
+                try:
+                    caminho = self.caminho_particao(ano, arquivo)
+                except ParticaoAusente:
+                    if ignorar_ausentes:
+                        continue
+                    raise
+                
+                # Cópia consistente do arquivo do ano, também pela API de backup
+                temporario = f"{copia_path}.{ano}"
+                fonte = sqlite3.connect(caminho)
+                destino = sqlite3.connect(temporario)
+                try:
+                    fonte.backup(destino)
+                finally:
+                    destino.close()
+                    fonte.close()
+                
+                try:
+                    with open(temporario, 'rb') as entrada:
+                        for parte, bloco in enumerate(iter(lambda: entrada.read(TAMANHO_BLOCO_PARTICAO), b'')):
+                            cursor.execute(
+                                f'INSERT INTO {TABELA_PARTICOES_BACKUP} (arquivo, parte, conteudo) VALUES (?, ?, ?)',
+                                (arquivo, parte, bloco)
+                            )
+                finally:
+                    os.remove(temporario)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def listar_backups(self, pasta: str = None) -> List[Dict]:
+        """Lista os backups compactados, do mais recente para o mais antigo"""
+        pasta = pasta or self.pasta_backups()
+        base = os.path.splitext(os.path.basename(self.db_name))[0]
+        
+        backups = []
+        for caminho in glob.glob(os.path.join(pasta, f"{base}_*.db.gz")):
+            info = os.stat(caminho)
+            backups.append({
+                'arquivo': os.path.basename(caminho),
+                'caminho': caminho,
+                'tamanho': info.st_size,
+                'data': datetime.fromtimestamp(info.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            })
+        
+        # O nome carrega o carimbo de data/hora, então a ordem alfabética é a cronológica
+        backups.sort(key=lambda b: b['arquivo'], reverse=True)
+        return backups
+    
+    def rotacionar_backups(self, pasta: str = None, manter: int = BACKUPS_MANTER_PADRAO):
+        """Apaga os backups mais antigos, mantendo apenas os `manter` mais recentes"""
+        for backup in self.listar_backups(pasta)[max(1, manter):]:
+            os.remove(backup['caminho'])
+    
+    # ==================== RESTAURAÇÃO ====================
+    
+    @staticmethod
+    def validar_banco(caminho: str) -> int:
+        """
+        Verifica se um arquivo é um banco SQLite íntegro e compatível com este sistema
+        Retorna a versão do esquema (PRAGMA user_version); levanta BackupInvalido se não for
+        """
+        with open(caminho, 'rb') as arquivo:
+            if arquivo.read(16) != b'SQLite format 3\x00':
+                raise BackupInvalido("O arquivo não é um banco de dados SQLite")
+        
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA integrity_check')
+            resultado = [row[0] for row in cursor.fetchall()]
+            if resultado != ['ok']:
+                raise BackupInvalido(f"Banco corrompido: {'; '.join(resultado[:3])}")
+            
+            cursor.execute('PRAGMA user_version')
+            versao = cursor.fetchone()[0]
+            if versao > VERSAO_SCHEMA:
+                raise BackupInvalido(
+                    f"Backup criado por uma versão mais nova do sistema (esquema {versao}, suportado até {VERSAO_SCHEMA})"
+                )
+            
+            for tabela, colunas in COLUNAS_OBRIGATORIAS.items():
+                cursor.execute(f'PRAGMA table_info({tabela})')
+                existentes = {row[1] for row in cursor.fetchall()}
+                if not existentes:
+                    raise BackupInvalido(f"Tabela '{tabela}' não encontrada no backup")
+                faltando = [c for c in colunas if c not in existentes]
+                if faltando:
+                    raise BackupInvalido(f"Tabela '{tabela}' sem as colunas: {', '.join(faltando)}")
+        except sqlite3.DatabaseError as e:
+            raise BackupInvalido(f"Erro ao ler o banco: {e}")
+        finally:
+            conn.close()
+        
+        return versao
+    
+    def restaurar_backup(self, origem, fazer_backup_atual: bool = True) -> Dict:
+        """
+        Restaura um backup (.db ou .db.gz) a partir de um caminho ou arquivo aberto
+        O conteúdo é gravado em disco por partes, validado (integridade e esquema),
+        migrado para o esquema atual e só então copiado para o banco em uso em uma transação.
+        Os anos arquivados embutidos no backup voltam para a pasta arquivo/ na mesma troca
+        """
+        pasta = os.path.dirname(os.path.abspath(self.db_name))
+        descritor, temporario = tempfile.mkstemp(dir=pasta, prefix='.restaurar_', suffix='.db')
+        os.close(descritor)
+        particoes_extraidas = {}
+        
+        try:
+            # 1. Copiar para disco em partes (descompactando se for gzip)
+            entrada = open(origem, 'rb') if isinstance(origem, str) else origem
+            try:
+                entrada.seek(0)
+                compactado = entrada.read(2) == b'\x1f\x8b'
+                entrada.seek(0)
+                leitor = gzip.GzipFile(fileobj=entrada) if compactado else entrada
+                with open(temporario, 'wb') as saida:
+                    shutil.copyfileobj(leitor, saida, 1024 * 1024)
+            except (OSError, EOFError) as e:
+                raise BackupInvalido(f"Erro ao ler o arquivo enviado: {e}")
+            finally:
+                if isinstance(origem, str):
+                    entrada.close()
+            
+            # 2. Validar
+            versao_schema = self.validar_banco(temporario)
+            
+            # Anos arquivados que vieram no backup: extraídos para nomes temporários
+            particoes_extraidas = self.extrair_particoes(temporario)
+            
+            # 3. Migrar (create_tables é idempotente e atualiza o esquema)
+            Database(temporario)
+            
+            # A versão dos dados precisa avançar para invalidar os caches de quem usa o banco atual
+            versao_atual = self.get_versao_dados() if os.path.exists(self.db_name) else 0
+            conn = sqlite3.connect(temporario)
+            conn.execute('UPDATE versao_dados SET versao = MAX(versao, ?) + 1 WHERE id = 1', (versao_atual,))
+            conn.commit()
+            conn.execute('PRAGMA journal_mode=DELETE')
+            conn.close()
+            
+            # 4. Guardar o banco atual antes de substituí-lo
+            backup_anterior = None
+            if fazer_backup_atual and os.path.exists(self.db_name):
+                backup_anterior = self.criar_backup(ignorar_particoes_ausentes=True)
+            
+            # 5. Troca: o conteúdo é copiado para o banco em uso pela API de backup, em uma única
+            # transação. Quem está com o banco aberto (agendador, outras sessões) passa a ver o
+            # banco restaurado, sem renomear arquivos nem apagar o WAL/-shm de um banco aberto.
+            # Novas conexões e a manutenção agendada esperam a troca terminar
+            with BLOQUEIO_RESTAURACAO:
+                for extraido, caminho in particoes_extraidas.items():
+                    os.replace(extraido, caminho)
+                fonte = sqlite3.connect(temporario)
+                destino = sqlite3.connect(self.db_name, timeout=TIMEOUT_RESTAURACAO)
+                try:
+                    fonte.backup(destino)
+                    destino.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                finally:
+                    destino.close()
+                    fonte.close()
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            for extraido in particoes_extraidas:
+                if os.path.exists(extraido):
+                    os.remove(extraido)
+        
+        # Anos que o banco restaurado referencia mas que não vieram no backup nem estão na pasta
+        particoes_ausentes = []
+        for particao in self.listar_particoes():
+            try:
+                self.caminho_particao(particao['ano'], particao['arquivo'])
+            except ParticaoAusente:
+                particoes_ausentes.append(particao['ano'])
         
         return {
-            'meta': meta,
-            'valor_atual': valor_atual,
-            'valor_meta': valor_meta,
-            'percentual': percentual,
-            'atingido': valor_atual >= valor_meta,
-            'falta': max(0, valor_meta - valor_atual)
+            'versao_schema_original': versao_schema,
+            'migrado': versao_schema < VERSAO_SCHEMA,
+            'backup_anterior': backup_anterior,
+            'particoes_restauradas': len(particoes_extraidas),
+            'particoes_ausentes': particoes_ausentes
         }
+    
+    def extrair_particoes(self, temporario: str) -> Dict[str, str]:
+        """
+        Grava os anos arquivados embutidos no backup ao lado dos definitivos (nomes temporários)
+        e os remove da cópia restaurada. Retorna {arquivo temporário: caminho definitivo}
+        """
+        pasta = os.path.dirname(os.path.abspath(self.db_name))
+        extraidos = {}
+        conn = sqlite3.connect(temporario)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (TABELA_PARTICOES_BACKUP,))
+            if not cursor.fetchone():
+                return extraidos
+            
+            cursor.execute(f'SELECT DISTINCT arquivo FROM {TABELA_PARTICOES_BACKUP} ORDER BY arquivo')
+            for (arquivo,) in cursor.fetchall():
+                relativo = os.path.normpath(arquivo)
+                if os.path.dirname(relativo) != PASTA_ARQUIVO:
+                    raise BackupInvalido(f"Caminho de ano arquivado inválido no backup: {arquivo}")
+                caminho = os.path.join(pasta, relativo)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                extraido = os.path.join(os.path.dirname(caminho), f".restaurar_{os.path.basename(caminho)}")
+                extraidos[extraido] = caminho
+                
+                leitura = conn.cursor()
+                leitura.execute(f'SELECT conteudo FROM {TABELA_PARTICOES_BACKUP} WHERE arquivo = ? ORDER BY parte',
+                                (arquivo,))
+                with open(extraido, 'wb') as saida:
+                    for (bloco,) in leitura:
+                        saida.write(bloco)
+                
+                verificacao = sqlite3.connect(f"file:{extraido}?mode=ro", uri=True)
+                try:
+                    if verificacao.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                        raise BackupInvalido(f"Ano arquivado corrompido no backup: {arquivo}")
+                except sqlite3.DatabaseError as e:
+                    raise BackupInvalido(f"Erro ao ler o ano arquivado {arquivo}: {e}")
+                finally:
+                    verificacao.close()
+            
+            cursor.execute(f'DROP TABLE {TABELA_PARTICOES_BACKUP}')
+            conn.commit()
+            conn.execute('VACUUM')
+        except BaseException:
+            for extraido in extraidos:
+                if os.path.exists(extraido):
+                    os.remove(extraido)
+            raise
+        finally:
+            conn.close()
+        return extraidos
+
+
+class AgendadorManutencao(threading.Thread):
+    """
+    Executa Database.executar_manutencao periodicamente em uma thread de baixa prioridade
+    `solicitar()` antecipa a próxima execução (forçando o ANALYZE)
+    """
+    
+    def __init__(self, db: Database, intervalo_horas: float = INTERVALO_MANUTENCAO_HORAS,
+                 atraso_inicial: float = 60):
+        super().__init__(name='manutencao', daemon=True)
+        self.db = db
+        self.intervalo = intervalo_horas * 3600
+        self.atraso_inicial = atraso_inicial
+        self.evento = threading.Event()
+        self.parado = False
+        self.forcar = False
+        self.em_execucao = False
+        self.ultimo_resultado = None
+        self.erro = None
+    
+    def run(self):
+        self.reduzir_prioridade()
+        espera = self.atraso_inicial
+        while True:
+            self.evento.wait(espera)
+            self.evento.clear()
+            if self.parado:
+                break
+            
+            forcar, self.forcar = self.forcar, False
+            self.em_execucao = True
+            try:
+                # Não roda durante uma restauração (nem a restauração começa no meio dela)
+                with BLOQUEIO_RESTAURACAO:
+                    self.ultimo_resultado = self.db.executar_manutencao(forcar=forcar)
+                self.erro = None
+            except sqlite3.Error as e:
+                self.erro = str(e)
+            finally:
+                self.em_execucao = False
+            espera = self.intervalo
+    
+    def solicitar(self):
+        """Executa a manutenção agora"""
+        self.forcar = True
+        self.evento.set()
+    
+    def parar(self):
+        self.parado = True
+        self.evento.set()
+    
+    @staticmethod
+    def reduzir_prioridade():
+        """No Linux o nice vale por thread; em outros sistemas a chamada é ignorada"""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
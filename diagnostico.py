@@ -0,0 +1,126 @@
+"""
+Painel de diagnóstico (oculto) - abre com Ctrl+Shift+D
+Liga/desliga a instrumentação das consultas e mostra as que mais pesam e as lentas
+"""
+
+import customtkinter as ctk
+import instrumentacao
+
+ORDENS = {
+    "Tempo total": 'total_ms',
+    "Tempo máximo": 'max_ms',
+    "Execuções": 'execucoes',
+    "Linhas": 'linhas'
+}
+
+
+class PainelDiagnostico(ctk.CTkToplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnóstico de consultas")
+        self.geometry("1100x700")
+
+        # Controles
+        barra = ctk.CTkFrame(self)
+        barra.pack(fill="x", padx=10, pady=10)
+
+        self.var_ativa = ctk.BooleanVar(value=instrumentacao.ativa())
+        ctk.CTkSwitch(
+            barra,
+            text="Instrumentação ativa",
+            variable=self.var_ativa,
+            command=self.alternar
+        ).pack(side="left", padx=10)
+
+        self.var_explicar = ctk.BooleanVar(value=instrumentacao.configuracao()['explicar'])
+        ctk.CTkCheckBox(
+            barra,
+            text="Capturar EXPLAIN QUERY PLAN",
+            variable=self.var_explicar,
+            command=self.alternar
+        ).pack(side="left", padx=10)
+
+        ctk.CTkLabel(barra, text="Lenta acima de (ms):").pack(side="left", padx=(10, 5))
+        self.entry_limite = ctk.CTkEntry(barra, width=70)
+        self.entry_limite.insert(0, str(instrumentacao.configuracao()['limite_lenta_ms']))
+        self.entry_limite.pack(side="left")
+
+        self.combo_ordem = ctk.CTkComboBox(barra, values=list(ORDENS), width=140,
+                                           command=lambda _: self.atualizar())
+        self.combo_ordem.set("Tempo total")
+        self.combo_ordem.pack(side="left", padx=10)
+
+        ctk.CTkButton(barra, text="🔄 Atualizar", width=100, command=self.atualizar).pack(side="right", padx=5)
+        ctk.CTkButton(barra, text="🗑️ Limpar", width=100, fg_color="gray",
+                      command=self.limpar).pack(side="right", padx=5)
+
+        # Resultados
+        self.texto = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        self.texto.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.atualizar()
+        self.after(2000, self.atualizar_periodicamente)
+
+    def alternar(self):
+        """Aplica os controles (ligar/desligar, EXPLAIN e limite das lentas)"""
+        try:
+            limite = float(self.entry_limite.get().replace(',', '.'))
+        except ValueError:
+            limite = instrumentacao.LIMITE_LENTA_MS
+        if self.var_ativa.get():
+            instrumentacao.ativar(limite_lenta_ms=limite, explicar=self.var_explicar.get())
+        else:
+            instrumentacao.desativar()
+        self.atualizar()
+
+    def limpar(self):
+        instrumentacao.limpar()
+        self.atualizar()
+
+    def atualizar_periodicamente(self):
+        if not self.winfo_exists():
+            return
+        if instrumentacao.ativa():
+            self.atualizar()
+        self.after(2000, self.atualizar_periodicamente)
+
+    def atualizar(self):
+        """Reescreve a tabela das consultas que mais pesam e das últimas lentas"""
+        ordem = ORDENS.get(self.combo_ordem.get(), 'total_ms')
+        linhas = []
+
+        estado = "ATIVA" if instrumentacao.ativa() else "desligada"
+        linhas.append(f"Instrumentação {estado}")
+        linhas.append("")
+        linhas.append(f"{'total ms':>10} {'média':>8} {'máx':>8} {'exec':>6} {'linhas':>8}  {'origem / método':<40} consulta")
+        linhas.append("-" * 160)
+
+        for item in instrumentacao.principais(25, ordem):
+            origem = max(item['origens'], key=item['origens'].get)
+            metodo = max(item['metodos'], key=item['metodos'].get)
+            linhas.append(
+                f"{item['total_ms']:>10.1f} {item['media_ms']:>8.1f} {item['max_ms']:>8.1f} "
+                f"{item['execucoes']:>6} {item['linhas']:>8}  {(origem + ' / ' + metodo)[:40]:<40} "
+                f"{item['consulta'][:120]}"
+            )
+            faixas = ', '.join(f"{rotulo}: {qtd}" for rotulo, qtd
+                               in zip(instrumentacao.rotulos_faixas(), item['faixas']) if qtd)
+            linhas.append(f"{'':>45}parâmetros {item['parametros']}  |  {faixas}")
+            for etapa in item['plano'] or []:
+                linhas.append(f"{'':>45}» {etapa}")
+
+        lentas = instrumentacao.consultas_lentas(15)
+        if lentas:
+            linhas.append("")
+            linhas.append("Consultas lentas (mais recentes primeiro)")
+            linhas.append("-" * 160)
+            for lenta in lentas:
+                linhas.append(
+                    f"{lenta['data']}  {lenta['ms']:>8.1f} ms  {lenta['linhas']:>7} linhas  "
+                    f"{lenta['origem']} / {lenta['metodo']}  {lenta['consulta'][:100]}"
+                )
+
+        self.texto.configure(state="normal")
+        self.texto.delete("1.0", "end")
+        self.texto.insert("1.0", "\n".join(linhas))
+        self.texto.configure(state="disabled")
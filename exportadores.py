@@ -0,0 +1,331 @@
+"""
+Módulo de exportação
+Geração de relatórios em PDF (reportlab) e Excel (pandas/openpyxl)
+"""
+
+from itertools import islice
+from xml.sax.saxutils import escape
+from typing import List, Dict, Iterable, Tuple
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+import pandas as pd
+import openpyxl
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from utils import Formatador
+
+class ExportadorPDF:
+    """Classe para exportação de relatórios em PDF"""
+    
+    @staticmethod
+    def gerar_relatorio_vendas(vendas: List[Dict], arquivo: str, periodo: str = ""):
+        """Gera relatório de vendas em PDF"""
+        doc = SimpleDocTemplate(arquivo, pagesize=A4)
+        elementos = []
+        styles = getSampleStyleSheet()
+        
+        # Título
+        titulo_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#1f77b4'),
+            spaceAfter=30,
+            alignment=1  # Center
+        )
+        
+        titulo = Paragraph(f"Relatório de Vendas{' - ' + periodo if periodo else ''}", titulo_style)
+        elementos.append(titulo)
+        elementos.append(Spacer(1, 20))
+        
+        # Tabela de vendas
+        if vendas:
+            dados = [['ID', 'Produto', 'Qtd', 'Valor Unit.', 'Total', 'Data']]
+            total_geral = sum(venda['valor_total'] for venda in vendas)
+            
+            # Colunas formatadas de uma vez
+            precos = Formatador.formatar_moeda_lote([venda['preco_unitario'] for venda in vendas])
+            totais = Formatador.formatar_moeda_lote([venda['valor_total'] for venda in vendas])
+            datas = Formatador.formatar_data_lote([venda['data_venda'] for venda in vendas])
+            
+            for venda, preco, total, data in zip(vendas, precos, totais, datas):
+                dados.append([
+                    str(venda['id']),
+                    venda['produto_nome'][:30],
+                    str(venda['quantidade']),
+                    preco,
+                    total,
+                    data
+                ])
+            
+            # Linha de total
+            dados.append(['', '', '', 'TOTAL:', Formatador.formatar_moeda(total_geral), ''])
+            
+            tabela = Table(dados, colWidths=[0.6*inch, 2.5*inch, 0.7*inch, 1.2*inch, 1.2*inch, 1.2*inch])
+            tabela.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e8e8e8')),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            
+            elementos.append(tabela)
+        else:
+            texto = Paragraph("Nenhuma venda registrada no período.", styles['Normal'])
+            elementos.append(texto)
+        
+        doc.build(elementos)
+    
+    @staticmethod
+    def gerar_relatorio_produtos(produtos: List[Dict], arquivo: str):
+        """Gera relatório de produtos em PDF"""
+        doc = SimpleDocTemplate(arquivo, pagesize=A4)
+        elementos = []
+        styles = getSampleStyleSheet()
+        
+        # Título
+        titulo = Paragraph("Relatório de Produtos", styles['Title'])
+        elementos.append(titulo)
+        elementos.append(Spacer(1, 20))
+        
+        if produtos:
+            dados = [['ID', 'Nome', 'Categoria', 'Estoque', 'P. Custo', 'P. Venda', 'Margem']]
+            
+            custos = Formatador.formatar_moeda_lote([produto['preco_custo'] for produto in produtos])
+            precos = Formatador.formatar_moeda_lote([produto['preco_venda'] for produto in produtos])
+            
+            for produto, custo, preco in zip(produtos, custos, precos):
+                margem = Formatador.calcular_margem(produto['preco_venda'], produto['preco_custo'])
+                dados.append([
+                    str(produto['id']),
+                    produto['nome'][:25],
+                    produto.get('categoria_nome', 'S/Cat')[:15],
+                    str(produto['estoque']),
+                    custo,
+                    preco,
+                    Formatador.formatar_porcentagem(margem)
+                ])
+            
+            tabela = Table(dados, colWidths=[0.5*inch, 2*inch, 1.3*inch, 0.8*inch, 1*inch, 1*inch, 0.8*inch])
+            tabela.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ca02c')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            
+            elementos.append(tabela)
+        else:
+            texto = Paragraph("Nenhum produto cadastrado.", styles['Normal'])
+            elementos.append(texto)
+        
+        doc.build(elementos)
+    
+    @staticmethod
+    def gerar_relatorio_financeiro(dados_financeiros: Dict, arquivo: str, periodo: str = ""):
+        """Gera relatório financeiro em PDF"""
+        doc = SimpleDocTemplate(arquivo, pagesize=A4)
+        elementos = []
+        styles = getSampleStyleSheet()
+        
+        # Título
+        titulo = Paragraph(f"Relatório Financeiro{' - ' + periodo if periodo else ''}", styles['Title'])
+        elementos.append(titulo)
+        elementos.append(Spacer(1, 30))
+        
+        # Resumo financeiro
+        dados_tabela = [
+            ['Descrição', 'Valor'],
+            ['Receita Total', Formatador.formatar_moeda(dados_financeiros.get('receita_total', 0))],
+            ['Lucro Bruto', Formatador.formatar_moeda(dados_financeiros.get('lucro_bruto', 0))],
+            ['Despesas', Formatador.formatar_moeda(dados_financeiros.get('despesas', 0))],
+            ['Lucro Líquido', Formatador.formatar_moeda(dados_financeiros.get('lucro_liquido', 0))]
+        ]
+        
+        tabela = Table(dados_tabela, colWidths=[3*inch, 2*inch])
+        tabela.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ff7f0e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#d4edda')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 14),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        
+        elementos.append(tabela)
+        doc.build(elementos)
+    
+    @staticmethod
+    def gerar_recibo_venda(venda: Dict, arquivo: str):
+        """Gera o recibo de uma venda em PDF"""
+        doc = SimpleDocTemplate(arquivo, pagesize=A4)
+        elementos = []
+        styles = getSampleStyleSheet()
+        
+        titulo = Paragraph(f"Recibo de Venda #{venda['id']}", styles['Title'])
+        elementos.append(titulo)
+        elementos.append(Spacer(1, 20))
+        
+        dados_tabela = [
+            ['Descrição', 'Valor'],
+            ['Data', Formatador.formatar_data_hora(venda['data_venda'])],
+            ['Cliente', venda.get('cliente') or 'Não informado'],
+            ['Produto', venda['produto_nome']],
+            ['Quantidade', str(venda['quantidade'])],
+            ['Preço Unitário', Formatador.formatar_moeda(venda['preco_unitario'])],
+            ['Total', Formatador.formatar_moeda(venda['valor_total'])]
+        ]
+        
+        tabela = Table(dados_tabela, colWidths=[2.5*inch, 3.5*inch])
+        tabela.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#d4edda')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elementos.append(tabela)
+        
+        if venda.get('observacoes'):
+            elementos.append(Spacer(1, 15))
+            # Texto livre: <, > e & quebrariam a marcação do Paragraph
+            elementos.append(Paragraph(f"Observações: {escape(venda['observacoes'])}", styles['Normal']))
+        
+        doc.build(elementos)
+
+class ExportadorExcel:
+    """Classe para exportação de relatórios em Excel"""
+    
+    # Linhas usadas para estimar a largura das colunas no modo streaming
+    LINHAS_AMOSTRA_LARGURA = 500
+    
+    # Colunas dos relatórios: (título, função que extrai o valor da linha)
+    COLUNAS_VENDAS = [
+        ('ID', lambda v: v['id']),
+        ('Produto', lambda v: v['produto_nome']),
+        ('Quantidade', lambda v: v['quantidade']),
+        ('Preço Unitário', lambda v: v['preco_unitario']),
+        ('Valor Total', lambda v: v['valor_total']),
+        ('Cliente', lambda v: v.get('cliente')),
+        ('Data da Venda', lambda v: v['data_venda'])
+    ]
+    
+    COLUNAS_PRODUTOS = [
+        ('ID', lambda p: p['id']),
+        ('Nome', lambda p: p['nome']),
+        ('Categoria', lambda p: p.get('categoria_nome')),
+        ('Preço Custo', lambda p: p['preco_custo']),
+        ('Preço Venda', lambda p: p['preco_venda']),
+        ('Estoque', lambda p: p['estoque']),
+        ('Estoque Mínimo', lambda p: p['estoque_minimo']),
+        ('Margem (%)', lambda p: Formatador.calcular_margem(p['preco_venda'], p['preco_custo']))
+    ]
+    
+    @staticmethod
+    def escrever_planilha_stream(linhas: Iterable[Dict], arquivo: str, nome_aba: str,
+                                 colunas: List[Tuple], cor_cabecalho: str) -> int:
+        """
+        Escreve uma planilha em modo write-only, consumindo as linhas sob demanda
+        A largura das colunas é calculada a partir das primeiras linhas (amostra)
+        Retorna a quantidade de linhas escritas
+        """
+        linhas = iter(linhas)
+        amostra = [
+            [extrair(linha) for _, extrair in colunas]
+            for linha in islice(linhas, ExportadorExcel.LINHAS_AMOSTRA_LARGURA)
+        ]
+        
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(nome_aba)
+        
+        # Largura das colunas (precisa ser definida antes da primeira linha)
+        for indice, (titulo, _) in enumerate(colunas):
+            maior = max([len(titulo)] + [len(str(valores[indice])) for valores in amostra if valores[indice] is not None])
+            worksheet.column_dimensions[get_column_letter(indice + 1)].width = min(maior + 2, 50)
+        
+        # Cabeçalho
+        header_fill = PatternFill(start_color=cor_cabecalho, end_color=cor_cabecalho, fill_type='solid')
+        header_font = Font(bold=True, color='FFFFFF')
+        cabecalho = []
+        for titulo, _ in colunas:
+            cell = WriteOnlyCell(worksheet, value=titulo)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal='center')
+            cabecalho.append(cell)
+        worksheet.append(cabecalho)
+        
+        for valores in amostra:
+            worksheet.append(valores)
+        
+        total = len(amostra)
+        for linha in linhas:
+            worksheet.append([extrair(linha) for _, extrair in colunas])
+            total += 1
+        
+        workbook.save(arquivo)
+        return total
+    
+    @staticmethod
+    def gerar_relatorio_vendas(vendas: Iterable[Dict], arquivo: str) -> int:
+        """
+        Gera relatório de vendas em Excel
+        Aceita uma lista ou um iterador (ex.: Database.iterar_vendas) para exportar sem carregar tudo
+        """
+        return ExportadorExcel.escrever_planilha_stream(
+            vendas, arquivo, 'Vendas', ExportadorExcel.COLUNAS_VENDAS, '1f77b4'
+        )
+    
+    @staticmethod
+    def gerar_relatorio_produtos(produtos: Iterable[Dict], arquivo: str) -> int:
+        """Gera relatório de produtos em Excel"""
+        return ExportadorExcel.escrever_planilha_stream(
+            produtos, arquivo, 'Produtos', ExportadorExcel.COLUNAS_PRODUTOS, '2ca02c'
+        )
+    
+    @staticmethod
+    def gerar_relatorio_completo(dados: Dict, arquivo: str):
+        """Gera relatório completo com múltiplas abas"""
+        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
+            # Aba de vendas
+            if 'vendas' in dados and dados['vendas']:
+                df_vendas = pd.DataFrame(dados['vendas'])
+                df_vendas.to_excel(writer, sheet_name='Vendas', index=False)
+            
+            # Aba de produtos
+            if 'produtos' in dados and dados['produtos']:
+                df_produtos = pd.DataFrame(dados['produtos'])
+                df_produtos.to_excel(writer, sheet_name='Produtos', index=False)
+            
+            # Aba de despesas
+            if 'despesas' in dados and dados['despesas']:
+                df_despesas = pd.DataFrame(dados['despesas'])
+                df_despesas.to_excel(writer, sheet_name='Despesas', index=False)
+            
+            # Aba de resumo
+            if 'resumo' in dados:
+                df_resumo = pd.DataFrame([dados['resumo']])
+                df_resumo.to_excel(writer, sheet_name='Resumo', index=False)
+
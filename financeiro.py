@@ -2,13 +2,15 @@
 Tela de Financeiro - Gestão financeira, despesas e relatórios
 """
 
+import os
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from datetime import datetime
 from database import Database
-from utils import Formatador, Periodo, ExportadorPDF, ExportadorExcel
+from utils import Formatador, Periodo
+from series_temporais import largura_grafico, reduzir_serie, posicoes_rotulos
 
 class Financeiro(ctk.CTkFrame):
     def __init__(self, parent, db: Database):
@@ -83,6 +85,16 @@ class Financeiro(ctk.CTkFrame):
         )
         btn_pdf.pack(side="right", padx=5)
         
+        btn_pdfs = ctk.CTkButton(
+            frame,
+            text="📑 Exportar Todos PDF",
+            command=self.exportar_relatorios_pdf,
+            width=170,
+            fg_color="#9467bd",
+            hover_color="#7f5aa2"
+        )
+        btn_pdfs.pack(side="right", padx=5)
+        
         btn_excel = ctk.CTkButton(
             frame,
             text="📊 Exportar Excel",
@@ -443,16 +455,19 @@ class Financeiro(ctk.CTkFrame):
                 lucro_por_data[data] = lucro_por_data.get(data, 0) - despesa['valor']
             
             if lucro_por_data:
-                datas = sorted(lucro_por_data.keys())
-                valores = [lucro_por_data[data] for data in datas]
-                
-                # Formatar datas
-                datas_formatadas = [Formatador.formatar_data(data + " 00:00:00") for data in datas]
+                # Agregar por dia/semana/mês conforme a largura do gráfico
+                largura = largura_grafico(self.figura_lucro, self.canvas_lucro)
+                serie = reduzir_serie(lucro_por_data, largura, data_inicio, data_fim)
+                valores = serie['valores']
+                posicoes = list(range(len(valores)))
                 
                 # Cores baseadas em positivo/negativo
                 cores = ['#2ca02c' if v >= 0 else '#d62728' for v in valores]
                 
-                self.ax_lucro.bar(datas_formatadas, valores, color=cores, alpha=0.7)
+                self.ax_lucro.bar(posicoes, valores, color=cores, alpha=0.7)
+                rotulos = posicoes_rotulos(len(posicoes), largura)
+                self.ax_lucro.set_xticks(rotulos)
+                self.ax_lucro.set_xticklabels([serie['rotulos'][i] for i in rotulos])
                 self.ax_lucro.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
                 self.ax_lucro.set_xlabel('Data', fontsize=10)
                 self.ax_lucro.set_ylabel('Lucro (R$)', fontsize=10)
@@ -583,22 +598,36 @@ class Financeiro(ctk.CTkFrame):
         
         if filename:
             try:
-                resumo = self.db.get_resumo_vendas(data_inicio, data_fim)
-                lucro_data = self.db.get_lucro_periodo(data_inicio, data_fim)
-                
-                dados = {
-                    'receita_total': resumo['receita_total'],
-                    'lucro_bruto': lucro_data['lucro_bruto'],
-                    'despesas': lucro_data['despesas'],
-                    'lucro_liquido': lucro_data['lucro_liquido']
-                }
-                
                 periodo_texto = self.combo_periodo.get()
-                ExportadorPDF.gerar_relatorio_financeiro(dados, filename, periodo_texto)
+                import relatorio_pdf  # carregado só ao exportar
+                relatorio_pdf.gerar_relatorio_financeiro(self.db, filename, data_inicio, data_fim, periodo_texto)
                 messagebox.showinfo("Sucesso", f"Relatório exportado para:\n{filename}")
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
     
+    def exportar_relatorios_pdf(self):
+        """Exporta os relatórios de vendas e financeiro do período de uma vez, gerados em paralelo"""
+        data_inicio, data_fim = self.get_periodo_datas()
+        
+        pasta = filedialog.askdirectory(title="Pasta dos relatórios")
+        
+        if pasta:
+            try:
+                periodo_texto = self.combo_periodo.get()
+                data = datetime.now().strftime('%Y%m%d')
+                tarefas = [
+                    {'tipo': tipo, 'db_name': self.db.db_name,
+                     'arquivo': os.path.join(pasta, f"relatorio_{tipo}_{data}.pdf"),
+                     'data_inicio': data_inicio, 'data_fim': data_fim, 'periodo': periodo_texto}
+                    for tipo in ('vendas', 'financeiro')
+                ]
+                import relatorio_pdf  # carregado só ao exportar
+                gerados = relatorio_pdf.gerar_relatorios_paralelo(tarefas)
+                arquivos = "\n".join(r['arquivo'] for r in gerados)
+                messagebox.showinfo("Sucesso", f"Relatórios exportados:\n{arquivos}")
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
+    
     def exportar_relatorio_excel(self):
         """Exporta relatório financeiro em Excel"""
         data_inicio, data_fim = self.get_periodo_datas()
@@ -630,6 +659,7 @@ class Financeiro(ctk.CTkFrame):
                     }
                 }
                 
+                from exportadores import ExportadorExcel  # carregado só ao exportar
                 ExportadorExcel.gerar_relatorio_completo(dados, filename)
                 messagebox.showinfo("Sucesso", f"Relatório exportado para:\n{filename}")
             except Exception as e:
@@ -119,7 +119,7 @@ class HistoricoPrecos(ctk.CTkToplevel):
         vendas.append(self.produto['preco_venda'])
         
         # Formatar datas
-        datas_formatadas = [Formatador.formatar_data(d + " 00:00:00") for d in datas]
+        datas_formatadas = Formatador.formatar_data_lote(datas, formato_entrada="%Y-%m-%d")
         
         # Plotar linhas
         ax.plot(datas_formatadas, custos, marker='o', linewidth=2, 
@@ -0,0 +1,307 @@
+"""
+Instrumentação das consultas do Database
+Mede cada comando (impressão digital do SQL, formato dos parâmetros, linhas, tempo, tela e
+método de origem), mantém um histograma em memória por consulta, grava um log das consultas
+lentas e, opcionalmente, captura o EXPLAIN QUERY PLAN
+
+Desligada, o Database usa a conexão normal e não há custo; `ativar()` troca a fábrica de conexões
+"""
+
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from database import Database, ConexaoOtimizada
+from consultor_indices import impressao_digital
+
+# Consultas acima deste tempo (ms) vão para o log de lentas
+LIMITE_LENTA_MS = 100
+# Limites (ms) das faixas do histograma; a última faixa é "acima de 1000"
+FAIXAS_MS = (1, 5, 10, 50, 100, 500, 1000)
+# Consultas lentas mantidas em memória para o painel
+MAX_LENTAS_MEMORIA = 100
+
+_ARQUIVO_DATABASE = os.path.normcase(os.path.abspath(sys.modules[Database.__module__].__file__))
+
+_lock = threading.Lock()
+_origem_local = threading.local()
+_estado = {
+    'ativa': False,
+    'explicar': False,
+    'limite_lenta_ms': LIMITE_LENTA_MS,
+    'arquivo_log': None,
+    'origem_padrao': None
+}
+_histograma: Dict[str, Dict] = {}
+_lentas = deque(maxlen=MAX_LENTAS_MEMORIA)
+
+
+def formato_parametros(parametros) -> str:
+    """Tipos dos parâmetros, sem os valores (ex.: '(str, str, int)')"""
+    if parametros is None:
+        return '()'
+    if isinstance(parametros, dict):
+        return '{' + ', '.join(f"{k}: {type(v).__name__}" for k, v in parametros.items()) + '}'
+    return '(' + ', '.join(type(v).__name__ for v in parametros) + ')'
+
+
+def definir_origem(origem: Optional[str]):
+    """Tela/página que está consultando o banco (vale para a thread atual e como padrão)"""
+    _origem_local.origem = origem
+    _estado['origem_padrao'] = origem
+
+
+def origem_atual() -> str:
+    return getattr(_origem_local, 'origem', None) or _estado['origem_padrao'] or '-'
+
+
+def metodo_chamador() -> str:
+    """Primeiro método do Database na pilha (quem montou a consulta)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if os.path.normcase(os.path.abspath(frame.f_code.co_filename)) == _ARQUIVO_DATABASE:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return '-'
+
+
+# ==================== CONEXÃO E CURSOR ====================
+
+class Medicao:
+    """Uma execução em andamento: o tempo das buscas (fetch) é somado até o cursor ser reutilizado"""
+
+    __slots__ = ('sql', 'valores', 'parametros', 'origem', 'metodo', 'duracao', 'linhas', 'quantidade')
+
+    def __init__(self, sql, valores, parametros, quantidade=1):
+        self.sql = sql
+        self.valores = valores
+        self.parametros = parametros
+        self.origem = origem_atual()
+        self.metodo = metodo_chamador()
+        self.duracao = 0.0
+        self.linhas = 0
+        self.quantidade = quantidade
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que cronometra execute/executemany e as buscas de linhas"""
+
+    medicao = None
+
+    def _medir(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            if self.medicao is not None:
+                self.medicao.duracao += time.perf_counter() - inicio
+
+    def execute(self, sql, parametros=()):
+        self.finalizar()
+        self.medicao = Medicao(sql, parametros, formato_parametros(parametros))
+        self._medir(super().execute, sql, parametros)
+        return self
+
+    def executemany(self, sql, lista):
+        self.finalizar()
+        lista = list(lista)
+        forma = formato_parametros(lista[0]) if lista else '()'
+        self.medicao = Medicao(sql, lista[0] if lista else (), f"{len(lista)}×{forma}", quantidade=len(lista))
+        self._medir(super().executemany, sql, lista)
+        return self
+
+    def fetchone(self):
+        linha = self._medir(super().fetchone)
+        if linha is not None and self.medicao is not None:
+            self.medicao.linhas += 1
+        return linha
+
+    def fetchmany(self, *args):
+        linhas = self._medir(super().fetchmany, *args)
+        if self.medicao is not None:
+            self.medicao.linhas += len(linhas)
+        return linhas
+
+    def fetchall(self):
+        linhas = self._medir(super().fetchall)
+        if self.medicao is not None:
+            self.medicao.linhas += len(linhas)
+        return linhas
+
+    def finalizar(self):
+        """Registra a execução anterior deste cursor"""
+        medicao, self.medicao = self.medicao, None
+        if medicao is not None:
+            registrar(medicao, self.connection)
+
+    def close(self):
+        self.finalizar()
+        super().close()
+
+
+class ConexaoInstrumentada(ConexaoOtimizada):
+    """Conexão que entrega cursores instrumentados e registra as medições pendentes ao fechar"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursores = []
+
+    def cursor(self, factory=CursorInstrumentado):
+        cursor = super().cursor(factory)
+        self.cursores.append(cursor)
+        return cursor
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, lista):
+        return self.cursor().executemany(sql, lista)
+
+    def close(self):
+        for cursor in self.cursores:
+            try:
+                cursor.finalizar()
+            except sqlite3.Error:
+                pass
+        self.cursores = []
+        super().close()
+
+
+# ==================== REGISTRO ====================
+
+def capturar_plano(conexao, sql: str, valores) -> List[str]:
+    """EXPLAIN QUERY PLAN com um cursor comum (não instrumentado) da mesma conexão"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return []
+    try:
+        # Conexão ainda aberta: as partições anexadas continuam visíveis
+        cursor = sqlite3.Cursor(conexao)
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, valores)
+        plano = [row[3] for row in cursor.fetchall()]
+        cursor.close()
+        return plano
+    except sqlite3.Error as e:
+        return [f"(erro ao capturar o plano: {e})"]
+
+
+def registrar(medicao: Medicao, conexao=None):
+    """Acumula a medição no histograma e, se passou do limite, no log de lentas"""
+    digital = impressao_digital(medicao.sql)
+    ms = medicao.duracao * 1000
+    faixa = next((i for i, limite in enumerate(FAIXAS_MS) if ms <= limite), len(FAIXAS_MS))
+
+    with _lock:
+        item = _histograma.get(digital)
+        if item is None:
+            item = _histograma[digital] = {
+                'consulta': digital,
+                'execucoes': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'linhas': 0,
+                'faixas': [0] * (len(FAIXAS_MS) + 1),
+                'parametros': medicao.parametros,
+                'origens': Counter(),
+                'metodos': Counter(),
+                'plano': None
+            }
+        item['execucoes'] += medicao.quantidade
+        item['total_ms'] += ms
+        item['max_ms'] = max(item['max_ms'], ms)
+        item['linhas'] += medicao.linhas
+        item['faixas'][faixa] += 1
+        item['parametros'] = medicao.parametros
+        item['origens'][medicao.origem] += 1
+        item['metodos'][medicao.metodo] += 1
+        capturar = _estado['explicar'] and item['plano'] is None and conexao is not None
+
+    if capturar:
+        plano = capturar_plano(conexao, medicao.sql, medicao.valores)
+        with _lock:
+            item['plano'] = plano
+
+    if ms >= _estado['limite_lenta_ms']:
+        lenta = {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(ms, 2),
+            'linhas': medicao.linhas,
+            'origem': medicao.origem,
+            'metodo': medicao.metodo,
+            'parametros': medicao.parametros,
+            'consulta': digital
+        }
+        if capturar:
+            lenta['plano'] = item['plano']
+        with _lock:
+            _lentas.appendleft(lenta)
+            arquivo = _estado['arquivo_log']
+            if arquivo:
+                with open(arquivo, 'a', encoding='utf-8') as log:
+                    log.write(json.dumps(lenta, ensure_ascii=False) + '\n')
+
+
+# ==================== CONTROLE E CONSULTA ====================
+
+def ativar(limite_lenta_ms: float = None, explicar: bool = None, arquivo_log: str = None):
+    """Liga a instrumentação para todas as conexões abertas a partir de agora"""
+    if limite_lenta_ms is not None:
+        _estado['limite_lenta_ms'] = limite_lenta_ms
+    if explicar is not None:
+        _estado['explicar'] = explicar
+    if arquivo_log is not None:
+        _estado['arquivo_log'] = arquivo_log
+    _estado['ativa'] = True
+    Database.fabrica_conexao = ConexaoInstrumentada
+
+
+def desativar():
+    _estado['ativa'] = False
+    Database.fabrica_conexao = ConexaoOtimizada
+
+
+def ativa() -> bool:
+    return _estado['ativa']
+
+
+def configuracao() -> Dict:
+    return {chave: _estado[chave] for chave in ('ativa', 'explicar', 'limite_lenta_ms', 'arquivo_log')}
+
+
+def limpar():
+    with _lock:
+        _histograma.clear()
+        _lentas.clear()
+
+
+def principais(limite: int = 15, ordem: str = 'total_ms') -> List[Dict]:
+    """Consultas que mais pesam (por tempo total, máximo ou execuções)"""
+    with _lock:
+        itens = [dict(item, origens=dict(item['origens']), metodos=dict(item['metodos']),
+                      faixas=list(item['faixas']))
+                 for item in _histograma.values()]
+    for item in itens:
+        item['media_ms'] = item['total_ms'] / item['execucoes'] if item['execucoes'] else 0
+    itens.sort(key=lambda i: -i[ordem])
+    return itens[:limite]
+
+
+def consultas_lentas(limite: int = 20) -> List[Dict]:
+    with _lock:
+        return list(_lentas)[:limite]
+
+
+def rotulos_faixas() -> List[str]:
+    """Rótulos das faixas do histograma ('≤1 ms', ..., '>1000 ms')"""
+    return [f"≤{limite} ms" for limite in FAIXAS_MS] + [f">{FAIXAS_MS[-1]} ms"]
+
+
+# Permite ligar pelo ambiente: DGTECH_DIAGNOSTICO=1 (e DGTECH_DIAGNOSTICO_EXPLAIN=1)
+if os.environ.get('DGTECH_DIAGNOSTICO') == '1':
+    ativar(explicar=os.environ.get('DGTECH_DIAGNOSTICO_EXPLAIN') == '1',
+           arquivo_log=os.environ.get('DGTECH_DIAGNOSTICO_LOG', 'consultas_lentas.log'))
@@ -4,19 +4,41 @@ Aplicação Principal com Interface Moderna
 """
 
 import customtkinter as ctk
-from database import Database
-from dashboard import Dashboard
-from produtos import Produtos
-from vendas import Vendas
-from financeiro import Financeiro
-from configuracoes import Configuracoes
-from relatorios import RelatoriosAvancados
+from database import Database, AgendadorManutencao, INTERVALO_MANUTENCAO_HORAS
+from collections import OrderedDict
+import importlib
+import instrumentacao
+import time
 import sys
 
+# Telas carregadas sob demanda: nome -> (módulo, classe)
+# Os módulos (e matplotlib/pandas que eles importam) só são importados na primeira visita
+TELAS = {
+    'dashboard': ('dashboard', 'Dashboard'),
+    'produtos': ('produtos', 'Produtos'),
+    'vendas': ('vendas', 'Vendas'),
+    'financeiro': ('financeiro', 'Financeiro'),
+    'relatorios': ('relatorios', 'RelatoriosAvancados'),
+    'configuracoes': ('configuracoes', 'Configuracoes')
+}
+
+# Orçamento de memória das telas mantidas vivas (quantidade de telas e total de widgets)
+LIMITE_TELAS_CACHE = 4
+LIMITE_WIDGETS_CACHE = 3000
+
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, db_name=None):
         super().__init__()
         
+        # Marcas de tempo da inicialização (perf_counter)
+        self.marcas_tempo = {'inicio': time.perf_counter()}
+        
+        # Telas já visitadas: nome -> {'tela', 'versao', 'widgets'} (ordem = uso mais recente)
+        self.telas_cache = OrderedDict()
+        self.tela_atual = None
+        self.agendador_manutencao = None
+        self.painel_diagnostico = None
+        
         # Configurações da janela
         self.title("DGTECH GESTÃO - Sistema de Vendas")
         self.geometry("1400x900")
@@ -28,7 +50,7 @@ class App(ctk.CTk):
             pass
         
         # Inicializar banco de dados
-        self.db = Database()
+        self.db = Database(db_name) if db_name else Database()
         
         # Carregar configurações
         self.carregar_configuracoes()
@@ -43,14 +65,38 @@ class App(ctk.CTk):
         # Criar área de conteúdo
         self.criar_area_conteudo()
         
-        # Mostrar dashboard inicial
+        self.marcas_tempo['janela'] = time.perf_counter()
+        
+        # Painel de diagnóstico oculto (Ctrl+Shift+D)
+        self.bind_all("<Control-Shift-D>", self.abrir_diagnostico)
+        self.bind_all("<Control-D>", self.abrir_diagnostico)
+        
+        # Mostrar dashboard inicial depois que a janela for desenhada
+        self.after_idle(self.iniciar_dashboard)
+    
+    def iniciar_dashboard(self):
+        """Carrega o dashboard inicial e executa otimizações"""
+        self.marcas_tempo['primeira_pintura'] = time.perf_counter()
         self.mostrar_dashboard()
+        self.update_idletasks()
+        self.marcas_tempo['dashboard_interativo'] = time.perf_counter()
         
         # Executar otimizações ao iniciar
         try:
             self.db.criar_indices()
         except:
             pass  # Índices já podem existir
+        
+        self.iniciar_manutencao()
+    
+    def iniciar_manutencao(self):
+        """Inicia a manutenção periódica do banco (ANALYZE, vacuum, checkpoint) em segundo plano"""
+        try:
+            intervalo = float(self.db.get_config('manutencao_intervalo_horas') or INTERVALO_MANUTENCAO_HORAS)
+        except ValueError:
+            intervalo = INTERVALO_MANUTENCAO_HORAS
+        self.agendador_manutencao = AgendadorManutencao(self.db, intervalo_horas=intervalo)
+        self.agendador_manutencao.start()
     
     def carregar_configuracoes(self):
         """Carrega configurações do sistema"""
@@ -187,64 +233,110 @@ class App(ctk.CTk):
         self.frame_conteudo.grid_rowconfigure(0, weight=1)
         self.frame_conteudo.grid_columnconfigure(0, weight=1)
     
-    def limpar_conteudo(self):
-        """Limpa a área de conteúdo"""
-        for widget in self.frame_conteudo.winfo_children():
-            widget.destroy()
+    # ==================== NAVEGAÇÃO E CACHE DE TELAS ====================
+    
+    def carregar_classe_tela(self, nome):
+        """Importa o módulo da tela apenas quando ela é aberta pela primeira vez"""
+        modulo, classe = TELAS[nome]
+        return getattr(importlib.import_module(modulo), classe)
+    
+    def contar_widgets(self, widget):
+        """Conta os widgets de uma tela (usado no orçamento de memória do cache)"""
+        return 1 + sum(self.contar_widgets(filho) for filho in widget.winfo_children())
+    
+    def ocultar_tela_atual(self):
+        """Esconde a tela atual mantendo-a viva para reutilização"""
+        if self.tela_atual is None or self.tela_atual not in self.telas_cache:
+            return
+        
+        entrada = self.telas_cache[self.tela_atual]
+        entrada['tela'].grid_remove()
+        # Alterações feitas pela própria tela já estão refletidas nela
+        entrada['versao'] = self.db.get_versao_dados()
+        entrada['widgets'] = self.contar_widgets(entrada['tela'])
+    
+    def liberar_telas_excedentes(self):
+        """Destrói as telas menos usadas quando o cache passa do orçamento"""
+        while len(self.telas_cache) > 1:
+            total_widgets = sum(e['widgets'] for e in self.telas_cache.values())
+            if len(self.telas_cache) <= LIMITE_TELAS_CACHE and total_widgets <= LIMITE_WIDGETS_CACHE:
+                break
+            nome, entrada = self.telas_cache.popitem(last=False)
+            entrada['tela'].destroy()
+    
+    def mostrar_tela(self, nome, botao, *args):
+        """Mostra uma tela, reaproveitando-a se os dados não mudaram desde a última visita"""
+        self.destacar_botao(botao)
+        self.ocultar_tela_atual()
+        instrumentacao.definir_origem(nome)
+        
+        versao = self.db.get_versao_dados()
+        entrada = self.telas_cache.get(nome)
+        
+        if entrada and entrada['versao'] != versao:
+            # Outra tela alterou os dados: reconstruir
+            entrada['tela'].destroy()
+            del self.telas_cache[nome]
+            entrada = None
+        
+        if entrada is None:
+            classe = self.carregar_classe_tela(nome)
+            tela = classe(self.frame_conteudo, self.db, *args)
+            entrada = {'tela': tela, 'versao': versao, 'widgets': 0}
+            self.telas_cache[nome] = entrada
+        
+        self.telas_cache.move_to_end(nome)
+        entrada['tela'].grid(row=0, column=0, sticky="nsew")
+        self.tela_atual = nome
+        
+        self.liberar_telas_excedentes()
+        return entrada['tela']
+    
+    def abrir_diagnostico(self, event=None):
+        """Abre (ou traz para frente) o painel de diagnóstico das consultas"""
+        if self.painel_diagnostico is not None and self.painel_diagnostico.winfo_exists():
+            self.painel_diagnostico.focus()
+            return
+        from diagnostico import PainelDiagnostico
+        self.painel_diagnostico = PainelDiagnostico(self)
     
     def mostrar_dashboard(self):
         """Mostra a tela de Dashboard"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_dashboard)
-        
-        dashboard = Dashboard(self.frame_conteudo, self.db)
-        dashboard.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('dashboard', self.btn_dashboard)
     
     def mostrar_produtos(self):
         """Mostra a tela de Produtos"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_produtos)
-        
-        produtos = Produtos(self.frame_conteudo, self.db)
-        produtos.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('produtos', self.btn_produtos)
     
     def mostrar_vendas(self):
         """Mostra a tela de Vendas"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_vendas)
-        
-        vendas = Vendas(self.frame_conteudo, self.db)
-        vendas.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('vendas', self.btn_vendas)
     
     def mostrar_financeiro(self):
         """Mostra a tela Financeiro"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_financeiro)
-        
-        financeiro = Financeiro(self.frame_conteudo, self.db)
-        financeiro.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('financeiro', self.btn_financeiro)
     
     def mostrar_relatorios(self):
         """Mostra a tela de Relatórios Avançados"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_relatorios)
-        
-        relatorios = RelatoriosAvancados(self.frame_conteudo, self.db)
-        relatorios.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('relatorios', self.btn_relatorios)
     
     def mostrar_configuracoes(self):
         """Mostra a tela de Configurações"""
-        self.limpar_conteudo()
-        self.destacar_botao(self.btn_config)
-        
-        config = Configuracoes(self.frame_conteudo, self.db, self.config_callback)
-        config.grid(row=0, column=0, sticky="nsew")
+        self.mostrar_tela('configuracoes', self.btn_config, self.config_callback)
     
     def config_callback(self, evento, dados):
         """Callback para eventos de configuração"""
         if evento == 'tema_alterado':
             # Tema já foi alterado nas configurações
             pass
+        elif evento == 'manutencao_solicitada':
+            if self.agendador_manutencao and self.agendador_manutencao.is_alive():
+                self.agendador_manutencao.solicitar()
+                return True
+            return False
+        elif evento == 'manutencao_intervalo':
+            if self.agendador_manutencao:
+                self.agendador_manutencao.intervalo = dados * 3600
     
     def sair(self):
         """Fecha a aplicação"""
@@ -0,0 +1,232 @@
+"""
+Motor de previsão por suavização exponencial (NumPy)
+Ajusta, para muitas séries diárias de uma vez, os modelos simples, Holt (tendência) e
+Holt-Winters aditivo (sazonalidade semanal); escolhe o modelo de cada série pelo erro em
+um trecho final reservado (validação) e devolve a previsão com intervalo
+
+As séries são matrizes (séries × dias) com os dias sem venda já preenchidos com zero
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+MODELOS = ('simples', 'holt', 'holt_winters')
+SAZONALIDADE = 7
+# Dias do fim do histórico reservados para escolher o modelo
+DIAS_VALIDACAO = 14
+# z do intervalo de previsão (95%)
+Z_INTERVALO = 1.96
+
+# Grades de parâmetros testadas (alfa: nível, beta: tendência, gama: sazonalidade)
+ALFAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+BETAS = (0.02, 0.1)
+GAMAS = (0.05, 0.15, 0.3)
+
+
+def indices_dias(inicio: str, fim: str) -> Dict[str, int]:
+    """Posição de cada dia (AAAA-MM-DD) de `inicio` a `fim` na série"""
+    data = datetime.strptime(inicio, "%Y-%m-%d")
+    dias = (datetime.strptime(fim, "%Y-%m-%d") - data).days + 1
+    return {(data + timedelta(days=i)).strftime("%Y-%m-%d"): i for i in range(max(dias, 0))}
+
+
+def completar_dias(valores: Dict[str, float], inicio: str, fim: str) -> np.ndarray:
+    """Série diária de `inicio` a `fim` (AAAA-MM-DD) com zero nos dias ausentes"""
+    indices = indices_dias(inicio, fim)
+    serie = np.zeros(len(indices))
+    for dia, valor in valores.items():
+        indice = indices.get(dia[:10])
+        if indice is not None:
+            serie[indice] += valor
+    return serie
+
+
+def matriz_diaria(linhas: Iterable[Dict], chave: str, campo: str,
+                  inicio: str, fim: str) -> Tuple[List, np.ndarray]:
+    """
+    Monta a matriz (séries × dias) a partir de linhas agregadas por dia
+    (ex.: get_vendas_por_dia(por_produto=True), chave='produto_id', campo='quantidade')
+    """
+    indices = indices_dias(inicio, fim)
+    series = {}
+    linhas_matriz, colunas, valores = [], [], []
+    for linha in linhas:
+        coluna = indices.get(linha['dia'][:10])
+        if coluna is None:
+            continue
+        linhas_matriz.append(series.setdefault(linha[chave], len(series)))
+        colunas.append(coluna)
+        valores.append(linha[campo])
+
+    matriz = np.zeros((len(series), len(indices)))
+    np.add.at(matriz, (linhas_matriz, colunas), valores)
+    return list(series), matriz
+
+
+def grade(modelo: str) -> np.ndarray:
+    """Combinações (alfa, beta, gama) testadas para o modelo"""
+    betas = BETAS if modelo != 'simples' else (0.0,)
+    gamas = GAMAS if modelo == 'holt_winters' else (0.0,)
+    return np.array([(a, b, g) for a in ALFAS for b in betas for g in gamas])
+
+
+def suavizar(y: np.ndarray, parametros: np.ndarray, modelo: str, m: int = SAZONALIDADE,
+             por_serie: bool = False) -> Dict:
+    """
+    Roda o modelo para todas as séries e combinações de parâmetros ao mesmo tempo
+    y: (séries × dias); parametros: (combinações × 3), ou (séries × 3) com `por_serie`
+    (uma combinação própria para cada série). Os estados são (combinações × séries)
+    Retorna a soma dos erros quadráticos de um passo e os estados finais
+    """
+    if por_serie:
+        alfa, beta, gama = (parametros[None, :, i] for i in range(3))
+        combinacoes = 1
+    else:
+        alfa, beta, gama = (parametros[:, i:i + 1] for i in range(3))
+        combinacoes = len(parametros)
+    series, dias = y.shape
+    colunas = np.ascontiguousarray(y.T)
+
+    # Estado inicial pelas duas primeiras semanas
+    primeira = colunas[:m].mean(axis=0)
+    nivel = np.broadcast_to(primeira, (combinacoes, series)).copy()
+    tendencia = np.zeros((combinacoes, series))
+    # Sazonalidade guardada como (posição na semana × combinações × séries)
+    sazonal = np.zeros((m, combinacoes, series))
+    if modelo != 'simples' and dias >= 2 * m:
+        tendencia[:] = (colunas[m:2 * m].mean(axis=0) - primeira) / m
+    if modelo == 'holt_winters':
+        sazonal[:] = (colunas[:m] - primeira)[:, None, :]
+
+    sse = np.zeros((combinacoes, series))
+    for t in range(m, dias):
+        observado = colunas[t]
+        anterior = sazonal[t % m]
+        erro = observado - nivel - tendencia - anterior
+        sse += erro * erro
+        novo_nivel = nivel + tendencia + alfa * erro
+        tendencia += beta * (novo_nivel - nivel - tendencia)
+        if modelo == 'holt_winters':
+            anterior += gama * (observado - novo_nivel - anterior)
+        nivel = novo_nivel
+
+    return {
+        'sse': sse,
+        'passos': max(dias - m, 1),
+        'nivel': nivel,
+        'tendencia': tendencia,
+        'sazonal': sazonal,
+        'dias': dias
+    }
+
+
+def projetar(estado: Dict, escolha: np.ndarray, horizonte: int, m: int = SAZONALIDADE) -> np.ndarray:
+    """Previsão (séries × horizonte) com a combinação escolhida de cada série"""
+    series = np.arange(escolha.shape[0])
+    nivel = estado['nivel'][escolha, series]
+    tendencia = estado['tendencia'][escolha, series]
+    passos = np.arange(1, horizonte + 1)
+    posicoes = (estado['dias'] + passos - 1) % m
+    sazonal = estado['sazonal'][posicoes][:, escolha, series].T
+    return nivel[:, None] + tendencia[:, None] * passos + sazonal
+
+
+def ajustar_modelo(y: np.ndarray, modelo: str, horizonte: int) -> Dict:
+    """Melhor combinação de parâmetros de cada série (menor erro de um passo) e sua projeção"""
+    parametros = grade(modelo)
+    estado = suavizar(y, parametros, modelo)
+    escolha = estado['sse'].argmin(axis=0)
+    return {
+        'parametros': parametros[escolha],
+        'previsao': projetar(estado, escolha, horizonte)
+    }
+
+
+def multiplicadores_variancia(parametros: np.ndarray, horizonte: int, m: int = SAZONALIDADE) -> np.ndarray:
+    """
+    Fator da variância do erro h passos à frente (modelos aditivos):
+    1 + soma, para j < h, de (alfa * (1 + j * beta) + gama * [j múltiplo de m])²
+    """
+    alfa, beta, gama = parametros[:, 0:1], parametros[:, 1:2], parametros[:, 2:3]
+    j = np.arange(1, horizonte)
+    termos = (alfa * (1 + j * beta) + gama * (j % m == 0)) ** 2
+    return np.concatenate([np.ones((len(parametros), 1)), 1 + np.cumsum(termos, axis=1)], axis=1)
+
+
+def prever(y: np.ndarray, horizonte: int, validacao: int = DIAS_VALIDACAO,
+           z: float = Z_INTERVALO, m: int = SAZONALIDADE) -> Dict:
+    """
+    Previsão de todas as séries (linhas de `y`) para os próximos `horizonte` dias
+    Cada série fica com o modelo de menor erro absoluto médio nos últimos `validacao` dias
+    (ajustado sem eles); a previsão final usa o histórico completo
+    """
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        y = y[None, :]
+    series, dias = y.shape
+
+    # Modelos que o tamanho do histórico permite (a sazonalidade pede ao menos 2 ciclos de treino)
+    modelos = [modelo for modelo in MODELOS
+               if dias - validacao >= (3 * m if modelo == 'holt_winters' else 2 * m)]
+    if not modelos or series == 0:
+        media = y.mean(axis=1) if dias else np.zeros(series)
+        previsao = np.repeat(media[:, None], horizonte, axis=1)
+        return {
+            'modelo': np.array(['media'] * series),
+            'previsao': previsao,
+            'inferior': previsao.copy(),
+            'superior': previsao.copy(),
+            'erro_validacao': np.full(series, np.nan),
+            'desvio': np.zeros(series),
+            'parametros': np.zeros((series, 3))
+        }
+
+    # Validação: ajusta (escolhendo os parâmetros) sem o trecho final e mede o erro nele
+    treino, teste = y[:, :dias - validacao], y[:, dias - validacao:]
+    ajustes = [ajustar_modelo(treino, modelo, validacao) for modelo in modelos]
+    erros = np.stack([np.abs(ajuste['previsao'] - teste).mean(axis=1) for ajuste in ajustes])
+    escolhido = erros.argmin(axis=0)
+
+    # Ajuste final com todo o histórico, mantendo os parâmetros escolhidos
+    previsao = np.zeros((series, horizonte))
+    desvio = np.zeros(series)
+    parametros = np.zeros((series, 3))
+    for indice, modelo in enumerate(modelos):
+        linhas = escolhido == indice
+        if not linhas.any():
+            continue
+        parametros[linhas] = ajustes[indice]['parametros'][linhas]
+        estado = suavizar(y[linhas], parametros[linhas], modelo, m, por_serie=True)
+        previsao[linhas] = projetar(estado, np.zeros(linhas.sum(), dtype=int), horizonte, m)
+        desvio[linhas] = np.sqrt(estado['sse'][0] / estado['passos'])
+
+    margem = z * desvio[:, None] * np.sqrt(multiplicadores_variancia(parametros, horizonte, m))
+    return {
+        'modelo': np.array(modelos)[escolhido],
+        'previsao': np.maximum(previsao, 0),
+        'inferior': np.maximum(previsao - margem, 0),
+        'superior': np.maximum(previsao + margem, 0),
+        'erro_validacao': erros[escolhido, np.arange(series)],
+        'desvio': desvio,
+        'parametros': parametros
+    }
+
+
+def intervalo_total(resultado: Dict, z: float = Z_INTERVALO, m: int = SAZONALIDADE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intervalo da soma do horizonte para cada série
+    Aproximação: supõe os erros dos dias independentes (soma das variâncias)
+    """
+    horizonte = resultado['previsao'].shape[1]
+    variancia = (resultado['desvio'][:, None] ** 2
+                 * multiplicadores_variancia(resultado['parametros'], horizonte, m)).sum(axis=1)
+    total = resultado['previsao'].sum(axis=1)
+    margem = z * np.sqrt(variancia)
+    return np.maximum(total - margem, 0), total + margem
+
+
+def datas_futuras(ultimo_dia: str, horizonte: int) -> List[str]:
+    """Datas (AAAA-MM-DD) dos `horizonte` dias seguintes a `ultimo_dia`"""
+    data = datetime.strptime(ultimo_dia, "%Y-%m-%d")
+    return [(data + timedelta(days=h)).strftime("%Y-%m-%d") for h in range(1, horizonte + 1)]
@@ -0,0 +1,183 @@
+"""
+Regras declarativas dos alertas inteligentes
+As métricas por produto (vendido nos últimos 30 dias, estoque, margem, dias de cobertura...)
+são montadas uma vez em arrays NumPy; cada regra é uma lista de condições
+(métrica, operador, referência) avaliada de uma vez sobre todos os produtos. A referência é um
+número, outra métrica ou uma chave de configuracoes (limites em LIMITES_ALERTAS)
+
+Usado por Analytics.alertas_regras, que alimenta os alertas do desktop e da versão web
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from reposicao import PRAZO_ENTREGA_DIAS, DIAS_COBERTURA
+
+# Dias de vendas somados na métrica 'vendido'
+DIAS_METRICAS = 30
+
+# Limites das regras gravados em configuracoes: chave -> (descrição, unidade, valor padrão)
+LIMITES_ALERTAS = {
+    'alerta_fator_demanda': ("Alta demanda: vendas de 30 dias acima do estoque vezes", "x", 2),
+    'alerta_dias_cobertura': ("Repor quando o estoque cobrir no máximo", "dias", PRAZO_ENTREGA_DIAS),
+    'alerta_max_reposicao': ("Alertas de reposição exibidos (mais urgentes)", "produtos", 5),
+    'alerta_estoque_parado': ("Produto parado: sem vendas em 30 dias e estoque acima de", "unidades", 10),
+    'alerta_margem_minima': ("Margem baixa: abaixo de", "%", 15),
+}
+
+OPERADORES = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+}
+
+# Avaliadas em ordem. 'exceto' descarta produtos já alertados pelas regras citadas;
+# 'ordem' (métrica; com '-' na frente, decrescente) e 'maximo' (limite) escolhem os mais urgentes.
+# mensagem e acao são formatadas com as métricas do produto
+REGRAS = (
+    {
+        'tipo': 'ALTA_DEMANDA',
+        'prioridade': 'ALTA',
+        'icone': '🔥',
+        'titulo': 'Alta demanda',
+        'condicoes': (('giro', '>', 'alerta_fator_demanda'),),
+        'mensagem': "Vendeu {vendido:g} unidades em 30 dias. Estoque atual: {estoque:g}",
+        'acao': "Considere aumentar estoque",
+    },
+    {
+        'tipo': 'ESTOQUE_ACABANDO',
+        'prioridade': 'ALTA',
+        'icone': '📦',
+        'titulo': 'Repor',
+        'condicoes': (('media_diaria', '>', 0), ('dias_cobertura', '<=', 'alerta_dias_cobertura')),
+        'ordem': 'dias_cobertura',
+        'maximo': 'alerta_max_reposicao',
+        'mensagem': "Estoque acaba em {dias_cobertura:.0f} dias",
+        'acao': "Comprar {qtd_sugerida:g} unidades",
+    },
+    {
+        'tipo': 'ESTOQUE_BAIXO',
+        'prioridade': 'MÉDIA',
+        'icone': '🔻',
+        'titulo': 'Estoque baixo',
+        'condicoes': (('estoque', '<=', 'estoque_minimo'),),
+        'exceto': ('ESTOQUE_ACABANDO',),
+        'mensagem': "{estoque:g} unidades (mínimo: {estoque_minimo:g})",
+        'acao': "Programe a reposição",
+    },
+    {
+        'tipo': 'PRODUTO_PARADO',
+        'prioridade': 'MÉDIA',
+        'icone': '⚠️',
+        'titulo': 'Produto parado',
+        'condicoes': (('vendido', '==', 0), ('estoque', '>', 'alerta_estoque_parado')),
+        'ordem': '-valor_parado',
+        'mensagem': "Sem vendas em 30 dias. Estoque: {estoque:g} (R$ {valor_parado:.2f} parados)",
+        'acao': "Considere promoção ou redução de preço",
+    },
+    {
+        'tipo': 'MARGEM_BAIXA',
+        'prioridade': 'MÉDIA',
+        'icone': '💰',
+        'titulo': 'Margem baixa',
+        'condicoes': (('margem', '<', 'alerta_margem_minima'),),
+        'mensagem': "Margem atual: {margem:.1f}%",
+        'acao': "Revisar preço de venda",
+    },
+)
+
+
+def limites_alertas(db) -> Dict[str, float]:
+    """Limites das regras lidos de configuracoes (valor padrão se ausente ou inválido)"""
+    limites = {}
+    for chave, (_, _, padrao) in LIMITES_ALERTAS.items():
+        try:
+            limites[chave] = float(db.get_config(chave) or padrao)
+        except ValueError:
+            limites[chave] = float(padrao)
+    return limites
+
+
+def montar_metricas(linhas: List[Dict], dias: int = DIAS_METRICAS) -> Dict[str, np.ndarray]:
+    """
+    Métricas por produto (colunas alinhadas) a partir de Database.metricas_produtos
+    A demanda diária vem do plano de reposição quando o produto tem plano; senão, das vendas do período
+    """
+    def coluna(nome: str) -> np.ndarray:
+        return np.array([np.nan if linha[nome] is None else linha[nome] for linha in linhas], dtype=float)
+
+    estoque = coluna('estoque')
+    vendido = coluna('vendido')
+    preco_custo = coluna('preco_custo')
+    preco_venda = coluna('preco_venda')
+    prevista = coluna('media_diaria_prevista')
+    com_plano = ~np.isnan(prevista)
+
+    media_diaria = np.where(com_plano, prevista, vendido / max(dias, 1))
+    estoque_maximo = np.where(com_plano, coluna('ponto_pedido') + coluna('demanda_cobertura'),
+                              media_diaria * (PRAZO_ENTREGA_DIAS + DIAS_COBERTURA))
+
+    return {
+        'produto_id': np.array([linha['id'] for linha in linhas], dtype=np.int64),
+        'produto_nome': np.array([linha['nome'] for linha in linhas], dtype=object),
+        'estoque': estoque,
+        'estoque_minimo': coluna('estoque_minimo'),
+        'vendido': vendido,
+        'margem': np.divide((preco_venda - preco_custo) * 100, preco_custo,
+                            out=np.zeros_like(preco_custo), where=preco_custo != 0),
+        'media_diaria': media_diaria,
+        'dias_cobertura': np.divide(estoque, media_diaria, out=np.full_like(estoque, np.inf),
+                                    where=media_diaria > 0),
+        'giro': np.divide(vendido, estoque, out=np.where(vendido > 0, np.inf, 0.0), where=estoque > 0),
+        'qtd_sugerida': np.maximum(np.ceil(estoque_maximo - estoque), 0),
+        'valor_parado': preco_custo * estoque,
+    }
+
+
+def referencia(metricas: Dict[str, np.ndarray], limites: Dict[str, float], valor):
+    """Valor comparado numa condição: métrica (array), limite de configuracoes ou número"""
+    if isinstance(valor, str):
+        return metricas[valor] if valor in metricas else limites[valor]
+    return valor
+
+
+def avaliar_regras(metricas: Dict[str, np.ndarray], limites: Dict[str, float],
+                   regras: Tuple[Dict, ...] = REGRAS) -> List[Dict]:
+    """
+    Avalia as regras sobre as métricas de todos os produtos (uma máscara booleana por regra)
+    Retorna os alertas no formato de Analytics.gerar_alertas_inteligentes, na ordem das regras
+    """
+    total = len(metricas['produto_id'])
+    mascaras = {}
+    alertas = []
+    for regra in regras:
+        mascara = np.ones(total, dtype=bool)
+        for metrica, operador, valor in regra['condicoes']:
+            mascara &= OPERADORES[operador](metricas[metrica], referencia(metricas, limites, valor))
+        for tipo in regra.get('exceto', ()):
+            mascara &= ~mascaras[tipo]
+        mascaras[regra['tipo']] = mascara
+
+        indices = np.flatnonzero(mascara)
+        if 'ordem' in regra:
+            chave = metricas[regra['ordem'].lstrip('-')][indices]
+            indices = indices[np.argsort(-chave if regra['ordem'].startswith('-') else chave, kind='stable')]
+        if 'maximo' in regra:
+            indices = indices[:max(int(referencia(metricas, limites, regra['maximo'])), 0)]
+
+        for i in indices.tolist():
+            valores = {nome: coluna[i] for nome, coluna in metricas.items()}
+            alertas.append({
+                'tipo': regra['tipo'],
+                'prioridade': regra['prioridade'],
+                'icone': regra['icone'],
+                'titulo': f"{regra['titulo']}: {valores['produto_nome']}",
+                'mensagem': regra['mensagem'].format(**valores),
+                'acao': regra['acao'].format(**valores),
+                'produto_id': int(valores['produto_id']),
+                'produto_nome': valores['produto_nome'],
+            })
+    return alertas
@@ -0,0 +1,361 @@
+"""
+Motor de relatórios PDF para períodos longos
+Desenha as tabelas página a página (com cabeçalho repetido) direto no canvas do reportlab,
+lendo as linhas do banco em lotes; os resumos vêm de agregações SQL
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from database import Database
+from utils import Formatador
+
+MARGEM = 40
+ALTURA_LINHA = 16
+ALTURA_CABECALHO = 20
+FONTE = "Helvetica"
+FONTE_NEGRITO = "Helvetica-Bold"
+TAMANHO_FONTE = 8
+
+# Colunas: (título, largura em pontos, alinhamento 'esquerda' | 'centro' | 'direita')
+COLUNAS_VENDAS = [
+    ('ID', 45, 'centro'),
+    ('Produto', 170, 'esquerda'),
+    ('Qtd', 40, 'centro'),
+    ('Valor Unit.', 80, 'direita'),
+    ('Total', 85, 'direita'),
+    ('Data', 95, 'centro')
+]
+
+COLUNAS_MESES = [
+    ('Mês', 80, 'centro'),
+    ('Vendas', 70, 'direita'),
+    ('Itens', 70, 'direita'),
+    ('Receita', 140, 'direita'),
+    ('Lucro Bruto', 140, 'direita')
+]
+
+COLUNAS_PRODUTOS = [
+    ('Produto', 215, 'esquerda'),
+    ('Qtd', 60, 'direita'),
+    ('Receita', 120, 'direita'),
+    ('Lucro Bruto', 120, 'direita')
+]
+
+COLUNAS_DESPESAS_CATEGORIA = [
+    ('Categoria', 255, 'esquerda'),
+    ('Lançamentos', 100, 'direita'),
+    ('Total', 160, 'direita')
+]
+
+COLUNAS_DESPESAS = [
+    ('Data', 75, 'centro'),
+    ('Descrição', 220, 'esquerda'),
+    ('Categoria', 120, 'esquerda'),
+    ('Valor', 100, 'direita')
+]
+
+LIMITE_PRODUTOS_RESUMO = 20
+
+
+class RelatorioPDF:
+    """Escreve um PDF página a página, sem manter as linhas das tabelas em memória"""
+
+    def __init__(self, arquivo: str, titulo: str, subtitulo: str = ""):
+        self.canvas = canvas.Canvas(arquivo, pagesize=A4)
+        self.largura, self.altura = A4
+        self.titulo = titulo
+        self.subtitulo = subtitulo
+        self.pagina = 0
+        self.y = 0
+        self.nova_pagina()
+
+    def nova_pagina(self):
+        """Fecha a página atual (se houver) e desenha o cabeçalho da próxima"""
+        if self.pagina:
+            self.canvas.showPage()
+        self.pagina += 1
+
+        self.canvas.setFont(FONTE_NEGRITO, 14)
+        self.canvas.drawString(MARGEM, self.altura - MARGEM, self.titulo)
+        self.canvas.setFont(FONTE, 8)
+        self.canvas.setFillColor(colors.grey)
+        if self.subtitulo:
+            self.canvas.drawString(MARGEM, self.altura - MARGEM - 12, self.subtitulo)
+        self.canvas.drawRightString(self.largura - MARGEM, MARGEM / 2, f"Página {self.pagina}")
+        self.canvas.setFillColor(colors.black)
+        self.y = self.altura - MARGEM - 30
+
+    def espaco_restante(self) -> float:
+        return self.y - MARGEM
+
+    def secao(self, texto: str):
+        """Título de seção; muda de página se não couber com ao menos algumas linhas"""
+        if self.espaco_restante() < 24 + ALTURA_CABECALHO + 3 * ALTURA_LINHA:
+            self.nova_pagina()
+        self.canvas.setFont(FONTE_NEGRITO, 11)
+        self.canvas.drawString(MARGEM, self.y - 12, texto)
+        self.y -= 24
+
+    def pares(self, itens: List[Tuple[str, str]]):
+        """Lista de pares rótulo/valor (quadro de resumo)"""
+        for rotulo, valor in itens:
+            if self.espaco_restante() < ALTURA_LINHA:
+                self.nova_pagina()
+            self.canvas.setFont(FONTE, 10)
+            self.canvas.drawString(MARGEM + 10, self.y - 11, rotulo)
+            self.canvas.setFont(FONTE_NEGRITO, 10)
+            self.canvas.drawRightString(MARGEM + 330, self.y - 11, valor)
+            self.y -= ALTURA_LINHA
+        self.y -= 8
+
+    def _cabecalho_tabela(self, colunas: List[Tuple], cor: str):
+        x = MARGEM
+        largura_total = sum(c[1] for c in colunas)
+        self.canvas.setFillColor(colors.HexColor(cor))
+        self.canvas.rect(x, self.y - ALTURA_CABECALHO, largura_total, ALTURA_CABECALHO, stroke=0, fill=1)
+        self.canvas.setFillColor(colors.white)
+        self.canvas.setFont(FONTE_NEGRITO, TAMANHO_FONTE + 1)
+        for titulo, largura, alinhamento in colunas:
+            self._texto_celula(titulo, x, largura, alinhamento, self.y - 14)
+            x += largura
+        self.canvas.setFillColor(colors.black)
+        self.y -= ALTURA_CABECALHO
+
+    def _texto_celula(self, texto: str, x: float, largura: float, alinhamento: str, y: float):
+        if alinhamento == 'direita':
+            self.canvas.drawRightString(x + largura - 4, y, texto)
+        elif alinhamento == 'centro':
+            self.canvas.drawCentredString(x + largura / 2, y, texto)
+        else:
+            self.canvas.drawString(x + 4, y, texto)
+
+    def tabela(self, colunas: List[Tuple], linhas: Iterable[List[str]], cor: str = '#1f77b4',
+               linha_total: List[str] = None) -> int:
+        """
+        Desenha uma tabela consumindo as linhas sob demanda
+        O cabeçalho é repetido a cada página; retorna o número de linhas desenhadas
+        """
+        largura_total = sum(c[1] for c in colunas)
+        if self.espaco_restante() < ALTURA_CABECALHO + ALTURA_LINHA:
+            self.nova_pagina()
+        self._cabecalho_tabela(colunas, cor)
+
+        total = 0
+        for linha in linhas:
+            if self.espaco_restante() < ALTURA_LINHA:
+                self.nova_pagina()
+                self._cabecalho_tabela(colunas, cor)
+            if total % 2:
+                self.canvas.setFillColor(colors.HexColor('#f2f2f2'))
+                self.canvas.rect(MARGEM, self.y - ALTURA_LINHA, largura_total, ALTURA_LINHA, stroke=0, fill=1)
+                self.canvas.setFillColor(colors.black)
+            self.canvas.setFont(FONTE, TAMANHO_FONTE)
+            x = MARGEM
+            for (_, largura, alinhamento), valor in zip(colunas, linha):
+                self._texto_celula(valor, x, largura, alinhamento, self.y - 11)
+                x += largura
+            self.y -= ALTURA_LINHA
+            total += 1
+
+        if linha_total:
+            if self.espaco_restante() < ALTURA_LINHA:
+                self.nova_pagina()
+            self.canvas.setFillColor(colors.HexColor('#e8e8e8'))
+            self.canvas.rect(MARGEM, self.y - ALTURA_LINHA, largura_total, ALTURA_LINHA, stroke=0, fill=1)
+            self.canvas.setFillColor(colors.black)
+            self.canvas.setFont(FONTE_NEGRITO, TAMANHO_FONTE)
+            x = MARGEM
+            for (_, largura, alinhamento), valor in zip(colunas, linha_total):
+                self._texto_celula(valor, x, largura, alinhamento, self.y - 11)
+                x += largura
+            self.y -= ALTURA_LINHA
+
+        self.y -= 12
+        return total
+
+    def linhas_por_pagina(self) -> int:
+        """Quantas linhas de tabela cabem em uma página cheia"""
+        return int((self.altura - 2 * MARGEM - 30 - ALTURA_CABECALHO) // ALTURA_LINHA)
+
+    def salvar(self):
+        self.canvas.save()
+
+
+# ==================== LINHAS FORMATADAS EM LOTES ====================
+
+def linhas_vendas(vendas: Iterator[Dict], tamanho_lote: int) -> Iterator[List[str]]:
+    """Formata as vendas em lotes do tamanho de uma página (moeda/data formatadas por coluna)"""
+    vendas = iter(vendas)
+    while True:
+        lote = list(islice(vendas, tamanho_lote))
+        if not lote:
+            break
+        precos = Formatador.formatar_moeda_lote([v['preco_unitario'] for v in lote])
+        totais = Formatador.formatar_moeda_lote([v['valor_total'] for v in lote])
+        datas = Formatador.formatar_data_hora_lote([v['data_venda'] for v in lote])
+        for venda, preco, total, data in zip(lote, precos, totais, datas):
+            yield [str(venda['id']), venda['produto_nome'][:32], str(venda['quantidade']), preco, total, data]
+
+
+def rotulo_mes(mes: str) -> str:
+    """'2025-03' -> '03/2025'"""
+    return f"{mes[5:7]}/{mes[:4]}" if mes else ""
+
+
+def texto_periodo(periodo: str, data_inicio: str, data_fim: str) -> str:
+    partes = []
+    if periodo:
+        partes.append(periodo)
+    if data_inicio or data_fim:
+        inicio = Formatador.formatar_data(data_inicio, "%Y-%m-%d") if data_inicio else "início"
+        fim = Formatador.formatar_data(data_fim, "%Y-%m-%d") if data_fim else "hoje"
+        partes.append(f"{inicio} a {fim}")
+    partes.append(f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    return " | ".join(partes)
+
+
+def desenhar_resumo_mensal(relatorio: RelatorioPDF, meses: List[Dict]):
+    moeda = Formatador.formatar_moeda
+    linhas = ([rotulo_mes(m['mes']), str(m['total_vendas']), str(m['quantidade']),
+               moeda(m['receita']), moeda(m['lucro_bruto'])] for m in meses)
+    relatorio.tabela(COLUNAS_MESES, linhas, cor='#2ca02c')
+
+
+def desenhar_ranking_produtos(relatorio: RelatorioPDF, produtos: List[Dict]):
+    moeda = Formatador.formatar_moeda
+    linhas = ([p['nome'][:40], str(p['quantidade']), moeda(p['receita']), moeda(p['lucro_bruto'])]
+              for p in produtos)
+    relatorio.tabela(COLUNAS_PRODUTOS, linhas, cor='#ff7f0e')
+
+
+# ==================== RELATÓRIOS ====================
+
+def gerar_relatorio_vendas(db: Database, arquivo: str, data_inicio: str = None,
+                           data_fim: str = None, periodo: str = "",
+                           progresso: Callable[[float], None] = None) -> int:
+    """
+    Relatório de vendas: páginas de resumo (agregações SQL) seguidas da listagem completa
+    `progresso` (opcional) recebe a fração já desenhada da listagem
+    Retorna o número de páginas geradas
+    """
+    relatorio = RelatorioPDF(arquivo, "Relatório de Vendas", texto_periodo(periodo, data_inicio, data_fim))
+    moeda = Formatador.formatar_moeda
+
+    resumo = db.get_resumo_vendas(data_inicio, data_fim)
+    lucro = db.get_lucro_periodo(data_inicio, data_fim)
+
+    relatorio.secao("Resumo do período")
+    relatorio.pares([
+        ("Total de vendas", str(resumo['total_vendas'])),
+        ("Receita total", moeda(resumo['receita_total'])),
+        ("Ticket médio", moeda(resumo['ticket_medio'])),
+        ("Lucro bruto", moeda(lucro['lucro_bruto']))
+    ])
+
+    relatorio.secao("Vendas por mês")
+    desenhar_resumo_mensal(relatorio, db.get_vendas_por_mes(data_inicio, data_fim))
+
+    relatorio.secao(f"Top {LIMITE_PRODUTOS_RESUMO} produtos por receita")
+    desenhar_ranking_produtos(relatorio, db.get_vendas_por_produto(data_inicio, data_fim, LIMITE_PRODUTOS_RESUMO))
+
+    # Listagem completa em páginas próprias
+    relatorio.nova_pagina()
+    relatorio.secao("Vendas do período")
+    vendas = db.iterar_vendas(data_inicio, data_fim)
+    if progresso:
+        from tarefas import com_progresso
+        vendas = com_progresso(vendas, resumo['total_vendas'], progresso)
+    relatorio.tabela(
+        COLUNAS_VENDAS,
+        linhas_vendas(vendas, relatorio.linhas_por_pagina()),
+        linha_total=['', '', '', 'TOTAL:', moeda(resumo['receita_total']), '']
+    )
+
+    relatorio.salvar()
+    return relatorio.pagina
+
+
+def gerar_relatorio_financeiro(db: Database, arquivo: str, data_inicio: str = None,
+                               data_fim: str = None, periodo: str = "") -> int:
+    """
+    Relatório financeiro: resultado do período, evolução mensal, despesas por categoria
+    e lançamentos de despesas. Retorna o número de páginas geradas
+    """
+    relatorio = RelatorioPDF(arquivo, "Relatório Financeiro", texto_periodo(periodo, data_inicio, data_fim))
+    moeda = Formatador.formatar_moeda
+
+    resumo = db.get_resumo_vendas(data_inicio, data_fim)
+    lucro = db.get_lucro_periodo(data_inicio, data_fim)
+
+    relatorio.secao("Resultado do período")
+    relatorio.pares([
+        ("Receita total", moeda(resumo['receita_total'])),
+        ("Lucro bruto", moeda(lucro['lucro_bruto'])),
+        ("Despesas", moeda(lucro['despesas'])),
+        ("Lucro líquido", moeda(lucro['lucro_liquido']))
+    ])
+
+    relatorio.secao("Receita e lucro por mês")
+    desenhar_resumo_mensal(relatorio, db.get_vendas_por_mes(data_inicio, data_fim))
+
+    relatorio.secao("Despesas por categoria")
+    categorias = db.get_despesas_por_categoria(data_inicio, data_fim)
+    relatorio.tabela(
+        COLUNAS_DESPESAS_CATEGORIA,
+        ([c['categoria'][:45], str(c['quantidade']), moeda(c['total'])] for c in categorias),
+        cor='#d62728',
+        linha_total=['TOTAL', '', moeda(lucro['despesas'])]
+    )
+
+    relatorio.secao(f"Top {LIMITE_PRODUTOS_RESUMO} produtos por receita")
+    desenhar_ranking_produtos(relatorio, db.get_vendas_por_produto(data_inicio, data_fim, LIMITE_PRODUTOS_RESUMO))
+
+    despesas = db.listar_despesas(data_inicio, data_fim)
+    if despesas:
+        relatorio.secao("Lançamentos de despesas")
+        valores = Formatador.formatar_moeda_lote([d['valor'] for d in despesas])
+        datas = Formatador.formatar_data_lote([d['data_despesa'] for d in despesas], formato_entrada="%Y-%m-%d")
+        relatorio.tabela(
+            COLUNAS_DESPESAS,
+            ([data, d['descricao'][:40], (d['categoria'] or '-')[:22], valor]
+             for d, data, valor in zip(despesas, datas, valores)),
+            cor='#d62728'
+        )
+
+    relatorio.salvar()
+    return relatorio.pagina
+
+
+# ==================== GERAÇÃO EM PARALELO ====================
+
+GERADORES = {
+    'vendas': gerar_relatorio_vendas,
+    'financeiro': gerar_relatorio_financeiro
+}
+
+
+def _executar_tarefa(tarefa: Dict) -> Dict:
+    """Executada no processo filho: abre o próprio Database e gera um relatório"""
+    db = Database(tarefa['db_name'])
+    paginas = GERADORES[tarefa['tipo']](
+        db, tarefa['arquivo'], tarefa.get('data_inicio'), tarefa.get('data_fim'), tarefa.get('periodo', "")
+    )
+    return {'arquivo': tarefa['arquivo'], 'paginas': paginas}
+
+
+def gerar_relatorios_paralelo(tarefas: List[Dict], max_processos: int = None) -> List[Dict]:
+    """
+    Gera vários relatórios ao mesmo tempo em um pool de processos
+    Cada tarefa: {'tipo': 'vendas'|'financeiro', 'db_name', 'arquivo', 'data_inicio', 'data_fim', 'periodo'}
+    Retorna, na mesma ordem, {'arquivo', 'paginas'} de cada relatório
+    """
+    if len(tarefas) <= 1:
+        return [_executar_tarefa(t) for t in tarefas]
+
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        return list(executor.map(_executar_tarefa, tarefas))
@@ -10,7 +10,19 @@ from datetime import datetime
 from database import Database
 from analytics import Analytics
 from utils import Formatador, Periodo
+from series_temporais import largura_grafico, reduzir_linha, reduzir_serie, posicoes_rotulos
 from tkinter import messagebox
+import threading
+
+ABA_ABC = "🎯 Análise ABC"
+ABA_EVOLUCAO = "📈 Evolução"
+ABA_SAZONALIDADE = "📅 Sazonalidade"
+ABA_PREVISAO = "🔮 Previsões"
+ABA_ALERTAS = "⚠️ Alertas"
+ABA_METAS = "🎯 Metas"
+ABA_CLIENTES = "👥 Clientes"
+
+ORDEM_ABAS = [ABA_ABC, ABA_CLIENTES, ABA_EVOLUCAO, ABA_SAZONALIDADE, ABA_PREVISAO, ABA_ALERTAS, ABA_METAS]
 
 class RelatoriosAvancados(ctk.CTkFrame):
     def __init__(self, parent, db: Database):
@@ -19,6 +31,39 @@ class RelatoriosAvancados(ctk.CTkFrame):
         self.analytics = Analytics(db)
         self.configure(fg_color="transparent")
         
+        # Abas são construídas e calculadas apenas quando selecionadas
+        self.abas_criadas = set()
+        self.versao_aba = {}
+        self.cache_abas = {}
+        self.calculos_pendentes = {}
+        self.criadores = {
+            ABA_ABC: self.criar_aba_abc,
+            ABA_CLIENTES: self.criar_aba_clientes,
+            ABA_EVOLUCAO: self.criar_aba_evolucao,
+            ABA_SAZONALIDADE: self.criar_aba_sazonalidade,
+            ABA_PREVISAO: self.criar_aba_previsao,
+            ABA_ALERTAS: self.criar_aba_alertas,
+            ABA_METAS: self.criar_aba_metas
+        }
+        self.atualizadores = {
+            ABA_ABC: self.atualizar_abc,
+            ABA_CLIENTES: self.atualizar_clientes,
+            ABA_EVOLUCAO: self.atualizar_evolucao,
+            ABA_SAZONALIDADE: self.atualizar_sazonalidade,
+            ABA_PREVISAO: self.atualizar_previsoes,
+            ABA_ALERTAS: self.atualizar_alertas,
+            ABA_METAS: self.atualizar_metas
+        }
+        self.calculos = {
+            ABA_ABC: self.calcular_abc,
+            ABA_CLIENTES: self.calcular_clientes,
+            ABA_EVOLUCAO: self.calcular_evolucao,
+            ABA_SAZONALIDADE: self.calcular_sazonalidade,
+            ABA_PREVISAO: self.calcular_previsoes,
+            ABA_ALERTAS: self.calcular_alertas,
+            ABA_METAS: self.calcular_metas
+        }
+        
         # Container principal com tabs
         self.scroll_frame = ctk.CTkScrollableFrame(self, fg_color="transparent")
         self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -32,24 +77,90 @@ class RelatoriosAvancados(ctk.CTkFrame):
         titulo.pack(pady=(0, 20))
         
         # Tabs
-        self.tabview = ctk.CTkTabview(self.scroll_frame, height=750)
+        self.tabview = ctk.CTkTabview(self.scroll_frame, height=750, command=self.ao_trocar_aba)
         self.tabview.pack(fill="both", expand=True)
         
-        # Criar abas
-        self.tab_abc = self.tabview.add("🎯 Análise ABC")
-        self.tab_evolucao = self.tabview.add("📈 Evolução")
-        self.tab_sazonalidade = self.tabview.add("📅 Sazonalidade")
-        self.tab_previsao = self.tabview.add("🔮 Previsões")
-        self.tab_alertas = self.tabview.add("⚠️ Alertas")
-        self.tab_metas = self.tabview.add("🎯 Metas")
-        
-        # Carregar conteúdo das abas
-        self.criar_aba_abc()
-        self.criar_aba_evolucao()
-        self.criar_aba_sazonalidade()
-        self.criar_aba_previsao()
-        self.criar_aba_alertas()
-        self.criar_aba_metas()
+        # Criar abas (apenas os containers; o conteúdo é montado sob demanda)
+        self.tab_abc = self.tabview.add(ABA_ABC)
+        self.tab_clientes = self.tabview.add(ABA_CLIENTES)
+        self.tab_evolucao = self.tabview.add(ABA_EVOLUCAO)
+        self.tab_sazonalidade = self.tabview.add(ABA_SAZONALIDADE)
+        self.tab_previsao = self.tabview.add(ABA_PREVISAO)
+        self.tab_alertas = self.tabview.add(ABA_ALERTAS)
+        self.tab_metas = self.tabview.add(ABA_METAS)
+        
+        # Carregar somente a aba visível
+        self.ao_trocar_aba()
+    
+    # ==================== CARREGAMENTO SOB DEMANDA ====================
+    
+    def ao_trocar_aba(self):
+        """Materializa a aba selecionada e pré-carrega a próxima em segundo plano"""
+        aba = self.tabview.get()
+        versao = self.db.get_versao_dados()
+        
+        if aba not in self.abas_criadas:
+            self.abas_criadas.add(aba)
+            self.versao_aba[aba] = versao
+            self.criadores[aba]()
+        elif self.versao_aba.get(aba) != versao:
+            # Dados mudaram desde a última exibição
+            self.versao_aba[aba] = versao
+            self.atualizadores[aba]()
+        
+        indice = ORDEM_ABAS.index(aba)
+        if indice + 1 < len(ORDEM_ABAS):
+            self.pre_carregar(ORDEM_ABAS[indice + 1], versao)
+    
+    def parametros_aba(self, aba):
+        """Parâmetros que, junto com a versão dos dados, identificam o resultado de uma aba"""
+        if aba == ABA_EVOLUCAO:
+            if hasattr(self, 'combo_periodo_evolucao'):
+                return (self.combo_periodo_evolucao.get(),)
+            return ("Últimos 30 dias",)
+        if aba == ABA_ABC:
+            if hasattr(self, 'combo_periodo_abc'):
+                return (self.combo_periodo_abc.get(),)
+            return ("Todo o período",)
+        return ()
+    
+    def obter_dados(self, aba):
+        """Retorna o resultado da análise de uma aba, recalculando só se a versão dos dados mudou"""
+        chave = (self.db.get_versao_dados(),) + self.parametros_aba(aba)
+        
+        # Se o pré-carregamento desta aba está em andamento, aguardar em vez de recalcular
+        pendente = self.calculos_pendentes.get(aba)
+        if pendente is not None:
+            pendente.wait()
+        
+        em_cache = self.cache_abas.get(aba)
+        if em_cache and em_cache[0] == chave:
+            return em_cache[1]
+        
+        dados = self.calculos[aba](*chave[1:])
+        self.cache_abas[aba] = (chave, dados)
+        return dados
+    
+    def pre_carregar(self, aba, versao):
+        """Calcula os dados de uma aba em uma thread, sem tocar nos widgets"""
+        chave = (versao,) + self.parametros_aba(aba)
+        em_cache = self.cache_abas.get(aba)
+        if aba in self.calculos_pendentes or (em_cache and em_cache[0] == chave):
+            return
+        
+        evento = threading.Event()
+        self.calculos_pendentes[aba] = evento
+        
+        def calcular():
+            try:
+                self.cache_abas[aba] = (chave, self.calculos[aba](*chave[1:]))
+            except Exception as e:
+                print(f"Erro ao pré-carregar aba {aba}: {e}")
+            finally:
+                self.calculos_pendentes.pop(aba, None)
+                evento.set()
+        
+        threading.Thread(target=calcular, daemon=True).start()
     
     # ==================== ABA ANÁLISE ABC ====================
     
@@ -76,15 +187,33 @@ class RelatoriosAvancados(ctk.CTkFrame):
         )
         label_exp.pack(pady=10, padx=10)
         
+        # Controles
+        frame_controles = ctk.CTkFrame(frame, fg_color="transparent")
+        frame_controles.pack(pady=10)
+        
+        ctk.CTkLabel(
+            frame_controles,
+            text="Período:",
+            font=ctk.CTkFont(size=12, weight="bold")
+        ).pack(side="left", padx=5)
+        
+        self.combo_periodo_abc = ctk.CTkComboBox(
+            frame_controles,
+            values=["Todo o período", "Últimos 30 dias", "Últimos 90 dias", "Este Ano"],
+            width=150
+        )
+        self.combo_periodo_abc.set("Todo o período")
+        self.combo_periodo_abc.pack(side="left", padx=5)
+        
         # Botão atualizar
         btn_atualizar = ctk.CTkButton(
-            frame,
+            frame_controles,
             text="🔄 Atualizar Análise",
             command=self.atualizar_abc,
             fg_color="#2ca02c",
             hover_color="#28a745"
         )
-        btn_atualizar.pack(pady=10)
+        btn_atualizar.pack(side="left", padx=5)
         
         # Frame para gráfico
         self.frame_grafico_abc = ctk.CTkFrame(frame)
@@ -96,6 +225,16 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         self.atualizar_abc()
     
+    def calcular_abc(self, periodo_selecionado):
+        """Calcula a análise ABC do período selecionado"""
+        if "30 dias" in periodo_selecionado:
+            return self.analytics.analise_abc(*Periodo.ultimos_n_dias(30))
+        elif "90 dias" in periodo_selecionado:
+            return self.analytics.analise_abc(*Periodo.ultimos_n_dias(90))
+        elif "Ano" in periodo_selecionado:
+            return self.analytics.analise_abc(Periodo.inicio_ano(), Periodo.fim_ano())
+        return self.analytics.analise_abc()
+    
     def atualizar_abc(self):
         """Atualiza análise ABC"""
         # Limpar
@@ -105,7 +244,7 @@ class RelatoriosAvancados(ctk.CTkFrame):
             widget.destroy()
         
         # Obter dados
-        abc = self.analytics.analise_abc()
+        abc = self.obter_dados(ABA_ABC)
         
         # Gráfico de pizza
         fig = Figure(figsize=(8, 5), dpi=80)
@@ -197,13 +336,8 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         self.atualizar_evolucao()
     
-    def atualizar_evolucao(self):
-        """Atualiza gráficos de evolução"""
-        for widget in self.frame_evolucao_graficos.winfo_children():
-            widget.destroy()
-        
-        # Determinar período
-        periodo_selecionado = self.combo_periodo_evolucao.get()
+    def calcular_evolucao(self, periodo_selecionado):
+        """Agrupa receita e quantidade vendida por dia no período selecionado"""
         if "7 dias" in periodo_selecionado:
             data_inicio, data_fim = Periodo.ultimos_n_dias(7)
         elif "30 dias" in periodo_selecionado:
@@ -217,7 +351,6 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         # Agrupar por data
         vendas_por_data = {}
-        estoque_por_data = {}
         
         for venda in vendas:
             data = venda['data_venda'][:10]
@@ -227,29 +360,50 @@ class RelatoriosAvancados(ctk.CTkFrame):
             vendas_por_data[data]['receita'] += venda['valor_total']
             vendas_por_data[data]['quantidade'] += venda['quantidade']
         
+        return data_inicio, data_fim, vendas_por_data
+    
+    def atualizar_evolucao(self):
+        """Atualiza gráficos de evolução"""
+        for widget in self.frame_evolucao_graficos.winfo_children():
+            widget.destroy()
+        
+        data_inicio, data_fim, vendas_por_data = self.obter_dados(ABA_EVOLUCAO)
+        
         # Criar figura com 2 subplots
         fig = Figure(figsize=(12, 8), dpi=80)
+        largura = largura_grafico(fig, self.frame_evolucao_graficos)
         
-        # Gráfico 1: Receita ao longo do tempo
+        # Gráfico 1: Receita ao longo do tempo (linha reduzida com LTTB)
         ax1 = fig.add_subplot(211)
-        datas = sorted(vendas_por_data.keys())
-        receitas = [vendas_por_data[d]['receita'] for d in datas]
-        datas_formatadas = [Formatador.formatar_data(d + " 00:00:00") for d in datas]
-        
-        ax1.plot(datas_formatadas, receitas, marker='o', linewidth=2, color='#2ca02c', markersize=6)
-        ax1.fill_between(range(len(receitas)), receitas, alpha=0.3, color='#2ca02c')
+        receitas = reduzir_linha({d: v['receita'] for d, v in vendas_por_data.items()}, largura)
+        marcador = 'o' if len(receitas['x']) <= 60 else None
+        
+        ax1.plot(receitas['x'], receitas['valores'], marker=marcador, linewidth=2, color='#2ca02c', markersize=6)
+        ax1.fill_between(receitas['x'], receitas['valores'], alpha=0.3, color='#2ca02c')
+        posicoes = posicoes_rotulos(len(receitas['x']), largura)
+        ax1.set_xticks([receitas['x'][i] for i in posicoes])
+        ax1.set_xticklabels([receitas['rotulos'][i] for i in posicoes])
         ax1.set_title('Evolução da Receita', fontsize=14, weight='bold')
         ax1.set_xlabel('Data', fontsize=10)
         ax1.set_ylabel('Receita (R$)', fontsize=10)
         ax1.grid(True, alpha=0.3)
         ax1.tick_params(axis='x', rotation=45, labelsize=8)
         
-        # Gráfico 2: Quantidade vendida
+        # Gráfico 2: Quantidade vendida (agregada por dia/semana/mês)
         ax2 = fig.add_subplot(212)
-        quantidades = [vendas_por_data[d]['quantidade'] for d in datas]
-        
-        ax2.bar(datas_formatadas, quantidades, color='#1f77b4', alpha=0.7)
-        ax2.set_title('Evolução da Quantidade Vendida', fontsize=14, weight='bold')
+        quantidades = reduzir_serie(
+            {d: v['quantidade'] for d, v in vendas_por_data.items()},
+            largura, data_inicio, data_fim
+        )
+        titulos_granularidade = {'dia': 'por Dia', 'semana': 'por Semana', 'mes': 'por Mês'}
+        posicoes_barras = list(range(len(quantidades['valores'])))
+        
+        ax2.bar(posicoes_barras, quantidades['valores'], color='#1f77b4', alpha=0.7)
+        posicoes = posicoes_rotulos(len(posicoes_barras), largura)
+        ax2.set_xticks(posicoes)
+        ax2.set_xticklabels([quantidades['rotulos'][i] for i in posicoes])
+        ax2.set_title(f"Evolução da Quantidade Vendida {titulos_granularidade[quantidades['granularidade']]}",
+                      fontsize=14, weight='bold')
         ax2.set_xlabel('Data', fontsize=10)
         ax2.set_ylabel('Quantidade', fontsize=10)
         ax2.grid(True, alpha=0.3, axis='y')
@@ -283,12 +437,16 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         self.atualizar_sazonalidade()
     
+    def calcular_sazonalidade(self):
+        """Calcula a análise de sazonalidade"""
+        return self.analytics.analise_sazonalidade()
+    
     def atualizar_sazonalidade(self):
         """Atualiza gráficos de sazonalidade"""
         for widget in self.frame_sazonalidade.winfo_children():
             widget.destroy()
         
-        dados = self.analytics.analise_sazonalidade()
+        dados = self.obter_dados(ABA_SAZONALIDADE)
         
         if not dados:
             ctk.CTkLabel(
@@ -335,6 +493,133 @@ class RelatoriosAvancados(ctk.CTkFrame):
         canvas.get_tk_widget().pack(fill="both", expand=True)
         canvas.draw()
     
+    # ==================== ABA CLIENTES ====================
+    
+    def criar_aba_clientes(self):
+        """Cria aba de clientes (segmentos RFM e coortes)"""
+        frame = ctk.CTkFrame(self.tab_clientes)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Botão atualizar
+        btn_atualizar = ctk.CTkButton(
+            frame,
+            text="🔄 Atualizar Clientes",
+            command=self.atualizar_clientes,
+            fg_color="#2ca02c",
+            hover_color="#28a745"
+        )
+        btn_atualizar.pack(pady=10)
+        
+        # Frame para conteúdo
+        self.frame_clientes = ctk.CTkScrollableFrame(frame, height=650)
+        self.frame_clientes.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.atualizar_clientes()
+    
+    def calcular_clientes(self):
+        """Calcula a segmentação RFM e as coortes"""
+        return self.analytics.analise_rfm(), self.analytics.coortes_clientes()
+    
+    def atualizar_clientes(self):
+        """Atualiza segmentos RFM e matriz de coortes"""
+        for widget in self.frame_clientes.winfo_children():
+            widget.destroy()
+        
+        rfm, coortes = self.obter_dados(ABA_CLIENTES)
+        
+        if not rfm['total_clientes']:
+            ctk.CTkLabel(
+                self.frame_clientes,
+                text="Nenhuma venda com cliente informado",
+                font=ctk.CTkFont(size=14)
+            ).pack(pady=50)
+            return
+        
+        # 1. Segmentos RFM
+        frame_rfm = ctk.CTkFrame(self.frame_clientes)
+        frame_rfm.pack(fill="x", pady=10, padx=5)
+        
+        ctk.CTkLabel(
+            frame_rfm,
+            text=f"👥 Segmentos RFM ({rfm['total_clientes']} clientes)",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(pady=10)
+        
+        frame_header = ctk.CTkFrame(frame_rfm, fg_color="#1f77b4")
+        frame_header.pack(fill="x", padx=10, pady=5)
+        for h in ["Segmento", "Clientes", "Receita", "% Receita", "Recência Média", "Compras Média"]:
+            ctk.CTkLabel(
+                frame_header,
+                text=h,
+                font=ctk.CTkFont(size=11, weight="bold"),
+                width=120
+            ).pack(side="left", padx=5, pady=5)
+        
+        for nome, segmento in rfm['segmentos'].items():
+            frame_item = ctk.CTkFrame(frame_rfm)
+            frame_item.pack(fill="x", padx=10, pady=2)
+            
+            ctk.CTkLabel(frame_item, text=nome, width=120, font=ctk.CTkFont(weight="bold")).pack(side="left", padx=5)
+            ctk.CTkLabel(frame_item, text=str(segmento['clientes']), width=120).pack(side="left", padx=5)
+            ctk.CTkLabel(frame_item, text=Formatador.formatar_moeda(segmento['receita']), width=120).pack(side="left", padx=5)
+            ctk.CTkLabel(frame_item, text=f"{segmento['participacao']:.1f}%", width=120).pack(side="left", padx=5)
+            ctk.CTkLabel(frame_item, text=f"{segmento['recencia_media']:.0f} dias", width=120).pack(side="left", padx=5)
+            ctk.CTkLabel(frame_item, text=f"{segmento['compras_media']:.1f}", width=120).pack(side="left", padx=5)
+        
+        # 2. Retenção por coorte (% dos clientes da coorte que compraram em cada mês)
+        frame_coortes = ctk.CTkFrame(self.frame_clientes)
+        frame_coortes.pack(fill="x", pady=10, padx=5)
+        
+        ctk.CTkLabel(
+            frame_coortes,
+            text="📅 Retenção por Coorte (mês da primeira compra)",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(pady=10)
+        
+        grade = ctk.CTkFrame(frame_coortes, fg_color="transparent")
+        grade.pack(padx=10, pady=5)
+        cabecalho = ["Coorte", "Clientes"] + [f"M{i}" for i in range(len(coortes['coortes']))]
+        for coluna, h in enumerate(cabecalho):
+            ctk.CTkLabel(grade, text=h, font=ctk.CTkFont(size=11, weight="bold"),
+                         width=70 if coluna < 2 else 48).grid(row=0, column=coluna, padx=1, pady=1)
+        
+        for linha, (nome, tamanho, retencao) in enumerate(
+                zip(coortes['coortes'], coortes['tamanho'], coortes['retencao']), start=1):
+            ctk.CTkLabel(grade, text=nome, width=70).grid(row=linha, column=0, padx=1, pady=1)
+            ctk.CTkLabel(grade, text=str(tamanho), width=70).grid(row=linha, column=1, padx=1, pady=1)
+            for coluna, valor in enumerate(retencao, start=2):
+                if valor is None or not tamanho:
+                    continue
+                # Verde mais forte para retenção maior
+                intensidade = int(230 - min(valor, 100) * 1.6)
+                ctk.CTkLabel(
+                    grade,
+                    text=f"{valor:.0f}%",
+                    width=48,
+                    fg_color=f"#{intensidade:02x}{200:02x}{intensidade:02x}",
+                    text_color="black",
+                    corner_radius=4
+                ).grid(row=linha, column=coluna, padx=1, pady=1)
+        
+        # 3. Melhores clientes
+        frame_top = ctk.CTkFrame(self.frame_clientes)
+        frame_top.pack(fill="x", pady=10, padx=5)
+        
+        ctk.CTkLabel(
+            frame_top,
+            text="🏆 Top 10 Clientes",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(pady=10)
+        
+        for cliente in rfm['clientes'][:10]:
+            ctk.CTkLabel(
+                frame_top,
+                text=(f"{cliente['nome']} • {cliente['segmento']} (RFM {cliente['rfm']}) • "
+                      f"{cliente['compras']} compras • {Formatador.formatar_moeda(cliente['valor_total'])} • "
+                      f"última há {cliente['recencia']} dias"),
+                font=ctk.CTkFont(size=12)
+            ).pack(anchor="w", padx=20, pady=2)
+    
     # ==================== ABA PREVISÕES ====================
     
     def criar_aba_previsao(self):
@@ -358,13 +643,18 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         self.atualizar_previsoes()
     
+    def calcular_previsoes(self):
+        """Calcula previsão de vendas e de reposição"""
+        return self.analytics.previsao_vendas(30), self.analytics.previsao_reposicao()
+    
     def atualizar_previsoes(self):
         """Atualiza previsões"""
         for widget in self.frame_previsoes.winfo_children():
             widget.destroy()
         
+        previsao, reposicoes = self.obter_dados(ABA_PREVISAO)
+        
         # 1. Previsão de vendas
-        previsao = self.analytics.previsao_vendas(30)
         
         frame_prev_vendas = ctk.CTkFrame(self.frame_previsoes)
         frame_prev_vendas.pack(fill="x", pady=10, padx=5)
@@ -407,9 +697,17 @@ class RelatoriosAvancados(ctk.CTkFrame):
             "#9467bd"
         ).pack(side="left", expand=True, fill="x", padx=5)
         
-        # 2. Previsão de reposição
-        reposicoes = self.analytics.previsao_reposicao(60)
+        if previsao.get('modelo'):
+            ctk.CTkLabel(
+                frame_prev_vendas,
+                text=(f"Modelo: {previsao['modelo']} • Receita entre "
+                      f"{Formatador.formatar_moeda(previsao.get('receita_minima', 0))} e "
+                      f"{Formatador.formatar_moeda(previsao.get('receita_maxima', 0))} (95%)"),
+                font=ctk.CTkFont(size=12),
+                text_color="gray"
+            ).pack(pady=(0, 10))
         
+        # 2. Previsão de reposição
         frame_repos = ctk.CTkFrame(self.frame_previsoes)
         frame_repos.pack(fill="x", pady=10, padx=5)
         
@@ -420,6 +718,15 @@ class RelatoriosAvancados(ctk.CTkFrame):
         ).pack(pady=10)
         
         if reposicoes:
+            ctk.CTkLabel(
+                frame_repos,
+                text=(f"Plano gerado em {Formatador.formatar_data_hora(reposicoes[0]['gerado_em'])} • "
+                      f"prazo de entrega {reposicoes[0]['prazo_entrega']} dias • "
+                      f"cobertura {reposicoes[0]['dias_cobertura']} dias"),
+                font=ctk.CTkFont(size=12),
+                text_color="gray"
+            ).pack(pady=(0, 5))
+            
             # Cabeçalho
             frame_header = ctk.CTkFrame(frame_repos, fg_color="#1f77b4")
             frame_header.pack(fill="x", padx=10, pady=5)
@@ -500,12 +807,16 @@ class RelatoriosAvancados(ctk.CTkFrame):
         
         self.atualizar_alertas()
     
+    def calcular_alertas(self):
+        """Gera os alertas inteligentes"""
+        return self.analytics.gerar_alertas_inteligentes()
+    
     def atualizar_alertas(self):
         """Atualiza alertas inteligentes"""
         for widget in self.frame_alertas.winfo_children():
             widget.destroy()
         
-        alertas = self.analytics.gerar_alertas_inteligentes()
+        alertas = self.obter_dados(ABA_ALERTAS)
         
         if not alertas:
             ctk.CTkLabel(
@@ -551,6 +862,22 @@ class RelatoriosAvancados(ctk.CTkFrame):
                 font=ctk.CTkFont(size=11, weight="bold"),
                 text_color="#d4edda"
             ).pack(anchor="w", pady=(2, 0))
+            
+            # Anomalias gravadas podem ser marcadas como lidas
+            if 'id' in alerta:
+                ctk.CTkButton(
+                    frame_conteudo,
+                    text="✓ Marcar como lido",
+                    width=140,
+                    fg_color="transparent",
+                    border_width=1,
+                    command=lambda alerta_id=alerta['id']: self.marcar_alerta_lido(alerta_id)
+                ).pack(anchor="e", pady=(5, 0))
+    
+    def marcar_alerta_lido(self, alerta_id: int):
+        """Marca uma anomalia como lida e atualiza a lista"""
+        self.db.marcar_alertas_lidos([alerta_id])
+        self.atualizar_alertas()
     
     # ==================== ABA METAS ====================
     
@@ -657,12 +984,17 @@ class RelatoriosAvancados(ctk.CTkFrame):
             width=120
         ).pack(side="left", padx=5)
     
+    def calcular_metas(self):
+        """Calcula o progresso das metas ativas (todas em uma única consulta)"""
+        progresso = self.db.progresso_metas()
+        return [(dados['meta'], dados) for dados in progresso.values()]
+    
     def atualizar_metas(self):
         """Atualiza lista de metas"""
         for widget in self.frame_metas.winfo_children():
             widget.destroy()
         
-        metas = self.db.listar_metas()
+        metas = self.obter_dados(ABA_METAS)
         
         if not metas:
             ctk.CTkLabel(
@@ -672,9 +1004,7 @@ class RelatoriosAvancados(ctk.CTkFrame):
             ).pack(pady=50)
             return
         
-        for meta in metas:
-            progresso_data = self.db.progresso_meta(meta['id'])
-            
+        for meta, progresso_data in metas:
             if not progresso_data:
                 continue
             
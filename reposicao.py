@@ -0,0 +1,153 @@
+"""
+Planejamento de reposição de estoque
+Prevê a demanda diária de cada produto (previsao.py) e calcula estoque de segurança,
+ponto de pedido e demanda da cobertura. Os produtos são divididos em lotes ajustados em
+processos separados (ProcessPoolExecutor) e o plano é gravado na tabela plano_reposicao,
+que as telas leem sem recalcular
+
+Uso:
+    python reposicao.py [--banco gestao_vendas.db] [--prazo 7] [--cobertura 30] [--processos 4]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+from database import Database
+from previsao import prever, matriz_diaria, multiplicadores_variancia
+
+# Dias entre o pedido e a chegada da mercadoria
+PRAZO_ENTREGA_DIAS = 7
+# Dias de venda que o pedido deve cobrir depois de chegar
+DIAS_COBERTURA = 30
+# z do nível de serviço (95%: probabilidade de não faltar produto durante o prazo de entrega)
+Z_NIVEL_SERVICO = 1.65
+# Dias de histórico usados no ajuste (26 semanas, como as demais previsões)
+DIAS_HISTORICO = 182
+
+# Produtos por lote enviado a um processo; com menos de dois lotes tudo roda no processo atual,
+# pois iniciar os processos custa mais que o ajuste (vetorizado) de alguns milhares de séries
+PRODUTOS_POR_LOTE = 5000
+
+
+def calcular_lote(produtos: List[int], quantidades: np.ndarray, prazo: int,
+                  cobertura: int, z: float) -> List[Tuple]:
+    """
+    Ajusta a demanda de um lote de produtos (linhas de `quantidades`) e calcula, para cada um:
+    demanda no prazo de entrega, estoque de segurança (z × desvio da demanda no prazo),
+    ponto de pedido (demanda no prazo + segurança) e demanda da cobertura
+    Roda em outro processo: recebe e devolve só tipos simples e arrays
+    """
+    resultado = prever(quantidades, prazo + cobertura)
+    previsao = resultado['previsao']
+    demanda_prazo = previsao[:, :prazo].sum(axis=1)
+    demanda_cobertura = previsao[:, prazo:].sum(axis=1)
+    variancia_prazo = (resultado['desvio'] ** 2
+                       * multiplicadores_variancia(resultado['parametros'], prazo).sum(axis=1))
+    seguranca = z * np.sqrt(variancia_prazo)
+    media_historico = quantidades.mean(axis=1)
+    media_prevista = previsao.mean(axis=1)
+
+    return [
+        (produto_id, float(media_historico[i]), float(media_prevista[i]), float(demanda_prazo[i]),
+         float(demanda_cobertura[i]), float(seguranca[i]), float(demanda_prazo[i] + seguranca[i]),
+         str(resultado['modelo'][i]))
+        for i, produto_id in enumerate(produtos)
+    ]
+
+
+def planejar_reposicao(db: Database, prazo: int = PRAZO_ENTREGA_DIAS, cobertura: int = DIAS_COBERTURA,
+                       dias_historico: int = DIAS_HISTORICO, processos: Optional[int] = None,
+                       z: float = Z_NIVEL_SERVICO) -> Dict:
+    """
+    Gera o plano de reposição de todos os produtos com venda no histórico e grava em plano_reposicao
+    processos: número de processos (None = número de CPUs; 1 = tudo no processo atual)
+    Retorna um resumo (produtos, lotes, processos usados e tempo)
+    """
+    inicio_execucao = time.perf_counter()
+    ontem = datetime.now() - timedelta(days=1)
+    inicio = (ontem - timedelta(days=dias_historico - 1)).strftime("%Y-%m-%d")
+    fim = ontem.strftime("%Y-%m-%d")
+
+    linhas = db.get_vendas_por_dia(inicio, fim, por_produto=True)
+    produtos, quantidades = matriz_diaria(linhas, 'produto_id', 'quantidade', inicio, fim)
+
+    lotes = [(produtos[i:i + PRODUTOS_POR_LOTE], quantidades[i:i + PRODUTOS_POR_LOTE])
+             for i in range(0, len(produtos), PRODUTOS_POR_LOTE)]
+    processos = min(processos or os.cpu_count() or 1, len(lotes))
+
+    plano = []
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(calcular_lote, ids, matriz, prazo, cobertura, z)
+                       for ids, matriz in lotes]
+            for futuro in futuros:
+                plano.extend(futuro.result())
+    else:
+        for ids, matriz in lotes:
+            plano.extend(calcular_lote(ids, matriz, prazo, cobertura, z))
+
+    db.salvar_plano_reposicao(plano, prazo, cobertura)
+    return {
+        'produtos': len(plano),
+        'lotes': len(lotes),
+        'processos': max(processos, 1),
+        'duracao_ms': (time.perf_counter() - inicio_execucao) * 1000
+    }
+
+
+def situacao_reposicao(item: Dict, hoje: datetime = None) -> Dict:
+    """
+    Completa um item de listar_plano_reposicao com os valores que dependem do estoque atual:
+    dias até acabar, data do pedido (quando o estoque chega ao ponto de pedido),
+    quantidade sugerida (até o estoque máximo: ponto de pedido + cobertura) e urgência
+    """
+    hoje = hoje or datetime.now()
+    estoque = item['estoque_atual']
+    media = item['media_diaria_prevista']
+    estoque_maximo = item['ponto_pedido'] + item['demanda_cobertura']
+
+    if media > 0:
+        dias_restantes = estoque / media
+        dias_ate_pedido = max((estoque - item['ponto_pedido']) / media, 0)
+    else:
+        dias_restantes = dias_ate_pedido = float('inf')
+
+    if estoque <= item['demanda_prazo']:
+        urgencia = 'ALTA'  # acaba antes de um pedido feito hoje chegar
+    elif estoque <= item['ponto_pedido']:
+        urgencia = 'MÉDIA'
+    else:
+        urgencia = 'BAIXA'
+
+    return dict(
+        item,
+        media_diaria=round(item['media_diaria'], 2),
+        dias_restantes=int(min(dias_restantes, 9999)),
+        data_reposicao=(hoje + timedelta(days=min(dias_ate_pedido, 9999))).strftime("%Y-%m-%d"),
+        qtd_sugerida=max(math.ceil(estoque_maximo - estoque), 0),
+        urgencia=urgencia
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o plano de reposição de estoque")
+    parser.add_argument('--banco', default="gestao_vendas.db", help="Arquivo do banco de dados")
+    parser.add_argument('--prazo', type=int, default=PRAZO_ENTREGA_DIAS, help="Prazo de entrega (dias)")
+    parser.add_argument('--cobertura', type=int, default=DIAS_COBERTURA, help="Dias cobertos pelo pedido")
+    parser.add_argument('--processos', type=int, default=None, help="Processos (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    resumo = planejar_reposicao(Database(args.banco), args.prazo, args.cobertura, processos=args.processos)
+    print(f"✅ Plano gerado para {resumo['produtos']} produtos "
+          f"({resumo['lotes']} lotes, {resumo['processos']} processos) em {resumo['duracao_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
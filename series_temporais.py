@@ -0,0 +1,182 @@
+"""
+Módulo de séries temporais para gráficos
+Agregação por dia/semana/mês e redução LTTB de acordo com a largura disponível
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+import math
+
+# Espaço mínimo (em pixels) reservado para cada ponto/barra e para cada rótulo do eixo X
+PIXELS_POR_PONTO = 12
+PIXELS_POR_ROTULO = 70
+
+LARGURA_PADRAO = 800
+
+
+def largura_grafico(figura, widget=None) -> int:
+    """Retorna a largura em pixels de um gráfico matplotlib (canvas/frame ou figura)"""
+    if widget is not None:
+        if hasattr(widget, 'get_tk_widget'):
+            widget = widget.get_tk_widget()
+        try:
+            largura = widget.winfo_width()
+            if largura > 1:
+                return largura
+        except Exception:
+            pass
+    try:
+        return int(figura.get_figwidth() * figura.dpi)
+    except Exception:
+        return LARGURA_PADRAO
+
+
+def max_pontos(largura_px: int) -> int:
+    """Quantidade máxima de pontos legíveis para a largura informada"""
+    return max(2, int(largura_px) // PIXELS_POR_PONTO)
+
+
+def escolher_granularidade(num_dias: int, largura_px: int) -> str:
+    """Escolhe o tamanho do balde (dia, semana ou mês) que cabe na largura"""
+    limite = max_pontos(largura_px)
+    if num_dias <= limite:
+        return 'dia'
+    if math.ceil(num_dias / 7) <= limite:
+        return 'semana'
+    return 'mes'
+
+
+def chave_periodo(data: str, granularidade: str) -> str:
+    """Converte uma data (AAAA-MM-DD...) na chave do balde correspondente"""
+    data = data[:10]
+    if granularidade == 'mes':
+        return data[:7] + '-01'
+    if granularidade == 'semana':
+        dia = date.fromisoformat(data)
+        return (dia - timedelta(days=dia.weekday())).isoformat()
+    return data
+
+
+def rotulo_periodo(chave: str, granularidade: str) -> str:
+    """Rótulo brasileiro do balde, sem passar por strptime/strftime"""
+    if granularidade == 'mes':
+        return f"{chave[5:7]}/{chave[:4]}"
+    return f"{chave[8:10]}/{chave[5:7]}/{chave[:4]}"
+
+
+def dias_no_intervalo(chaves: List[str], data_inicio: str = None, data_fim: str = None) -> int:
+    """Número de dias coberto pela série (ou pelo período, quando informado)"""
+    inicio = data_inicio or (min(chaves) if chaves else None)
+    fim = data_fim or (max(chaves) if chaves else None)
+    if not inicio or not fim:
+        return 0
+    return (date.fromisoformat(fim[:10]) - date.fromisoformat(inicio[:10])).days + 1
+
+
+def agregar_serie(serie: Dict[str, float], granularidade: str) -> Tuple[List[str], List[float]]:
+    """Soma os valores diários no balde escolhido; retorna (chaves, valores) ordenados"""
+    if granularidade == 'dia':
+        chaves = sorted(serie)
+        return chaves, [serie[c] for c in chaves]
+
+    baldes = {}
+    for data, valor in serie.items():
+        chave = chave_periodo(data, granularidade)
+        baldes[chave] = baldes.get(chave, 0) + valor
+
+    chaves = sorted(baldes)
+    return chaves, [baldes[c] for c in chaves]
+
+
+def reduzir_serie(serie: Dict[str, float], largura_px: int,
+                  data_inicio: str = None, data_fim: str = None) -> Dict:
+    """
+    Agrega uma série diária {data: valor} no balde que cabe na largura do gráfico
+    Retorna chaves, rótulos formatados, valores e a granularidade usada
+    """
+    num_dias = dias_no_intervalo(list(serie), data_inicio, data_fim)
+    granularidade = escolher_granularidade(num_dias, largura_px)
+    chaves, valores = agregar_serie(serie, granularidade)
+
+    return {
+        'granularidade': granularidade,
+        'chaves': chaves,
+        'rotulos': [rotulo_periodo(c, granularidade) for c in chaves],
+        'valores': valores
+    }
+
+
+def posicoes_rotulos(n: int, largura_px: int) -> List[int]:
+    """Índices dos pontos que recebem rótulo no eixo X"""
+    if n <= 0:
+        return []
+    max_rotulos = max(2, int(largura_px) // PIXELS_POR_ROTULO)
+    passo = max(1, math.ceil(n / max_rotulos))
+    return list(range(0, n, passo))
+
+
+def lttb(xs: List[float], ys: List[float], limite: int) -> Tuple[List[float], List[float]]:
+    """
+    Largest-Triangle-Three-Buckets: reduz uma série de linha para `limite` pontos
+    preservando picos e vales (o primeiro e o último ponto são sempre mantidos)
+    """
+    n = len(xs)
+    if limite >= n or limite < 3:
+        return list(xs), list(ys)
+
+    saida_x = [xs[0]]
+    saida_y = [ys[0]]
+    tamanho_balde = (n - 2) / (limite - 2)
+    a = 0
+
+    for i in range(limite - 2):
+        # Média do próximo balde (terceiro vértice do triângulo)
+        inicio_prox = int((i + 1) * tamanho_balde) + 1
+        fim_prox = min(int((i + 2) * tamanho_balde) + 1, n)
+        qtd_prox = fim_prox - inicio_prox
+        media_x = sum(xs[inicio_prox:fim_prox]) / qtd_prox
+        media_y = sum(ys[inicio_prox:fim_prox]) / qtd_prox
+
+        # Ponto do balde atual que forma o maior triângulo
+        inicio = int(i * tamanho_balde) + 1
+        fim = int((i + 1) * tamanho_balde) + 1
+        ax, ay = xs[a], ys[a]
+        maior_area = -1
+        escolhido = inicio
+        for j in range(inicio, fim):
+            area = abs((ax - media_x) * (ys[j] - ay) - (ax - xs[j]) * (media_y - ay))
+            if area > maior_area:
+                maior_area = area
+                escolhido = j
+
+        saida_x.append(xs[escolhido])
+        saida_y.append(ys[escolhido])
+        a = escolhido
+
+    saida_x.append(xs[-1])
+    saida_y.append(ys[-1])
+    return saida_x, saida_y
+
+
+def reduzir_linha(serie: Dict[str, float], largura_px: int) -> Dict:
+    """
+    Reduz uma série diária {data: valor} para gráficos de linha com LTTB
+    O eixo X usa o deslocamento em dias a partir da primeira data, para que
+    plot e fill_between compartilhem as mesmas coordenadas
+    """
+    chaves = sorted(serie)
+    if not chaves:
+        return {'datas': [], 'x': [], 'valores': [], 'rotulos': []}
+
+    origem = date.fromisoformat(chaves[0][:10])
+    xs = [(date.fromisoformat(c[:10]) - origem).days for c in chaves]
+    ys = [serie[c] for c in chaves]
+    xs, ys = lttb(xs, ys, max_pontos(largura_px))
+    datas = [(origem + timedelta(days=x)).isoformat() for x in xs]
+
+    return {
+        'datas': datas,
+        'x': xs,
+        'valores': ys,
+        'rotulos': [rotulo_periodo(d, 'dia') for d in datas]
+    }
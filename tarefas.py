@@ -0,0 +1,130 @@
+"""
+Fila de tarefas em segundo plano para exportações
+Gera os arquivos fora da thread do script (Streamlit), acompanha o progresso e
+reaproveita o arquivo gerado enquanto relatório, parâmetros e versão dos dados forem os mesmos
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+import os
+import tempfile
+import threading
+import time
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+# Quantos arquivos prontos ficam guardados (os mais antigos são apagados)
+LIMITE_ARTEFATOS = 20
+
+
+class Tarefa:
+    """Estado de uma exportação: status, progresso (0 a 1) e arquivo gerado"""
+
+    def __init__(self, chave: Tuple, nome_arquivo: str, mime: str, caminho: str):
+        self.chave = chave
+        self.nome_arquivo = nome_arquivo
+        self.mime = mime
+        self.caminho = caminho
+        self.status = PENDENTE
+        self.progresso = 0.0
+        self.erro = None
+        self.criada_em = time.time()
+        self.concluida_em = None
+
+    @property
+    def ativa(self) -> bool:
+        return self.status in (PENDENTE, EXECUTANDO)
+
+    @property
+    def pronta(self) -> bool:
+        return self.status == CONCLUIDO and os.path.exists(self.caminho)
+
+    def atualizar_progresso(self, fracao: float):
+        self.progresso = max(0.0, min(1.0, fracao))
+
+
+class FilaExportacao:
+    """
+    Fila de exportações executadas em um pool de threads
+    Cada tarefa é identificada por (relatório, parâmetros, versão dos dados)
+    """
+
+    def __init__(self, pasta: str = None, max_threads: int = 2):
+        self.pasta = pasta or os.path.join(tempfile.gettempdir(), 'dgtech_exportacoes')
+        os.makedirs(self.pasta, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='exportacao')
+        self.tarefas: Dict[Tuple, Tarefa] = {}
+        self.lock = threading.Lock()
+
+    def enviar(self, relatorio: str, parametros: Tuple, versao: int, nome_arquivo: str,
+               mime: str, gerar: Callable[[str, Callable[[float], None]], None]) -> Tarefa:
+        """
+        Agenda uma exportação; se a mesma já existe (pronta ou em andamento), devolve a existente
+        `gerar(caminho, progresso)` escreve o arquivo e informa o progresso entre 0 e 1
+        """
+        chave = (relatorio, tuple(parametros), versao)
+
+        with self.lock:
+            tarefa = self.tarefas.get(chave)
+            if tarefa and (tarefa.ativa or tarefa.pronta):
+                return tarefa
+
+            extensao = os.path.splitext(nome_arquivo)[1]
+            caminho = os.path.join(self.pasta, f"{relatorio}_{abs(hash(chave)):x}{extensao}")
+            tarefa = Tarefa(chave, nome_arquivo, mime, caminho)
+            self.tarefas[chave] = tarefa
+
+        self.executor.submit(self._executar, tarefa, gerar)
+        return tarefa
+
+    def obter(self, chave: Tuple) -> Optional[Tarefa]:
+        return self.tarefas.get(chave)
+
+    def _executar(self, tarefa: Tarefa, gerar: Callable):
+        tarefa.status = EXECUTANDO
+        pasta, nome = os.path.split(tarefa.caminho)
+        temporario = os.path.join(pasta, 'parcial_' + nome)
+        try:
+            gerar(temporario, tarefa.atualizar_progresso)
+            # O arquivo só aparece com o nome final quando estiver completo
+            os.replace(temporario, tarefa.caminho)
+            tarefa.progresso = 1.0
+            tarefa.concluida_em = time.time()
+            tarefa.status = CONCLUIDO
+        except Exception as e:
+            tarefa.erro = str(e)
+            tarefa.status = ERRO
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        finally:
+            self._limpar_artefatos()
+
+    def _limpar_artefatos(self):
+        """Remove tarefas com erro e os arquivos prontos mais antigos além do limite"""
+        with self.lock:
+            for chave in [c for c, t in self.tarefas.items() if t.status == ERRO and time.time() - t.criada_em > 300]:
+                del self.tarefas[chave]
+
+            prontas = sorted(
+                (t for t in self.tarefas.values() if t.status == CONCLUIDO),
+                key=lambda t: t.concluida_em
+            )
+            for tarefa in prontas[:-LIMITE_ARTEFATOS]:
+                del self.tarefas[tarefa.chave]
+                if os.path.exists(tarefa.caminho):
+                    os.remove(tarefa.caminho)
+
+
+def com_progresso(linhas: Iterable, total: int, progresso: Callable[[float], None],
+                  intervalo: int = 500) -> Iterator:
+    """Repassa as linhas de um iterador informando o progresso a cada `intervalo` linhas"""
+    if not total:
+        yield from linhas
+        return
+    for indice, linha in enumerate(linhas, 1):
+        if indice % intervalo == 0:
+            progresso(indice / total)
+        yield linha
@@ -4,16 +4,41 @@ Funções auxiliares para formatação, validação e exportação
 """
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Dict
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+import re
+
+# Troca "," por "." e "." por "," em uma única passada (1,234.56 -> 1.234,56)
+_TABELA_MOEDA = str.maketrans(",.", ".,")
+
+# Formato gravado no banco; conversões para o padrão brasileiro são feitas por fatiamento
+_FORMATO_BANCO = "%Y-%m-%d %H:%M:%S"
+_RE_DATA_BANCO = re.compile(r"\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01]) ([01]\d|2[0-3]):[0-5]\d:[0-5]\d")
+_FATIADORES_DATA = {
+    "%d/%m/%Y": lambda d: f"{d[8:10]}/{d[5:7]}/{d[:4]}",
+    "%d/%m/%Y %H:%M": lambda d: f"{d[8:10]}/{d[5:7]}/{d[:4]} {d[11:16]}",
+}
+
+@lru_cache(maxsize=4096)
+def _converter_data(data_str: str, formato_entrada: str, formato_saida: str) -> str:
+    """Converte uma data entre formatos (memoizado: datas repetidas não são reprocessadas)"""
+    try:
+        return datetime.strptime(data_str, formato_entrada).strftime(formato_saida)
+    except (ValueError, TypeError):
+        return data_str
+
+def _valores_lista(valores) -> list:
+    """Converte lista, tupla, array numpy ou Series pandas em lista Python"""
+    if hasattr(valores, 'tolist'):
+        return valores.tolist()
+    return list(valores)
+
+def _mesmo_tipo(original, resultado: list):
+    """Devolve uma Series com o mesmo índice quando a entrada é uma Series"""
+    if hasattr(original, 'index') and hasattr(original, 'to_numpy'):
+        return type(original)(resultado, index=original.index, dtype=object)
+    return resultado
 
 class Formatador:
     """Classe para formatação de dados"""
@@ -21,20 +46,75 @@ class Formatador:
     @staticmethod
     def formatar_moeda(valor: float) -> str:
         """Formata valor para moeda brasileira"""
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return f"R$ {valor:,.2f}".translate(_TABELA_MOEDA)
     
     @staticmethod
     def formatar_data(data_str: str, formato_entrada: str = "%Y-%m-%d %H:%M:%S",
                      formato_saida: str = "%d/%m/%Y") -> str:
         """Formata data para o padrão brasileiro"""
+        if not data_str:
+            return ""
         try:
-            if not data_str:
-                return ""
-            data = datetime.strptime(data_str, formato_entrada)
-            return data.strftime(formato_saida)
-        except:
+            return _converter_data(data_str, formato_entrada, formato_saida)
+        except TypeError:
+            # Valor não hashable (ex.: lista) - mantém o comportamento de devolver a entrada
             return data_str
     
+    @staticmethod
+    def formatar_moeda_lote(valores):
+        """
+        Formata uma coluna inteira de valores como moeda brasileira
+        Aceita lista, array numpy ou Series pandas; valores nulos viram ""
+        """
+        lista = _valores_lista(valores)
+        if not lista:
+            return _mesmo_tipo(valores, [])
+        
+        nulos = [i for i, v in enumerate(lista) if v is None or v != v]
+        if nulos:
+            lista = [0 if v is None or v != v else v for v in lista]
+        
+        # Uma única tradução sobre o texto de todas as linhas
+        texto = "\n".join(map("R$ {:,.2f}".format, lista)).translate(_TABELA_MOEDA)
+        resultado = texto.split("\n")
+        for i in nulos:
+            resultado[i] = ""
+        return _mesmo_tipo(valores, resultado)
+    
+    @staticmethod
+    def formatar_data_lote(valores, formato_entrada: str = "%Y-%m-%d %H:%M:%S",
+                           formato_saida: str = "%d/%m/%Y"):
+        """
+        Formata uma coluna inteira de datas; cada data distinta é convertida uma única vez
+        Aceita lista, array numpy ou Series pandas
+        """
+        convertidas = {}
+        resultado = []
+        fatiador = _FATIADORES_DATA.get(formato_saida) if formato_entrada == _FORMATO_BANCO else None
+        valida = _RE_DATA_BANCO.fullmatch
+        for data_str in _valores_lista(valores):
+            if not data_str or data_str != data_str:  # vazio, None ou NaN
+                resultado.append("")
+                continue
+            if not isinstance(data_str, str):
+                resultado.append(data_str)
+                continue
+            formatada = convertidas.get(data_str)
+            if formatada is None:
+                # Dias 29 a 31 passam pelo strptime (rejeita 31/02, 31/04...), como em formatar_data
+                if fatiador and len(data_str) == 19 and data_str[8:10] <= "28" and valida(data_str):
+                    formatada = fatiador(data_str)
+                else:
+                    formatada = _converter_data(data_str, formato_entrada, formato_saida)
+                convertidas[data_str] = formatada
+            resultado.append(formatada)
+        return _mesmo_tipo(valores, resultado)
+    
+    @staticmethod
+    def formatar_data_hora_lote(valores):
+        """Formata uma coluna inteira de datas com hora"""
+        return Formatador.formatar_data_lote(valores, formato_saida="%d/%m/%Y %H:%M")
+    
     @staticmethod
     def formatar_data_hora(data_str: str) -> str:
         """Formata data e hora"""
@@ -175,283 +255,12 @@ class Periodo:
         inicio = hoje - timedelta(days=n-1)
         return (inicio.strftime("%Y-%m-%d"), hoje.strftime("%Y-%m-%d"))
 
-class ExportadorPDF:
-    """Classe para exportação de relatórios em PDF"""
-    
-    @staticmethod
-    def gerar_relatorio_vendas(vendas: List[Dict], arquivo: str, periodo: str = ""):
-        """Gera relatório de vendas em PDF"""
-        doc = SimpleDocTemplate(arquivo, pagesize=A4)
-        elementos = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1f77b4'),
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        
-        titulo = Paragraph(f"Relatório de Vendas{' - ' + periodo if periodo else ''}", titulo_style)
-        elementos.append(titulo)
-        elementos.append(Spacer(1, 20))
-        
-        # Tabela de vendas
-        if vendas:
-            dados = [['ID', 'Produto', 'Qtd', 'Valor Unit.', 'Total', 'Data']]
-            total_geral = 0
-            
-            for venda in vendas:
-                dados.append([
-                    str(venda['id']),
-                    venda['produto_nome'][:30],
-                    str(venda['quantidade']),
-                    Formatador.formatar_moeda(venda['preco_unitario']),
-                    Formatador.formatar_moeda(venda['valor_total']),
-                    Formatador.formatar_data(venda['data_venda'])
-                ])
-                total_geral += venda['valor_total']
-            
-            # Linha de total
-            dados.append(['', '', '', 'TOTAL:', Formatador.formatar_moeda(total_geral), ''])
-            
-            tabela = Table(dados, colWidths=[0.6*inch, 2.5*inch, 0.7*inch, 1.2*inch, 1.2*inch, 1.2*inch])
-            tabela.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e8e8e8')),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elementos.append(tabela)
-        else:
-            texto = Paragraph("Nenhuma venda registrada no período.", styles['Normal'])
-            elementos.append(texto)
-        
-        doc.build(elementos)
-    
-    @staticmethod
-    def gerar_relatorio_produtos(produtos: List[Dict], arquivo: str):
-        """Gera relatório de produtos em PDF"""
-        doc = SimpleDocTemplate(arquivo, pagesize=A4)
-        elementos = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph("Relatório de Produtos", styles['Title'])
-        elementos.append(titulo)
-        elementos.append(Spacer(1, 20))
-        
-        if produtos:
-            dados = [['ID', 'Nome', 'Categoria', 'Estoque', 'P. Custo', 'P. Venda', 'Margem']]
-            
-            for produto in produtos:
-                margem = Formatador.calcular_margem(produto['preco_venda'], produto['preco_custo'])
-                dados.append([
-                    str(produto['id']),
-                    produto['nome'][:25],
-                    produto.get('categoria_nome', 'S/Cat')[:15],
-                    str(produto['estoque']),
-                    Formatador.formatar_moeda(produto['preco_custo']),
-                    Formatador.formatar_moeda(produto['preco_venda']),
-                    Formatador.formatar_porcentagem(margem)
-                ])
-            
-            tabela = Table(dados, colWidths=[0.5*inch, 2*inch, 1.3*inch, 0.8*inch, 1*inch, 1*inch, 0.8*inch])
-            tabela.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ca02c')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elementos.append(tabela)
-        else:
-            texto = Paragraph("Nenhum produto cadastrado.", styles['Normal'])
-            elementos.append(texto)
-        
-        doc.build(elementos)
-    
-    @staticmethod
-    def gerar_relatorio_financeiro(dados_financeiros: Dict, arquivo: str, periodo: str = ""):
-        """Gera relatório financeiro em PDF"""
-        doc = SimpleDocTemplate(arquivo, pagesize=A4)
-        elementos = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph(f"Relatório Financeiro{' - ' + periodo if periodo else ''}", styles['Title'])
-        elementos.append(titulo)
-        elementos.append(Spacer(1, 30))
-        
-        # Resumo financeiro
-        dados_tabela = [
-            ['Descrição', 'Valor'],
-            ['Receita Total', Formatador.formatar_moeda(dados_financeiros.get('receita_total', 0))],
-            ['Lucro Bruto', Formatador.formatar_moeda(dados_financeiros.get('lucro_bruto', 0))],
-            ['Despesas', Formatador.formatar_moeda(dados_financeiros.get('despesas', 0))],
-            ['Lucro Líquido', Formatador.formatar_moeda(dados_financeiros.get('lucro_liquido', 0))]
-        ]
-        
-        tabela = Table(dados_tabela, colWidths=[3*inch, 2*inch])
-        tabela.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ff7f0e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#d4edda')),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 14),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elementos.append(tabela)
-        doc.build(elementos)
+# Exportadores ficam em exportadores.py (reportlab, pandas e openpyxl são pesados);
+# continuam acessíveis por utils.ExportadorPDF / utils.ExportadorExcel, carregados no primeiro acesso
+_EXPORTADORES = ('ExportadorPDF', 'ExportadorExcel')
 
-class ExportadorExcel:
-    """Classe para exportação de relatórios em Excel"""
-    
-    @staticmethod
-    def gerar_relatorio_vendas(vendas: List[Dict], arquivo: str):
-        """Gera relatório de vendas em Excel"""
-        df = pd.DataFrame(vendas)
-        
-        if not df.empty:
-            # Formatar colunas
-            colunas_renomear = {
-                'id': 'ID',
-                'produto_nome': 'Produto',
-                'quantidade': 'Quantidade',
-                'preco_unitario': 'Preço Unitário',
-                'valor_total': 'Valor Total',
-                'cliente': 'Cliente',
-                'data_venda': 'Data da Venda'
-            }
-            df = df.rename(columns=colunas_renomear)
-            
-            # Selecionar apenas colunas relevantes
-            colunas_manter = ['ID', 'Produto', 'Quantidade', 'Preço Unitário', 
-                            'Valor Total', 'Cliente', 'Data da Venda']
-            df = df[[col for col in colunas_manter if col in df.columns]]
-        
-        # Salvar em Excel
-        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Vendas', index=False)
-            
-            # Formatar planilha
-            workbook = writer.book
-            worksheet = writer.sheets['Vendas']
-            
-            # Estilo do cabeçalho
-            header_fill = PatternFill(start_color='1f77b4', end_color='1f77b4', fill_type='solid')
-            header_font = Font(bold=True, color='FFFFFF')
-            
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Ajustar largura das colunas
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    @staticmethod
-    def gerar_relatorio_produtos(produtos: List[Dict], arquivo: str):
-        """Gera relatório de produtos em Excel"""
-        df = pd.DataFrame(produtos)
-        
-        if not df.empty:
-            # Adicionar coluna de margem
-            df['margem'] = df.apply(
-                lambda row: Formatador.calcular_margem(row['preco_venda'], row['preco_custo']),
-                axis=1
-            )
-            
-            colunas_renomear = {
-                'id': 'ID',
-                'nome': 'Nome',
-                'categoria_nome': 'Categoria',
-                'preco_custo': 'Preço Custo',
-                'preco_venda': 'Preço Venda',
-                'estoque': 'Estoque',
-                'estoque_minimo': 'Estoque Mínimo',
-                'margem': 'Margem (%)'
-            }
-            df = df.rename(columns=colunas_renomear)
-            
-            colunas_manter = ['ID', 'Nome', 'Categoria', 'Preço Custo', 'Preço Venda',
-                            'Estoque', 'Estoque Mínimo', 'Margem (%)']
-            df = df[[col for col in colunas_manter if col in df.columns]]
-        
-        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Produtos', index=False)
-            
-            workbook = writer.book
-            worksheet = writer.sheets['Produtos']
-            
-            header_fill = PatternFill(start_color='2ca02c', end_color='2ca02c', fill_type='solid')
-            header_font = Font(bold=True, color='FFFFFF')
-            
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-            
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-    
-    @staticmethod
-    def gerar_relatorio_completo(dados: Dict, arquivo: str):
-        """Gera relatório completo com múltiplas abas"""
-        with pd.ExcelWriter(arquivo, engine='openpyxl') as writer:
-            # Aba de vendas
-            if 'vendas' in dados and dados['vendas']:
-                df_vendas = pd.DataFrame(dados['vendas'])
-                df_vendas.to_excel(writer, sheet_name='Vendas', index=False)
-            
-            # Aba de produtos
-            if 'produtos' in dados and dados['produtos']:
-                df_produtos = pd.DataFrame(dados['produtos'])
-                df_produtos.to_excel(writer, sheet_name='Produtos', index=False)
-            
-            # Aba de despesas
-            if 'despesas' in dados and dados['despesas']:
-                df_despesas = pd.DataFrame(dados['despesas'])
-                df_despesas.to_excel(writer, sheet_name='Despesas', index=False)
-            
-            # Aba de resumo
-            if 'resumo' in dados:
-                df_resumo = pd.DataFrame([dados['resumo']])
-                df_resumo.to_excel(writer, sheet_name='Resumo', index=False)
+def __getattr__(nome):
+    if nome in _EXPORTADORES:
+        import exportadores
+        return getattr(exportadores, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
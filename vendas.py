@@ -6,7 +6,7 @@ import customtkinter as ctk
 from tkinter import messagebox
 from datetime import datetime
 from database import Database
-from utils import Formatador, Periodo, ExportadorPDF, ExportadorExcel
+from utils import Formatador, Periodo
 from tkinter import filedialog
 
 class Vendas(ctk.CTkFrame):
@@ -409,11 +409,13 @@ class Vendas(ctk.CTkFrame):
             text=f"Total: {Formatador.formatar_moeda(valor_total)}"
         )
         
-        # Listar vendas
-        for venda in vendas:
-            self.criar_item_venda(venda)
+        # Listar vendas (datas e valores formatados de uma vez)
+        datas = Formatador.formatar_data_hora_lote([v['data_venda'] for v in vendas])
+        totais = Formatador.formatar_moeda_lote([v['valor_total'] for v in vendas])
+        for venda, data_formatada, total_formatado in zip(vendas, datas, totais):
+            self.criar_item_venda(venda, data_formatada, total_formatado)
     
-    def criar_item_venda(self, venda):
+    def criar_item_venda(self, venda, data_formatada=None, total_formatado=None):
         """Cria item de venda na lista"""
         frame = ctk.CTkFrame(self.scroll_vendas)
         frame.pack(fill="x", pady=2)
@@ -422,7 +424,8 @@ class Vendas(ctk.CTkFrame):
         ctk.CTkLabel(frame, text=str(venda['id']), width=50).pack(side="left", padx=5)
         
         # Data/Hora
-        data_formatada = Formatador.formatar_data_hora(venda['data_venda'])
+        if data_formatada is None:
+            data_formatada = Formatador.formatar_data_hora(venda['data_venda'])
         ctk.CTkLabel(frame, text=data_formatada, width=130).pack(side="left", padx=5)
         
         # Produto
@@ -435,7 +438,7 @@ class Vendas(ctk.CTkFrame):
         # Total
         ctk.CTkLabel(
             frame,
-            text=Formatador.formatar_moeda(venda['valor_total']),
+            text=total_formatado or Formatador.formatar_moeda(venda['valor_total']),
             width=100,
             text_color="#2ca02c",
             font=ctk.CTkFont(weight="bold")
@@ -478,9 +481,8 @@ class Vendas(ctk.CTkFrame):
     def exportar_pdf(self):
         """Exporta vendas para PDF"""
         data_inicio, data_fim = self.get_periodo_datas()
-        vendas = self.db.listar_vendas(data_inicio, data_fim)
         
-        if not vendas:
+        if not self.db.get_resumo_vendas(data_inicio, data_fim)['total_vendas']:
             messagebox.showinfo("Atenção", "Nenhuma venda para exportar!")
             return
         
@@ -493,7 +495,8 @@ class Vendas(ctk.CTkFrame):
         if filename:
             try:
                 periodo_texto = self.combo_periodo.get()
-                ExportadorPDF.gerar_relatorio_vendas(vendas, filename, periodo_texto)
+                import relatorio_pdf  # carregado só ao exportar
+                relatorio_pdf.gerar_relatorio_vendas(self.db, filename, data_inicio, data_fim, periodo_texto)
                 messagebox.showinfo("Sucesso", f"Relatório exportado para:\n{filename}")
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
@@ -501,9 +504,8 @@ class Vendas(ctk.CTkFrame):
     def exportar_excel(self):
         """Exporta vendas para Excel"""
         data_inicio, data_fim = self.get_periodo_datas()
-        vendas = self.db.listar_vendas(data_inicio, data_fim)
         
-        if not vendas:
+        if not self.db.get_resumo_vendas(data_inicio, data_fim)['total_vendas']:
             messagebox.showinfo("Atenção", "Nenhuma venda para exportar!")
             return
         
@@ -515,6 +517,9 @@ class Vendas(ctk.CTkFrame):
         
         if filename:
             try:
+                from exportadores import ExportadorExcel  # carregado só ao exportar
+                # Linhas lidas do banco em lotes e gravadas direto na planilha
+                vendas = self.db.iterar_vendas(data_inicio, data_fim)
                 ExportadorExcel.gerar_relatorio_vendas(vendas, filename)
                 messagebox.showinfo("Sucesso", f"Relatório exportado para:\n{filename}")
             except Exception as e: